@@ -1,26 +1,59 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from contextlib import asynccontextmanager
+import logging
+import os
 import re
-import ast
-from typing import Optional
+import time
+import uuid
+from typing import Any, Optional
+from starlette.concurrency import run_in_threadpool
 from word2number import w2n
-from difflib import get_close_matches
 # from functions import check_availability as legacy_check_availability
-from menu_manager import MenuManager
-from speech_pipeline_manager import call_llm
-
-menu = MenuManager("data/enhanced_menu.json")
-app = FastAPI()
-
-# Shared order state
-order_session = {
-    "items": [],
-    "nyu_id": None,
-    "building": None,
-    "phone": None,
-    "dietary": None,
-    "pending_category": None
-
-}
+from menu_snapshot import get_menu, get_menu_store
+from order_store import DEFAULT_SESSION_ID, DEFAULT_TTL, OrderRecord, create_order_store
+from order_journal import DEFAULT_JOURNAL_DIR, JournalError, OrderJournal, get_order_journal
+from tool_call import ToolCall, ToolCallError, parse_call, parse_json_call
+
+logger = logging.getLogger(__name__)
+
+get_menu_store() # Load the menu at import, not on the first tool call
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_menu_store().start_watching() # Hot reload when the menu file changes (e.g. sold-out items)
+    get_journal() # Fail at startup, not on the first confirmation, if another process holds it
+    yield
+    get_menu_store().stop_watching()
+    orders.close()
+    if journal is not None:
+        journal.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Per-session order state (ORDER_STORE=sqlite shares it between several workers)
+ORDER_STORE = os.getenv("ORDER_STORE", "memory")
+orders = create_order_store(
+    backend=ORDER_STORE,
+    path=os.getenv("ORDER_STORE_PATH", "data/orders.sqlite3"),
+    ttl=float(os.getenv("ORDER_TTL", DEFAULT_TTL)),
+)
+
+# Durable log of confirmed orders (ORDER_JOURNAL_FSYNC: always | interval | off)
+# Opened by the serving process, never at import: `python app.py` imports this module
+# twice (as __main__ and in the reload worker), and only one process may hold the journal
+journal: Optional[OrderJournal] = None
+
+def get_journal() -> OrderJournal:
+    global journal
+    if journal is None:
+        # With the shared sqlite store every worker process journals to its own worker-<n> subdirectory
+        journal = get_order_journal(
+            directory=os.getenv("ORDER_JOURNAL_DIR", DEFAULT_JOURNAL_DIR),
+            fsync=os.getenv("ORDER_JOURNAL_FSYNC", "always"),
+            per_worker=ORDER_STORE == "sqlite",
+        )
+    return journal
+JOURNAL_ACK_TIMEOUT = 5.0 # Seconds to wait for the group commit before giving up on a confirmation
 
 VALID_BUILDINGS = {
     "A1A", "A1B", "A1C", "A2A", "A2B", "A2C", "A3", "A4",
@@ -58,28 +91,24 @@ def clarify_category(category: str) -> str:
     if not category:
         return "❌ I didn't catch the category."
 
+    menu = get_menu()
     category = category.lower().rstrip('s')  # normalize plural to singular
-    matched_category = None
-
-    for cat in menu.menu.keys():
-        if category in cat.lower() or cat.lower() in category:
-            matched_category = cat
-            break
+    matched_category = menu.compiled.find_category(category)
 
     if not matched_category:
         return f"❌ Sorry, we don't have anything listed under {category}."
 
-    options = menu.list_flavors(matched_category)
-    if not options:
-        return f"❌ No flavors available under {matched_category}."
+    if not matched_category.flavors:
+        return f"❌ No flavors available under {matched_category.name}."
 
-    return f"✅ Yes, we have {matched_category}. What would you like? Options include: {', '.join(options)}"
+    return f"✅ Yes, we have {matched_category.name}. What would you like? Options include: {matched_category.flavor_options}"
 
 
 def check_availability(item: str) -> str:
     if not item or item.strip().lower() == "unknown":
         return "❌ Sorry, that item wasn't understood."
 
+    menu = get_menu()
     item = item.strip().lower()
 
     # Direct check using internal index
@@ -88,30 +117,13 @@ def check_availability(item: str) -> str:
         return f"✅ Yes, we have {canonical} available."
 
     # Fuzzy match as fallback
-    close = get_close_matches(item, menu.item_index.keys(), n=1, cutoff=0.8)
+    close = menu.find_closest_item(item)
     if close:
-        suggestion = menu.item_index[close[0]][1]
+        suggestion = menu.item_index[close][1]
         return f"✅ Yes, did you mean: {suggestion}?"
 
-    # Deep recursive search as last resort (handles nested structure)
-    def recursive_search(menu_section):
-        if isinstance(menu_section, dict):
-            for key, val in menu_section.items():
-                if item in key.lower():
-                    return key
-                result = recursive_search(val)
-                if result:
-                    return result
-        elif isinstance(menu_section, list):
-            for val in menu_section:
-                if item in val.lower():
-                    return val
-        elif isinstance(menu_section, str):
-            if item in menu_section.lower():
-                return menu_section
-        return None
-
-    match = recursive_search(menu.menu)
+    # Substring search over the whole menu as last resort (handles nested structure)
+    match = menu.find_in_menu(item)
     if match:
         return f"✅ Yes, we have {match} available."
 
@@ -214,81 +226,108 @@ def check_availability(item: str) -> str:
 
 #     return confirmed
 
-def place_order(query: str = "", item: str = "", quantity: int = 1) -> str:
-    global order_session
+def place_order(query: str = "", item: str = "", quantity: int = 1, session_id: str = DEFAULT_SESSION_ID) -> str:
     item = item or ""
     query = query or ""
     clean_query = re.sub(r'[^\w\s#]', '', (query or "").lower())
     item = (item or "").strip()
-    print(f"[DEBUG] Checking item: {item} | Cleaned: {clean_query}")
-
-    # ✅ Case 1: If it's a known category like "Pizza"
-    if menu.has_flavors(item):
-        order_session["pending_category"] = item
-        order_session["pending_qty"] = quantity
-        return f"❓ Which {item} would you like? Options include: {', '.join(menu.list_flavors(item))}"
-
-    # ✅ Case 2: Try fuzzy match for exact dish
-    matched = menu.find_closest_item(item)
-    if not matched:
-        return f"❌ Sorry, {item} is not on the menu."
-    item = matched
-
-    if not order_session["items"]:
-        order_session["items"].append((item, quantity))
-
-
-    # 🆔 Step 2: NYU ID
-    if not order_session["nyu_id"]:
-        digits = "".join(re.findall(r'\d+', clean_query))
-        if len(digits) == 8:
-            order_session["nyu_id"] = "N" + digits
-        else:
-            return "📎 Please say the 8 digits of your NYU ID after the letter N."
-
-    # 🏢 Step 3: Building number
-    if not order_session["building"]:
-        building = normalize_building_input(clean_query)
-        if building in VALID_BUILDINGS:
-            order_session["building"] = building
-        else:
-            return "🏢 Please mention your building number."
-
-    # 📱 Step 4: Phone number
-    if not order_session["phone"]:
-        digits = "".join(re.findall(r'\d+', clean_query))
-        if len(digits) >= 9:
-            order_session["phone"] = digits
-            return "📝 Do you have any allergy info or special requests?"
-        else:
-            return "📱 Please provide your phone number."
-
-    # 📝 Step 5: Dietary notes
-    if not order_session["dietary"]:
-        keywords = ["no", "without", "allergy", "allergies", "nuts", "gluten", "lactose", "vegan", "extra", "spicy"]
-        if any(word in clean_query for word in keywords):
-            order_session["dietary"] = query
-        else:
-            return "📝 Do you have any allergy info or special requests?"
+    logger.debug(f"🧾 Checking item: {item} | Cleaned: {clean_query} | Session: {session_id}")
+    menu = get_menu()
+    token = uuid.uuid4().hex
+    complete = [] # The finished order, journaled once the store has released the session
+
+    # Runs atomically on this session's order; returns the new order (None resets it) and the reply
+    def advance(order: OrderRecord):
+        # ⏳ Another request (e.g. the speculative generation) is journaling this order right now
+        if order.confirming and time.time() - order.updated_at <= JOURNAL_ACK_TIMEOUT + 1.0:
+            return order, "⏳ Your order is being confirmed, one moment please."
+
+        # ✅ Case 1: If it's a known category like "Pizza"
+        if menu.has_flavors(item):
+            order = order._replace(pending_category=item, pending_qty=quantity)
+            return order, f"❓ Which {item} would you like? Options include: {', '.join(menu.list_flavors(item))}"
+
+        # ✅ Case 2: Try fuzzy match for exact dish
+        matched = menu.find_closest_item(item)
+        if not matched:
+            return order, f"❌ Sorry, {item} is not on the menu."
+
+        if not order.items:
+            order = order._replace(items=((matched, quantity),))
+
+        # 🆔 Step 2: NYU ID
+        if not order.nyu_id:
+            digits = "".join(re.findall(r'\d+', clean_query))
+            if len(digits) == 8:
+                order = order._replace(nyu_id="N" + digits)
+            else:
+                return order, "📎 Please say the 8 digits of your NYU ID after the letter N."
+
+        # 🏢 Step 3: Building number
+        if not order.building:
+            building = normalize_building_input(clean_query)
+            if building in VALID_BUILDINGS:
+                order = order._replace(building=building)
+            else:
+                return order, "🏢 Please mention your building number."
+
+        # 📱 Step 4: Phone number
+        if not order.phone:
+            digits = "".join(re.findall(r'\d+', clean_query))
+            if len(digits) >= 9:
+                return order._replace(phone=digits), "📝 Do you have any allergy info or special requests?"
+            else:
+                return order, "📱 Please provide your phone number."
+
+        # 📝 Step 5: Dietary notes
+        if not order.dietary:
+            keywords = ["no", "without", "allergy", "allergies", "nuts", "gluten", "lactose", "vegan", "extra", "spicy"]
+            if any(word in clean_query for word in keywords):
+                order = order._replace(dietary=query)
+            else:
+                return order, "📝 Do you have any allergy info or special requests?"
+
+        # 🧾 Complete: mark it as ours to journal, outside the session's lock
+        order = order._replace(confirming=token)
+        complete.append(order)
+        return order, None
+
+    reply = orders.update(session_id, advance)
+    if not complete:
+        return reply
+    order = complete[0]
+
+    # 🧾 Journal the order; only confirm it once it is committed
+    try:
+        saved = get_journal().append({
+            "session_id": session_id,
+            "items": order.items,
+            "nyu_id": order.nyu_id,
+            "building": order.building,
+            "phone": order.phone,
+            "dietary": order.dietary,
+        }).wait(JOURNAL_ACK_TIMEOUT)
+    except JournalError:
+        saved = False
+
+    # 🔄 Reset the session once saved; otherwise keep the order so it can be confirmed again
+    def finish(current: OrderRecord):
+        if current.confirming != token: # Evicted or reset meanwhile
+            return (None if current == OrderRecord() else current), None
+        return (None if saved else current._replace(confirming=None)), None
+
+    orders.update(session_id, finish)
+    if not saved:
+        return "⚠️ Sorry, I couldn't save your order. Please confirm it again."
 
     # ✅ Final confirmation
-    items_str = ", ".join(f"{qty} x {item}" for item, qty in order_session["items"])
+    items_str = ", ".join(f"{qty} x {name}" for name, qty in order.items)
     confirmed = (
         f"✅ Order confirmed for: {items_str}!\n"
-        f"🤚 NYU ID: {order_session['nyu_id']}, 🏢 Building: {order_session['building']}, 📱 Phone: {order_session['phone']}.\n"
+        f"🤚 NYU ID: {order.nyu_id}, 🏢 Building: {order.building}, 📱 Phone: {order.phone}.\n"
     )
-    if order_session["dietary"]:
-        confirmed += f"📝 Note: {order_session['dietary']}"
-
-    # 🔄 Reset session
-    order_session = {
-        "items": [],
-        "nyu_id": None,
-        "building": None,
-        "phone": None,
-        "dietary": None
-    }
-
+    if order.dietary:
+        confirmed += f"📝 Note: {order.dietary}"
     return confirmed
 
 
@@ -296,56 +335,22 @@ def get_price(item: str) -> str:
     if not item or item == "unknown":
         return "❌ Sorry, I couldn't understand the item you're asking about."
 
+    menu = get_menu()
     item = item.strip().lower()
 
-    # Check if item directly matches any leaf-level item with price
-    for category, content in menu.menu.items():
-        if isinstance(content, dict):
-            for subkey, subcontent in content.items():
-                # Nested items
-                if isinstance(subcontent, dict):
-                    for leaf_item, price in subcontent.items():
-                        if item in leaf_item.lower():
-                            return f"💵 {leaf_item} costs {price:.2f} dirhams."
-                # Direct item:price map
-                elif isinstance(subcontent, (int, float)):
-                    if item in subkey.lower():
-                        return f"💵 {subkey} costs {subcontent:.2f} dirhams."
-                # Description (skip)
-                elif isinstance(subcontent, str):
-                    continue
-
-        elif isinstance(content, (int, float)):
-            if item in category.lower():
-                return f"💵 {category} costs {content:.2f} dirhams."
-
-        elif isinstance(content, list):
-            for list_item in content:
-                if item in list_item.lower():
-                    return f"🧂 {list_item} is available. Please ask for more details."
+    # First priced (or listed) name containing the query, in menu order
+    entry = menu.compiled.find_entry(item)
+    if entry:
+        if entry.listed:
+            return f"🧂 {entry.name} is available. Please ask for more details."
+        return f"💵 {entry.name} costs {entry.price:.2f} dirhams."
 
     # If user queried a whole category (e.g. "acai bowl", "pizza")
-    for category, content in menu.menu.items():
-        if item in category.lower():
-            # Collect all priced entries under this category
-            priced_items = []
-
-            if isinstance(content, dict):
-                for k, v in content.items():
-                    if isinstance(v, (int, float)):
-                        priced_items.append((k, v))
-                    elif isinstance(v, dict):
-                        for subk, subv in v.items():
-                            if isinstance(subv, (int, float)):
-                                priced_items.append((subk, subv))
-
-            if priced_items:
-                msg = f"🧾 Here are some {category} options with prices:\n"
-                for name, price in priced_items:
-                    msg += f"• {name}: {price:.2f} AED\n"
-                return msg.strip()
-
-            return f"📦 {category} is available. Some items may not have prices listed."
+    category = menu.compiled.find_category_containing(item)
+    if category:
+        if category.price_listing:
+            return category.price_listing
+        return f"📦 {category.name} is available. Some items may not have prices listed."
 
     return f"❌ Sorry, {item} is not found in our menu."
 
@@ -360,46 +365,78 @@ FUNCTIONS = {
 
 }
 
+# Functions that keep per-session state and receive the caller's session id
+SESSION_FUNCTIONS = {"place_order"}
 
-def parse_args(args_str):
-    try:
-        tree = ast.parse(f"f({args_str})", mode='eval')
-        call = tree.body
-        return {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
-    except Exception as e:
-        raise ValueError(f"❌ Failed to parse arguments: {args_str} → {e}")
 
 def parse_function_call(llm_output: str):
-    match = re.match(r'CALL\s+(\w+)\((.*)\)', llm_output.strip(), re.DOTALL)
-    if not match:
-        raise ValueError(f"Invalid function call format: {llm_output}")
-    func_name = match.group(1)
-    args_str = match.group(2)
-    args = parse_args(args_str)
-    return func_name, args
-
-@app.middleware("http")
+    call = parse_call(llm_output)
+    return call.name, call.args
+
 async def log_requests(request: Request, call_next):
-    print(f"📥 {request.method} {request.url}")
+    logger.info(f"📥 {request.method} {request.url}")
     response = await call_next(request)
-    print(f"📤 Response status: {response.status_code}")
+    logger.info(f"📤 Response status: {response.status_code}")
     return response
 
+if os.getenv("MCP_LOG_REQUESTS"): # Off by default: a middleware costs every request
+    app.middleware("http")(log_requests)
+
+def execute(call: ToolCall, session_id: Optional[str] = None) -> str:
+    logger.debug(f"🛠️ {call.name}({call.args})")
+    if call.name not in FUNCTIONS:
+        return f"⚠️ Unknown function: {call.name}"
+    args = dict(call.args)
+    if call.name in SESSION_FUNCTIONS:
+        args["session_id"] = session_id or DEFAULT_SESSION_ID # Never taken from the LLM's arguments
+    try:
+        return FUNCTIONS[call.name](**args)
+    except Exception as e:
+        return f"⚠️ MCP Error: {str(e)}"
+
+# Shared by the /mcp endpoint and in-process callers (mcp_client.MCPClient)
+def dispatch(prompt: str, session_id: Optional[str] = None) -> str:
+    try:
+        call = parse_call(prompt)
+    except ToolCallError as e:
+        return f"⚠️ MCP Error: {str(e)}"
+    return execute(call, session_id)
+
+def dispatch_json(body: Any, session_id: Optional[str] = None) -> str:
+    try:
+        call = parse_json_call(body)
+    except ToolCallError as e:
+        return f"⚠️ MCP Error: {str(e)}"
+    return execute(call, session_id)
+
+# Body: {"name": ..., "arguments": {...}} or {"query": "CALL name(...)"}, plus an optional "session_id"
+# Calls run in the thread pool: a confirmation waits for the journal's group commit
 @app.post("/mcp")
 async def mcp(request: Request):
     data = await request.json()
-    prompt = data.get("query", "")
-    try:
-        func_name, args = parse_function_call(prompt)
-        print("🛠️ Parsed function name:", func_name)
-        print("🧪 Parsed args:", args)
-        print("🧪 Arg types:", {k: type(v) for k, v in args.items()})
-        if func_name in FUNCTIONS:
-            response = FUNCTIONS[func_name](**args)
-            return {"response": response}
-        return {"response": f"⚠️ Unknown function: {func_name}"}
-    except Exception as e:
-        return {"response": f"⚠️ MCP Error: {str(e)}"}
+    session_id = data.get("session_id") if isinstance(data, dict) else None
+    return {"response": await run_in_threadpool(dispatch_json, data, session_id)}
+
+def _dispatch_batch(calls: list, session_id: Optional[str]) -> list:
+    return [dispatch(call, session_id) if isinstance(call, str) else dispatch_json(call, session_id) for call in calls]
+
+# Body: {"calls": [<call>, ...], "session_id": ...}; calls run in order, each one a /mcp body or a CALL string
+@app.post("/mcp/batch")
+async def mcp_batch(request: Request):
+    data = await request.json()
+    calls = data.get("calls") if isinstance(data, dict) else None
+    if not isinstance(calls, list):
+        raise HTTPException(status_code=400, detail='Expected {"calls": [...]}')
+    session_id = data.get("session_id")
+    return {"responses": await run_in_threadpool(_dispatch_batch, calls, session_id)}
+
+@app.get("/menu/status")
+async def menu_status():
+    return get_menu_store().stats()
+
+@app.get("/orders/status")
+async def orders_status():
+    return {**orders.stats(), "journal": get_journal().stats()}
 
 @app.get("/ping")
 async def ping():
@@ -1,8 +1,10 @@
 import asyncio
 import logging
-from typing import Optional, Callable
+import time
+from typing import Any, Dict, Optional, Callable
 import numpy as np
-from scipy.signal import resample_poly
+from resampler import PCM16Resampler
+from timing_stats import TimingStats
 from transcribe import TranscriptionProcessor
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,8 @@ class AudioInputProcessor:
     """
 
     _RESAMPLE_RATIO = 3  # Resample ratio from 48kHz (assumed input) to 16kHz.
+    _INPUT_SAMPLE_RATE = 48000
+    _STATS_LOG_INTERVAL = 1000  # Log frame processing stats every N frames.
 
     def __init__(
             self,
@@ -26,6 +30,7 @@ class AudioInputProcessor:
             is_orpheus: bool = False,
             silence_active_callback: Optional[Callable[[bool], None]] = None,
             pipeline_latency: float = 0.5,
+            turn_detection_classifier: Optional[Any] = None,
         ) -> None:
         """
         Initializes the AudioInputProcessor.
@@ -36,14 +41,21 @@ class AudioInputProcessor:
             silence_active_callback: Optional callback function invoked when silence state changes.
                                      It receives a boolean argument (True if silence is active).
             pipeline_latency: Estimated latency of the processing pipeline in seconds.
+            turn_detection_classifier: Optional shared `SentenceClassifier` for the transcriber's turn detection.
         """
         self.last_partial_text: Optional[str] = None
+        # Stateful 48kHz -> 16kHz resampler, keeps filter history between chunks and
+        # writes its int16 output into a small ring of preallocated frames
+        self.resampler = PCM16Resampler(1, self._RESAMPLE_RATIO)
+        # Per-frame processing time (resample + hand-off to the recorder)
+        self.frame_stats = TimingStats()
         self.transcriber = TranscriptionProcessor(
             language,
             on_recording_start_callback=self._on_recording_start,
             silence_active_callback=self._silence_active_callback,
             is_orpheus=is_orpheus,
             pipeline_latency=pipeline_latency,
+            turn_detection_classifier=turn_detection_classifier,
         )
         # Flag to indicate if the transcription loop has failed fatally
         self._transcription_failed = False
@@ -73,6 +85,31 @@ class AudioInputProcessor:
         logger.info("👂🛑 Aborting generation requested.")
         self.transcriber.abort_generation()
 
+    def detach(self) -> None:
+        """
+        Disconnects this processor from the client session that was using it.
+
+        Clears every externally assigned callback (on this instance and on the
+        transcriber) and resets the transcription state so the processor can be
+        handed to the next session by the model pool without leaking events or
+        text from the previous conversation.
+        """
+        self.realtime_callback = None
+        self.recording_start_callback = None
+        self.silence_active_callback = None
+        self.transcriber.potential_sentence_end = None
+        self.transcriber.on_tts_allowed_to_synthesize = None
+        self.transcriber.potential_full_transcription_callback = None
+        self.transcriber.potential_full_transcription_abort_callback = None
+        self.transcriber.full_transcription_callback = None
+        self.transcriber.before_final_sentence = None
+        self.interrupted = False
+        self.last_partial_text = None
+        self.resampler.reset()
+        self.frame_stats.reset()
+        self.transcriber.reset()
+        logger.info("👂🔌 AudioInputProcessor detached from session.")
+
     def _setup_callbacks(self) -> None:
         """Sets up internal callbacks for the TranscriptionProcessor instance."""
         def partial_transcript_callback(text: str) -> None:
@@ -121,33 +158,34 @@ class AudioInputProcessor:
         """
         Converts raw audio bytes (int16) to a 16kHz 16-bit PCM numpy array.
 
-        The audio is converted to float32 for accurate resampling and then
-        converted back to int16, clipping values outside the valid range.
+        The chunk is viewed in place (no copy) and fed to the streaming resampler,
+        which computes in float32 and carries its filter history over from the
+        previous chunk, so the 16kHz stream is continuous across chunk boundaries.
+        The output is clipped in place and converted to int16 into a reusable ring
+        slot, so steady-state processing does not allocate any sample buffers.
+        Because the resampler holds back a few samples until the next chunk
+        arrives, the output length may differ by one sample from `len / 3`.
 
         Args:
             raw_bytes: Raw audio data assumed to be in int16 format.
 
         Returns:
             A numpy array containing the resampled audio in int16 format at 16kHz.
-            Returns an array of zeros if the input is silent.
+            It is a view into the resampler's output ring and stays valid for the
+            next few calls only.
         """
-        raw_audio = np.frombuffer(raw_bytes, dtype=np.int16)
-
-        if np.max(np.abs(raw_audio)) == 0:
-            # Calculate expected length after resampling for silence
-            expected_len = int(np.ceil(len(raw_audio) / self._RESAMPLE_RATIO))
-            return np.zeros(expected_len, dtype=np.int16)
-
-        # Convert to float32 for resampling precision
-        audio_float32 = raw_audio.astype(np.float32)
+        return self.resampler.process(raw_bytes)
 
-        # Resample using float32 data
-        resampled_float = resample_poly(audio_float32, 1, self._RESAMPLE_RATIO)
-
-        # Convert back to int16, clipping to ensure validity
-        resampled_int16 = np.clip(resampled_float, -32768, 32767).astype(np.int16)
+    def get_processing_stats(self) -> Dict[str, float]:
+        """
+        Returns per-frame processing time statistics of the input audio path.
 
-        return resampled_int16
+        Returns:
+            A dict with frame count, mean/max/EWMA/p50/p99 processing time in
+            milliseconds and the real-time factor (processing time divided by the
+            duration of the processed audio, far below 1.0 is expected).
+        """
+        return self.frame_stats.snapshot()
 
 
     async def process_chunk_queue(self, audio_queue: asyncio.Queue) -> None:
@@ -191,6 +229,7 @@ class AudioInputProcessor:
                     break  # Termination signal
 
                 pcm_data = audio_data.pop("pcm")
+                frame_start = time.perf_counter()
 
                 # Process audio chunk (resampling happens consistently via float32)
                 processed = self.process_audio_chunk(pcm_data)
@@ -201,10 +240,22 @@ class AudioInputProcessor:
                 if not self.interrupted:
                     # Check failure flag again, as it might have been set between queue.get and here
                      if not self._transcription_failed:
-                        # Feed audio to the underlying processor
-                        self.transcriber.feed_audio(processed.tobytes(), audio_data)
+                        # Feed audio to the underlying processor (byte view of the ring slot, no copy)
+                        self.transcriber.feed_audio(memoryview(processed).cast("B"), audio_data)
                      # No 'else' needed here because the checks at the start of the loop handle termination
 
+                self.frame_stats.record(
+                    time.perf_counter() - frame_start,
+                    media_duration=len(pcm_data) / 2 / self._INPUT_SAMPLE_RATE,
+                )
+                if self.frame_stats.count % self._STATS_LOG_INTERVAL == 0:
+                    stats = self.frame_stats.snapshot()
+                    logger.debug(
+                        f"👂⏱️ Input frames: {stats['count']}, mean {stats['mean_ms']:.3f}ms, "
+                        f"p99 {stats['p99_ms']:.3f}ms, max {stats['max_ms']:.3f}ms, "
+                        f"RTF {stats.get('real_time_factor', 0.0):.4f}"
+                    )
+
             except asyncio.CancelledError:
                 logger.info("👂🚫 Audio processing task cancelled.")
                 break
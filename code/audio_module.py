@@ -14,6 +14,8 @@ from huggingface_hub import hf_hub_download
 from RealtimeTTS import (CoquiEngine, KokoroEngine, OrpheusEngine,
                          OrpheusVoice, TextToAudioStream)
 
+from phrase_cache import PhraseAudioCache, phrase_cache_key
+
 logger = logging.getLogger(__name__)
 
 # Default configuration constants
@@ -24,6 +26,12 @@ ENGINE_SILENCES = {
     "kokoro":  Silence(comma=0.3, sentence=0.6, default=0.3),
     "orpheus": Silence(comma=0.3, sentence=0.6, default=0.3),
 }
+# Voice and speaking rate per engine (also part of the phrase cache key)
+ENGINE_VOICES = {
+    "coqui":   ("reference_audio.wav", 1.1),
+    "kokoro":  ("af_heart", 1.26),
+    "orpheus": ("tara", 1.0),
+}
 # Stream chunk sizes influence latency vs. throughput trade-offs
 QUICK_ANSWER_STREAM_CHUNK_SIZE = 8
 FINAL_ANSWER_STREAM_CHUNK_SIZE = 30
@@ -80,6 +88,7 @@ class AudioProcessor:
             self,
             engine: str = START_ENGINE,
             orpheus_model: str = "orpheus-3b-0.1-ft-Q8_0-GGUF/orpheus-3b-0.1-ft-q8_0.gguf",
+            phrase_cache: Optional[PhraseAudioCache] = None,
         ) -> None:
         """
         Initializes the AudioProcessor with a specific TTS engine.
@@ -91,8 +100,11 @@ class AudioProcessor:
         Args:
             engine: The name of the TTS engine to use ("coqui", "kokoro", "orpheus").
             orpheus_model: The path or identifier for the Orpheus model file (used only if engine is "orpheus").
+            phrase_cache: Optional cache of synthesized phrases. `synthesize` serves
+                          cached phrases from it and stores newly completed ones.
         """
         self.engine_name = engine
+        self.phrase_cache = phrase_cache
         self.stop_event = threading.Event()
         self.finished_event = threading.Event()
         self.audio_chunks = asyncio.Queue() # Queue for synthesized audio output
@@ -100,6 +112,9 @@ class AudioProcessor:
 
         self.silence = ENGINE_SILENCES.get(engine, ENGINE_SILENCES[self.engine_name])
         self.current_stream_chunk_size = QUICK_ANSWER_STREAM_CHUNK_SIZE # Initial chunk size
+        if engine not in ENGINE_VOICES:
+            raise ValueError(f"Unsupported engine: {engine}")
+        self.voice, self.speed = ENGINE_VOICES[engine]
 
         # Dynamically load and configure the selected TTS engine
         if engine == "coqui":
@@ -107,8 +122,8 @@ class AudioProcessor:
             self.engine = CoquiEngine(
                 specific_model="Lasinya",
                 local_models_path="./models",
-                voice="reference_audio.wav",
-                speed=1.1,
+                voice=self.voice,
+                speed=self.speed,
                 use_deepspeed=False,
                 thread_count=6,
                 stream_chunk_size=self.current_stream_chunk_size,
@@ -120,8 +135,8 @@ class AudioProcessor:
             )
         elif engine == "kokoro":
             self.engine = KokoroEngine(
-                voice="af_heart",
-                default_speed=1.26,
+                voice=self.voice,
+                default_speed=self.speed,
                 trim_silence=True,
                 silence_threshold=0.01,
                 extra_start_ms=25,
@@ -137,7 +152,7 @@ class AudioProcessor:
                 repetition_penalty=1.1,
                 max_tokens=1200,
             )
-            voice = OrpheusVoice("tara")
+            voice = OrpheusVoice(self.voice)
             self.engine.set_voice(voice)
         else:
             raise ValueError(f"Unsupported engine: {engine}")
@@ -226,6 +241,40 @@ class AudioProcessor:
         logger.info("👄🛑 Audio stream stopped.")
         self.finished_event.set()
 
+    def phrase_key(self, text: str) -> str:
+        """Returns the phrase cache key of `text` for this engine, voice and speed."""
+        return phrase_cache_key(self.engine_name, self.voice, self.speed, text)
+
+    def _play_cached_phrase(
+            self,
+            chunks: list,
+            audio_chunks: Queue,
+            stop_event: threading.Event,
+            generation_string: str,
+        ) -> bool:
+        """
+        Puts the chunks of a cached phrase into the queue at once.
+
+        Args:
+            chunks: The cached PCM chunks.
+            audio_chunks: The output queue.
+            stop_event: Checked before queuing, so an aborted generation gets nothing.
+            generation_string: An optional identifier string for logging purposes.
+
+        Returns:
+            True if the phrase was queued, False if `stop_event` was already set.
+        """
+        if stop_event.is_set():
+            return False
+        for chunk in chunks:
+            audio_chunks.put_nowait(chunk)
+        if self.on_first_audio_chunk_synthesize:
+            try:
+                self.on_first_audio_chunk_synthesize()
+            except Exception as e:
+                logger.error(f"👄💥 {generation_string} Error in on_first_audio_chunk_synthesize callback: {e}", exc_info=True)
+        return True
+
     def synthesize(
             self,
             text: str,
@@ -250,9 +299,24 @@ class AudioProcessor:
                         This should typically be the instance's `self.stop_event`.
             generation_string: An optional identifier string for logging purposes.
 
+        If a phrase cache is configured, a cached phrase is queued immediately
+        without running the engine, and a phrase synthesized to completion is
+        added to the cache.
+
         Returns:
             True if synthesis completed fully, False if interrupted by stop_event.
         """
+        phrase_key = None
+        if self.phrase_cache is not None:
+            start_lookup = time.time()
+            phrase_key = self.phrase_key(text)
+            cached = self.phrase_cache.get(phrase_key)
+            if cached is not None:
+                completed = self._play_cached_phrase(cached, audio_chunks, stop_event, generation_string)
+                logger.info(f"👄💾 {generation_string} Quick answer served from phrase cache in {(time.time() - start_lookup)*1000:.2f}ms ({len(cached)} chunks). Text: {text[:50]}...")
+                return completed
+        synthesized: list[bytes] = [] # Everything queued, for the phrase cache
+
         if self.engine_name == "coqui" and hasattr(self.engine, 'set_stream_chunk_size') and self.current_stream_chunk_size != QUICK_ANSWER_STREAM_CHUNK_SIZE:
             logger.info(f"👄⚙️ {generation_string} Setting Coqui stream chunk size to {QUICK_ANSWER_STREAM_CHUNK_SIZE} for quick synthesis.")
             self.engine.set_stream_chunk_size(QUICK_ANSWER_STREAM_CHUNK_SIZE)
@@ -338,6 +402,7 @@ class AudioProcessor:
                     for c in buffer:
                         try:
                             audio_chunks.put_nowait(c)
+                            synthesized.append(c)
                             put_occurred_this_call = True
                         except asyncio.QueueFull:
                             logger.warning(f"👄⚠️ {generation_string} Quick audio queue full, dropping chunk.")
@@ -347,6 +412,7 @@ class AudioProcessor:
             else: # Not buffering, put chunk directly
                 try:
                     audio_chunks.put_nowait(chunk)
+                    synthesized.append(chunk)
                     put_occurred_this_call = True
                 except asyncio.QueueFull:
                     logger.warning(f"👄⚠️ {generation_string} Quick audio queue full, dropping chunk.")
@@ -399,11 +465,14 @@ class AudioProcessor:
             for c in buffer:
                  try:
                     audio_chunks.put_nowait(c)
+                    synthesized.append(c)
                  except asyncio.QueueFull:
                     logger.warning(f"👄⚠️ {generation_string} Quick audio queue full on final flush, dropping chunk.")
             buffer.clear()
 
         logger.info(f"👄✅ {generation_string} Quick answer synthesis complete. Text: {text[:50]}...")
+        if phrase_key is not None and not stop_event.is_set():
+            self.phrase_cache.put(phrase_key, synthesized)
         return True # Indicate successful completion
 
     def synthesize_generator(
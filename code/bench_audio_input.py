@@ -0,0 +1,93 @@
+# bench_audio_input.py
+"""
+Per-frame cost of the browser -> recorder input path for many sessions.
+
+Legacy path: frombuffer, max(abs) silence check, astype(float32),
+resample_poly, clip, astype(int16), tobytes (what AudioInputProcessor did).
+Current path: PCM16Resampler (streaming, in-place clip into a ring slot)
+plus a byte memoryview for the recorder.
+
+Each frame is 2048 samples at 48kHz (~42.7 ms), as sent by the web client.
+The fed data is appended to a bytearray, which is what the recorder does.
+Reports processing time per frame, the real-time factor per session and
+the bytes allocated per frame.
+
+Usage:
+    python bench_audio_input.py [sessions] [frames_per_session]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from resampler import PCM16Resampler
+from timing_stats import TimingStats
+
+FRAME_SAMPLES = 2048
+INPUT_RATE = 48000
+
+
+def legacy_process(raw_bytes: bytes):
+    raw_audio = np.frombuffer(raw_bytes, dtype=np.int16)
+    if np.max(np.abs(raw_audio)) == 0:
+        return np.zeros(int(np.ceil(len(raw_audio) / 3)), dtype=np.int16).tobytes()
+    resampled = resample_poly(raw_audio.astype(np.float32), 1, 3)
+    return np.clip(resampled, -32768, 32767).astype(np.int16).tobytes()
+
+
+def make_frames(count: int) -> list:
+    rng = np.random.default_rng(0)
+    return [(rng.standard_normal(FRAME_SAMPLES) * 5000).astype(np.int16).tobytes() for _ in range(count)]
+
+
+def run(mode: str, sessions: int, frames: list) -> tuple:
+    resamplers = [PCM16Resampler(1, 3) for _ in range(sessions)]
+    sinks = [bytearray() for _ in range(sessions)]
+    stats = TimingStats(window=len(frames) * sessions)
+    frame_seconds = FRAME_SAMPLES / INPUT_RATE
+
+    def step(session: int, frame: bytes) -> None:
+        start = time.perf_counter()
+        if mode == "legacy":
+            sinks[session] += legacy_process(frame)
+        else:
+            sinks[session] += memoryview(resamplers[session].process(frame)).cast("B")
+        stats.record(time.perf_counter() - start, media_duration=frame_seconds)
+        del sinks[session][:] # the recorder drains its buffer into its queue
+
+    for frame in frames[:10]: # warm up buffers
+        for session in range(sessions):
+            step(session, frame)
+    stats.reset()
+
+    for frame in frames:
+        for session in range(sessions):
+            step(session, frame)
+    snapshot = stats.snapshot()
+
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames[:100]:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        step(0, frame)
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return snapshot, allocated / 100
+
+
+def main() -> None:
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    frames = make_frames(count)
+    print(f"{sessions} session(s) x {count} frames of {FRAME_SAMPLES} samples @ {INPUT_RATE} Hz")
+    for mode in ("legacy", "current"):
+        stats, alloc = run(mode, sessions, frames)
+        print(f"  {mode:8s} mean {stats['mean_ms'] * 1000:6.1f} us  p99 {stats['p99_ms'] * 1000:6.1f} us  "
+              f"RTF {stats['real_time_factor']:.5f}  peak alloc {alloc / 1024:5.1f} KiB/frame")
+
+
+if __name__ == "__main__":
+    main()
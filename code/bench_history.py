@@ -0,0 +1,188 @@
+# bench_history.py
+"""
+Prompt size and time to first token per turn for three history strategies.
+
+Plays a 50-turn synthetic ordering conversation (the system prompt from
+system_prompt.txt, callers asking about and ordering dishes, assistant
+answers of varying length) through:
+
+- unbounded: every message is sent every turn (the old `self.history` list);
+- window: the oldest messages are dropped one at a time until the prompt
+  fits the budget, so after the first overflow the start of the history
+  changes on every turn;
+- managed: `ConversationHistory` (pinned system prompt, chunked trims).
+
+Per turn it reports the prompt tokens and TTFT. The backend reuses its KV
+cache for the longest prefix the new prompt shares with the previous
+request (prompt plus answer), so only the rest has to be prefilled before
+the first token.
+
+TTFT is measured against the local Ollama server when it is reachable
+(streamed `/api/chat` with `keep_alive`, one token generated; the prompt
+tokens are the ones Ollama reports it evaluated). Otherwise it is modeled
+and labelled as such: `base_ms` plus `prefill_ms` per uncached token, the
+cached prefix counted in whole messages with `estimate_tokens`.
+
+Usage:
+    python bench_history.py [budget_tokens] [base_ms] [prefill_ms]
+"""
+import json
+import statistics
+import sys
+import time
+
+import requests
+
+from history_manager import ConversationHistory, MESSAGE_OVERHEAD, estimate_tokens
+
+OLLAMA_URL = "http://localhost:11434/api/chat"
+LLM_MODEL = "mistral"
+TURNS = 50
+
+DISHES = ["margherita pizza", "chicken shawarma", "falafel wrap", "caesar salad", "beef burger", "mango lassi", "lentil soup"]
+QUESTIONS = [
+    "How much is the {dish}?",
+    "Do you have {dish} today?",
+    "I'd like two {dish}, please.",
+    "Can you make the {dish} without onions?",
+    "What comes with the {dish}?",
+]
+ANSWERS = [
+    "The {dish} costs 31 AED.",
+    "Yes, the {dish} is available today. Would you like to add it to your order?",
+    "Added two {dish} to your order. Anything else?",
+    "Sure, I noted no onions on the {dish}. Your order so far has {count} items, anything else I can get you?",
+    "The {dish} comes with fries and a small salad, and you can swap the fries for rice at no extra cost.",
+]
+
+
+def conversation():
+    """Returns the (user, assistant) turns."""
+    turns = []
+    for index in range(TURNS):
+        dish = DISHES[index % len(DISHES)]
+        kind = index % len(QUESTIONS)
+        turns.append((QUESTIONS[kind].format(dish=dish), ANSWERS[kind].format(dish=dish, count=index + 1)))
+    return turns
+
+
+def load_system_prompt() -> str:
+    try:
+        with open("system_prompt.txt", "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "You are a helpful assistant."
+
+
+def tokens_of(message) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+class Unbounded:
+    def __init__(self, system_prompt: str, budget: int):
+        self.system = {"role": "system", "content": system_prompt}
+        self.window = []
+
+    def append(self, message):
+        self.window.append(message)
+
+    def messages(self):
+        return [self.system] + self.window
+
+
+class SlidingWindow(Unbounded):
+    def __init__(self, system_prompt: str, budget: int):
+        super().__init__(system_prompt, budget)
+        self.budget = budget
+
+    def append(self, message):
+        self.window.append(message)
+        while len(self.window) > 1 and sum(map(tokens_of, self.messages())) > self.budget:
+            del self.window[0]
+
+
+def shared_prefix_tokens(prompt, cached) -> int:
+    """Tokens of the leading messages `prompt` shares with the cached sequence."""
+    total = 0
+    for new, old in zip(prompt, cached):
+        if new != old:
+            break
+        total += tokens_of(new)
+    return total
+
+
+def ollama_turn(messages):
+    """Streams one token from Ollama. Returns (TTFT ms, prompt tokens evaluated), or None if unreachable."""
+    body = {"model": LLM_MODEL, "messages": messages, "stream": True, "keep_alive": "10m",
+            "options": {"num_predict": 1, "temperature": 0}}
+    start = time.perf_counter()
+    ttft = None
+    try:
+        with requests.post(OLLAMA_URL, json=body, stream=True, timeout=120) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if ttft is None:
+                    ttft = (time.perf_counter() - start) * 1000
+                if chunk.get("done"):
+                    return ttft, chunk.get("prompt_eval_count", 0)
+    except requests.RequestException:
+        return None
+    return None
+
+
+def run(strategy, turns, live: bool, base_ms: float, prefill_ms: float):
+    """Returns per turn (prompt tokens, tokens to prefill, TTFT ms)."""
+    rows = []
+    cached = []
+    for user, answer in turns:
+        strategy.append({"role": "user", "content": user})
+        prompt = list(strategy.messages())
+        tokens = sum(map(tokens_of, prompt))
+        if live:
+            ttft, evaluated = ollama_turn(prompt)
+        else:
+            evaluated = tokens - shared_prefix_tokens(prompt, cached)
+            ttft = base_ms + evaluated * prefill_ms
+        rows.append((tokens, evaluated, ttft))
+        reply = {"role": "assistant", "content": answer}
+        strategy.append(reply)
+        cached = prompt + [reply]
+    return rows
+
+
+def main() -> None:
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    base_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 40.0
+    prefill_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    system_prompt = load_system_prompt()
+    turns = conversation()
+    live = ollama_turn([{"role": "user", "content": "hi"}]) is not None
+    print(f"System prompt {tokens_of({'content': system_prompt})} tokens, budget {budget} tokens, {TURNS} turns.")
+    print(f"TTFT: {'measured against ' + LLM_MODEL + ' on Ollama' if live else f'modeled ({base_ms:.0f} ms + {prefill_ms} ms per uncached token; Ollama not reachable)'}")
+
+    strategies = {
+        "unbounded": Unbounded(system_prompt, budget),
+        "window": SlidingWindow(system_prompt, budget),
+        "managed": ConversationHistory(system_prompt=system_prompt, max_tokens=budget),
+    }
+    results = {name: run(strategy, turns, live, base_ms, prefill_ms) for name, strategy in strategies.items()}
+
+    print(f"{'turn':>4}" + "".join(f" {name + ' tok':>14} {'prefill':>8} {'ttft ms':>8}" for name in results))
+    for index in range(TURNS):
+        print(f"{index + 1:>4}" + "".join(f" {rows[index][0]:>14} {rows[index][1]:>8} {rows[index][2]:>8.1f}" for rows in results.values()))
+
+    print()
+    print(f"{'strategy':>10} {'max tok':>8} {'mean tok':>9} {'prefilled':>10} {'mean ttft':>10} {'p95 ttft':>9}")
+    for name, rows in results.items():
+        ttfts = sorted(row[2] for row in rows)
+        print(f"{name:>10} {max(row[0] for row in rows):>8} {statistics.mean(row[0] for row in rows):>9.0f} "
+              f"{sum(row[1] for row in rows):>10} {statistics.mean(ttfts):>10.1f} {ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))]:>9.1f}")
+    managed = strategies["managed"]
+    print(f"managed: {managed.trims} trims, {managed.dropped} messages dropped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench_intent_router.py
+"""
+Fast-path hit rate and latency saved by the deterministic intent router.
+
+Routes a corpus of caller transcripts (price questions, availability
+questions, orders, and the turns the router should leave to the LLM:
+order details, small talk, off-menu requests) and reports:
+
+- the share answered by the fast path (confidence >= threshold) and the
+  share that still goes to the LLM;
+- the router's own cost per transcript (mean / p99 µs);
+- the end-to-end time saved: one LLM translation (`call_llm`) per hit.
+
+The LLM time is measured against the local Ollama server when it is
+reachable (same model and system prompt shape as `call_llm`, non-streamed);
+otherwise the `llm_ms` argument is used and labelled as assumed.
+
+Usage:
+    python bench_intent_router.py [threshold] [llm_ms] [rounds]
+"""
+import statistics
+import sys
+import time
+
+import requests
+
+from intent_router import DEFAULT_THRESHOLD, IntentRouter
+from menu_snapshot import get_menu
+
+OLLAMA_URL = "http://localhost:11434/api/chat"
+LLM_MODEL = "mistral"
+
+# (transcript, True if the fast path should take it)
+CORPUS = [
+    ("How much is the margherita?", True),
+    ("what's the price of the chicken alfredo", True),
+    ("How much are the french fries?", True),
+    ("um how much does the beef steak cost", True),
+    ("what does the salmon steak cost", True),
+    ("Can I get the price of the pepperoni?", True),
+    ("price of potato wedges", True),
+    ("Do you have sweet potato fries?", True),
+    ("do you guys have acai bowls", True),
+    ("Is the dynamite chicken available?", True),
+    ("Do you sell chicken wings?", True),
+    ("do you have mozzarella sticks", True),
+    ("I want two margherita pizzas.", True),
+    ("Can I get a pepperoni pizza please", True),
+    ("I'd like three chicken tikka pizzas", True),
+    ("I'll have the chicken cordon bleu", True),
+    ("Let me get the angry chicken", True),
+    ("Give me a couple of beef supreme pizzas", True),
+    ("hi, can I order the seafood marinara", True),
+    ("I would like the crispy vegan falafel", True),
+    ("I want a pizza", True),
+    ("okay I'll take one roasted half chicken", True),
+    ("I want the margarita", True),
+    ("I'd like the halloumi and vegetable with fig jam", True),
+    ("Can I get two mashed potatoes?", True),
+    ("My NYU ID is N12345678", False),
+    ("I'm in building A1A", False),
+    ("my phone number is 050 123 4567", False),
+    ("No allergies, thanks", False),
+    ("yes that's correct", False),
+    ("What do you recommend?", False),
+    ("Hello there", False),
+    ("What are your opening hours?", False),
+    ("Do you have sushi?", False),
+    ("I want a burger with extra cheese and no onions", False),
+    ("Can you tell me a joke?", False),
+    ("I'd like to change my order", False),
+    ("how long will delivery take", False),
+    ("what's vegetarian on the menu", False),
+    ("I want something spicy", False),
+]
+
+
+def measure_llm_ms(samples: int = 3):
+    """Times non-streamed call translations against Ollama. Returns the median ms, or None if unreachable."""
+    times = []
+    for transcript, _ in CORPUS[:samples]:
+        body = {
+            "model": LLM_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a backend agent that can only respond with function calls."},
+                {"role": "user", "content": transcript},
+            ],
+            "stream": False,
+        }
+        start = time.perf_counter()
+        try:
+            requests.post(OLLAMA_URL, json=body, timeout=60).raise_for_status()
+        except requests.RequestException:
+            return None
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main() -> None:
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THRESHOLD
+    assumed_llm_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 400.0
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    build_start = time.perf_counter()
+    router = IntentRouter(get_menu())
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    hits = correct = 0
+    for transcript, expected in CORPUS:
+        match = router.route(transcript)
+        hit = match is not None and match.confidence >= threshold
+        hits += hit
+        correct += hit == expected
+        label = f"{match.call.name} {match.confidence:.2f}" if match is not None else "-"
+        print(f"{'FAST' if hit else 'LLM ':>4}  {transcript[:52]:<52} {label}")
+
+    timings = []
+    for _ in range(rounds):
+        for transcript, _ in CORPUS:
+            start = time.perf_counter()
+            router.route(transcript)
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+
+    llm_ms = measure_llm_ms()
+    source = "measured" if llm_ms is not None else "assumed"
+    if llm_ms is None:
+        llm_ms = assumed_llm_ms
+    mean_us = statistics.mean(timings)
+    total = len(CORPUS)
+    print()
+    print(f"grammar build: {build_ms:.1f} ms ({len(router._phrases)} menu phrases)")
+    print(f"fast path: {hits}/{total} transcripts ({hits / total:.0%}) at threshold {threshold}, "
+          f"{correct}/{total} routed as expected")
+    print(f"router: {mean_us:.1f} µs mean, {timings[int(len(timings) * 0.99)]:.1f} µs p99 per transcript")
+    print(f"LLM translation: {llm_ms:.0f} ms ({source})")
+    print(f"saved: {llm_ms - mean_us / 1000:.0f} ms per fast-path turn, "
+          f"{hits * llm_ms / total - mean_us / 1000:.0f} ms per turn on average over the corpus")
+
+
+if __name__ == "__main__":
+    main()
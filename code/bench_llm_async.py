@@ -0,0 +1,199 @@
+# bench_llm_async.py
+"""
+Token throughput and cancellation latency of `LLM.generate` (threads) vs `LLM.agenerate` (one event loop).
+
+Starts an Ollama-compatible stub in a child process (asyncio, keep-alive,
+chunked NDJSON on `/api/chat`, one token every `token_ms`) and streams
+`tokens` tokens per request with 1, 10 and 100 concurrent streams:
+
+- sync: one thread per stream over `LLM.generate` (requests, per-chunk
+  cancellation check under `_requests_lock`);
+- async: one task per stream over `LLM.agenerate` on a single event loop
+  (pooled httpx client sized to the stream count).
+
+Throughput is the total tokens received per second with every stream
+running to the end, with the client process CPU time per token (the stub
+shares the machine, so on few cores tokens/s saturates first).
+Cancellation latency is measured on a second round: once every stream has
+received a few tokens, all are cancelled with `cancel_generation(request_id)`,
+and the time until each consumer sees its stream end is recorded (p50 / p99).
+
+Usage:
+    python bench_llm_async.py [tokens] [token_ms]
+"""
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from llm_module import LLM
+
+STREAMS = (1, 10, 100)
+CANCEL_AFTER = 5 # Tokens each stream receives before the cancellation round cancels it
+
+
+async def stub_connection(reader, writer, tokens: int, delay: float) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            if length:
+                await reader.readexactly(length)
+            if head.startswith(b"GET"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 17\r\n\r\nOllama is running")
+                continue
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for index in range(tokens + 1):
+                await asyncio.sleep(delay)
+                done = index == tokens
+                line = json.dumps({"model": "stub", "message": {"role": "assistant", "content": "" if done else " tok"}, "done": done}).encode() + b"\n"
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def serve(port: int, tokens: int, delay: float) -> None:
+    async def main():
+        server = await asyncio.start_server(lambda r, w: stub_connection(r, w, tokens, delay), "127.0.0.1", port, backlog=512)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
+
+
+def start_stub(tokens: int, delay: float):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    stub = subprocess.Popen([sys.executable, __file__, "--serve", str(port), str(tokens), str(delay)])
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return stub, f"http://127.0.0.1:{port}"
+        except OSError:
+            if time.monotonic() > deadline:
+                stub.kill()
+                raise RuntimeError("Stub server did not start")
+            time.sleep(0.1)
+
+
+def run_sync(llm: LLM, streams: int, cancel: bool):
+    """Returns (tokens received, elapsed s, cancellation latencies ms)."""
+    counts = [0] * streams
+    ended = [0.0] * streams
+    started = threading.Barrier(streams + 1) if cancel else None
+
+    def consume(index):
+        for _ in llm.generate("hi", use_system_prompt=False, request_id=f"sync-{index}"):
+            counts[index] += 1
+            if cancel and counts[index] == CANCEL_AFTER:
+                started.wait()
+        ended[index] = time.perf_counter()
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(streams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    latencies = []
+    if cancel:
+        started.wait()
+        cancelled_at = time.perf_counter()
+        for index in range(streams):
+            llm.cancel_generation(f"sync-{index}")
+    for thread in threads:
+        thread.join()
+    if cancel:
+        latencies = [(end - cancelled_at) * 1000 for end in ended]
+    return sum(counts), time.perf_counter() - start, latencies
+
+
+async def run_async(llm: LLM, streams: int, cancel: bool):
+    """Returns (tokens received, elapsed s, cancellation latencies ms)."""
+    counts = [0] * streams
+    ended = [0.0] * streams
+    ready = asyncio.Semaphore(0)
+
+    async def consume(index):
+        async for _ in llm.agenerate("hi", use_system_prompt=False, request_id=f"async-{index}"):
+            counts[index] += 1
+            if cancel and counts[index] == CANCEL_AFTER:
+                ready.release()
+        ended[index] = time.perf_counter()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(consume(i)) for i in range(streams)]
+    latencies = []
+    if cancel:
+        for _ in range(streams):
+            await ready.acquire()
+        cancelled_at = time.perf_counter()
+        for index in range(streams):
+            llm.cancel_generation(f"async-{index}")
+    await asyncio.gather(*tasks)
+    if cancel:
+        latencies = [(end - cancelled_at) * 1000 for end in ended]
+    return sum(counts), time.perf_counter() - start, latencies
+
+
+def measured(run):
+    """Runs `run()` and adds the client process CPU time (s) to its result."""
+    cpu = time.process_time()
+    result = run()
+    return result + (time.process_time() - cpu,)
+
+
+def report(name: str, streams: int, result, cancel_result) -> None:
+    tokens, elapsed, _, cpu = result
+    latencies = sorted(cancel_result[2])
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:>6} {streams:>8} {tokens / elapsed:>10.0f} {cpu / tokens * 1e6:>12.1f} "
+          f"{statistics.median(latencies):>12.2f} {p99:>12.2f}")
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4]))
+        return
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 10.0) / 1000
+    logging.getLogger("llm_module").setLevel(logging.ERROR)
+    logging.getLogger("urllib3").setLevel(logging.ERROR) # "Connection pool is full" with 100 threads
+
+    stub, url = start_stub(tokens, delay)
+    try:
+        print(f"{tokens} tokens per stream, {delay * 1000:.0f} ms per token")
+        print(f"{'path':>6} {'streams':>8} {'tokens/s':>10} {'CPU us/tok':>12} {'cancel p50':>12} {'cancel p99':>12}")
+        for streams in STREAMS:
+            llm = LLM(backend="ollama", model="stub", base_url=url)
+            run_sync(llm, 1, False) # Warm-up: connection check and first connection
+            report("sync", streams, measured(lambda: run_sync(llm, streams, False)), run_sync(llm, streams, True))
+
+            async def run_both():
+                llm = LLM(backend="ollama", model="stub", base_url=url, max_connections=streams)
+                await run_async(llm, 1, False) # Warm-up: client creation and first connection
+                cpu = time.process_time()
+                result = await run_async(llm, streams, False) + (time.process_time() - cpu,)
+                cancel_result = await run_async(llm, streams, True)
+                await llm.aclose()
+                return result, cancel_result
+            report("async", streams, *asyncio.run(run_both()))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
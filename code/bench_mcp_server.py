@@ -0,0 +1,188 @@
+# bench_mcp_server.py
+"""
+Requests per second and p99 latency of the MCP server, old and new request path.
+
+Starts the MCP app under uvicorn in a child process and drives it with
+`concurrency` keep-alive connections (plain `http.client`, one thread each,
+to leave the CPU to the server) from this process. Routes compared:
+
+- legacy: the request path before this change, re-created as an extra route
+  on a server with the request logging middleware enabled (regex +
+  `ast.parse` / `ast.literal_eval` per call, five debug prints per request;
+  the prints go to /dev/null here, so a real console costs more);
+- text: `/mcp` with the same `{"query": "CALL ..."}` body, parsed by the tokenizer;
+- json: `/mcp` with a structured `{"name": ..., "arguments": ...}` body;
+- batch: `/mcp/batch` with `BATCH` calls per request (rates are per call).
+
+The calls are the read-only tools (price, availability, category lookups).
+
+Usage:
+    python bench_mcp_server.py [requests] [concurrency]
+"""
+import ast
+import http.client
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+BATCH = 4
+
+CALLS = [
+    ("get_price", {"item": "margherita"}),
+    ("check_availability", {"item": "acai bowl"}),
+    ("clarify_category", {"category": "pizzas"}),
+    ("get_price", {"item": "fries"}),
+]
+
+
+def legacy_route(app_module) -> None:
+    """Registers the pre-change request path on the app as POST /mcp_legacy."""
+    from fastapi import Request
+
+    def parse_args(args_str):
+        try:
+            tree = ast.parse(f"f({args_str})", mode='eval')
+            call = tree.body
+            return {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+        except Exception as e:
+            raise ValueError(f"❌ Failed to parse arguments: {args_str} → {e}")
+
+    def parse_function_call(llm_output: str):
+        match = re.match(r'CALL\s+(\w+)\((.*)\)', llm_output.strip(), re.DOTALL)
+        if not match:
+            raise ValueError(f"Invalid function call format: {llm_output}")
+        return match.group(1), parse_args(match.group(2))
+
+    def dispatch(prompt: str, session_id=None) -> str:
+        try:
+            func_name, args = parse_function_call(prompt)
+            print("🛠️ Parsed function name:", func_name)
+            print("🧪 Parsed args:", args)
+            print("🧪 Arg types:", {k: type(v) for k, v in args.items()})
+            if func_name in app_module.FUNCTIONS:
+                return app_module.FUNCTIONS[func_name](**args)
+            return f"⚠️ Unknown function: {func_name}"
+        except Exception as e:
+            return f"⚠️ MCP Error: {str(e)}"
+
+    @app_module.app.post("/mcp_legacy")
+    async def mcp_legacy(request: Request):
+        print(f"📥 {request.method} {request.url}") # The request logging middleware
+        data = await request.json()
+        response = {"response": dispatch(data.get("query", ""), data.get("session_id"))}
+        print("📤 Response status: 200")
+        return response
+
+
+def serve(port: int, legacy: bool) -> None:
+    import uvicorn
+
+    if legacy:
+        os.environ["MCP_LOG_REQUESTS"] = "1"
+    import app
+    sys.stdout = open(os.devnull, "w")
+    if legacy:
+        legacy_route(app)
+    uvicorn.run(app.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def call_text(name: str, args: dict) -> str:
+    return f"CALL {name}(" + ", ".join(f"{key}={value!r}" for key, value in args.items()) + ")"
+
+
+def drive(port: int, path: str, bodies, requests: int, concurrency: int):
+    """Sends `requests` POSTs over `concurrency` keep-alive connections. Returns (elapsed s, latencies ms)."""
+    payloads = [json.dumps(body) for body in bodies]
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset: int, record: bool):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        local = []
+        for index in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            conn.request("POST", path, payloads[index % len(payloads)], headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"{path} returned {response.status}")
+            local.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        if record:
+            with lock:
+                latencies.extend(local)
+
+    elapsed = 0.0
+    for record in (False, True): # Warm-up round first
+        threads = [threading.Thread(target=worker, args=(i, record)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(legacy: bool):
+    """Starts the MCP server in a child process. Returns (process, port) once it accepts connections."""
+    port = _free_port()
+    args = [sys.executable, __file__, "--serve", str(port)] + (["legacy"] if legacy else [])
+    server = subprocess.Popen(args, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return server, port
+        except OSError:
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.kill()
+                raise RuntimeError("MCP server did not start")
+            time.sleep(0.2)
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]), legacy=sys.argv[3:] == ["legacy"])
+        return
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    text_bodies = [{"query": call_text(name, args)} for name, args in CALLS]
+    json_bodies = [{"name": name, "arguments": args} for name, args in CALLS]
+    batch_bodies = [{"calls": json_bodies[:BATCH]}]
+    runs = [
+        ("legacy", True, "/mcp_legacy", text_bodies, 1),
+        ("text", False, "/mcp", text_bodies, 1),
+        ("json", False, "/mcp", json_bodies, 1),
+        (f"batch x{BATCH}", False, "/mcp/batch", batch_bodies, BATCH),
+    ]
+    print(f"{requests} requests, {concurrency} concurrent connections")
+    print(f"{'route':>10} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, legacy, path, bodies, calls_per_request in runs:
+        server, port = start_server(legacy)
+        try:
+            elapsed, latencies = drive(port, path, bodies, requests // calls_per_request, concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)]
+        rate = len(latencies) * calls_per_request / elapsed
+        print(f"{name:>10} {rate:>9.0f} {statistics.median(latencies):>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_menu_search.py
+"""
+Compares menu lookups with and without the prebuilt search index.
+
+Generates synthetic menus of increasing size (categories -> sub-categories ->
+priced items, with made-up dish names) and measures, per query:
+
+- fuzzy: `difflib.get_close_matches` over every item (the old
+  `find_closest_item`) versus `MenuSearchIndex.best`;
+- substring: a recursive walk of the menu JSON (the old last resort of
+  `check_availability`) versus `MenuSearchIndex.find_substring`.
+
+Queries are menu items with one or two typos, like ASR output.
+
+Usage:
+    python bench_menu_search.py [max_items]
+"""
+import random
+import statistics
+import sys
+import time
+from difflib import get_close_matches
+
+from menu_manager import MenuManager
+from menu_search import MenuSearchIndex
+
+WORDS = [
+    "chicken", "beef", "paneer", "tikka", "alfredo", "supreme", "margherita", "pepperoni", "truffle",
+    "smoked", "salmon", "avocado", "teriyaki", "spicy", "garlic", "honey", "mustard", "grilled",
+    "crispy", "shawarma", "falafel", "halloumi", "mushroom", "funghi", "tropical", "berry", "choco",
+    "mango", "lime", "cajun", "buffalo", "korean", "sesame", "ginger", "basil", "pesto", "tandoori",
+]
+
+
+def synthetic_menu(items: int, seed: int = 0) -> dict:
+    """Builds a menu JSON with `items` priced dishes in nested categories."""
+    rng = random.Random(seed)
+    menu: dict = {}
+    for index in range(items):
+        category = menu.setdefault(f"Category {index % 40}", {})
+        sub = category.setdefault(f"Section {index % 7}", {})
+        name = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 3)))
+        sub[f"{name} {index}"] = round(rng.uniform(10, 80), 2)
+    return menu
+
+
+def typo(text: str, rng: random.Random) -> str:
+    chars = list(text)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("aeiourstln")
+    return "".join(chars)
+
+
+def recursive_search(item: str, section):
+    if isinstance(section, dict):
+        for key, value in section.items():
+            if item in key.lower():
+                return key
+            result = recursive_search(item, value)
+            if result:
+                return result
+    elif isinstance(section, list):
+        for value in section:
+            if item in value.lower():
+                return value
+    elif isinstance(section, str) and item in section.lower():
+        return section
+    return None
+
+
+def timed(fn, queries) -> float:
+    """Median ms per call."""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    max_items = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sizes = [size for size in (100, 1000, 10000, 50000, 100000) if size <= max_items]
+    print(f"{'items':>8} {'build ms':>9} {'difflib ms':>11} {'index ms':>9} {'walk ms':>9} {'substr ms':>10}")
+    for size in sizes:
+        rng = random.Random(size)
+        menu = MenuManager.__new__(MenuManager) # Skip reading a file, reuse the index builders
+        menu.menu = synthetic_menu(size)
+        menu.item_index = menu._build_index()
+        start = time.perf_counter()
+        index = MenuSearchIndex(menu.menu, menu.item_index)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        keys = list(menu.item_index)
+        queries = [typo(rng.choice(keys), rng) for _ in range(200)]
+        # Unique item tails, so matches are spread over the whole menu
+        substrings = [key[-rng.randint(6, 10):] for key in rng.sample(keys, min(200, len(keys)))]
+        slow = max(5, 2000 // max(1, size // 100)) # Fewer repeats for the linear scans
+
+        difflib_ms = timed(lambda q: get_close_matches(q, keys, n=1, cutoff=0.8), queries[:slow])
+        index_ms = timed(lambda q: index.best(q, cutoff=0.8), queries)
+        walk_ms = timed(lambda q: recursive_search(q, menu.menu), substrings[:slow])
+        substr_ms = timed(index.find_substring, substrings)
+        print(f"{size:>8} {build_ms:>9.1f} {difflib_ms:>11.3f} {index_ms:>9.3f} {walk_ms:>9.3f} {substr_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
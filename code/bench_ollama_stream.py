@@ -0,0 +1,125 @@
+# bench_ollama_stream.py
+"""
+Throughput and memory of the Ollama stream decoder vs the old split-and-json.loads loop.
+
+Replays `/api/chat` streams in the format Ollama sends (one JSON object per
+token with model and timestamp, the final line with the timing stats;
+content with multi-byte characters and the odd escaped character) of
+100, 1k and 10k tokens, cut into network chunks two ways:
+
+- line: one read per line, as a local Ollama delivers tokens;
+- 64k: 64 KiB reads, as when the consumer falls behind (or for a
+  non-streamed backlog). These cut lines and UTF-8 characters anywhere.
+
+Compared: the old `_yield_ollama_chunks` body (decode every chunk to str,
+append to a str buffer, `split('\\n', 1)` per line, `json.loads` per line)
+and `OllamaStreamDecoder`. Reports MB/s and the peak memory traced while
+decoding (tracemalloc, separate run).
+
+Usage:
+    python bench_ollama_stream.py [rounds]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from ollama_stream import OllamaStreamDecoder
+
+WORDS = ["The", " margherita", " costs", " 31", " AED", ".", " Café", " crème", " 🍕", " \"extra\"", "\n", " cheese", ",", " okay", "?"]
+
+
+def capture(tokens: int) -> bytes:
+    """Builds a stream in Ollama's wire format (Go's encoder: compact, raw UTF-8, escapes quotes and control characters)."""
+    lines = []
+    for index in range(tokens):
+        lines.append(json.dumps({
+            "model": "hf.co/bartowski/Mistral-Small-24B-Instruct-2501-GGUF:Q4_K_M",
+            "created_at": f"2025-05-01T12:00:{index % 60:02d}.{index:06d}Z",
+            "message": {"role": "assistant", "content": WORDS[index % len(WORDS)]},
+            "done": False,
+        }, ensure_ascii=False, separators=(",", ":")))
+    lines.append(json.dumps({
+        "model": "hf.co/bartowski/Mistral-Small-24B-Instruct-2501-GGUF:Q4_K_M",
+        "created_at": "2025-05-01T12:01:00.000000Z",
+        "message": {"role": "assistant", "content": ""},
+        "done_reason": "stop", "done": True, "total_duration": 5191566416, "load_duration": 2154458,
+        "prompt_eval_count": 26, "prompt_eval_duration": 383809000, "eval_count": tokens, "eval_duration": 4799921000,
+    }, separators=(",", ":")))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def split_lines(data: bytes):
+    return [line + b"\n" for line in data.split(b"\n")[:-1]]
+
+
+def split_fixed(data: bytes, size: int = 64 * 1024):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def legacy_decode(chunks):
+    """The decoding part of the old `_yield_ollama_chunks`."""
+    contents = []
+    buffer = ""
+    pending = b"" # The old loop called chunk_bytes.decode('utf-8') and failed on a split character; keep it comparable
+    for chunk_bytes in chunks:
+        try:
+            buffer += (pending + chunk_bytes).decode("utf-8")
+            pending = b""
+        except UnicodeDecodeError as e:
+            buffer += (pending + chunk_bytes)[:e.start].decode("utf-8")
+            pending = (pending + chunk_bytes)[e.start:]
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            content = chunk.get("message", {}).get("content")
+            if content:
+                contents.append(content)
+            if chunk.get("done"):
+                return contents
+    return contents
+
+
+def decoder_decode(chunks):
+    contents = []
+    decoder = OllamaStreamDecoder()
+    for chunk_bytes in chunks:
+        for chunk in decoder.feed(chunk_bytes):
+            if chunk.content:
+                contents.append(chunk.content)
+            if chunk.done:
+                return contents
+    return contents
+
+
+def measure(decode, chunks, size: int, rounds: int):
+    """Returns (MB/s, peak KiB)."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode(chunks)
+    rate = size * rounds / (time.perf_counter() - start) / 1e6
+    tracemalloc.start()
+    decode(chunks)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rate, peak / 1024
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'tokens':>7} {'chunks':>7} {'KiB':>7} {'legacy MB/s':>12} {'decoder MB/s':>13} {'legacy peak KiB':>16} {'decoder peak KiB':>17}")
+    for tokens in (100, 1000, 10000):
+        data = capture(tokens)
+        for name, chunks in (("line", split_lines(data)), ("64k", split_fixed(data))):
+            expected = legacy_decode(chunks)
+            assert decoder_decode(chunks) == expected == [WORDS[i % len(WORDS)] for i in range(tokens)]
+            count = max(1, rounds * 1000 // tokens)
+            legacy_rate, legacy_peak = measure(legacy_decode, chunks, len(data), count)
+            rate, peak = measure(decoder_decode, chunks, len(data), count)
+            print(f"{tokens:>7} {name:>7} {len(data) / 1024:>7.0f} {legacy_rate:>12.1f} {rate:>13.1f} {legacy_peak:>16.0f} {peak:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench_order_journal.py
+"""
+Measures confirmed orders per second written to the order journal.
+
+Each of `threads` producers (concurrent sessions) confirms orders one after
+another: it appends the order and waits for its receipt, as `place_order`
+does before replying. Compared with the old `functions.place_order`, which
+opened `orders.txt`, appended a line and closed it on every order (run
+here with and without an fsync per order to match the journal's modes).
+
+Reports orders/s, the acknowledgement latency (p50 / p99) and the average
+number of orders per group commit.
+
+Usage:
+    python bench_order_journal.py [orders] [threads]
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from order_journal import OrderJournal
+
+ORDER = {
+    "session_id": "3f9c2a1b",
+    "items": [["Margherita", 2]],
+    "nyu_id": "N12345678",
+    "building": "A1A",
+    "phone": "0501234567",
+    "dietary": "no nuts",
+}
+
+
+def run_producers(confirm, orders: int, threads: int):
+    """Runs `confirm()` `orders` times spread over `threads` threads. Returns (elapsed s, latencies ms)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def producer(count):
+        local = []
+        for _ in range(count):
+            start = time.perf_counter()
+            confirm()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=producer, args=(orders // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, latencies
+
+
+def legacy_writer(path: str, fsync: bool):
+    lock = threading.Lock()
+
+    def confirm():
+        with lock, open(path, "a") as f:
+            f.write(ORDER["items"][0][0] + "\n")
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    return confirm
+
+
+def report(name: str, elapsed: float, latencies, batch: str = "") -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:>24} {len(latencies) / elapsed:>10.0f} {statistics.median(latencies):>8.3f} {p99:>8.3f} {batch:>7}")
+
+
+def main() -> None:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    directory = tempfile.mkdtemp()
+    print(f"{orders} orders from {threads} concurrent sessions")
+    print(f"{'writer':>24} {'orders/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'batch':>7}")
+    try:
+        for fsync in (True, False):
+            name = "open/append/close" + (" +fsync" if fsync else "")
+            path = os.path.join(directory, f"orders-{fsync}.txt")
+            elapsed, latencies = run_producers(legacy_writer(path, fsync), orders // (10 if fsync else 1), threads)
+            report(name, elapsed, latencies)
+        for mode in ("always", "interval", "off"):
+            journal = OrderJournal(os.path.join(directory, mode), fsync=mode)
+            elapsed, latencies = run_producers(lambda: journal.append(ORDER).wait(), orders, threads)
+            stats = journal.stats()
+            journal.close()
+            report(f"journal fsync={mode}", elapsed, latencies, f"{stats['appended'] / stats['commits']:.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# bench_order_store.py
+"""
+Load test of the per-session order store behind `place_order`.
+
+Opens thousands of orders at once and walks every one of them through the
+five `place_order` steps (dish, NYU ID, building, phone, dietary note). Each
+step is run for all sessions, in shuffled order, on a thread pool before the
+next step starts, so every order is partial while the others are being
+served. The last step must confirm each session with its own NYU ID and
+phone number; any other reply counts as cross-talk.
+
+Backends:
+
+- memory: the in-process store, one process;
+- sqlite: the WAL store, one process;
+- sqlite xN: the WAL store shared by N processes, where consecutive steps of
+  one order are handled by different processes (as with several uvicorn
+  workers behind a load balancer).
+
+Usage:
+    python bench_order_store.py [sessions] [threads] [processes]
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from order_store import MemoryOrderStore, SQLiteOrderStore
+
+STEPS = 5
+
+
+def step_query(session: int, step: int) -> str:
+    """The caller's answer at each step of the order."""
+    return ["", f"N {session:08d}", "A1A", f"05{session:08d}", "no nuts please"][step]
+
+
+def expected_confirmation(session: int) -> str:
+    return f"🤚 NYU ID: N{session:08d}, 🏢 Building: A1A, 📱 Phone: 05{session:08d}."
+
+
+def run_steps(sessions, step: int, threads: int):
+    """Runs one step for the given sessions. Returns (latencies ms, cross-talk count)."""
+    def one(session):
+        start = time.perf_counter()
+        reply = app.place_order(query=step_query(session, step), item="margherita", session_id=f"bench-{session}")
+        latency = (time.perf_counter() - start) * 1000
+        wrong = step == STEPS - 1 and expected_confirmation(session) not in reply
+        return latency, wrong
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, sessions))
+    return [latency for latency, _ in results], sum(wrong for _, wrong in results)
+
+
+def run_in_process(store, sessions: int, threads: int):
+    app.orders = store
+    rng = random.Random(18)
+    latencies, wrong = [], 0
+    start = time.perf_counter()
+    for step in range(STEPS):
+        order = list(range(sessions))
+        rng.shuffle(order)
+        step_latencies, step_wrong = run_steps(order, step, threads)
+        latencies += step_latencies
+        wrong += step_wrong
+        if step == 0:
+            peak = len(store) # Every order is open and partial here
+    return latencies, wrong, time.perf_counter() - start, peak
+
+
+def _worker(rank, processes, path, sessions, threads, barrier, results):
+    app.orders = SQLiteOrderStore(path)
+    latencies, wrong = [], 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for step in range(STEPS):
+            barrier.wait()
+            mine = [session for session in range(sessions) if (session + step) % processes == rank]
+            step_latencies, step_wrong = run_steps(mine, step, threads)
+            latencies += step_latencies
+            wrong += step_wrong
+    app.orders.close()
+    results.put((latencies, wrong))
+
+
+def run_multi_process(path: str, sessions: int, threads: int, processes: int):
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(processes + 1)
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(rank, processes, path, sessions, threads, barrier, results))
+               for rank in range(processes)]
+    for worker in workers:
+        worker.start()
+    barrier.wait() # All workers are up
+    start = time.perf_counter()
+    for _ in range(STEPS - 1):
+        barrier.wait()
+    latencies, wrong = [], 0
+    for _ in workers:
+        worker_latencies, worker_wrong = results.get()
+        latencies += worker_latencies
+        wrong += worker_wrong
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    return latencies, wrong, elapsed
+
+
+def report(name: str, latencies, wrong: int, elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:>12} {len(latencies) / elapsed:>10.0f} {statistics.median(latencies):>8.3f} {p99:>8.3f} {wrong:>11}")
+
+
+def main() -> None:
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    directory = tempfile.mkdtemp()
+    print(f"{sessions} simultaneous orders, {STEPS} steps each, {threads} threads per process")
+    print(f"{'backend':>12} {'calls/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'cross-talk':>11}")
+    try:
+        for name, store in (("memory", MemoryOrderStore()), ("sqlite", SQLiteOrderStore(os.path.join(directory, "orders.sqlite3")))):
+            with contextlib.redirect_stdout(io.StringIO()): # place_order prints debug lines
+                latencies, wrong, elapsed, peak = run_in_process(store, sessions, threads)
+            report(name, latencies, wrong, elapsed)
+            assert peak == sessions, f"{peak} open orders, expected {sessions}"
+            store.close()
+        latencies, wrong, elapsed = run_multi_process(os.path.join(directory, "shared.sqlite3"), sessions, threads, processes)
+        report(f"sqlite x{processes}", latencies, wrong, elapsed)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
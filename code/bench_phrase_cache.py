@@ -0,0 +1,69 @@
+# bench_phrase_cache.py
+"""
+Measures time-to-first-audio of replies served from the phrase cache.
+
+A cache hit in `AudioProcessor.synthesize` computes the phrase key, fetches
+the chunks and puts them into the generation's audio queue. This script runs
+exactly that path (without a TTS engine) for the memory tier and for the disk
+tier (fresh cache instance on a populated directory), and reports the time
+until the first chunk is in the queue.
+
+Usage:
+    python bench_phrase_cache.py [repeats]
+"""
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from event_bridge import NotifyingQueue
+from phrase_cache import PhraseAudioCache, phrase_cache_key
+
+PHRASES = [
+    "📎 Please say the 8 digits of your NYU ID after the letter N.",
+    "🏢 Please mention your building number.",
+    "📱 Please provide your phone number.",
+    "📝 Do you have any allergy info or special requests?",
+]
+SOURCE_RATE = 24000
+
+
+def synthetic_audio(seconds: float) -> list:
+    """Stands in for engine output: 40 ms int16 chunks of noise."""
+    audio = (np.random.default_rng(0).standard_normal(int(seconds * SOURCE_RATE)) * 3000).astype(np.int16)
+    step = SOURCE_RATE * 40 // 1000
+    return [audio[i:i + step].tobytes() for i in range(0, len(audio), step)]
+
+
+def serve(cache: PhraseAudioCache, text: str) -> float:
+    """Runs the cache-hit path and returns ms until the first chunk is queued."""
+    queue = NotifyingQueue()
+    first = []
+    queue.on_put = lambda: first or first.append(time.perf_counter())
+    start = time.perf_counter()
+    chunks = cache.get(phrase_cache_key("kokoro", "af_heart", 1.26, text))
+    for chunk in chunks:
+        queue.put_nowait(chunk)
+    return (first[0] - start) * 1000
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    print(f"{name:<12} median {statistics.median(samples):.3f} ms   p99 {samples[int(len(samples) * 0.99) - 1]:.3f} ms   max {samples[-1]:.3f} ms")
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        warm = PhraseAudioCache(disk_dir=tmp)
+        for text in PHRASES:
+            warm.put(phrase_cache_key("kokoro", "af_heart", 1.26, text), synthetic_audio(3.0))
+
+        report("memory", [serve(warm, PHRASES[i % len(PHRASES)]) for i in range(repeats)])
+        report("disk (cold)", [serve(PhraseAudioCache(disk_dir=tmp), PHRASES[i % len(PHRASES)]) for i in range(repeats)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_resampler.py
+"""
+Compares the streaming polyphase resampler against the previous resample_poly code.
+
+Output path (24kHz -> 48kHz): the old UpsampleOverlap resampled every chunk
+twice (alone and concatenated with the previous chunk) and sliced out the
+middle; the new one runs StreamingResampler(2, 1).
+Input path (48kHz -> 16kHz): the old AudioInputProcessor called resample_poly
+per chunk without history; the new one runs StreamingResampler(1, 3).
+
+Reports mean / p99 latency per chunk and bytes allocated per chunk
+(tracemalloc, numpy allocations are traced).
+
+Usage:
+    python bench_resampler.py [chunks]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from resampler import StreamingResampler
+
+
+class LegacyUpsampleOverlap:
+    """The previous UpsampleOverlap algorithm (double resample_poly with overlap slicing)."""
+    def __init__(self):
+        self.previous_chunk = None
+        self.resampled_previous_chunk = None
+
+    def get_pcm_chunk(self, chunk: bytes) -> bytes:
+        audio_float = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+        upsampled_current_chunk = resample_poly(audio_float, 48000, 24000)
+        if self.previous_chunk is None:
+            part = upsampled_current_chunk[:len(upsampled_current_chunk) // 2]
+        else:
+            up = resample_poly(np.concatenate((self.previous_chunk, audio_float)), 48000, 24000)
+            prev_len = len(self.resampled_previous_chunk)
+            part = up[prev_len // 2:(len(up) - prev_len) // 2 + prev_len]
+        self.previous_chunk = audio_float
+        self.resampled_previous_chunk = upsampled_current_chunk
+        return (part * 32767).astype(np.int16).tobytes()
+
+
+def legacy_downsample(chunk: bytes) -> np.ndarray:
+    audio = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+    return np.clip(resample_poly(audio, 1, 3), -32768, 32767).astype(np.int16)
+
+
+def streaming_upsampler():
+    from upsample_overlap import UpsampleOverlap
+    return UpsampleOverlap().get_pcm_chunk
+
+
+def streaming_downsampler():
+    resampler = StreamingResampler(1, 3)
+    def process(chunk: bytes) -> np.ndarray:
+        return np.clip(resampler.process(np.frombuffer(chunk, dtype=np.int16)), -32768, 32767).astype(np.int16)
+    return process
+
+
+def make_chunks(rate: int, chunk_ms: int, count: int) -> list:
+    rng = np.random.default_rng(0)
+    samples = rate * chunk_ms // 1000
+    return [(rng.standard_normal(samples) * 6000).astype(np.int16).tobytes() for _ in range(count)]
+
+
+def measure(fn, chunks: list) -> tuple:
+    for chunk in chunks[:20]: # warm up (buffers grow to size)
+        fn(chunk)
+    timings = []
+    for chunk in chunks:
+        start = time.perf_counter()
+        fn(chunk)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    allocated = 0
+    for chunk in chunks[:200]:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(chunk)
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    timings = np.array(timings) * 1e6
+    return timings.mean(), np.percentile(timings, 99), allocated / min(len(chunks), 200)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cases = (
+        ("24k->48k, 40 ms chunks", make_chunks(24000, 40, count),
+         (("resample_poly x2", LegacyUpsampleOverlap().get_pcm_chunk), ("streaming", streaming_upsampler()))),
+        ("48k->16k, 20 ms chunks", make_chunks(48000, 20, count),
+         (("resample_poly", legacy_downsample), ("streaming", streaming_downsampler()))),
+    )
+    for title, chunks, variants in cases:
+        print(title)
+        for name, fn in variants:
+            mean_us, p99_us, alloc = measure(fn, chunks)
+            print(f"  {name:17s} mean {mean_us:7.1f} us  p99 {p99_us:7.1f} us  "
+                  f"peak alloc {alloc / 1024:6.1f} KiB/chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench_template_tts.py
+"""
+Measures time-to-first-audio and CPU cost of spliced template replies.
+
+Fills a phrase cache with stand-in audio for every fragment of the MCP reply
+templates (and the menu names), then renders typical replies with
+`TemplateSynthesizer.render` and reports wall time and thread CPU per reply.
+A spliced reply is complete when `render` returns, so its time is also the
+time to first audio. If RealtimeTTS is installed, the same replies are
+synthesized live by `AudioProcessor` for comparison.
+
+Usage:
+    python bench_template_tts.py [repeats]
+"""
+import statistics
+import sys
+import time
+from queue import Queue
+
+import numpy as np
+
+from phrase_cache import PhraseAudioCache
+from presynthesis import menu_vocabulary
+from template_tts import SAMPLE_RATE, TemplateSynthesizer, load_templates
+
+REPLIES = [
+    "💵 Margherita costs 31.00 dirhams.",
+    "✅ Yes, we have Chicken Tikka available.",
+    "❌ Sorry, Seafood is not on the menu.",
+    "✅ Yes, did you mean: Pepperoni?",
+]
+
+
+def synthetic_audio(text: str) -> list:
+    """Stands in for engine output: ~70 ms per word of noise in 40 ms chunks."""
+    seconds = 0.07 * max(1, len(text.split())) + 0.1
+    audio = (np.random.default_rng(len(text)).standard_normal(int(seconds * SAMPLE_RATE)) * 3000).astype(np.int16)
+    step = SAMPLE_RATE * 40 // 1000
+    return [audio[i:i + step].tobytes() for i in range(0, len(audio), step)]
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    print(f"{name:<22} median {statistics.median(samples):8.3f} ms   max {samples[-1]:8.3f} ms")
+
+
+def bench_spliced(repeats: int) -> list:
+    cache = PhraseAudioCache()
+    key = lambda text: f"kokoro|af_heart|1.26|{text}"
+    synth = TemplateSynthesizer(load_templates(), cache, key)
+    for text in synth.fragment_catalogue() + menu_vocabulary():
+        cache.put(key(text), synthetic_audio(text))
+    for reply in REPLIES:
+        if synth.render(reply) is None:
+            print(f"Not spliceable with this menu (skipped): {reply}")
+    replies = [r for r in REPLIES if synth.render(r) is not None]
+
+    wall, cpu = [], []
+    for i in range(repeats):
+        reply = replies[i % len(replies)]
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        synth.render(reply)
+        wall.append((time.perf_counter() - start) * 1000)
+        cpu.append((time.thread_time() - cpu_start) * 1000)
+    report("spliced TTFA", wall)
+    report("spliced CPU/reply", cpu)
+    return replies
+
+
+def bench_live(replies: list) -> None:
+    try:
+        from audio_module import AudioProcessor
+    except ImportError as e:
+        print(f"Live synthesis not available here ({e}); skipping the engine comparison.")
+        return
+    import threading
+    audio = AudioProcessor(engine="kokoro")
+    ttfa, cpu = [], []
+    for reply in replies:
+        first = []
+        audio.on_first_audio_chunk_synthesize = lambda: first.append(time.perf_counter())
+        start, cpu_start = time.perf_counter(), time.process_time()
+        audio.synthesize(reply, Queue(), threading.Event())
+        ttfa.append((first[0] - start) * 1000 if first else float("nan"))
+        cpu.append((time.process_time() - cpu_start) * 1000)
+    report("live TTFA", ttfa)
+    report("live CPU/reply", cpu)
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    replies = bench_spliced(repeats)
+    bench_live(replies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bench_tool_call_stream.py
+"""
+Time to tool dispatch with the streaming call parser vs. waiting for the whole LLM reply.
+
+Runs a stub Ollama server in this process that streams a typical tool-call
+answer — the `CALL ...` line followed by the explanation models tend to add
+anyway — one token every `token_ms`, as `/api/chat` does. Compared:
+
+- legacy: `call_llm` as before, reading the stream to `done`, joining the
+  parts and only then handing the text on;
+- streaming: `LLM.generate` feeding a `StreamingToolCallParser`, dispatching
+  as soon as the call is closed and cancelling the rest via
+  `LLM.cancel_generation`.
+
+Reports time to dispatch and total generation time separately (for the
+streaming path "total" is until the cancelled stream was closed), plus the
+tokens the stub actually sent, which shows the generation stopping early.
+
+Usage:
+    python bench_tool_call_stream.py [turns] [token_ms]
+"""
+import json
+import logging
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from llm_module import LLM
+from tool_call import StreamingToolCallParser, parse_call
+
+REPLY = (
+    'CALL place_order(query="I want two margherita pizzas", item="Margherita", quantity=2)\n\n'
+    "This places an order for two Margherita pizzas as the customer asked. "
+    "If the item is not available the order function will report it, and the customer can pick another dish."
+)
+TOKENS = re.findall(r"\s*\S{1,4}", REPLY) # Roughly LLM sized pieces
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    token_delay = 0.02
+    sent = 0 # Tokens written across all requests
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"Ollama is running")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in TOKENS:
+                time.sleep(self.token_delay)
+                self._chunk({"message": {"role": "assistant", "content": token}, "done": False})
+                with StubOllama.lock:
+                    StubOllama.sent += 1
+            self._chunk({"message": {"role": "assistant", "content": ""}, "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client cancelled the generation
+
+    def _chunk(self, data):
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def legacy_call_llm(url: str, prompt: str) -> str:
+    """The old `call_llm` reading loop: whole stream, then join."""
+    res = requests.post(f"{url}/api/chat", json={"model": "mistral", "messages": [{"role": "user", "content": prompt}], "stream": True}, stream=True)
+    content_parts = []
+    for line in res.iter_lines(decode_unicode=True):
+        if not line.strip():
+            continue
+        data = json.loads(line)
+        if "message" in data and "content" in data["message"]:
+            content_parts.append(data["message"]["content"])
+    return "".join(content_parts).strip()
+
+
+def run_legacy(url: str, turns: int):
+    dispatch = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        parse_call(legacy_call_llm(url, "I want two margherita pizzas"))
+        dispatch.append((time.perf_counter() - start) * 1000)
+    return dispatch, dispatch
+
+
+def run_streaming(llm: LLM, turns: int):
+    dispatch, total = [], []
+    for turn in range(turns):
+        request_id = f"bench-{turn}"
+        parser = StreamingToolCallParser()
+        start = time.perf_counter()
+        stream = llm.generate("I want two margherita pizzas", use_system_prompt=False, request_id=request_id)
+        for token in stream:
+            if parser.feed(token) is not None:
+                dispatch.append((time.perf_counter() - start) * 1000)
+                llm.cancel_generation(request_id)
+                break
+        stream.close()
+        total.append((time.perf_counter() - start) * 1000)
+    return dispatch, total
+
+
+def main() -> None:
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    StubOllama.token_delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    logging.getLogger("llm_module").setLevel(logging.WARNING)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    llm = LLM(backend="ollama", model="mistral", base_url=url)
+
+    print(f"{turns} turns, {len(TOKENS)} tokens per reply, {StubOllama.token_delay * 1000:.0f} ms per token")
+    print(f"{'path':>10} {'dispatch ms':>12} {'total ms':>10} {'tokens sent':>12}")
+    for name, run in (("legacy", lambda: run_legacy(url, turns)), ("streaming", lambda: run_streaming(llm, turns))):
+        StubOllama.sent = 0
+        dispatch, total = run()
+        time.sleep(2 * StubOllama.token_delay) # Let the stub notice closed connections
+        print(f"{name:>10} {statistics.mean(dispatch):>12.0f} {statistics.mean(total):>10.0f} {StubOllama.sent / turns:>12.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
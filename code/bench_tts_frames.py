@@ -0,0 +1,72 @@
+# bench_tts_frames.py
+"""
+Compares the two TTS wire formats per second of synthesized audio.
+
+JSON path:   UpsampleOverlap.get_base64_chunk + json.dumps (what send_json does)
+Binary path: UpsampleOverlap.get_pcm_chunk + pack_tts_frame
+
+Reports server CPU time and bytes on the wire. The input is a 24 kHz int16 tone
+cut into chunks of the size the TTS engines typically emit.
+
+Usage:
+    python bench_tts_frames.py [seconds_of_audio] [chunk_ms]
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+from tts_frame import pack_tts_frame
+from upsample_overlap import UpsampleOverlap
+
+SOURCE_RATE = 24000
+
+
+def make_chunks(seconds: float, chunk_ms: int) -> list:
+    """Builds int16 PCM chunks of a 440 Hz tone at 24 kHz."""
+    t = np.arange(int(seconds * SOURCE_RATE)) / SOURCE_RATE
+    audio = (np.sin(2 * np.pi * 440 * t) * 12000).astype(np.int16)
+    step = SOURCE_RATE * chunk_ms // 1000
+    return [audio[i:i + step].tobytes() for i in range(0, len(audio), step)]
+
+
+def run_json(chunks: list) -> tuple:
+    upsampler = UpsampleOverlap()
+    wire = 0
+    start = time.process_time()
+    for chunk in chunks:
+        wire += len(json.dumps({"type": "tts_chunk", "content": upsampler.get_base64_chunk(chunk)}))
+    return time.process_time() - start, wire
+
+
+def run_binary(chunks: list) -> tuple:
+    upsampler = UpsampleOverlap()
+    wire = 0
+    start = time.process_time()
+    for seq, chunk in enumerate(chunks):
+        wire += len(pack_tts_frame(1, seq, upsampler.get_pcm_chunk(chunk)))
+    return time.process_time() - start, wire
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    chunk_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    chunks = make_chunks(seconds, chunk_ms)
+
+    print(f"{seconds:.0f}s of audio in {len(chunks)} chunks of {chunk_ms} ms")
+    results = {}
+    for name, fn in (("json", run_json), ("binary", run_binary)):
+        fn(chunks[:50]) # warm up
+        cpu, wire = fn(chunks)
+        results[name] = (cpu, wire)
+        print(f"  {name:6s} {cpu / seconds * 1000:7.3f} ms CPU per audio second, "
+              f"{wire / seconds / 1024:7.1f} KiB/s on the wire")
+
+    json_cpu, json_wire = results["json"]
+    bin_cpu, bin_wire = results["binary"]
+    print(f"  binary saves {100 * (1 - bin_cpu / json_cpu):.1f}% CPU and {100 * (1 - bin_wire / json_wire):.1f}% bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_tts_sender.py
+"""
+Measures the idle CPU cost of the per-connection TTS sender task.
+
+Simulates N connected but silent clients on one event loop and compares the
+old 1 ms polling loop (`await asyncio.sleep(0.001)` + queue check) against
+the event-driven `LoopWakeup.wait()` used by `server.send_tts_chunks`.
+CPU time is taken from `time.process_time()`, so it includes every thread of
+the process.
+
+Usage:
+    python bench_tts_sender.py [connections] [seconds]
+"""
+import asyncio
+import sys
+import time
+from queue import Empty, Queue
+
+from event_bridge import LoopWakeup
+
+
+async def polling_sender(audio_chunks: Queue, stop: asyncio.Event) -> None:
+    """The previous sender: wake up every millisecond and poll the queue."""
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        try:
+            audio_chunks.get_nowait()
+        except Empty:
+            continue
+
+
+async def event_sender(audio_chunks: Queue, wakeup: LoopWakeup, stop: asyncio.Event) -> None:
+    """The event-driven sender: sleep until a worker thread notifies."""
+    while not stop.is_set():
+        try:
+            audio_chunks.get_nowait()
+            continue
+        except Empty:
+            pass
+        await wakeup.wait()
+
+
+async def measure(mode: str, connections: int, seconds: float) -> float:
+    """Runs `connections` idle senders for `seconds` and returns CPU seconds used."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    wakeups = [LoopWakeup(loop) for _ in range(connections)]
+    tasks = []
+    for wakeup in wakeups:
+        if mode == "polling":
+            tasks.append(asyncio.create_task(polling_sender(Queue(), stop)))
+        else:
+            tasks.append(asyncio.create_task(event_sender(Queue(), wakeup, stop)))
+
+    await asyncio.sleep(0.1) # let the tasks settle
+    cpu_start = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu_used = time.process_time() - cpu_start
+
+    stop.set()
+    for wakeup in wakeups:
+        wakeup.notify()
+    await asyncio.gather(*tasks)
+    return cpu_used
+
+
+def main() -> None:
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    print(f"Idle TTS sender CPU, {connections} connection(s), {seconds:.1f}s wall time")
+    for mode in ("polling", "event"):
+        cpu = asyncio.run(measure(mode, connections, seconds))
+        per_conn = cpu / seconds / connections * 100
+        print(f"  {mode:8s} total {cpu / seconds * 100:6.2f}% of one core, {per_conn:6.3f}% per connection")
+
+
+if __name__ == "__main__":
+    main()
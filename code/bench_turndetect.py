@@ -0,0 +1,108 @@
+# bench_turndetect.py
+"""
+Turn-detection classifier latency and throughput as the session count grows.
+
+Every simulated session is a thread that, like TurnDetection._text_worker,
+classifies growing partial transcripts back to back. Two modes are compared:
+
+  per-call: one forward pass per sentence, padded to max_length=128 and
+            serialised by a lock (how each session used the model before)
+  batched:  SentenceClassifier.predict, micro-batched across sessions with
+            dynamic padding
+
+Reports p50 / p99 request latency, sentences per second and mean batch size.
+Runs on CPU unless CUDA is available. With --backend=torch-int8 or
+--backend=onnx the batched mode uses that inference backend (the per-call
+baseline always uses the full precision model).
+
+Usage:
+    python bench_turndetect.py [seconds_per_step] [max_sessions] [--local] [--backend=onnx] [--model-dir=PATH]
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from sentence_classifier import SentenceClassifier
+
+SENTENCES = [
+    "I would like to order a large pepperoni pizza",
+    "Can I get two chicken teriyaki bowls and a coke please",
+    "What flavors do you have for the acai bowls",
+    "How much is the beef supreme",
+    "Actually make that a medium instead of a large",
+    "Do you have anything vegetarian on the menu today",
+    "I think that is everything, thank you",
+    "Wait, can you add some garlic bread to that order as well",
+]
+PARTIALS = [" ".join(s.split()[:n]) for s in SENTENCES for n in range(2, len(s.split()) + 1)]
+
+
+def per_call_predictor(classifier: SentenceClassifier):
+    """The previous behaviour: fixed 128-token padding, one pass per call under a lock."""
+    lock = threading.Lock()
+
+    def predict(sentence: str) -> float:
+        inputs = classifier.tokenizer(sentence, return_tensors="pt", truncation=True,
+                                      padding="max_length", max_length=classifier.max_length)
+        inputs = {key: value.to(classifier.device) for key, value in inputs.items()}
+        with lock, torch.no_grad():
+            outputs = classifier.classification_model(**inputs)
+        return F.softmax(outputs.logits, dim=1)[0, 1].item()
+    return predict
+
+
+def run_sessions(predict, sessions: int, seconds: float) -> tuple:
+    latencies = [[] for _ in range(sessions)]
+    stop = threading.Event()
+
+    def session(index: int) -> None:
+        i = index * 7
+        while not stop.is_set():
+            sentence = PARTIALS[i % len(PARTIALS)] + f" {index}" # distinct per session
+            start = time.perf_counter()
+            predict(sentence)
+            latencies[index].append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=session, args=(n,), daemon=True) for n in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    flat = np.array([value for values in latencies for value in values]) * 1000
+    return np.percentile(flat, 50), np.percentile(flat, 99), len(flat) / elapsed
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    seconds = float(args[0]) if args else 5.0
+    max_sessions = int(args[1]) if len(args) > 1 else 16
+    backend = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--backend=")), "torch")
+    model_dir = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--model-dir=")), None)
+    classifier = SentenceClassifier(local="--local" in sys.argv, backend=backend, model_dir=model_dir)
+    per_call = per_call_predictor(classifier)
+
+    print(f"device {classifier.device}, backend {classifier.backend}, {seconds:.0f}s per step")
+    print(f"{'sessions':>8} | {'per-call p50/p99 ms':>20} {'sent/s':>7} | {'batched p50/p99 ms':>19} {'sent/s':>7} {'batch':>6}")
+    sessions = 1
+    while sessions <= max_sessions:
+        p50_a, p99_a, rate_a = run_sessions(per_call, sessions, seconds)
+        batches_before, sentences_before = classifier.batches, classifier.batched_sentences
+        p50_b, p99_b, rate_b = run_sessions(classifier.predict, sessions, seconds)
+        batches = classifier.batches - batches_before
+        mean_batch = (classifier.batched_sentences - sentences_before) / batches if batches else 0.0
+        print(f"{sessions:>8} | {p50_a:9.1f} /{p99_a:8.1f} {rate_a:7.1f} | {p50_b:8.1f} /{p99_b:8.1f} {rate_b:7.1f} {mean_batch:6.1f}")
+        sessions *= 2
+    classifier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# compiled_menu.py
+from typing import Any, Dict, List, Optional, Union
+
+from menu_search import SCAN_LIMIT, SubstringIndex
+
+
+class MenuEntry:
+    """A priced (or listed) name of the menu, in the order `get_price` searches them."""
+    __slots__ = ("name", "lower", "price", "listed")
+
+    def __init__(self, name: str, price: Any, listed: bool = False) -> None:
+        self.name = name
+        self.lower = name.lower()
+        self.price = price
+        self.listed = listed # Listed without a price (e.g. sauces)
+
+
+class MenuCategory:
+    """A top-level menu category with everything the tool functions report about it."""
+    __slots__ = ("name", "lower", "flavors", "flavor_options", "sizes", "priced_items", "price_listing")
+
+    def __init__(
+            self,
+            name: str,
+            flavors: List[str],
+            sizes: Dict[str, float],
+            priced_items: List[tuple],
+            price_listing: Optional[str],
+        ) -> None:
+        self.name = name
+        self.lower = name.lower()
+        self.flavors = flavors
+        self.flavor_options = ", ".join(flavors)
+        self.sizes = sizes
+        self.priced_items = priced_items
+        self.price_listing = price_listing # None if nothing in the category has a price
+
+
+class MenuItem:
+    """An entry of `MenuManager.item_index` with its price resolved once."""
+    __slots__ = ("key", "name", "category", "price")
+
+    def __init__(self, key: str, name: str, category: str, price: Union[str, float, Dict[str, float]]) -> None:
+        self.key = key
+        self.name = name
+        self.category = category
+        self.price = price
+
+
+class CompiledMenu:
+    """
+    The menu JSON compiled once into flat lookup tables.
+
+    The MCP tool functions used to walk the nested menu dict on every call.
+    Everything they derive from it (priced names in search order, per-category
+    price listings, size tables, flavor lists and item prices) is
+    computed here when the menu is loaded, so a call is a dict lookup or a
+    trigram-filtered substring search. Lookups return exactly what the walking
+    implementation found, including which match wins when several names
+    contain the query. The reply wording stays in the tool functions.
+    """
+    def __init__(self, menu: Dict[str, Any], item_index: Dict[str, tuple], category_to_flavors: Dict[str, List[str]]) -> None:
+        """
+        Compiles the menu.
+
+        Args:
+            menu: The menu JSON.
+            item_index: `MenuManager.item_index` (lowercase name -> (category, name)).
+            category_to_flavors: `MenuManager.category_to_flavors` (lowercase category -> flavors).
+        """
+        self.entries: List[MenuEntry] = []
+        self.categories: List[MenuCategory] = []
+        for category, content in menu.items():
+            self._compile_entries(category, content)
+            self.categories.append(self._compile_category(category, content, category_to_flavors))
+
+        self.items: Dict[str, MenuItem] = {
+            key: MenuItem(key, name, category, self._item_price(menu.get(category), name))
+            for key, (category, name) in item_index.items()
+        }
+        self._entry_index = SubstringIndex([entry.lower for entry in self.entries])
+        self._category_index = SubstringIndex([category.lower for category in self.categories])
+        self._category_ids: Dict[str, int] = {}
+        for index, category in enumerate(self.categories):
+            self._category_ids.setdefault(category.lower, index)
+        self._category_lengths = sorted({len(name) for name in self._category_ids})
+
+    def _compile_entries(self, category: str, content: Any) -> None:
+        """Appends the names `get_price` matches in its first pass, in its search order."""
+        if isinstance(content, dict):
+            for subkey, subcontent in content.items():
+                if isinstance(subcontent, dict):
+                    for leaf_item, price in subcontent.items():
+                        self.entries.append(MenuEntry(leaf_item, price))
+                elif isinstance(subcontent, (int, float)):
+                    self.entries.append(MenuEntry(subkey, subcontent))
+        elif isinstance(content, (int, float)):
+            self.entries.append(MenuEntry(category, content))
+        elif isinstance(content, list):
+            for list_item in content:
+                self.entries.append(MenuEntry(list_item, None, listed=True))
+
+    @staticmethod
+    def _compile_category(category: str, content: Any, category_to_flavors: Dict[str, List[str]]) -> MenuCategory:
+        priced_items = []
+        sizes = {}
+        if isinstance(content, dict):
+            for key, value in content.items():
+                if isinstance(value, (int, float)):
+                    priced_items.append((key, value))
+                    sizes[key] = value
+                elif isinstance(value, dict):
+                    for subkey, subvalue in value.items():
+                        if isinstance(subvalue, (int, float)):
+                            priced_items.append((subkey, subvalue))
+
+        listing = None
+        if priced_items:
+            listing = f"🧾 Here are some {category} options with prices:\n"
+            for name, price in priced_items:
+                listing += f"• {name}: {price:.2f} AED\n"
+            listing = listing.strip()
+        flavors = category_to_flavors.get(category.lower(), [])
+        return MenuCategory(category, flavors, sizes, priced_items, listing)
+
+    @staticmethod
+    def _item_price(cat_data: Any, item: str) -> Union[str, float, Dict[str, float]]:
+        """Resolves `MenuManager.get_price` for one indexed item."""
+        if isinstance(cat_data, dict):
+            price = cat_data.get(item)
+            if isinstance(price, (int, float)):
+                return price
+            elif isinstance(price, str):
+                # price is description -> the category's size table ("Small", "Large")
+                sizes = {k: v for k, v in cat_data.items() if isinstance(v, (int, float))}
+                if sizes:
+                    return sizes
+        return "❌ Price not found"
+
+    def item_price(self, item_name: str) -> Union[str, float, Dict[str, float]]:
+        """
+        Looks up the price of an indexed item (see `MenuManager.get_price`).
+
+        Args:
+            item_name: Item name (any case).
+
+        Returns:
+            The price, a size table for items priced by size, or an error string.
+        """
+        item = self.items.get(item_name.lower())
+        if item is None:
+            return "❌ Not found"
+        return dict(item.price) if isinstance(item.price, dict) else item.price
+
+    def find_entry(self, query: str) -> Optional[MenuEntry]:
+        """
+        Returns the first priced or listed name containing `query`, in menu order.
+
+        Args:
+            query: The lowercase query.
+
+        Returns:
+            The entry, or None.
+        """
+        index = self._entry_index.first(query)
+        return self.entries[index] if index is not None else None
+
+    def find_category_containing(self, query: str) -> Optional[MenuCategory]:
+        """
+        Returns the first category whose name contains `query`.
+
+        Args:
+            query: The lowercase query.
+
+        Returns:
+            The category, or None.
+        """
+        index = self._category_index.first(query)
+        return self.categories[index] if index is not None else None
+
+    def find_category(self, query: str) -> Optional[MenuCategory]:
+        """
+        Returns the first category whose name contains `query` or is contained in it.
+
+        Args:
+            query: The lowercase category as heard.
+
+        Returns:
+            The category, or None.
+        """
+        if len(self.categories) <= SCAN_LIMIT:
+            for category in self.categories:
+                if query in category.lower or category.lower in query:
+                    return category
+            return None
+        best = self._category_index.first(query)
+        for length in self._category_lengths:
+            if best == 0 or length > len(query):
+                break
+            for start in range(len(query) - length + 1):
+                index = self._category_ids.get(query[start:start + length])
+                if index is not None and (best is None or index < best):
+                    best = index
+        return self.categories[best] if best is not None else None
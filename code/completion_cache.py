@@ -0,0 +1,128 @@
+# completion_cache.py
+import collections
+import re
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_completion_text(text: str) -> str:
+    """
+    Builds the cache key for a sentence passed to the completion model.
+
+    Collapses runs of whitespace and strips the ends. Punctuation and case are
+    left alone: `TurnDetection` already strips punctuation before asking, and
+    the model's answer may depend on case.
+
+    Args:
+        text: The sentence as given to the model.
+
+    Returns:
+        The normalized key.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class CompletionProbabilityCache:
+    """
+    Thread-safe memo of sentence completion probabilities, shared by all sessions.
+
+    The model output depends on the sentence only, so results are kept across
+    turns and sessions in an LRU keyed on the normalized text. Growing partial
+    transcripts ("I would", "I would like", ...) therefore pay one model call
+    per distinct normalized sentence, and repeats after a reset or from another
+    session are free.
+
+    Concurrent requests for the same key are coalesced: while one caller runs
+    the model, the others wait for its result instead of computing it again,
+    which debounces the bursts of identical partials RealtimeSTT produces.
+    """
+    def __init__(self, compute: Callable[[str], float], max_size: int = 4096) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            compute: Function returning the completion probability of a normalized sentence.
+            max_size: Maximum number of cached sentences (least recently used are evicted).
+        """
+        self._compute = compute
+        self.max_size = max_size
+        self._entries: "collections.OrderedDict[str, float]" = collections.OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, sentence: str) -> float:
+        """
+        Returns the completion probability of `sentence`, computing it at most once per key.
+
+        Args:
+            sentence: The sentence to classify.
+
+        Returns:
+            The probability (between 0.0 and 1.0) that the sentence is complete.
+        """
+        key = normalize_completion_text(sentence)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key) # Mark as recently used
+                self.hits += 1
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            probability = self._compute(key)
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = probability
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False) # Remove the least recently used item
+            del self._in_flight[key]
+        future.set_result(probability)
+        return probability
+
+    def clear(self) -> None:
+        """Drops all cached probabilities (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            A dict with `hits`, `misses` (model calls), `coalesced` (waited on a
+            concurrent identical request), `size` and `hit_rate`.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "size": len(self._entries),
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,102 @@
+# event_bridge.py
+import asyncio
+import threading
+from queue import Queue
+from typing import Callable, Optional
+
+
+class LoopWakeup:
+    """
+    A coalescing wake-up signal that worker threads use to rouse an asyncio task.
+
+    Any thread may call `notify()`; the waiting coroutine returns from `wait()`
+    on the event loop. Multiple notifications that arrive before the waiter
+    runs collapse into a single wake-up, so a burst of audio chunks costs one
+    loop iteration instead of one per chunk. Because the underlying event is
+    only cleared when `wait()` returns, a notification sent between the waiter
+    checking its state and going back to sleep is never lost.
+    """
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        Initializes the wake-up signal.
+
+        Args:
+            loop: The event loop the waiting task runs on. Defaults to the running loop,
+                  so pass it explicitly when constructing from a worker thread.
+        """
+        self._loop = loop if loop is not None else asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    def notify(self) -> None:
+        """Wakes the waiting task. Safe to call from any thread, cheap to call often."""
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._set)
+        except RuntimeError:
+            # Event loop already closed (server shutting down), nobody is waiting
+            pass
+
+    def _set(self) -> None:
+        """Sets the asyncio event on the loop thread."""
+        with self._lock:
+            self._scheduled = False
+        self._event.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sleeps until notified or until `timeout` seconds have passed.
+
+        Args:
+            timeout: Maximum seconds to sleep. None sleeps until notified.
+
+        Returns:
+            True if woken by a notification, False on timeout.
+        """
+        try:
+            if timeout is None:
+                await self._event.wait()
+            else:
+                await asyncio.wait_for(self._event.wait(), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+
+class NotifyingQueue(Queue):
+    """
+    A thread-safe `queue.Queue` that calls a hook after every put.
+
+    Used for the audio chunks of a running generation: the TTS worker threads
+    keep calling `put_nowait` as before, and the hook wakes the asyncio sender
+    task instead of it having to poll the queue.
+
+    With `record=True` every item is also appended to `recorded`, which keeps
+    the full stream available after consumers have drained the queue.
+    """
+    def __init__(self, on_put: Optional[Callable[[], None]] = None, maxsize: int = 0, record: bool = False) -> None:
+        """
+        Initializes the queue.
+
+        Args:
+            on_put: Callable invoked (without arguments) after each item is added.
+            maxsize: Maximum queue size, 0 for unbounded.
+            record: Whether to keep a copy of every item in `recorded`.
+        """
+        super().__init__(maxsize=maxsize)
+        self.on_put = on_put
+        self.recorded: Optional[list] = [] if record else None
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        """Puts an item into the queue and fires the `on_put` hook."""
+        super().put(item, block=block, timeout=timeout)
+        if self.recorded is not None:
+            self.recorded.append(item)
+        if self.on_put:
+            self.on_put()
@@ -1,11 +1,10 @@
 import json
-from menu_manager import MenuManager
-menu = MenuManager("data/enhanced_menu.json")
+from menu_snapshot import get_menu
+from order_journal import get_order_journal
 
 
 def check_availability(item: str) -> str:
-   from menu_manager import MenuManager
-   menu = MenuManager("data/enhanced_menu.json")
+   menu = get_menu()
 
 
    if item in menu.menu:
@@ -21,8 +20,7 @@ def check_availability(item: str) -> str:
 
 
 def place_order(item_name: str) -> str:
-   with open("orders.txt", "a") as f:
-       f.write(item_name + "\n")
+   get_order_journal().append({"item": item_name}).wait()
    return f"🧾 Order placed for {item_name}."
 
 
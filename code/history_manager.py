@@ -0,0 +1,142 @@
+# history_manager.py
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 2048 # Whole prompt: pinned system prompt + history window
+DEFAULT_LOW_WATER = 0.5   # A trim shrinks the window to this share of its budget
+MESSAGE_OVERHEAD = 4      # Chat template tokens around each message (role markers, separators)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text with a BPE tokenizer (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+class ConversationHistory:
+    """
+    Chat history held to a token budget, trimmed so the prompt prefix stays byte-stable.
+
+    The system prompt is pinned at the front and never trimmed. Each message
+    is stored once, as given, with its token count computed on append. When
+    the window exceeds its budget it is not shifted by one message per turn
+    (that would change the prompt's second message, and with it everything
+    after the system prompt, on every turn): the oldest messages are dropped
+    in one go down to `low_water` of the budget, starting the window at a
+    user turn. Between trims the prompt only grows at the end, so the
+    backend's prefix cache (Ollama/llama.cpp KV cache reuse, OpenAI-style
+    prompt caching) covers everything but the newest messages.
+
+    Behaves like the list it replaces for `append`, `len`, iteration and
+    indexing (over the window, without the system prompt).
+    """
+    def __init__(
+            self,
+            system_prompt: Optional[str] = None,
+            max_tokens: int = DEFAULT_MAX_TOKENS,
+            low_water: float = DEFAULT_LOW_WATER,
+            count_tokens: Callable[[str], int] = estimate_tokens,
+        ) -> None:
+        """
+        Creates an empty history.
+
+        Args:
+            system_prompt: Pinned first message of every prompt, or None.
+            max_tokens: Token budget of the whole prompt, system prompt included.
+            low_water: Share of the window budget a trim shrinks the window to (0..1).
+            count_tokens: Token counter for message contents.
+        """
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.low_water = low_water
+        self._system: Optional[Dict[str, str]] = None
+        self._system_tokens = 0
+        self._messages: List[Dict[str, str]] = []
+        self._tokens: List[int] = []
+        self._window_tokens = 0
+        self._lock = threading.Lock()
+        self.trims = 0           # Number of trims; the prompt prefix after the system prompt changes with each
+        self.dropped = 0         # Messages dropped by trims
+        self.set_system_prompt(system_prompt)
+
+    def set_system_prompt(self, system_prompt: Optional[str]) -> None:
+        with self._lock:
+            self._system = {"role": "system", "content": system_prompt} if system_prompt else None
+            self._system_tokens = self.count_tokens(system_prompt) + MESSAGE_OVERHEAD if system_prompt else 0
+            self._trim()
+
+    @property
+    def window_budget(self) -> int:
+        """Tokens available to the history window after the system prompt."""
+        return max(0, self.max_tokens - self._system_tokens)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens of the prompt `messages()` returns."""
+        return self._system_tokens + self._window_tokens
+
+    def append(self, message: Dict[str, str]) -> None:
+        """Adds a message ({"role": ..., "content": ...}) at the end, trimming the window if over budget."""
+        with self._lock:
+            tokens = self.count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD
+            self._messages.append(message)
+            self._tokens.append(tokens)
+            self._window_tokens += tokens
+            self._trim()
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+    def _trim(self) -> None:
+        budget = self.window_budget
+        if self._window_tokens <= budget:
+            return
+        target = int(budget * self.low_water)
+        drop = 0
+        remaining = self._window_tokens
+        last = len(self._messages) - 1 # The newest message always stays
+        while drop < last and (remaining > target or self._messages[drop]["role"] != "user"):
+            remaining -= self._tokens[drop]
+            drop += 1
+        if drop:
+            del self._messages[:drop]
+            del self._tokens[:drop]
+            self._window_tokens = remaining
+            self.trims += 1
+            self.dropped += drop
+            logger.info(f"🗂️✂️ History trimmed: dropped {drop} oldest messages, {self.tokens} of {self.max_tokens} prompt tokens in use.")
+
+    def messages(self) -> List[Dict[str, str]]:
+        """The prompt messages: pinned system prompt, then the window. The same message objects every call."""
+        with self._lock:
+            return ([self._system] if self._system else []) + self._messages
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages.clear()
+            self._tokens.clear()
+            self._window_tokens = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": len(self._messages),
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "trims": self.trims,
+            "dropped": self.dropped,
+        }
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(list(self._messages))
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def __bool__(self) -> bool:
+        return bool(self._messages)
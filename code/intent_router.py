@@ -0,0 +1,253 @@
+# intent_router.py
+import logging
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from word2number import w2n
+
+from menu_manager import MenuManager
+from menu_snapshot import get_menu
+from tool_call import ToolCall
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.75 # Below this confidence the transcript goes to the LLM
+UNEXPLAINED_PENALTY = 0.3 # Confidence lost per slot word that is neither menu vocabulary nor filler
+AMBIGUOUS_FACTOR = 0.5   # Several different dishes named in one utterance
+SIZE_ONLY_FACTOR = 0.5   # Only a size named ("a small"): which dish it is the size of is a guess
+FUZZY_CUTOFF = 0.6       # Minimum search score for a dish name that is not an exact phrase
+
+# Leading words the ASR often keeps before the actual request
+_LEAD = r"(?:(?:hi|hey|hello|ok|okay|so|um|uh|yes|yeah|and|also|then|well|sorry|excuse me|actually)\s+)*"
+
+# (intent, pattern, weight). Every pattern captures the dish part of the sentence as `slot`.
+_PATTERNS: List[Tuple[str, str, float]] = [
+    ("price", r"how much (?:is|are|does|do|would|will|for|was|were) (?P<slot>.+?)(?: (?:cost|costs|be|go for|run))?", 1.0),
+    ("price", r"what(?:'s| is| are| does| would be) (?:the )?(?:price|cost)s? (?:of|for|on) (?P<slot>.+)", 1.0),
+    ("price", r"what (?:does|do|would) (?P<slot>.+?) cost", 1.0),
+    ("price", r"(?:can|could|may) (?:i|you) (?:get|have|tell me|know) (?:the )?(?:price|cost)s? (?:of|for|on) (?P<slot>.+)", 1.0),
+    ("price", r"(?:the )?(?:price|cost) (?:of|for|on) (?P<slot>.+)", 0.95),
+    ("price", r"(?P<slot>.+?) price", 0.85),
+    ("availability", r"(?:do|did) (?:you|u|y'all) (?:guys )?(?:have|sell|serve|got|carry|make|do|offer) (?P<slot>.+)", 1.0),
+    ("availability", r"(?:is|are) (?:there )?(?P<slot>.+?) (?:available|on the menu|in stock)", 1.0),
+    ("availability", r"(?:have|got) you (?:got )?(?P<slot>.+)", 0.95),
+    ("availability", r"you (?:guys )?(?:have|got|sell) (?P<slot>.+)", 0.9),
+    ("availability", r"any (?P<slot>.+?)(?: left| available)?", 0.8),
+    ("order", r"i(?:'d| would) like to (?:order|get|have|try) (?P<slot>.+)", 1.0),
+    ("order", r"i(?:'d| would) like (?P<slot>.+)", 1.0),
+    ("order", r"i (?:want|wanna|need) to (?:order|get|have|try) (?P<slot>.+)", 1.0),
+    ("order", r"i (?:want|wanna|need) (?P<slot>.+)", 1.0),
+    ("order", r"i(?:'ll| will) (?:have|take|get|go with|do) (?P<slot>.+)", 1.0),
+    ("order", r"(?:can|could|may) i (?:get|have|order|grab) (?P<slot>.+)", 0.95),
+    ("order", r"(?:give|get) me (?P<slot>.+)", 0.95),
+    ("order", r"let me (?:get|have|order|grab) (?P<slot>.+)", 0.95),
+    ("order", r"(?:let's|lets) (?:do|get|go with) (?P<slot>.+)", 0.9),
+    ("order", r"(?:please )?order (?P<slot>.+)", 0.9),
+]
+
+# Slot words that carry no meaning for the call
+_FILLERS = {
+    "the", "a", "an", "some", "any", "your", "of", "please", "me", "for", "us", "just", "like",
+    "um", "uh", "maybe", "today", "now", "then", "thanks", "thank", "you", "one", "ones", "order",
+    "portion", "portions", "plate", "plates", "piece", "pieces", "serving", "also", "too", "there",
+}
+_SIZES = {"small", "medium", "regular", "large"} # A modifier when a dish or category is named too, never the dish
+_NUMBER_WORDS = set(w2n.american_number_system) - {"point"}
+_NON_WORD = re.compile(r"[^\w'\s]")
+_SPACES = re.compile(r"\s+")
+_PARENTHETICAL = re.compile(r"\([^)]*\)")
+
+
+class IntentMatch(NamedTuple):
+    """A transcript mapped to a tool call."""
+    intent: str        # "price", "availability" or "order"
+    call: ToolCall
+    confidence: float  # 0..1: pattern weight x dish match score x share of the sentence explained
+    entity: str        # Menu name the call refers to
+
+
+class _Entity(NamedTuple):
+    name: str          # As written in the menu
+    category: str      # Top-level category it belongs to
+    is_category: bool  # A top-level category itself
+
+
+def normalize(text: str) -> str:
+    """Lowercases a transcript and strips punctuation (apostrophes are kept)."""
+    text = text.lower().replace("’", "'").replace("&", " and ")
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def _aliases(name: str) -> List[str]:
+    """The ways a menu name is likely to appear in a transcript."""
+    base = normalize(_PARENTHETICAL.sub(" ", name))
+    forms = {base, base.replace("'", ""), base.replace("'", " ")}
+    for form in list(forms):
+        words = form.split()
+        if not words:
+            continue
+        last = words[-1]
+        forms.add(" ".join(words[:-1] + [last[:-1] if last.endswith("s") and len(last) > 3 else last + "s"]))
+    return [_SPACES.sub(" ", form).strip() for form in forms if form.strip()]
+
+
+class IntentRouter:
+    """
+    Maps common caller utterances straight to a tool call, without the LLM.
+
+    Built once per menu: every category, sub-category and dish name (with
+    plural and punctuation variants) goes into a phrase table, and a small
+    set of anchored sentence patterns covers price questions ("how much is
+    the X"), availability questions ("do you have Y") and orders ("I want two
+    Z"). `route` matches the patterns, finds the dish in the captured part by
+    the longest known phrase (or the fuzzy menu search as a fallback), reads a
+    leading quantity with `word2number`, and scores how much of the sentence
+    it explained. Callers use the call only above a confidence threshold and
+    ask the LLM otherwise.
+    """
+    def __init__(self, menu: MenuManager) -> None:
+        """
+        Compiles the grammar and phrase table for a menu.
+
+        Args:
+            menu: The menu the calls refer to.
+        """
+        self.menu = menu
+        self._patterns = [(intent, re.compile(rf"{_LEAD}{pattern}"), weight) for intent, pattern, weight in _PATTERNS]
+        self._phrases: Dict[Tuple[str, ...], _Entity] = {}
+        self._categories = set()
+        for category, content in menu.menu.items():
+            self._add(category, _Entity(category, category, True))
+            self._categories.add(category)
+            self._walk(category, content)
+        self._longest = max((len(words) for words in self._phrases), default=0)
+
+    def _add(self, name: str, entity: _Entity) -> None:
+        for alias in _aliases(name):
+            self._phrases.setdefault(tuple(alias.split()), entity) # First (menu order) wins
+
+    def _walk(self, category: str, content: Any) -> None:
+        if isinstance(content, dict):
+            for key, value in content.items():
+                self._add(key, _Entity(key, category, False))
+                self._walk(category, value)
+
+    def route(self, transcript: str) -> Optional[IntentMatch]:
+        """
+        Maps a transcript to a tool call.
+
+        Args:
+            transcript: What the caller said.
+
+        Returns:
+            The most confident match, or None if no pattern applies or no dish
+            is named. Low-confidence matches are returned too; compare
+            `confidence` with the threshold before using the call.
+        """
+        text = normalize(transcript)
+        best: Optional[IntentMatch] = None
+        for intent, pattern, weight in self._patterns:
+            if best is not None and weight <= best.confidence:
+                continue # Cannot beat what we have
+            match = pattern.fullmatch(text)
+            if match is None:
+                continue
+            candidate = self._resolve(intent, match.group("slot"), weight, transcript)
+            if candidate is not None and (best is None or candidate.confidence > best.confidence):
+                best = candidate
+        return best
+
+    def _resolve(self, intent: str, slot: str, weight: float, transcript: str) -> Optional[IntentMatch]:
+        words = slot.split()
+        quantity, words = self._quantity(words)
+        entities: List[_Entity] = []
+        unexplained: List[str] = []
+        index = 0
+        while index < len(words):
+            for length in range(min(self._longest, len(words) - index), 0, -1):
+                entity = self._phrases.get(tuple(words[index:index + length]))
+                if entity is not None:
+                    entities.append(entity)
+                    index += length
+                    break
+            else:
+                unexplained.append(words[index])
+                index += 1
+
+        score = 1.0
+        sized = any(w in _SIZES for w in words)
+        if entities:
+            # "a small acai bowl": some menus list sizes as dishes, but next to a dish or category "small" is a size
+            sizes = [e for e in entities if not e.is_category and e.name.lower() in _SIZES]
+            if len(sizes) < len(entities):
+                entities = [e for e in entities if e not in sizes]
+            elif sizes:
+                score *= SIZE_ONLY_FACTOR
+            # "margherita pizza": the category only repeats where the dish is from
+            dishes = [e for e in entities if not e.is_category]
+            named = {e.category for e in dishes}
+            entities = dishes + [e for e in entities if e.is_category and e.name not in named]
+            unexplained = [w for w in unexplained if w not in _FILLERS and w not in _SIZES]
+        else:
+            unexplained = [w for w in unexplained if w not in _FILLERS]
+            hit = self.menu.search_index.best(" ".join(unexplained), cutoff=FUZZY_CUTOFF) if unexplained else None
+            if hit is None:
+                return None
+            category = self.menu.item_index.get(hit.key, (hit.name, hit.name))[0]
+            entities = [_Entity(hit.name, category, False)]
+            score, unexplained = hit.score, []
+
+        if len({e.name for e in entities}) > 1:
+            score *= AMBIGUOUS_FACTOR
+        entity = entities[0]
+        confidence = weight * score * max(0.0, 1.0 - UNEXPLAINED_PENALTY * len(unexplained))
+        return IntentMatch(intent, self._call(intent, entity, quantity, transcript, sized), round(confidence, 3), entity.name)
+
+    @staticmethod
+    def _quantity(words: List[str]) -> Tuple[int, List[str]]:
+        """Reads a leading quantity ("2", "two", "a couple of"). Returns it (default 1) and the remaining words."""
+        if words and words[0].isdigit():
+            return max(1, int(words[0])), words[1:]
+        if words[:2] == ["a", "couple"] or words[:1] == ["couple"]:
+            rest = words[2:] if words[0] == "a" else words[1:]
+            return 2, rest[1:] if rest[:1] == ["of"] else rest
+        count = 0
+        while count < len(words) and (words[count] in _NUMBER_WORDS or (count and words[count] == "and")):
+            count += 1
+        while count and words[count - 1] == "and":
+            count -= 1
+        if count:
+            try:
+                return max(1, w2n.word_to_num(" ".join(words[:count]))), words[count:]
+            except ValueError:
+                pass
+        return 1, words
+
+    @staticmethod
+    def _call(intent: str, entity: _Entity, quantity: int, transcript: str, sized: bool = False) -> ToolCall:
+        if intent == "price":
+            return ToolCall("get_price", {"item": entity.name})
+        if intent == "availability":
+            return ToolCall("check_availability", {"item": entity.name})
+        if entity.is_category and not sized: # Only order once a dish or a size is named; ask which one first
+            return ToolCall("clarify_category", {"category": entity.name})
+        return ToolCall("place_order", {"query": transcript, "item": entity.name, "quantity": quantity})
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    """Returns the router for the current menu snapshot, rebuilt after a menu reload."""
+    global _router
+    menu = get_menu()
+    router = _router
+    if router is None or router.menu is not menu:
+        with _router_lock:
+            if _router is None or _router.menu is not menu:
+                _router = IntentRouter(menu)
+                logger.info(f"🧭 Intent grammar compiled ({len(_router._phrases)} menu phrases).")
+            router = _router
+    return router
@@ -6,10 +6,13 @@ import sys
 import time
 import json
 import uuid
+import asyncio
 import subprocess # <-- Restored usage
-from typing import Generator, List, Dict, Optional, Any
+from typing import AsyncGenerator, Generator, List, Dict, Optional, Any
 from threading import Lock
 
+from ollama_stream import OllamaStreamDecoder
+
 # --- Library Dependencies ---
 try:
     import requests
@@ -33,6 +36,13 @@ except ImportError:
     class APIConnectionError(APIError): pass
     logging.warning("🤖⚠️ openai library not installed. OpenAI/LMStudio backends will not function.")
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logging.warning("🤖⚠️ httpx library not installed. Async generation (LLM.agenerate) will not function.")
+
 # Configure logging
 # Use the root logger configured by the main application if available, else basic config
 log_level_str = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -61,6 +71,40 @@ except ImportError:
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 LMSTUDIO_BASE_URL = os.getenv("LMSTUDIO_BASE_URL", "http://127.0.0.1:1234/v1")
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Pooled connections per LLM instance for async generation; streams beyond this wait for a free connection.
+# A local server only runs a few generations in parallel anyway (Ollama: OLLAMA_NUM_PARALLEL).
+ASYNC_MAX_CONNECTIONS = {"ollama": 8, "lmstudio": 4, "openai": 64}
+if os.getenv("LLM_MAX_CONNECTIONS"):
+    ASYNC_MAX_CONNECTIONS = dict.fromkeys(ASYNC_MAX_CONNECTIONS, int(os.getenv("LLM_MAX_CONNECTIONS")))
+
+
+class _AsyncStreamCloser:
+    """
+    Closes an httpx streaming response from any thread.
+
+    Registered as the stream object of async requests so `cancel_generation`
+    (synchronous, possibly called from another thread) cancels them like the
+    sync ones: the response is closed on its own event loop, and the reader
+    sees the closed transport instead of polling a cancellation flag.
+    """
+    __slots__ = ("response", "loop")
+    _closing = set() # Keeps close tasks referenced until they are done
+
+    def __init__(self, response: "httpx.Response", loop: asyncio.AbstractEventLoop) -> None:
+        self.response = response
+        self.loop = loop
+
+    def close(self) -> None:
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._schedule_close)
+
+    def _schedule_close(self) -> None:
+        task = self.loop.create_task(self.response.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
 
 # --- Backend Client Creation/Check Functions ---
 def _create_openai_client(api_key: Optional[str], base_url: Optional[str] = None) -> OpenAI:
@@ -200,6 +244,7 @@ class LLM:
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         no_think: bool = False,
+        max_connections: Optional[int] = None,
     ):
         """
         Initializes the LLM interface for a specific backend and model.
@@ -211,6 +256,8 @@ class LLM:
             api_key: API key, primarily for OpenAI backend (can be omitted for others if not needed).
             base_url: Optional base URL for the backend API (overrides defaults/env vars).
             no_think: Experimental flag (currently unused in core logic, intended for future prompt modification).
+            max_connections: Connection pool size for async generation (`agenerate`). Defaults to the
+                             backend's entry in `ASYNC_MAX_CONNECTIONS`.
 
         Raises:
             ValueError: If an unsupported backend is specified.
@@ -239,6 +286,9 @@ class LLM:
         self._active_requests: Dict[str, Dict[str, Any]] = {}
         self._requests_lock = Lock()
         self._ollama_connection_ok: bool = False # Added explicit init
+        self.max_connections = max_connections or ASYNC_MAX_CONNECTIONS[self.backend]
+        self._async_client: Optional["httpx.AsyncClient"] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
 
         logger.info(f"🤖⚙️ Configuring LLM instance: backend='{self.backend}', model='{self.model}'")
 
@@ -421,6 +471,8 @@ class LLM:
             except Exception as e:
                 # Log error during close but continue - the request is still removed from tracking
                 logger.error(f"🤖💥 Error closing stream/response for request {request_id}: {e}", exc_info=False)
+        elif request_type.endswith("-async"):
+            logger.info(f"🤖🗑️ [{request_id}] Async request not connected yet, it is dropped once it connects.")
         else:
              logger.warning(f"🤖⚠️ [{request_id}] No stream object found in request data to close.")
 
@@ -611,7 +663,8 @@ class LLM:
             history: An optional list of previous messages (dicts with "role" and "content").
             use_system_prompt: If True, prepends the configured system prompt (if any).
             request_id: An optional unique ID for this generation request. If None, one is generated.
-            **kwargs: Additional backend-specific keyword arguments (e.g., temperature, top_p, stop sequences).
+            **kwargs: Additional backend-specific keyword arguments (e.g., temperature, top_p, stop sequences;
+                      keep_alive for Ollama, ignored by the other backends).
 
         Yields:
             str: Individual tokens (or small chunks of text) as they are generated by the LLM.
@@ -635,23 +688,13 @@ class LLM:
         req_id = request_id if request_id else f"{self.backend}-{uuid.uuid4()}"
         logger.info(f"🤖💬 Starting generation (Request ID: {req_id})")
 
-        messages = []
-        if use_system_prompt and self.system_prompt_message:
-            messages.append(self.system_prompt_message)
-        if history:
-            messages.extend(history)
-
-        if len(messages) == 0 or messages[-1]["role"] != "user":
-            added_text = text # for normal text
-            if self.no_think:
-                 # This modification logic remains specific for now
-                added_text = f"{text}/nothink" # for qwen 3
-            logger.info(f"🧠💬 llm_module.py generate adding role user to messages, content: {added_text}")
-            messages.append({"role": "user", "content": added_text})
+        messages = self._build_messages(text, history, use_system_prompt)
         logger.debug(f"🤖💬 [{req_id}] Prepared messages count: {len(messages)}")
 
         stream_iterator = None
         stream_object_to_register = None # This is the object we need to close on cancel
+        if self.backend != "ollama":
+            kwargs.pop("keep_alive", None) # Ollama only
 
         try:
             if self.backend == "openai":
@@ -701,6 +744,8 @@ class LLM:
                     "stream": True,
                     "options": options
                 }
+                if kwargs.get("keep_alive") is not None: # Keeps the model (and its prompt cache) loaded between turns
+                    payload["keep_alive"] = kwargs["keep_alive"]
                 logger.info(f"🤖💬 [{req_id}] Sending Ollama request to {ollama_api_url} with payload:")
                 logger.info(f"{json.dumps(payload, indent=2)}")
                 # Increase read timeout significantly for generation
@@ -745,6 +790,213 @@ class LLM:
             logger.debug(f"🤖ℹ️ [{req_id}] Exiting finally block. Active requests: {len(self._active_requests)}")
 
 
+    def _build_messages(self, text: str, history: Optional[List[Dict[str, str]]], use_system_prompt: bool) -> List[Dict[str, str]]:
+        """
+        Builds the chat messages: system prompt, history and the user text (unless history already ends with it).
+
+        A history that starts with its own system message (e.g. `ConversationHistory.messages()`)
+        keeps it as the only one, so the prompt prefix is the same on every turn.
+        """
+        messages = []
+        has_system = bool(history) and history[0].get("role") == "system"
+        if use_system_prompt and self.system_prompt_message and not has_system:
+            messages.append(self.system_prompt_message)
+        if history:
+            messages.extend(history)
+
+        if len(messages) == 0 or messages[-1]["role"] != "user":
+            added_text = text # for normal text
+            if self.no_think:
+                 # This modification logic remains specific for now
+                added_text = f"{text}/nothink" # for qwen 3
+            logger.info(f"🧠💬 llm_module.py generate adding role user to messages, content: {added_text}")
+            messages.append({"role": "user", "content": added_text})
+        return messages
+
+    # --- Async Generation ---
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """
+        Returns the pooled async HTTP client for the running event loop, creating it on first use.
+
+        One client (keep-alive connection pool of `max_connections`) serves
+        every concurrent `agenerate` stream on the loop. A client is bound to
+        the loop it was created on, so a new one is made if called from another
+        (the old one is closed, see `_close_stale_client`).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                self._close_stale_client(self._async_client, self._async_client_loop)
+                self._async_client = None
+            if self.backend == "ollama":
+                base_url = self.effective_ollama_url
+                headers = {}
+            elif self.backend == "lmstudio":
+                base_url = self.effective_lmstudio_url
+                headers = {"Authorization": "Bearer lmstudio-key"}
+            else:
+                base_url = self.effective_openai_base_url or OPENAI_BASE_URL
+                headers = {"Authorization": f"Bearer {self.effective_openai_key}"} if self.effective_openai_key else {}
+            if not base_url:
+                raise ValueError(f"No base URL configured for the '{self.backend}' backend.")
+            self._async_client = httpx.AsyncClient(
+                base_url=base_url.rstrip('/'),
+                headers=headers,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(600.0, connect=10.0, pool=None), # Queue for a connection as long as it takes
+            )
+            self._async_client_loop = loop
+            logger.info(f"🤖🔌 Created async HTTP client for {self.backend} ({self.max_connections} pooled connections).")
+        return self._async_client
+
+    @staticmethod
+    def _close_stale_client(client: "httpx.AsyncClient", loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        Closes a client created on another event loop, without waiting for it.
+
+        If that loop still runs (in another thread), the client is closed there.
+        Otherwise its connections can no longer be used, and the close runs on
+        the current loop; sockets that need the dead loop to close are left to
+        the garbage collector.
+        """
+        if loop is not None and not loop.is_closed() and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        _AsyncStreamCloser._closing.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            _AsyncStreamCloser._closing.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"🤖⚠️ Could not close the async HTTP client of a previous event loop: {task.exception()}")
+
+        task.add_done_callback(done)
+        logger.info("🤖🔌 Closing the async HTTP client of a previous event loop.")
+
+    async def agenerate(
+        self,
+        text: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        use_system_prompt: bool = True,
+        request_id: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncGenerator[str, None]:
+        """
+        Async counterpart of `generate`: streams tokens on the running event loop.
+
+        All streams of this instance share one pooled keep-alive HTTP client,
+        so many sessions can stream from a single event loop without a thread
+        each. `cancel_generation(request_id)` works for these streams too: it
+        closes the HTTP response, which ends the stream; no lock is taken per
+        token. Breaking out of the `async for` (or closing the generator)
+        closes the response as well.
+
+        Args:
+            text: The user's input prompt/text.
+            history: An optional list of previous messages (dicts with "role" and "content").
+            use_system_prompt: If True, prepends the configured system prompt (if any).
+            request_id: An optional unique ID for this generation request. If None, one is generated.
+            **kwargs: Additional backend-specific keyword arguments, as for `generate`.
+
+        Yields:
+            str: Individual tokens (or small chunks of text) as they are generated by the LLM.
+
+        Raises:
+            ImportError: If httpx is not installed.
+            ConnectionError: If communication with the backend fails.
+            RuntimeError: If the Ollama stream reports an error.
+            httpx.HTTPStatusError: For error responses (4xx or 5xx).
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx library is required for async generation but not installed.")
+        req_id = request_id if request_id else f"{self.backend}-{uuid.uuid4()}"
+        logger.info(f"🤖💬 Starting async generation (Request ID: {req_id})")
+        messages = self._build_messages(text, history, use_system_prompt)
+
+        if self.backend == "ollama":
+            valid_options = {"temperature", "top_k", "top_p", "num_predict", "stop"}
+            options = {k: v for k, v in kwargs.items() if k in valid_options}
+            if 'temperature' not in options:
+                options['temperature'] = 0.7
+            path = "/api/chat"
+            payload = {"model": self.model, "messages": messages, "stream": True, "options": options}
+            if kwargs.get("keep_alive") is not None:
+                payload["keep_alive"] = kwargs["keep_alive"]
+        else:
+            kwargs.pop("keep_alive", None) # Ollama only
+            if self.backend == "lmstudio" and 'temperature' not in kwargs:
+                kwargs['temperature'] = 0.7
+            path = "/chat/completions"
+            payload = {"model": self.model, "messages": messages, "stream": True, **kwargs}
+
+        client = self._get_async_client()
+        self._register_request(req_id, f"{self.backend}-async", None) # Cancellable while it waits for a pooled connection
+        cancelled = False
+        try:
+            async with client.stream("POST", path, json=payload) as response:
+                with self._requests_lock:
+                    request = self._active_requests.get(req_id)
+                    if request is not None:
+                        request["stream"] = _AsyncStreamCloser(response, asyncio.get_running_loop())
+                if request is None: # Cancelled while it waited for a connection
+                    logger.info(f"🤖🗑️ Async generation {req_id} cancelled before it connected.")
+                    return
+                response.raise_for_status()
+                try:
+                    lines = self._aparse_ollama(response) if self.backend == "ollama" else self._aparse_openai(response)
+                    async for content in lines:
+                        yield content
+                except (httpx.ReadError, httpx.StreamClosed, httpx.RemoteProtocolError) as e:
+                    with self._requests_lock:
+                        cancelled = req_id not in self._active_requests
+                    if not cancelled:
+                        raise ConnectionError(f"Communication error during generation: {e}") from e
+            if cancelled:
+                logger.info(f"🤖🗑️ Async generation {req_id} cancelled.")
+            else:
+                logger.info(f"🤖✅ Finished async generation successfully (request_id: {req_id})")
+        except (httpx.ConnectError, httpx.TimeoutException) as e:
+            logger.error(f"🤖💥 Connection/Timeout Error during async generation for {req_id}: {e}", exc_info=False)
+            raise ConnectionError(f"Communication error during generation: {e}") from e
+        finally:
+            with self._requests_lock:
+                self._active_requests.pop(req_id, None) # The response itself was closed by `async with`
+
+    async def _aparse_ollama(self, response: "httpx.Response") -> AsyncGenerator[str, None]:
+        """Yields message contents from an Ollama NDJSON stream until 'done'."""
+        decoder = OllamaStreamDecoder()
+        done = False
+        async for data in response.aiter_bytes(): # Decompressed, not decoded
+            if done:
+                continue # Read the body to its end, so the connection goes back to the pool
+            for chunk in decoder.feed(data):
+                if chunk.error:
+                    raise RuntimeError(f"Ollama stream error: {chunk.error}")
+                if chunk.content:
+                    yield chunk.content
+                if chunk.done:
+                    done = True
+                    break
+
+    async def _aparse_openai(self, response: "httpx.Response") -> AsyncGenerator[str, None]:
+        """Yields delta contents from an OpenAI-compatible server-sent events stream until [DONE]."""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                continue # The server ends the body right after
+            choices = json.loads(data).get("choices") or []
+            content = choices[0].get("delta", {}).get("content") if choices else None
+            if content:
+                yield content
+
+    async def aclose(self) -> None:
+        """Closes the async HTTP client (its pooled connections). Call from the loop that used it."""
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+
     # --- Backend-Specific Chunk Yielding Helpers ---
     def _yield_openai_chunks(self, stream, request_id: str) -> Generator[str, None, None]:
         """
@@ -819,8 +1071,9 @@ class LLM:
         """
         Iterates over an Ollama HTTP response stream, decoding JSON lines and yielding content.
 
-        Handles reading bytes, decoding UTF-8, parsing JSON chunks, extracting message content,
-        and checking for the 'done' signal. Checks for cancellation before processing each chunk.
+        Handles reading bytes, splitting and decoding lines (`OllamaStreamDecoder`), extracting
+        message content, and checking for the 'done' signal. Checks for cancellation before
+        processing each chunk.
         Ensures the response is closed upon completion, error, or cancellation.
 
         Args:
@@ -837,7 +1090,7 @@ class LLM:
             Exception: For JSON decoding errors or other unexpected issues.
         """
         token_count = 0
-        buffer = ""
+        decoder = OllamaStreamDecoder()
         processed_done = False # Flag to track if 'done' message was processed
         try:
             # --- Start Change ---
@@ -853,36 +1106,18 @@ class LLM:
                     if not chunk_bytes:
                         continue # Skip empty chunks
 
-                    buffer += chunk_bytes.decode('utf-8')
-
-                    # Process complete JSON objects separated by newlines in the buffer
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        if not line.strip():
-                            continue # Skip empty lines
-
-                        try:
-                            chunk = json.loads(line)
-                            if chunk.get('error'):
-                                logger.error(f"🤖💥 Ollama stream returned error for {request_id}: {chunk['error']}")
-                                raise RuntimeError(f"Ollama stream error: {chunk['error']}")
-                            content = chunk.get('message', {}).get('content')
-                            if content:
-                                token_count += 1
-                                yield content
-                            if chunk.get('done'):
-                                logger.debug(f"🤖✅ [{request_id}] Ollama signalled 'done'.")
-                                # Ensure any remaining buffer is cleared (should be unlikely if 'done' is last)
-                                buffer = ""
-                                processed_done = True # Mark done as processed
-                                break # Exit inner while loop on 'done'
-                        except json.JSONDecodeError:
-                            logger.warning(f"🤖⚠️ [{request_id}] Failed to decode JSON line: '{line[:100]}...'")
-                            # Continue trying to process buffer
-                        except Exception as e:
-                            # Reraise other exceptions during JSON processing
-                            logger.error(f"🤖💥 [{request_id}] Error processing Ollama stream chunk: {e}", exc_info=True)
-                            raise # Reraise for outer try/except
+                    # Complete lines in this chunk (malformed ones are logged and skipped by the decoder)
+                    for chunk in decoder.feed(chunk_bytes):
+                        if chunk.error:
+                            logger.error(f"🤖💥 Ollama stream returned error for {request_id}: {chunk.error}")
+                            raise RuntimeError(f"Ollama stream error: {chunk.error}")
+                        if chunk.content:
+                            token_count += 1
+                            yield chunk.content
+                        if chunk.done:
+                            logger.debug(f"🤖✅ [{request_id}] Ollama signalled 'done'.")
+                            processed_done = True # Mark done as processed
+                            break # Exit inner loop on 'done'
 
                     # If 'done' was received and processed, break outer loop too
                     if processed_done:
@@ -896,7 +1131,7 @@ class LLM:
 
                 # More robust check: verify it's the expected NoneType error on read
                 # and ideally confirm cancellation happened concurrently.
-                if "'NoneType' object has no attribute 'read'" in str(e):
+                if "'NoneType' object has no attribute 'read'" in str(e) or "'NoneType' object has no attribute 'readline'" in str(e):
                     # This is the specific error we expect from response.close() being called concurrently.
                     if is_cancelled:
                         logger.warning(f"🤖⚠️ [{request_id}] Caught AttributeError ('NoneType' has no attribute 'read') during Ollama stream iteration, likely due to concurrent cancellation. Stopping iteration.")
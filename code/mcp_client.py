@@ -0,0 +1,328 @@
+# mcp_client.py
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from tool_call import ToolCall, format_call
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MCP_URL = "http://localhost:9000/mcp"
+
+
+class MCPCallCancelled(Exception):
+    """Raised by `MCPCall.result` when the call was cancelled before it finished."""
+
+
+class MCPCall:
+    """
+    A single in-flight MCP request, returned by `MCPClient.submit`.
+
+    The request runs on the client's worker pool. `result` blocks until the
+    response arrives or `cancel` is called from another thread, whichever
+    comes first, so an abort never has to wait for the MCP server.
+    """
+    def __init__(self, query: str, session_id: Optional[str] = None, tool_call: Optional[ToolCall] = None) -> None:
+        """
+        Initializes the call handle.
+
+        Args:
+            query: The function call text (sent to the MCP server unless `tool_call` is given).
+            session_id: Conversation whose order state the call reads and updates.
+            tool_call: The parsed call, sent as a structured body instead of `query`.
+        """
+        self.query = query
+        self.session_id = session_id
+        self.tool_call = tool_call
+        self.started_at = time.monotonic()
+        self._future: Optional[Future] = None
+        self._done = threading.Event()
+        self._cancel_event = threading.Event()
+
+    def _attach(self, future: Future) -> None:
+        """Binds the worker future and wakes `result` as soon as it completes."""
+        self._future = future
+        future.add_done_callback(lambda _: self._done.set())
+
+    @property
+    def cancelled(self) -> bool:
+        """True once `cancel` was called."""
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """
+        Abandons the call. Waiters return immediately with `MCPCallCancelled`.
+
+        A request that has already been sent cannot be recalled; its response
+        is discarded when it arrives. Retries that have not started yet are skipped.
+        """
+        if self._cancel_event.is_set():
+            return
+        self._cancel_event.set()
+        if self._future is not None:
+            self._future.cancel()
+        self._done.set()
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """
+        Waits for the MCP response.
+
+        Args:
+            timeout: Maximum seconds to wait, None to wait until the client's own deadline.
+
+        Returns:
+            The `response` text of the MCP server (error messages included, as before).
+
+        Raises:
+            MCPCallCancelled: If `cancel` was called before the response arrived.
+            TimeoutError: If `timeout` expired first.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"MCP call did not finish within {timeout:.2f}s")
+        if self._cancel_event.is_set():
+            raise MCPCallCancelled(self.query)
+        return self._future.result()
+
+
+class MCPClient:
+    """
+    Persistent client for the MCP function server, shared by all sessions.
+
+    Keeps a pooled `requests.Session`, so consecutive calls reuse an open
+    keep-alive connection instead of paying a TCP handshake per sentence.
+    Every request has bounded connect and read timeouts, and the total time
+    spent on one call (including retries) is capped by `deadline`. Only
+    failures to *establish* a connection are retried: at that point the
+    server has not seen the request, so retrying cannot place an order twice.
+
+    With `in_process=True` the call is dispatched straight to `app.dispatch`
+    (the same code the `/mcp` endpoint runs), skipping HTTP entirely when the
+    MCP functions live in the same process as the speech pipeline.
+
+    Calls that are already parsed (`submit_call`) are sent as a structured
+    `{"name", "arguments"}` body, or run with `app.execute` in-process, so
+    the server does not parse the call text again.
+    """
+    def __init__(
+            self,
+            url: str = DEFAULT_MCP_URL,
+            in_process: bool = False,
+            dispatcher: Optional[Callable[..., str]] = None,
+            executor: Optional[Callable[..., str]] = None,
+            connect_timeout: float = 0.5,
+            read_timeout: float = 10.0,
+            deadline: float = 12.0,
+            max_retries: int = 3,
+            retry_backoff: float = 0.05,
+            pool_size: int = 4,
+        ) -> None:
+        """
+        Initializes the client. No connection is opened until the first call.
+
+        Args:
+            url: Endpoint of the MCP server.
+            in_process: If True, call the MCP functions directly instead of over HTTP.
+            dispatcher: In-process dispatch function ((query[, session_id]) -> response text).
+                        Defaults to `app.dispatch`, imported on first use. Implies `in_process`.
+            executor: In-process function for parsed calls ((ToolCall[, session_id]) -> response text).
+                      Defaults to `app.execute`, or, with a custom `dispatcher`, to that
+                      dispatcher given the formatted call text. Implies `in_process`.
+            connect_timeout: Seconds allowed to establish a connection.
+            read_timeout: Seconds allowed to wait for the response once connected.
+            deadline: Maximum total seconds per call, retries and backoff included.
+            max_retries: Maximum number of reconnect attempts after a connection failure.
+            retry_backoff: Initial backoff in seconds between reconnect attempts (doubles each time).
+            pool_size: Number of worker threads and pooled keep-alive connections.
+        """
+        self.url = url
+        self.in_process = in_process or dispatcher is not None or executor is not None
+        self._dispatcher = dispatcher
+        self._custom_dispatcher = dispatcher is not None
+        self._execute = executor
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="MCPClient")
+
+        self.calls = 0
+        self.retries = 0
+        self.cancellations = 0
+
+    def _resolve_dispatcher(self) -> Callable[..., str]:
+        """Returns the in-process dispatch function, importing the MCP app on first use."""
+        if self._dispatcher is None:
+            import app # Lazy: app imports the menu and FastAPI, which HTTP-only setups don't need
+            self._dispatcher = app.dispatch
+            logger.info("🗣️🔗 MCP calls are dispatched in-process.")
+        return self._dispatcher
+
+    def _resolve_executor(self) -> Callable[..., str]:
+        """Returns the in-process function for parsed calls."""
+        if self._execute is None:
+            if self._custom_dispatcher: # Hand the custom dispatcher the call as text
+                dispatcher = self._dispatcher
+                self._execute = lambda call, *session: dispatcher(format_call(call), *session)
+            else:
+                import app # Lazy, as in _resolve_dispatcher
+                self._execute = app.execute
+        return self._execute
+
+    @staticmethod
+    def _is_connect_failure(e: requests.exceptions.ConnectionError) -> bool:
+        """True if the request failed before it reached the server (safe to retry)."""
+        if isinstance(e, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(e.args[0], "reason", None) if e.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _post(self, call: MCPCall) -> str:
+        """Sends the query over HTTP, retrying connection failures within the deadline."""
+        deadline = call.started_at + self.deadline
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return f"⚠️ MCP Error: no response within {self.deadline:.1f}s"
+            if call.tool_call is not None:
+                body = {"name": call.tool_call.name, "arguments": call.tool_call.args}
+            else:
+                body = {"query": call.query}
+            if call.session_id is not None:
+                body["session_id"] = call.session_id
+            try:
+                res = self.session.post(
+                    self.url,
+                    json=body,
+                    timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining)),
+                )
+            except requests.exceptions.ConnectionError as e:
+                backoff = self.retry_backoff * (2 ** attempt)
+                if (not self._is_connect_failure(e) or attempt >= self.max_retries
+                        or time.monotonic() + backoff >= deadline):
+                    return f"⚠️ MCP Error: {str(e)}"
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"🗣️🔗🔁 MCP connection failed, retry {attempt}/{self.max_retries} in {backoff*1000:.0f}ms: {e}")
+                if call._cancel_event.wait(backoff):
+                    return "" # Cancelled, nobody is waiting for the answer any more
+                continue
+            except requests.exceptions.RequestException as e:
+                return f"⚠️ MCP Error: {str(e)}"
+
+            try:
+                data = res.json()
+            except json.JSONDecodeError:
+                return f"⚠️ MCP Error: Invalid JSON response: {res.text}"
+            return data.get("response", "⚠️ No 'response' key in MCP output.")
+
+    def _dispatch(self, call: MCPCall) -> str:
+        """Runs the query against the MCP functions of this process."""
+        if call.tool_call is not None:
+            execute = self._resolve_executor()
+            if call.session_id is None:
+                return execute(call.tool_call)
+            return execute(call.tool_call, call.session_id)
+        dispatcher = self._resolve_dispatcher()
+        if call.session_id is None:
+            return dispatcher(call.query)
+        return dispatcher(call.query, call.session_id) # Order state is isolated per session, no global lock
+
+    def _run(self, call: MCPCall) -> str:
+        """Worker body of one call."""
+        if call.cancelled:
+            return ""
+        return self._dispatch(call) if self.in_process else self._post(call)
+
+    def submit(self, query: str, session_id: Optional[str] = None) -> MCPCall:
+        """
+        Starts an MCP call in the background.
+
+        Args:
+            query: The function call text, e.g. `CALL get_price(item="pizza")`.
+            session_id: Conversation the call belongs to (selects its order state).
+                        Without one the server uses its shared default session.
+
+        Returns:
+            An `MCPCall` handle to wait on (`result`) or abandon (`cancel`).
+        """
+        call = MCPCall(query, session_id)
+        self.calls += 1
+        call._attach(self._executor.submit(self._run, call))
+        return call
+
+    def submit_call(self, tool_call: ToolCall, session_id: Optional[str] = None) -> MCPCall:
+        """
+        Starts an already parsed MCP call in the background.
+
+        Sent as `{"name": ..., "arguments": {...}}` (or run with `app.execute`
+        in-process), so the call is not formatted and parsed again.
+
+        Args:
+            tool_call: The call, e.g. from the intent router or the streaming parser.
+            session_id: Conversation the call belongs to.
+
+        Returns:
+            An `MCPCall` handle to wait on (`result`) or abandon (`cancel`).
+        """
+        call = MCPCall(format_call(tool_call), session_id, tool_call) # Text kept for logs
+        self.calls += 1
+        call._attach(self._executor.submit(self._run, call))
+        return call
+
+    def call(self, query: str, session_id: Optional[str] = None) -> str:
+        """
+        Sends a query and waits for the response.
+
+        Args:
+            query: The function call text.
+            session_id: Conversation the call belongs to.
+
+        Returns:
+            The MCP response text.
+        """
+        return self.submit(query, session_id).result()
+
+    def cancel(self, call: Optional[MCPCall]) -> None:
+        """
+        Cancels an in-flight call. Cancelling a finished call or None does nothing.
+
+        Args:
+            call: The handle returned by `submit`.
+        """
+        if call is None or call._done.is_set():
+            return
+        call.cancel()
+        self.cancellations += 1
+        logger.info(f"🗣️🔗🛑 MCP call cancelled after {(time.monotonic() - call.started_at)*1000:.0f}ms.")
+
+    def close(self) -> None:
+        """Closes pooled connections and stops the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+_default_client: Optional[MCPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> MCPClient:
+    """Returns the process-wide MCP client (created on first use with the default URL)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = MCPClient()
+        return _default_client
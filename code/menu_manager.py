@@ -2,7 +2,8 @@
 
 from typing import Any, Dict, Union
 import json
-from difflib import get_close_matches
+from compiled_menu import CompiledMenu
+from menu_search import MenuSearchIndex
 
 class MenuManager:
     def __init__(self, menu_path):
@@ -11,6 +12,8 @@ class MenuManager:
 
         self.item_index = self._build_index()
         self.category_to_flavors = self._build_flavor_index()
+        self.search_index = MenuSearchIndex(self.menu, self.item_index)
+        self.compiled = CompiledMenu(self.menu, self.item_index, self.category_to_flavors)
 
     def _build_index(self) -> Dict[str, Union[str, tuple]]:
         index = {}
@@ -56,23 +59,7 @@ class MenuManager:
 
 
     def get_price(self, item_name: str) -> Union[str, float, Dict[str, float]]:
-        key = item_name.lower()
-        if key not in self.item_index:
-            return "❌ Not found"
-
-        category, item = self.item_index[key]
-        cat_data = self.menu[category]
-
-        if isinstance(cat_data, dict):
-            price = cat_data.get(item)
-            if isinstance(price, (int, float)):
-                return price
-            elif isinstance(price, str):
-                # price is description -> look for "Small" and "Large"
-                sizes = {k: v for k, v in cat_data.items() if isinstance(v, (int, float))}
-                if sizes:
-                    return sizes
-        return "❌ Price not found"
+        return self.compiled.item_price(item_name)
 
     def list_items(self):
         return list(self.item_index.keys())
@@ -109,9 +96,14 @@ class MenuManager:
     
 
     def find_closest_item(self, item_name: str, cutoff: float = 0.8):
-        item_name = item_name.lower()
-        matches = get_close_matches(item_name, self.item_index.keys(), n=1, cutoff=cutoff)
-        return matches[0] if matches else None
+        hit = self.search_index.best(item_name, cutoff=cutoff)
+        return hit.key if hit else None
+
+    def search_items(self, query: str, limit: int = 5, cutoff: float = 0.6):
+        return self.search_index.search(query, limit=limit, cutoff=cutoff)
+
+    def find_in_menu(self, text: str):
+        return self.search_index.find_substring(text)
 
 # import json
 # from typing import Optional
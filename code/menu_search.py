@@ -0,0 +1,265 @@
+# menu_search.py
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+
+# Candidates taken from the trigram ranking before the exact (difflib) rescoring
+RERANK_CANDIDATES = 24
+# Items sharing fewer trigrams than this fraction of the best overlap are not ranked at all
+CANDIDATE_OVERLAP = 0.5
+# Score given to a phonetic match (same sound, different spelling) that difflib rates lower
+PHONETIC_SCORE = 0.82
+# Up to this many strings, a flat scan beats the trigram filter (numpy call overhead)
+SCAN_LIMIT = 256
+# Shorter phonetic keys (e.g. "bk" for "BBQ") are too ambiguous to count as a match
+MIN_PHONETIC_LETTERS = 3
+
+_WORDS = re.compile(r"[a-z]+")
+_PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"gh"), "g"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"dg"), "j"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"[cq]"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"z"), "s"),
+]
+_SILENT = re.compile(r"[aeiouyhw]")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+class SearchHit(NamedTuple):
+    """A ranked search result."""
+    key: str          # Lowercase key of `MenuManager.item_index`
+    name: str         # Item name as written in the menu
+    score: float      # difflib similarity ratio (or PHONETIC_SCORE for a phonetic match)
+    phonetic: bool    # True if the query sounds like the item
+
+
+def phonetic_key(text: str) -> str:
+    """
+    Computes a coarse phonetic key, robust to the spellings speech recognition produces.
+
+    Each word keeps its first letter; common spelling variants are unified
+    (ph/f, c/k/s, gh/g, ...), later vowels and silent letters are dropped and
+    repeated letters collapsed. "margarita" and "Margherita" both map to "mrgrt".
+
+    Args:
+        text: The text to encode.
+
+    Returns:
+        The space separated keys of the words.
+    """
+    keys = []
+    for word in _WORDS.findall(text.lower()):
+        for pattern, replacement in _PHONETIC_RULES:
+            word = pattern.sub(replacement, word)
+        keys.append(_REPEATS.sub(r"\1", word[0] + _SILENT.sub("", word[1:])))
+    return " ".join(keys)
+
+
+def _trigrams(text: str, pad: bool = True) -> Set[str]:
+    """Character trigrams of a lowercase text (padded to mark word start and end)."""
+    if pad:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _TrigramIndex:
+    """Inverted index from character trigram to the ids of the names containing it."""
+    def __init__(self, names: Sequence[str]) -> None:
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for index, name in enumerate(names):
+            grams = _trigrams(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(index)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.int32)
+        self.count = len(names)
+
+    def overlap(self, grams: Set[str]) -> Optional[np.ndarray]:
+        """Number of `grams` each name contains, or None if no name contains any."""
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return None
+        return np.bincount(np.concatenate(lists), minlength=self.count)
+
+
+class SubstringIndex:
+    """
+    Finds the first of a list of strings that contains a query, in list order.
+
+    Equivalent to `next(i for i, t in enumerate(texts) if query in t)`, but
+    for more than `SCAN_LIMIT` strings only those containing every trigram of
+    the query are checked.
+    """
+    def __init__(self, texts: Sequence[str]) -> None:
+        """
+        Builds the index.
+
+        Args:
+            texts: The lowercase strings to search, in priority order.
+        """
+        self.texts = list(texts)
+        self._index = _TrigramIndex(self.texts) if len(self.texts) > SCAN_LIMIT else None
+
+    def first(self, query: str) -> Optional[int]:
+        """
+        Returns the position of the first string containing `query`.
+
+        Args:
+            query: The lowercase text to look for (not stripped).
+
+        Returns:
+            The index into `texts`, or None if no string contains the query.
+        """
+        grams = _trigrams(query, pad=False) if self._index is not None else None
+        if not grams: # Small list, or shorter than a trigram
+            for index, text in enumerate(self.texts):
+                if query in text:
+                    return index
+            return None
+        counts = self._index.overlap(grams)
+        if counts is None:
+            return None
+        for index in np.flatnonzero(counts >= len(grams)):
+            if query in self.texts[index]:
+                return int(index)
+        return None
+
+
+class MenuSearchIndex:
+    """
+    Prebuilt fuzzy and substring search over a menu.
+
+    Replaces `difflib.get_close_matches` over every item (and the recursive
+    substring walk over the menu JSON) with lookups whose cost barely grows
+    with the menu size:
+
+    - Fuzzy: candidates are ranked by character trigram overlap (Dice
+      coefficient) from an inverted index, and the query's phonetic key adds
+      items that sound the same but share few trigrams. Only the best few are
+      rescored with difflib's `SequenceMatcher.ratio`, so scores and cutoffs
+      mean exactly what they meant with `get_close_matches`.
+    - Substring: names containing every trigram of the query are verified with
+      `in`, in menu order, which gives the same first match as a depth-first
+      walk of the menu.
+
+    The index is immutable once built; rebuild it when the menu changes.
+    """
+    def __init__(self, menu: Dict[str, Any], item_index: Dict[str, tuple]) -> None:
+        """
+        Builds the index.
+
+        Args:
+            menu: The menu JSON (categories, sub-categories, items, descriptions).
+            item_index: `MenuManager.item_index`, mapping lowercase item names to
+                        (category, original name). Fuzzy search returns its keys.
+        """
+        self.keys = list(item_index.keys())
+        self.names = [item_index[key][1] for key in self.keys]
+        self.key_ids = {key: index for index, key in enumerate(self.keys)}
+        self._items = _TrigramIndex(self.keys)
+        self._phonetic: Dict[str, List[int]] = {}
+        for index, key in enumerate(self.keys):
+            self._phonetic.setdefault(phonetic_key(key), []).append(index)
+
+        # Every string of the menu in depth-first order (keys before their values)
+        self.nodes: List[str] = []
+        self._collect_nodes(menu)
+        self._node_index = SubstringIndex([node.lower() for node in self.nodes])
+
+    def _collect_nodes(self, section: Any) -> None:
+        if isinstance(section, dict):
+            for key, value in section.items():
+                self.nodes.append(key)
+                self._collect_nodes(value)
+        elif isinstance(section, list):
+            for value in section:
+                self._collect_nodes(value)
+        elif isinstance(section, str):
+            self.nodes.append(section)
+
+    def _candidates(self, query: str) -> Dict[int, bool]:
+        """Item ids worth rescoring, best trigram match first, mapped to whether they match phonetically."""
+        candidates: Dict[int, bool] = {}
+        grams = _trigrams(query)
+        counts = self._items.overlap(grams)
+        if counts is not None:
+            ids = np.flatnonzero(counts >= max(1, int(counts.max() * CANDIDATE_OVERLAP)))
+            dice = 2.0 * counts[ids] / (self._items.sizes[ids] + len(grams))
+            if ids.size > RERANK_CANDIDATES:
+                top = np.argpartition(-dice, RERANK_CANDIDATES)[:RERANK_CANDIDATES]
+                ids, dice = ids[top], dice[top]
+            for index in ids[np.argsort(-dice)]:
+                candidates[int(index)] = False
+        sound = phonetic_key(query)
+        if len(sound.replace(" ", "")) >= MIN_PHONETIC_LETTERS:
+            for index in self._phonetic.get(sound, ()):
+                candidates[index] = True
+        return candidates
+
+    def search(self, query: str, limit: int = 5, cutoff: float = 0.6) -> List[SearchHit]:
+        """
+        Returns the items most similar to `query`, best first.
+
+        Args:
+            query: The item name as heard (any case).
+            limit: Maximum number of hits.
+            cutoff: Minimum score in [0, 1] (difflib ratio).
+
+        Returns:
+            Up to `limit` hits with a score of at least `cutoff`. An exact
+            match scores 1.0. Ties are ordered like `get_close_matches`.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        hits: List[SearchHit] = []
+        threshold = cutoff # Rises to the worst kept score once `limit` hits are found
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        for index, phonetic in self._candidates(query).items():
+            key = self.keys[index]
+            matcher.set_seq1(key)
+            score = 0.0
+            # Cheap upper bounds first, like get_close_matches
+            if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold:
+                score = matcher.ratio()
+            if phonetic and score < PHONETIC_SCORE:
+                score = PHONETIC_SCORE
+            if score >= threshold:
+                hits.append(SearchHit(key, self.names[index], score, phonetic))
+                if len(hits) >= limit:
+                    hits.sort(key=lambda hit: (hit.score, hit.key), reverse=True)
+                    del hits[limit:]
+                    threshold = max(cutoff, hits[-1].score)
+        hits.sort(key=lambda hit: (hit.score, hit.key), reverse=True)
+        return hits[:limit]
+
+    def best(self, query: str, cutoff: float = 0.8) -> Optional[SearchHit]:
+        """Returns the single best hit with a score of at least `cutoff`, or None."""
+        key = query.strip().lower()
+        index = self.key_ids.get(key)
+        if index is not None:
+            return SearchHit(key, self.names[index], 1.0, True)
+        hits = self.search(key, limit=1, cutoff=cutoff)
+        return hits[0] if hits else None
+
+    def find_substring(self, query: str) -> Optional[str]:
+        """
+        Returns the first menu string (name or description) containing `query`.
+
+        Args:
+            query: The text to look for (any case, not stripped).
+
+        Returns:
+            The string as written in the menu, in depth-first menu order, or None.
+        """
+        index = self._node_index.first(query.lower())
+        return self.nodes[index] if index is not None else None
@@ -0,0 +1,194 @@
+# menu_snapshot.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from menu_manager import MenuManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MENU_PATH = "data/enhanced_menu.json"
+
+
+class MenuSnapshot:
+    """
+    One fully built, read-only version of the menu.
+
+    Holds a `MenuManager` with all its indexes (item index, search index,
+    compiled tables). A snapshot is never modified after it is published;
+    a changed menu file produces a new snapshot with the next version number.
+    """
+    __slots__ = ("menu", "version", "loaded_at", "build_ms", "file_stamp")
+
+    def __init__(self, menu: MenuManager, version: int, build_ms: float, file_stamp: Tuple[float, int]) -> None:
+        self.menu = menu
+        self.version = version
+        self.loaded_at = time.time()
+        self.build_ms = build_ms
+        self.file_stamp = file_stamp # (mtime, size) of the file it was built from
+
+
+class MenuStore:
+    """
+    Process-wide holder of the current menu snapshot, with hot reload.
+
+    Readers call `current()` (or `get_menu()`), which returns the published
+    snapshot without taking a lock. A reload parses the file and builds every
+    index into a new snapshot first, then publishes it with a single reference
+    assignment, so readers never block and never see a half-built index. A
+    reader that keeps the snapshot it got for the duration of a request sees
+    one consistent menu even if a reload happens meanwhile.
+
+    `start_watching` polls the file's mtime and size on a background thread.
+    A file that does not parse (e.g. caught mid-write) is retried on the next
+    poll while the previous snapshot stays in service.
+    """
+    def __init__(self, path: str = DEFAULT_MENU_PATH) -> None:
+        """
+        Loads the first snapshot.
+
+        Args:
+            path: Path of the menu JSON.
+
+        Raises:
+            OSError, ValueError: If the initial menu cannot be loaded.
+        """
+        self.path = path
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock() # Serializes writers only
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._snapshot = self._build(version=1)
+        logger.info(f"🍽️ Menu snapshot v1 loaded in {self._snapshot.build_ms:.1f}ms ({len(self._snapshot.menu.item_index)} items).")
+
+    def _stamp(self) -> Tuple[float, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def _build(self, version: int) -> MenuSnapshot:
+        stamp = self._stamp()
+        start = time.perf_counter()
+        menu = MenuManager(self.path)
+        return MenuSnapshot(menu, version, (time.perf_counter() - start) * 1000, stamp)
+
+    def current(self) -> MenuSnapshot:
+        """Returns the published snapshot (never blocks)."""
+        return self._snapshot
+
+    def reload(self) -> bool:
+        """
+        Rebuilds the snapshot from the file and publishes it.
+
+        Returns:
+            True if a new snapshot was published, False if the file could not be
+            loaded (the current snapshot stays in service).
+        """
+        with self._reload_lock:
+            try:
+                snapshot = self._build(self._snapshot.version + 1)
+            except Exception as e: # Unreadable or malformed file, never take the service down
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning(f"🍽️⚠️ Menu reload failed, keeping v{self._snapshot.version}: {e}")
+                return False
+            self._snapshot = snapshot # Atomic publish
+            self.reloads += 1
+            self.last_error = None
+        logger.info(f"🍽️🔄 Menu snapshot v{snapshot.version} published, rebuilt in {snapshot.build_ms:.1f}ms "
+                    f"({len(snapshot.menu.item_index)} items).")
+        return True
+
+    def check_for_changes(self) -> bool:
+        """
+        Reloads if the file's mtime or size differ from the current snapshot's.
+
+        Returns:
+            True if a new snapshot was published.
+        """
+        try:
+            stamp = self._stamp()
+        except OSError:
+            return False # Being replaced, check again on the next poll
+        if stamp == self._snapshot.file_stamp:
+            return False
+        return self.reload()
+
+    def start_watching(self, interval: float = 1.0) -> None:
+        """
+        Starts polling the menu file for changes (no-op if already watching).
+
+        Args:
+            interval: Seconds between checks.
+        """
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="MenuWatcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"🍽️👀 Watching {self.path} for menu changes every {interval:g}s.")
+
+    def stop_watching(self) -> None:
+        """Stops the watcher thread."""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2.0)
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logger.error(f"🍽️💥 Menu watcher error: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Reports the current snapshot and reload counters.
+
+        Returns:
+            A dict with `version`, `items`, `build_ms` (rebuild time of the
+            current snapshot), `loaded_at`, `reloads`, `failures`, `last_error`
+            and `watching`.
+        """
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "items": len(snapshot.menu.item_index),
+            "build_ms": snapshot.build_ms,
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None,
+        }
+
+
+_default_store: Optional[MenuStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_menu_store(path: str = DEFAULT_MENU_PATH) -> MenuStore:
+    """
+    Returns the process-wide menu store, loading it on first use.
+
+    Args:
+        path: Menu JSON path (only used by the first call).
+
+    Returns:
+        The shared MenuStore.
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = MenuStore(path)
+    return _default_store
+
+
+def get_menu() -> MenuManager:
+    """Returns the `MenuManager` of the current process-wide snapshot."""
+    return get_menu_store().current().menu
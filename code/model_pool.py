@@ -0,0 +1,240 @@
+# model_pool.py
+import logging
+import queue
+import threading
+from typing import List, Optional
+
+from audio_in import AudioInputProcessor
+from audio_module import AudioProcessor
+from colors import Colors
+from llm_module import LLM
+from mcp_client import MCPClient, DEFAULT_MCP_URL
+from phrase_cache import PhraseAudioCache
+from template_tts import TemplateSynthesizer, load_templates
+from sentence_classifier import SentenceClassifier, BACKEND_TORCH
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLease:
+    """
+    The heavy, pre-warmed components checked out by a single client session.
+
+    A lease bundles one TTS engine (`AudioProcessor`) with one speech input
+    stack (`AudioInputProcessor`, which owns a Whisper recorder and a turn
+    detector bound to the pool's shared sentence classifier). While a session
+    holds the lease no other session can use these components.
+    """
+    def __init__(self, slot: int, audio_processor: AudioProcessor, audio_input_processor: AudioInputProcessor):
+        """
+        Initializes a ModelLease.
+
+        Args:
+            slot: Index of the pool slot these components belong to (for logging).
+            audio_processor: The TTS engine wrapper of this slot.
+            audio_input_processor: The audio input / transcription stack of this slot.
+        """
+        self.slot = slot
+        self.audio_processor = audio_processor
+        self.audio_input_processor = audio_input_processor
+
+
+class ModelPool:
+    """
+    A bounded pool of pre-loaded models shared by all client sessions.
+
+    Loading Whisper, the turn-detection classifier and a TTS engine takes
+    seconds and a lot of memory, so they are created once at server startup.
+    The DistilBERT sentence classifier is stateless and is shared by every
+    slot; it batches the turn-detection requests of all sessions. Whisper
+    recorders and TTS engines hold streaming state, so the pool keeps `size`
+    warm instances of each and lends them out exclusively
+    through `acquire` / `release`. All per-conversation state (history,
+    running generation, upsampler, callbacks) lives in the session instead.
+    """
+    def __init__(
+            self,
+            size: int = 1,
+            language: str = "en",
+            tts_engine: str = "kokoro",
+            orpheus_model: str = "orpheus-3b-0.1-ft-Q8_0-GGUF/orpheus-3b-0.1-ft-q8_0.gguf",
+            llm_provider: str = "ollama",
+            llm_model: str = "mistral",
+            no_think: bool = False,
+            turn_detection_local: bool = True,
+            turn_detection_backend: str = BACKEND_TORCH,
+            mcp_url: str = DEFAULT_MCP_URL,
+            mcp_in_process: bool = False,
+            phrase_cache_bytes: int = 64 * 1024 * 1024,
+            phrase_cache_dir: Optional[str] = None,
+            template_tts: bool = True,
+        ) -> None:
+        """
+        Loads all models and fills the pool.
+
+        Must be called from within a running asyncio event loop, because each
+        `AudioInputProcessor` starts its background transcription task on creation.
+
+        Args:
+            size: Number of concurrent sessions the pool can serve.
+            language: Transcription language code.
+            tts_engine: TTS engine name passed to every `AudioProcessor`.
+            orpheus_model: Orpheus model identifier (only used by the orpheus engine).
+            llm_provider: LLM backend used to measure inference latency once.
+            llm_model: LLM model used to measure inference latency once.
+            no_think: Passed to the LLM used for the latency measurement.
+            turn_detection_local: Whether the sentence classifier loads from the local model dir.
+            turn_detection_backend: Inference backend of the shared sentence classifier
+                                    ("torch", "torch-int8" or "onnx").
+            mcp_url: Endpoint of the MCP function server.
+            mcp_in_process: Call the MCP functions in this process instead of over HTTP.
+            phrase_cache_bytes: Memory budget of the shared synthesized-phrase cache (0 disables it).
+            phrase_cache_dir: Optional directory for the phrase cache's on-disk tier.
+            template_tts: Splice template replies from cached fragments (needs the phrase cache).
+        """
+        if size < 1:
+            raise ValueError(f"Model pool size must be at least 1, got {size}")
+
+        self.tts_engine = tts_engine
+        self._init_slots(size)
+
+        logger.info(f"🏊 Loading model pool with {Colors.apply(str(size)).blue} slot(s)...")
+
+        # --- Shared, stateless model ---
+        self.sentence_classifier = SentenceClassifier(local=turn_detection_local, backend=turn_detection_backend)
+        self.mcp_client = MCPClient(url=mcp_url, in_process=mcp_in_process, pool_size=max(4, size))
+        self.phrase_cache: Optional[PhraseAudioCache] = None
+        if phrase_cache_bytes > 0:
+            self.phrase_cache = PhraseAudioCache(max_bytes=phrase_cache_bytes, disk_dir=phrase_cache_dir)
+
+        # --- LLM latency (measured once, reused by every session) ---
+        llm = LLM(backend=llm_provider, model=llm_model, no_think=no_think)
+        llm.prewarm()
+        self.llm_inference_time: Optional[float] = llm.measure_inference_time()
+        llm_time = self.llm_inference_time if self.llm_inference_time is not None else 0.0
+
+        # --- Per-slot stateful models ---
+        audio_processors = [
+            AudioProcessor(engine=tts_engine, orpheus_model=orpheus_model, phrase_cache=self.phrase_cache)
+            for _ in range(size)
+        ]
+        tts_time = audio_processors[0].tts_inference_time
+        self.template_synthesizer: Optional[TemplateSynthesizer] = None
+        if template_tts and self.phrase_cache is not None:
+            self.template_synthesizer = TemplateSynthesizer(load_templates(), self.phrase_cache, audio_processors[0].phrase_key)
+            logger.info(f"🏊🧩 Template synthesis enabled for {len(self.template_synthesizer.templates)} reply formats.")
+        self.full_output_pipeline_latency = llm_time + tts_time # ms
+        logger.info(f"🏊⏱️ Full output pipeline latency: {self.full_output_pipeline_latency:.2f}ms (LLM: {llm_time:.2f}ms, TTS: {tts_time:.2f}ms)")
+
+        for slot, audio_processor in enumerate(audio_processors):
+            audio_input_processor = AudioInputProcessor(
+                language,
+                is_orpheus=tts_engine == "orpheus",
+                pipeline_latency=self.full_output_pipeline_latency / 1000, # seconds
+                turn_detection_classifier=self.sentence_classifier,
+            )
+            self._add_slot(ModelLease(slot, audio_processor, audio_input_processor))
+
+        logger.info(f"🏊✅ Model pool ready ({size} slot(s)).")
+
+    def _init_slots(self, size: int) -> None:
+        """Sets up the (still empty) slot bookkeeping."""
+        self.size = size
+        self._idle: "queue.Queue[ModelLease]" = queue.Queue()
+        self._leases: List[ModelLease] = []
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiting = 0 # Sessions blocked in acquire()
+        # Set whenever a session asks for a slot; background work holding one stops on it
+        self.background_preempt = threading.Event()
+
+    def _add_slot(self, lease: ModelLease) -> None:
+        self._leases.append(lease)
+        self._idle.put(lease)
+
+    @property
+    def in_use(self) -> int:
+        """Number of slots currently lent out to sessions."""
+        return self._in_use
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[ModelLease]:
+        """
+        Borrows a free slot, blocking until one is available.
+
+        Args:
+            timeout: Maximum seconds to wait. None waits forever.
+
+        Returns:
+            A ModelLease, or None if no slot became free within `timeout`.
+        """
+        with self._lock:
+            self._waiting += 1 # Keeps background work from taking the slot back while we wait
+            self.background_preempt.set() # Sessions take precedence over background synthesis
+        lease = None
+        try:
+            lease = self._idle.get(block=True, timeout=timeout)
+        except queue.Empty:
+            pass
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                if lease is not None:
+                    self._in_use += 1
+        if lease is None:
+            logger.warning(f"🏊⏳ No free model slot within {timeout}s ({self._in_use}/{self.size} in use).")
+            return None
+        logger.info(f"🏊➡️ Slot {lease.slot} acquired ({self._in_use}/{self.size} in use).")
+        return lease
+
+    def release(self, lease: ModelLease) -> None:
+        """
+        Returns a slot to the pool.
+
+        The caller is responsible for detaching its callbacks from the leased
+        components before releasing them.
+
+        Args:
+            lease: The lease previously returned by `acquire`.
+        """
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(lease)
+        logger.info(f"🏊⬅️ Slot {lease.slot} released ({self._in_use}/{self.size} in use).")
+
+    def acquire_background(self) -> Optional[ModelLease]:
+        """
+        Borrows a slot for background work, only while no session is using the pool.
+
+        Never blocks. The holder must stop its work when `background_preempt`
+        is set (e.g. by passing it as the TTS stop event) and return the slot
+        with `release_background`.
+
+        Returns:
+            A ModelLease, or None if any session is active or waiting, or no slot is idle.
+        """
+        with self._lock:
+            if self._in_use > 0 or self._waiting > 0:
+                return None
+            try:
+                lease = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            self.background_preempt.clear()
+        return lease
+
+    def release_background(self, lease: ModelLease) -> None:
+        """
+        Returns a slot borrowed with `acquire_background`.
+
+        Args:
+            lease: The lease previously returned by `acquire_background`.
+        """
+        self._idle.put(lease)
+
+    def shutdown(self) -> None:
+        """Shuts down the audio input stack of every slot, the shared classifier and the MCP client."""
+        logger.info("🏊🛑 Shutting down model pool...")
+        for lease in self._leases:
+            lease.audio_input_processor.shutdown()
+        self.sentence_classifier.shutdown()
+        self.mcp_client.close()
@@ -0,0 +1,122 @@
+# ollama_stream.py
+import json
+import logging
+from json.decoder import scanstring as _scanstring
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_NEWLINE = 0x0A
+_CONTENT_KEY = b'"content":"'
+_MESSAGE_KEY = b'"message":{'
+_DONE_TRUE = b'"done":true'
+_WHITESPACE = b" \t\r"
+
+
+class StreamChunk(NamedTuple):
+    """The fields of one Ollama `/api/chat` stream line that the pipeline uses."""
+    content: str          # message.content ("" if absent)
+    done: bool
+    error: Optional[str]  # Error reported by the server instead of a message
+
+
+_chunk = lambda fields: tuple.__new__(StreamChunk, fields) # Skips NamedTuple's Python-level __new__
+
+
+class OllamaStreamDecoder:
+    """
+    Incremental decoder for Ollama's newline-delimited JSON stream.
+
+    Each network chunk is scanned for newlines with `find` from the last
+    offset and its complete lines are parsed in place through a memoryview,
+    without splitting or copying the rest; only an unfinished last line is
+    kept in a bytearray until the chunk completing it arrives. Lines are only
+    decoded from UTF-8 once complete, so a multi-byte character split across
+    two chunks is never cut (a newline byte cannot occur inside one).
+
+    Only `message.content`, `done` and `error` are read. For the usual
+    `{"model":...,"message":{"role":"assistant","content":"..."},"done":false}`
+    line the content string is sliced out directly (through the JSON string
+    scanner if it contains escapes); any other shape falls back to
+    `json.loads` of the whole line.
+    """
+    __slots__ = ("_buffer", "_scanned", "lines", "invalid_lines")
+
+    def __init__(self) -> None:
+        self._buffer = bytearray() # Unfinished line carried over from earlier chunks
+        self._scanned = 0          # Length of the buffer already searched for a newline
+        self.lines = 0
+        self.invalid_lines = 0
+
+    def feed(self, data: bytes) -> List[StreamChunk]:
+        """
+        Adds a network chunk and returns the stream lines it completed.
+
+        Args:
+            data: Raw bytes as read from the response.
+
+        Returns:
+            One StreamChunk per complete, non-empty line, in order. Lines that
+            are not valid JSON are logged and skipped.
+        """
+        buffer = self._buffer
+        if buffer:
+            buffer += data
+            source = buffer
+            scan = self._scanned
+        else:
+            source = data # Nothing pending: parse the chunk in place, keep only its unfinished tail
+            scan = 0
+        chunks = []
+        start = 0
+        end = source.find(_NEWLINE, scan)
+        if end >= 0:
+            with memoryview(source) as view: # Released before the buffer is resized
+                while end >= 0:
+                    if end > start:
+                        chunk = self._parse(source, view, start, end)
+                        if chunk is not None:
+                            chunks.append(chunk)
+                    start = end + 1
+                    end = source.find(_NEWLINE, start)
+        if source is buffer:
+            if start == len(buffer):
+                buffer.clear()
+            elif start:
+                del buffer[:start]
+            self._scanned = len(buffer)
+        elif start < len(data):
+            buffer += data[start:]
+            self._scanned = len(buffer)
+        return chunks
+
+    def _parse(self, source, view: memoryview, start: int, end: int) -> Optional[StreamChunk]:
+        self.lines += 1
+        message = source.find(_MESSAGE_KEY, start, end)
+        if message >= 0:
+            key = source.find(_CONTENT_KEY, message, end)
+            if key >= 0:
+                first = key + len(_CONTENT_KEY)
+                close = source.find(b'"', first, end)
+                if close >= 0 and source.find(b"\\", first, close) < 0:
+                    content = str(view[first:close], "utf-8")
+                else: # Escapes: let the JSON string scanner find the end
+                    try:
+                        content = _scanstring(str(view[first:end], "utf-8"), 0)[0]
+                    except ValueError:
+                        content = None
+                if content is not None:
+                    return _chunk((content, source.find(_DONE_TRUE, first, end) >= 0, None))
+        if source[start] in _WHITESPACE and not bytes(view[start:end]).strip():
+            return None
+        try: # No message, an error, or an unexpected layout
+            data = json.loads(str(view[start:end], "utf-8"))
+        except ValueError:
+            self.invalid_lines += 1
+            logger.warning(f"🤖⚠️ Failed to decode JSON line: '{str(view[start:min(end, start + 100)], 'utf-8', 'replace')}...'")
+            return None
+        if not isinstance(data, dict):
+            self.invalid_lines += 1
+            return None
+        message = data.get("message") or {}
+        return _chunk((message.get("content") or "", bool(data.get("done")), data.get("error") or None))
@@ -0,0 +1,541 @@
+# order_journal.py
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = "data/orders"
+FSYNC_MODES = ("always", "interval", "off")
+SEGMENT_BYTES = 16 * 1024 * 1024 # Start a new segment file after this many bytes
+MAX_BATCH = 1024                 # Records written (and fsynced) together at most
+SEGMENT_PREFIX = "orders-"
+SEGMENT_SUFFIX = ".log"
+LOCK_NAME = "journal.lock"       # Held by the one process appending to a journal directory
+MAX_WORKERS = 64                 # Worker subdirectories tried by `get_order_journal(per_worker=True)`
+
+_fdatasync = getattr(os, "fdatasync", os.fsync) # fdatasync is not available on Windows / macOS
+
+
+class JournalError(Exception):
+    """Raised when an order could not be written to the journal."""
+
+
+class JournalRecord(NamedTuple):
+    """One journaled order."""
+    seq: int          # Increases by one per order, across segments and restarts
+    timestamp: float  # Wall clock time the order was appended
+    order: Dict[str, Any]
+
+
+class JournalReceipt:
+    """
+    Handle of an appended order, completed by the writer thread.
+
+    The order counts as acknowledged once `wait` returns True: its batch has
+    been written to the segment file and, with `fsync="always"`, flushed to
+    the disk.
+    """
+    __slots__ = ("seq", "error", "_done")
+
+    def __init__(self, seq: int) -> None:
+        self.seq = seq
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the order is committed.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely).
+
+        Returns:
+            True once committed, False on timeout.
+
+        Raises:
+            JournalError: If the write failed.
+        """
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise JournalError(f"Order {self.seq} was not journaled: {self.error}") from self.error
+        return True
+
+    def _complete(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self._done.set()
+
+
+def _encode(seq: int, timestamp: float, order: Dict[str, Any]) -> bytes:
+    """Encodes a record as one line: CRC32 of the payload (hex), a space, the JSON payload."""
+    payload = json.dumps([seq, timestamp, order], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode(line: bytes) -> Optional[JournalRecord]:
+    """Decodes a complete line, or returns None for a torn or corrupted one."""
+    if len(line) < 10 or line[8:9] != b" " or not line.endswith(b"\n"):
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        seq, timestamp, order = json.loads(payload)
+    except ValueError:
+        return None
+    return JournalRecord(seq, timestamp, order)
+
+
+def segment_paths(directory: str) -> List[str]:
+    """Returns the segment files of a journal directory, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    names = [n for n in names if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+    return [os.path.join(directory, n) for n in sorted(names)] # Named by zero-padded first seq
+
+
+def _first_seq(path: str) -> int:
+    return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def _lock_directory(directory: str) -> Optional[int]:
+    """Takes the journal directory's exclusive lock. Returns its fd, or None if another writer holds it."""
+    fd = os.open(os.path.join(directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd # No advisory locks on Windows; one writer per directory is up to the deployment
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+class OrderJournal:
+    """
+    Append-only, segmented journal of confirmed orders with group commit.
+
+    `append` only encodes the order and queues it; it never touches the disk.
+    A single writer thread takes everything queued, writes it with one
+    `write` call and then syncs once per batch, so while one fsync runs the
+    next batch builds up and the cost of a sync is shared by all orders that
+    arrived meanwhile. Each order gets a `JournalReceipt` that is completed
+    when its batch is committed.
+
+    fsync modes:
+
+    - "always": every batch is fsynced before its receipts complete. An
+      acknowledged order survives a process crash and a power loss.
+    - "interval": receipts complete after the write; the file is fsynced at
+      most every `fsync_interval` seconds. Survives a process crash; a power
+      loss can drop the last interval.
+    - "off": never fsynced except on rotation and close. Survives a process
+      crash only.
+
+    Records are CRC-checked lines in files named after their first sequence
+    number; a new segment is started when the current one exceeds
+    `segment_bytes`, and after every restart, so a line torn by a crash is
+    only ever at the end of a segment and is skipped by the reader.
+
+    Sequence numbers and segment names are kept by the writing process, so
+    a directory has exactly one writer: opening a journal whose directory
+    is locked by another `OrderJournal` raises JournalError. Several worker
+    processes each use their own directory (`get_order_journal(per_worker=True)`).
+    """
+    def __init__(
+            self,
+            directory: str = DEFAULT_JOURNAL_DIR,
+            fsync: str = "always",
+            fsync_interval: float = 0.05,
+            segment_bytes: int = SEGMENT_BYTES,
+            max_batch: int = MAX_BATCH,
+        ) -> None:
+        """
+        Opens the journal and starts the writer thread.
+
+        Args:
+            directory: Directory of the segment files (created if missing).
+            fsync: "always", "interval" or "off" (see the class docstring).
+            fsync_interval: Seconds between fsyncs in "interval" mode.
+            segment_bytes: Size after which a new segment file is started.
+            max_batch: Maximum number of records per group commit.
+
+        Raises:
+            ValueError: For an unknown fsync mode.
+            JournalError: If another process (or journal) is writing to `directory`.
+        """
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"Unknown fsync mode: {fsync} (expected one of {', '.join(FSYNC_MODES)})")
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.max_batch = max_batch
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = _lock_directory(directory)
+        if self._lock_fd is None:
+            raise JournalError(f"Order journal {directory} is in use by another writer; give each worker process its own directory")
+
+        self._seq = self._recover_last_seq()
+        self._append_lock = threading.Lock() # Keeps queue order == sequence order
+        self._queue: "queue.SimpleQueue[Optional[Tuple[bytes, JournalReceipt]]]" = queue.SimpleQueue()
+        self._last_receipt: Optional[JournalReceipt] = None
+        self._closed = False
+
+        # Writer thread state
+        self._fd: Optional[int] = None
+        self._segment_size = 0
+        self._dirty = False # Written but not yet fsynced
+        self._last_sync = time.monotonic()
+
+        self.appended = 0
+        self.commits = 0
+        self.fsyncs = 0
+        self.failures = 0
+        self.largest_batch = 0
+
+        self._writer = threading.Thread(target=self._run, name="OrderJournal", daemon=True)
+        self._writer.start()
+        logger.info(f"🧾📒 Order journal at {directory} (fsync={fsync}), continuing after seq {self._seq}.")
+
+    def _recover_last_seq(self) -> int:
+        """Returns the highest sequence number already journaled (0 for a new journal)."""
+        for path in reversed(segment_paths(self.directory)):
+            last = None
+            for record in read_segment(path):
+                last = record.seq
+            if last is not None:
+                return last
+        return 0
+
+    # --- Producer side ---
+
+    def append(self, order: Dict[str, Any]) -> JournalReceipt:
+        """
+        Queues an order for the journal (never blocks on disk I/O).
+
+        Args:
+            order: JSON-serializable order data.
+
+        Returns:
+            The receipt, completed when the order is committed.
+
+        Raises:
+            JournalError: If the journal is closed.
+        """
+        with self._append_lock:
+            if self._closed:
+                raise JournalError("Order journal is closed")
+            self._seq += 1
+            receipt = JournalReceipt(self._seq)
+            self._queue.put((_encode(self._seq, time.time(), order), receipt))
+            self._last_receipt = receipt
+            self.appended += 1
+        return receipt
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every order appended so far is committed.
+
+        Args:
+            timeout: Maximum seconds to wait.
+
+        Returns:
+            True if everything is committed, False on timeout.
+        """
+        receipt = self._last_receipt
+        if receipt is None:
+            return True
+        try:
+            return receipt.wait(timeout)
+        except JournalError:
+            return True # Committed as far as it ever will be; the failure was reported to its caller
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Commits what is queued, syncs and closes the segment, and stops the writer."""
+        with self._append_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._writer.join(timeout)
+        if not self._writer.is_alive():
+            os.close(self._lock_fd) # Releases the directory for the next writer
+
+    # --- Writer thread ---
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval if self._dirty else None)
+            except queue.Empty:
+                try:
+                    self._sync() # "interval" mode: nothing new arrived, sync what is pending
+                except OSError as e:
+                    # Receipts of the unsynced orders already completed after their write (the
+                    # "interval" guarantee); count the failure and start a fresh segment, as _commit does
+                    self.failures += 1
+                    logger.error(f"🧾💥 Order journal sync failed after seq {self._seq}: {e}")
+                    self._close_segment(sync=False)
+                continue
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._commit(batch)
+        self._close_segment()
+
+    def _commit(self, batch: List[Tuple[bytes, JournalReceipt]]) -> None:
+        data = b"".join(line for line, _ in batch)
+        try:
+            if self._fd is None or self._segment_size >= self.segment_bytes:
+                self._open_segment(batch[0][1].seq)
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            self._segment_size += len(data)
+            self._dirty = True
+            if self.fsync == "always" or (self.fsync == "interval" and time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+        except OSError as e:
+            self.failures += 1
+            logger.error(f"🧾💥 Order journal write failed for seq {batch[0][1].seq}-{batch[-1][1].seq}: {e}")
+            self._close_segment(sync=False) # The next batch starts a fresh segment after the torn one
+            for _, receipt in batch:
+                receipt._complete(e)
+            return
+        self.commits += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for _, receipt in batch:
+            receipt._complete()
+
+    def _sync(self) -> None:
+        if self._fd is not None and self._dirty:
+            _fdatasync(self._fd)
+            self.fsyncs += 1
+            self._dirty = False
+            self._last_sync = time.monotonic()
+
+    def _open_segment(self, first_seq: int) -> None:
+        self._close_segment()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+        self._segment_size = os.fstat(self._fd).st_size
+        if self.fsync != "off":
+            self._sync_directory() # Make the new file itself durable
+        logger.info(f"🧾📒 Order journal segment {os.path.basename(path)} opened.")
+
+    def _sync_directory(self) -> None:
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return # Directories cannot be opened on Windows
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _close_segment(self, sync: bool = True) -> None:
+        if self._fd is None:
+            return
+        try:
+            if sync:
+                self._dirty = True # Always sync a segment that is being closed, whatever the mode
+                self._sync()
+        except OSError as e:
+            logger.error(f"🧾💥 Order journal sync on close failed: {e}")
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._dirty = False
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the journal counters.
+
+        Returns:
+            A dict with `fsync`, `last_seq`, `appended`, `commits`, `fsyncs`,
+            `failures`, `largest_batch` and `pending` (queued, not yet committed).
+        """
+        return {
+            "fsync": self.fsync,
+            "last_seq": self._seq,
+            "appended": self.appended,
+            "commits": self.commits,
+            "fsyncs": self.fsyncs,
+            "failures": self.failures,
+            "largest_batch": self.largest_batch,
+            "pending": self._queue.qsize(),
+        }
+
+
+def read_segment(path: str) -> Iterator[JournalRecord]:
+    """
+    Yields the valid records of one segment file.
+
+    Torn or corrupted lines (a crash mid-write) are skipped.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            record = _decode(line)
+            if record is not None:
+                yield record
+
+
+class JournalReader:
+    """
+    Reads a journal directory, also while an `OrderJournal` is appending to it.
+
+    `replay` returns what is on disk now; `follow` keeps tailing the
+    journal for new orders, moving on to new segments as they appear.
+    """
+    def __init__(self, directory: str = DEFAULT_JOURNAL_DIR) -> None:
+        self.directory = directory
+
+    def _segments_after(self, since_seq: int) -> List[str]:
+        """Skips segments that only hold records up to `since_seq`."""
+        paths = segment_paths(self.directory)
+        start = 0
+        for index in range(1, len(paths)):
+            if _first_seq(paths[index]) <= since_seq + 1:
+                start = index
+        return paths[start:]
+
+    def replay(self, since_seq: int = 0) -> Iterator[JournalRecord]:
+        """
+        Yields the journaled orders in sequence order.
+
+        Args:
+            since_seq: Only orders with a higher sequence number are returned.
+        """
+        for path in self._segments_after(since_seq):
+            for record in read_segment(path):
+                if record.seq > since_seq:
+                    yield record
+
+    def follow(
+            self,
+            since_seq: int = 0,
+            poll_interval: float = 0.2,
+            stop: Optional[threading.Event] = None,
+        ) -> Iterator[JournalRecord]:
+        """
+        Yields the journaled orders and then new ones as they are written.
+
+        Args:
+            since_seq: Only orders with a higher sequence number are returned.
+            poll_interval: Seconds between checks for new data.
+            stop: Ends the iteration when set.
+        """
+        stop = stop or threading.Event()
+        last_seq = since_seq
+        path: Optional[str] = None
+        offset = 0
+        while not stop.is_set():
+            paths = self._segments_after(last_seq)
+            if path is None or path not in paths:
+                if not paths:
+                    stop.wait(poll_interval)
+                    continue
+                path, offset = paths[0], 0
+            records, offset = self._scan(path, offset)
+            for record in records:
+                if record.seq > last_seq:
+                    last_seq = record.seq
+                    yield record
+            if records:
+                continue
+            later = [p for p in paths if p > path]
+            if later:
+                records, offset = self._scan(path, offset) # Anything written right before the switch
+                for record in records:
+                    if record.seq > last_seq:
+                        last_seq = record.seq
+                        yield record
+                path, offset = later[0], 0
+                continue
+            stop.wait(poll_interval)
+
+    @staticmethod
+    def _scan(path: str, offset: int) -> Tuple[List[JournalRecord], int]:
+        """Decodes the complete lines after `offset`. Returns them and the offset after the last one."""
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+        end = data.rfind(b"\n") + 1 # Leave a line still being written for the next scan
+        records = []
+        for line in data[:end].splitlines(keepends=True):
+            record = _decode(line)
+            if record is not None:
+                records.append(record)
+        return records, offset + end
+
+
+_default_journal: Optional[OrderJournal] = None
+_default_journal_lock = threading.Lock()
+
+
+def get_order_journal(directory: str = DEFAULT_JOURNAL_DIR, fsync: str = "always", per_worker: bool = False) -> OrderJournal:
+    """
+    Returns the process-wide order journal, opening it on first use.
+
+    Args:
+        directory: Journal directory (only used by the first call).
+        fsync: fsync mode (only used by the first call).
+        per_worker: For several worker processes sharing `directory`: journal to
+                    the first `worker-<n>` subdirectory no other process holds.
+                    Each has its own sequence numbers; read them one by one.
+
+    Returns:
+        The shared OrderJournal.
+
+    Raises:
+        JournalError: If the directory (or every worker subdirectory) is in use.
+    """
+    global _default_journal
+    with _default_journal_lock:
+        if _default_journal is None:
+            if not per_worker:
+                _default_journal = OrderJournal(directory, fsync=fsync)
+            else:
+                for worker in range(MAX_WORKERS):
+                    try:
+                        _default_journal = OrderJournal(os.path.join(directory, f"worker-{worker}"), fsync=fsync)
+                        break
+                    except JournalError:
+                        continue
+                else:
+                    raise JournalError(f"All {MAX_WORKERS} worker journals under {directory} are in use")
+        return _default_journal
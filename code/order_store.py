@@ -0,0 +1,313 @@
+# order_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = "default" # Callers that send no session id share this order (the old behavior)
+DEFAULT_TTL = 30 * 60.0        # Abandoned partial orders are dropped after this many seconds
+LOCK_STRIPES = 64              # Per-session write locks of the memory backend
+
+
+class OrderRecord(NamedTuple):
+    """
+    The partial order of one session. Immutable: updates produce a new record.
+
+    `items` holds (item, quantity) pairs. The other fields are collected step
+    by step by `place_order` until the order can be confirmed.
+    """
+    items: Tuple[Tuple[str, int], ...] = ()
+    nyu_id: Optional[str] = None
+    building: Optional[str] = None
+    phone: Optional[str] = None
+    dietary: Optional[str] = None
+    pending_category: Optional[str] = None
+    pending_qty: Optional[int] = None
+    confirming: Optional[str] = None # Token of the request journaling the complete order
+    updated_at: float = 0.0
+
+
+# Applied to the current record of a session: returns the new record (None ends the session) and the reply
+OrderUpdate = Callable[[OrderRecord], Tuple[Optional[OrderRecord], str]]
+
+
+class OrderStore(ABC):
+    """
+    Session-scoped store of partial orders.
+
+    Every conversation keeps its own order under its session id, so concurrent
+    callers never see or overwrite each other's state. `get` is lock-free.
+    `update` runs a read-modify-write for one session atomically (two calls
+    for the same session, e.g. a speculative and a final generation, are
+    serialized; different sessions proceed in parallel). Sessions untouched
+    for `ttl` seconds are treated as abandoned and evicted.
+    """
+    backend = "abstract"
+
+    def __init__(self, ttl: float = DEFAULT_TTL, sweep_interval: Optional[float] = None) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            ttl: Seconds after the last update at which a session is evicted.
+            sweep_interval: Seconds between eviction sweeps (default: ttl / 10).
+        """
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval if sweep_interval is not None else ttl / 10
+        self._next_sweep = time.monotonic() + self.sweep_interval
+        self.updates = 0
+        self.evictions = 0
+
+    def _expired(self, record: OrderRecord, now: float) -> bool:
+        return now - record.updated_at > self.ttl
+
+    def _maybe_sweep(self) -> None:
+        """Runs `evict_expired` if the sweep interval has passed (called by writers)."""
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            evicted = self.evict_expired()
+            if evicted:
+                logger.info(f"🧾🧹 Evicted {evicted} abandoned order session(s) ({self.backend}).")
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[OrderRecord]:
+        """Returns the current record of a session, or None if there is none (or it expired)."""
+
+    @abstractmethod
+    def update(self, session_id: str, fn: OrderUpdate) -> str:
+        """
+        Atomically applies `fn` to the session's record and stores the result.
+
+        Args:
+            session_id: The session whose order is updated.
+            fn: Receives the current record (an empty one for a new session) and
+                returns the new record, or None to delete the session, plus a reply.
+
+        Returns:
+            The reply returned by `fn`.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Removes a session's order."""
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        """Removes all sessions older than the TTL. Returns the number removed."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of sessions with an order in progress."""
+
+    def close(self) -> None:
+        """Releases resources held by the backend."""
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the store counters.
+
+        Returns:
+            A dict with `backend`, `sessions`, `updates` and `evictions` (this process).
+        """
+        return {"backend": self.backend, "sessions": len(self), "updates": self.updates, "evictions": self.evictions}
+
+
+class MemoryOrderStore(OrderStore):
+    """
+    In-process backend: a dict of immutable records.
+
+    Readers look a record up without locking (publishing a new record is a
+    single dict assignment). Writers take one of `LOCK_STRIPES` locks chosen
+    by session id, so only updates of the same session wait for each other.
+    """
+    backend = "memory"
+
+    def __init__(self, ttl: float = DEFAULT_TTL, sweep_interval: Optional[float] = None) -> None:
+        super().__init__(ttl, sweep_interval)
+        self._records: Dict[str, OrderRecord] = {}
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def get(self, session_id: str) -> Optional[OrderRecord]:
+        record = self._records.get(session_id)
+        if record is None or self._expired(record, time.time()):
+            return None
+        return record
+
+    def update(self, session_id: str, fn: OrderUpdate) -> str:
+        with self._locks[hash(session_id) % LOCK_STRIPES]:
+            record, reply = fn(self.get(session_id) or OrderRecord())
+            if record is None:
+                self._records.pop(session_id, None)
+            else:
+                self._records[session_id] = record._replace(updated_at=time.time())
+            self.updates += 1
+        self._maybe_sweep()
+        return reply
+
+    def delete(self, session_id: str) -> None:
+        with self._locks[hash(session_id) % LOCK_STRIPES]:
+            self._records.pop(session_id, None)
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        evicted = 0
+        for session_id, record in list(self._records.items()):
+            if not self._expired(record, now):
+                continue
+            with self._locks[hash(session_id) % LOCK_STRIPES]:
+                current = self._records.get(session_id)
+                if current is not None and self._expired(current, now):
+                    del self._records[session_id]
+                    evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class SQLiteOrderStore(OrderStore):
+    """
+    Local SQLite backend in WAL mode, shared by several processes (e.g. uvicorn workers).
+
+    Each thread (and process) uses its own connection. Reads are plain
+    SELECTs, which WAL never blocks. `update` runs in a `BEGIN IMMEDIATE`
+    transaction, which serializes read-modify-writes across all processes
+    without blocking readers. Within a process, writers queue on a lock
+    instead, since SQLite's busy handler retries with sleeps of up to 100ms.
+    Records are stored as compact JSON arrays.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, sweep_interval: Optional[float] = None, busy_timeout: float = 5.0) -> None:
+        """
+        Opens (and if needed creates) the database.
+
+        Args:
+            path: Database file.
+            ttl: Seconds after the last update at which a session is evicted.
+            sweep_interval: Seconds between eviction sweeps (default: ttl / 10).
+            busy_timeout: Seconds a writer waits for another process's transaction.
+        """
+        super().__init__(ttl, sweep_interval)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS orders (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS orders_updated_at ON orders (updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Returns this thread's connection (a new one after a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _encode(record: OrderRecord) -> str:
+        return json.dumps(record[:-1], separators=(",", ":")) # updated_at has its own column
+
+    @staticmethod
+    def _decode(data: str, updated_at: float) -> OrderRecord:
+        fields = json.loads(data)
+        fields[0] = tuple(tuple(item) for item in fields[0])
+        return OrderRecord(*fields, updated_at=updated_at) # Rows written before a field was added get its default
+
+    def get(self, session_id: str) -> Optional[OrderRecord]:
+        row = self._conn().execute("SELECT data, updated_at FROM orders WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        record = self._decode(*row)
+        return None if self._expired(record, time.time()) else record
+
+    def update(self, session_id: str, fn: OrderUpdate) -> str:
+        conn = self._conn()
+        with self._write_lock:
+            reply = self._update(conn, session_id, fn)
+        self._maybe_sweep()
+        return reply
+
+    def _update(self, conn: sqlite3.Connection, session_id: str, fn: OrderUpdate) -> str:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data, updated_at FROM orders WHERE session_id = ?", (session_id,)).fetchone()
+            current = self._decode(*row) if row is not None else None
+            if current is None or self._expired(current, time.time()):
+                current = OrderRecord()
+            record, reply = fn(current)
+            if record is None:
+                conn.execute("DELETE FROM orders WHERE session_id = ?", (session_id,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO orders (session_id, data, updated_at) VALUES (?, ?, ?)",
+                             (session_id, self._encode(record), time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.updates += 1
+        return reply
+
+    def delete(self, session_id: str) -> None:
+        self._conn().execute("DELETE FROM orders WHERE session_id = ?", (session_id,))
+
+    def evict_expired(self) -> int:
+        cursor = self._conn().execute("DELETE FROM orders WHERE updated_at < ?", (time.time() - self.ttl,))
+        self.evictions += cursor.rowcount
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def create_order_store(backend: str = "memory", path: str = "data/orders.sqlite3", ttl: float = DEFAULT_TTL) -> OrderStore:
+    """
+    Creates an order store.
+
+    Args:
+        backend: "memory" (single process) or "sqlite" (shared by several processes).
+        path: Database file of the sqlite backend.
+        ttl: Seconds after which an abandoned partial order is evicted.
+
+    Returns:
+        The store.
+
+    Raises:
+        ValueError: For an unknown backend.
+    """
+    if backend == "memory":
+        store = MemoryOrderStore(ttl=ttl)
+    elif backend == "sqlite":
+        store = SQLiteOrderStore(path, ttl=ttl)
+    else:
+        raise ValueError(f"Unknown order store backend: {backend}")
+    logger.info(f"🧾 Order store: {backend}" + (f" ({path})" if backend == "sqlite" else "") + f", TTL {ttl:.0f}s.")
+    return store
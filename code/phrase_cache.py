@@ -0,0 +1,212 @@
+# phrase_cache.py
+import collections
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Chunk size used when a phrase is read back from disk (100 ms of 24 kHz int16 mono)
+DISK_CHUNK_BYTES = 4800
+
+
+def normalize_phrase_text(text: str) -> str:
+    """
+    Normalizes text for the phrase cache key.
+
+    Only whitespace is collapsed: punctuation and case change the prosody of
+    the synthesized audio, so they must stay part of the key.
+
+    Args:
+        text: The text passed to the TTS engine.
+
+    Returns:
+        The normalized text.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def phrase_cache_key(engine: str, voice: str, speed: float, text: str) -> str:
+    """
+    Builds the content address of a synthesized phrase.
+
+    Args:
+        engine: TTS engine name (e.g. "kokoro").
+        voice: Voice identifier of the engine.
+        speed: Speaking rate of the engine.
+        text: The text to synthesize (normalized here).
+
+    Returns:
+        A hex SHA-256 digest identifying the audio.
+    """
+    material = f"{engine}|{voice}|{speed:g}|{normalize_phrase_text(text)}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class PhraseAudioCache:
+    """
+    Content-addressed store of synthesized PCM, shared by all TTS engines of the pool.
+
+    Most replies come from a small, fixed set of MCP templates, so the same
+    sentences are synthesized over and over. Each phrase is addressed by
+    `phrase_cache_key` (engine, voice, speed and text), which makes sharing one
+    cache between different engines safe.
+
+    Entries live in a byte-budgeted LRU in memory. With `disk_dir` set they are
+    also written to disk, so they survive restarts; a memory miss then falls
+    back to the disk copy and promotes it. The chunk boundaries of the original
+    synthesis are kept in memory; chunks read back from disk are re-split into
+    `DISK_CHUNK_BYTES` pieces.
+    """
+    def __init__(
+            self,
+            max_bytes: int = 64 * 1024 * 1024,
+            max_entry_bytes: int = 4 * 1024 * 1024,
+            disk_dir: Optional[str] = None,
+        ) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_bytes: Memory budget for cached PCM (least recently used phrases are evicted).
+            max_entry_bytes: Phrases larger than this are not cached.
+            disk_dir: Optional directory for the persistent tier (created if missing).
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _disk_path(self, key: str) -> str:
+        """Path of the on-disk copy of `key` (sharded by the first two hex digits)."""
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pcm")
+
+    def _insert(self, key: str, chunks: tuple, size: int) -> None:
+        """Adds an entry to the memory tier and evicts down to the budget. Caller holds the lock."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= sum(len(c) for c in old)
+        self._entries[key] = chunks
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sum(len(c) for c in evicted)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        """Loads a phrase from the disk tier, or None if it is not there."""
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                pcm = f.read()
+        except OSError:
+            return None
+        if not pcm:
+            return None
+        return tuple(pcm[i:i + DISK_CHUNK_BYTES] for i in range(0, len(pcm), DISK_CHUNK_BYTES))
+
+    def _write_disk(self, key: str, chunks: Sequence[bytes]) -> None:
+        """Writes a phrase to the disk tier atomically (never leaves partial files)."""
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"👄💾⚠️ Could not write phrase {key[:12]} to disk: {e}")
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """
+        Returns the cached audio chunks of a phrase.
+
+        Args:
+            key: The key from `phrase_cache_key`.
+
+        Returns:
+            The PCM chunks (24 kHz int16) in playback order, or None on a miss.
+        """
+        with self._lock:
+            chunks = self._entries.get(key)
+            if chunks is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(chunks)
+
+        chunks = self._read_disk(key)
+        with self._lock:
+            if chunks is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, chunks, sum(len(c) for c in chunks))
+        return list(chunks)
+
+    def put(self, key: str, chunks: Sequence[bytes]) -> bool:
+        """
+        Stores the audio of a completely synthesized phrase.
+
+        Args:
+            key: The key from `phrase_cache_key`.
+            chunks: The PCM chunks as produced by the engine.
+
+        Returns:
+            True if the phrase was cached, False if it was empty or too large.
+        """
+        chunks = tuple(bytes(c) for c in chunks if c)
+        size = sum(len(c) for c in chunks)
+        if size == 0 or size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            self._insert(key, chunks, size)
+        if self.disk_dir:
+            self._write_disk(key, chunks)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.disk_dir) and os.path.exists(self._disk_path(key))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            A dict with `hits` (memory), `disk_hits`, `misses`, `hit_rate`,
+            `entries`, `bytes` (memory tier) and `evictions`.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,271 @@
+# presynthesis.py
+import ast
+import json
+import logging
+import os
+import threading
+import time
+from queue import Queue
+from typing import Dict, Iterable, List, Optional
+
+from text_context import TextContext, preprocess_tts_text
+
+logger = logging.getLogger(__name__)
+
+
+def quick_answer_text(text: str, text_context: Optional[TextContext] = None) -> str:
+    """
+    Returns the part of an MCP reply the speech pipeline passes to `AudioProcessor.synthesize`.
+
+    The pipeline preprocesses the reply and synthesizes the first context found
+    by `TextContext` (the quick answer), or the whole reply if there is none;
+    only that text is looked up in the phrase cache. The rest (overhang) is
+    streamed through `synthesize_generator`.
+
+    Args:
+        text: The reply text.
+        text_context: The splitter to use (a default TextContext if None).
+
+    Returns:
+        The quick answer text.
+    """
+    text = preprocess_tts_text(text)
+    context, _ = (text_context or TextContext()).get_context(text)
+    return context or text
+
+
+def fixed_prompts(app_path: str = "app.py") -> List[str]:
+    """
+    Collects the constant reply strings of the MCP functions.
+
+    Parses the module (without importing it) and returns every string literal
+    that a function returns as a whole, e.g. `return "🏢 Please mention your
+    building number."`, also as the reply of a `(record, reply)` tuple.
+    Formatted replies (f-strings) are left to the template synthesis.
+
+    Args:
+        app_path: Path of the MCP app module.
+
+    Returns:
+        The prompt strings in source order, without duplicates.
+    """
+    with open(app_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=app_path)
+    prompts: Dict[str, None] = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Return):
+            continue
+        reply = node.value
+        if isinstance(reply, ast.Tuple) and reply.elts:
+            reply = reply.elts[-1] # (record, reply) of an order update
+        if isinstance(reply, ast.Constant) and isinstance(reply.value, str) and reply.value.strip():
+            prompts[reply.value] = None
+    return list(prompts)
+
+
+def menu_vocabulary(menu_path: str = "data/enhanced_menu.json") -> List[str]:
+    """
+    Collects every category, sub-category and item name of the menu.
+
+    Args:
+        menu_path: Path of the menu JSON.
+
+    Returns:
+        The names in menu order, without duplicates. Descriptions are skipped.
+    """
+    with open(menu_path, "r", encoding="utf-8") as f:
+        menu = json.load(f)
+    names: Dict[str, None] = {}
+
+    def walk(node) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                names[key] = None
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                if isinstance(value, str):
+                    names[value] = None
+
+    walk(menu)
+    return list(names)
+
+
+def build_catalogue(
+        app_path: str = "app.py",
+        menu_path: str = "data/enhanced_menu.json",
+        greeting: Optional[str] = None,
+        extra: Iterable[str] = (),
+        fragments: Iterable[str] = (),
+    ) -> List[str]:
+    """
+    Builds the list of texts to pre-synthesize, most valuable first.
+
+    Args:
+        app_path: Path of the MCP app module (fixed prompts).
+        menu_path: Path of the menu JSON (category and item names).
+        greeting: Optional greeting spoken at the start of a conversation.
+        extra: Additional reply texts.
+        fragments: Texts cached exactly as given, not split like a reply
+                   (template fragments, see `TemplateSynthesizer.fragment_catalogue`).
+
+    Returns:
+        The texts as passed to `AudioProcessor.synthesize`, without duplicates.
+    """
+    text_context = TextContext()
+    catalogue: Dict[str, None] = {}
+    replies = ([greeting] if greeting else []) + fixed_prompts(app_path) + list(extra)
+    for reply in replies:
+        catalogue[quick_answer_text(reply, text_context)] = None
+    for text in list(menu_vocabulary(menu_path)) + list(fragments):
+        catalogue[preprocess_tts_text(text)] = None
+    return list(catalogue)
+
+
+class PreSynthesizer:
+    """
+    Fills the shared phrase cache with a catalogue of texts in the background.
+
+    Runs on a low-priority thread and only ever borrows a TTS engine from the
+    model pool while no session is using it (`ModelPool.acquire_background`).
+    When a session asks for a slot, the pool raises its preemption event; the
+    synthesis in progress is stopped through it and the slot is handed back at
+    once, so pre-synthesis never delays a live conversation. Texts that are
+    already cached (e.g. from the disk tier) are skipped.
+    """
+    def __init__(self, pool, catalogue: List[str], start_delay: float = 2.0, idle_poll: float = 1.0) -> None:
+        """
+        Initializes the worker. Call `start` to begin.
+
+        Args:
+            pool: The ModelPool whose phrase cache and TTS engines are used.
+            catalogue: Texts to synthesize, in order.
+            start_delay: Seconds to wait after `start` (lets the server finish starting).
+            idle_poll: Seconds between checks while sessions occupy the pool.
+        """
+        self.pool = pool
+        self.catalogue = list(catalogue)
+        self.start_delay = start_delay
+        self.idle_poll = idle_poll
+        self.state = "pending"
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.preempted = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._keys: List[str] = [] # Phrase cache keys of the catalogue, known once an engine was borrowed
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the background thread (no-op without a phrase cache or if already started)."""
+        if self._thread is not None:
+            return
+        if self.pool.phrase_cache is None:
+            self.state = "disabled"
+            logger.info("👄📚 Pre-synthesis disabled (no phrase cache).")
+            return
+        self._thread = threading.Thread(target=self._run, name="PreSynthesizer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the worker after the current phrase and waits briefly for it."""
+        self._stop_event.set()
+        self.pool.background_preempt.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    @staticmethod
+    def _lower_priority() -> None:
+        """Lowers the OS scheduling priority of the calling thread (Linux only, best effort)."""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+    def _synthesize(self, lease, text: str) -> bool:
+        """Synthesizes one text into the phrase cache. Returns False if preempted."""
+        audio = lease.audio_processor
+        audio.on_first_audio_chunk_synthesize = None # The lease may still point at its last session
+        sink = Queue() # Audio is only wanted in the phrase cache
+        return audio.synthesize(text, sink, self.pool.background_preempt, generation_string="[Presynth]")
+
+    def _run(self) -> None:
+        """Worker loop: synthesize each uncached catalogue entry while the pool is idle."""
+        self._lower_priority()
+        if self._stop_event.wait(self.start_delay):
+            return
+        self.state = "running"
+        self.started_at = time.time()
+        cache = self.pool.phrase_cache
+        logger.info(f"👄📚 Pre-synthesis of {len(self.catalogue)} phrases started.")
+
+        index = 0
+        while index < len(self.catalogue) and not self._stop_event.is_set():
+            text = self.catalogue[index]
+            lease = self.pool.acquire_background()
+            if lease is None:
+                self.state = "paused" # Sessions are active, wait for the pool to go idle
+                self._stop_event.wait(self.idle_poll)
+                continue
+            self.state = "running"
+            if not self._keys:
+                self._keys = [lease.audio_processor.phrase_key(t) for t in self.catalogue]
+            try:
+                if self._keys[index] in cache:
+                    self.skipped += 1
+                    index += 1
+                    continue
+                if self._synthesize(lease, text):
+                    self.done += 1
+                    index += 1
+                else:
+                    self.preempted += 1 # Retried once the pool is idle again
+            except Exception as e:
+                logger.warning(f"👄📚💥 Pre-synthesis failed for '{text[:40]}': {e}")
+                self.failed += 1
+                index += 1
+            finally:
+                self.pool.release_background(lease)
+            processed = self.done + self.skipped + self.failed
+            if processed and processed % 25 == 0:
+                logger.info(f"👄📚 Pre-synthesis progress: {processed}/{len(self.catalogue)}")
+
+        self.finished_at = time.time()
+        self.state = "stopped" if self._stop_event.is_set() else "finished"
+        status = self.status()
+        logger.info(f"👄📚✅ Pre-synthesis {self.state}: {status['coverage']:.0%} of the catalogue cached "
+                    f"({self.done} synthesized, {self.skipped} already cached, {self.failed} failed) "
+                    f"in {status['elapsed_s']:.1f}s.")
+
+    def status(self) -> Dict[str, object]:
+        """
+        Reports progress and coverage.
+
+        Returns:
+            A dict with `state` (pending, running, paused, finished, stopped or
+            disabled), `total`, `synthesized`, `skipped`, `failed`, `preempted`,
+            `progress` (fraction processed), `coverage` (fraction of the
+            catalogue currently in the phrase cache, 0 until the worker has
+            started) and `elapsed_s`.
+        """
+        total = len(self.catalogue)
+        processed = self.done + self.skipped + self.failed
+        cache = self.pool.phrase_cache
+        covered = sum(1 for key in self._keys if key in cache) if cache is not None else 0
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "state": self.state,
+            "total": total,
+            "synthesized": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "preempted": self.preempted,
+            "progress": processed / total if total else 1.0,
+            "coverage": covered / total if total else 1.0,
+            "elapsed_s": elapsed,
+        }
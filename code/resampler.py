@@ -0,0 +1,244 @@
+# resampler.py
+import numpy as np
+from math import gcd
+from numpy.lib.stride_tricks import as_strided
+from scipy.signal import firwin
+
+
+class StreamingResampler:
+    """
+    Rational-ratio polyphase resampler that keeps its filter state between calls.
+
+    Designs the same anti-aliasing FIR filter as `scipy.signal.resample_poly`
+    (Kaiser window, beta 5.0, 10 zero crossings per side) and applies it in
+    polyphase form, so only the non-zero taps of the zero-stuffed signal are
+    ever multiplied and only the output samples that are kept are computed.
+    The last few input samples are carried over as history, which makes the
+    output of a chunked stream continuous without recomputing any overlap.
+
+    Each output sample is the row sum of its own window times the taps of its
+    phase, reduced along a contiguous row of fixed length, so the summation
+    order never depends on the chunk size and the result is bit-exact
+    regardless of how the input is split into chunks.
+    The filter delay is compensated: output sample `j` is aligned with input
+    time `j * down / up`, exactly like `resample_poly`. Because of that, the
+    newest ~`half_len / up` input samples cannot be used until more input (or
+    `flush()`) arrives.
+
+    All work buffers are preallocated and only grow when a larger chunk than
+    seen before arrives, so steady-state processing does not allocate.
+    """
+    def __init__(self, up: int, down: int, dtype=np.float32) -> None:
+        """
+        Designs the filter and initializes the stream state.
+
+        Args:
+            up: Upsampling factor (e.g. 2 for 24kHz -> 48kHz).
+            down: Downsampling factor (e.g. 3 for 48kHz -> 16kHz).
+            dtype: Floating point type used for the computation and the output.
+        """
+        if up < 1 or down < 1:
+            raise ValueError(f"Resampling factors must be positive, got up={up}, down={down}")
+        g = gcd(up, down)
+        self.up = up // g
+        self.down = down // g
+        self.dtype = np.dtype(dtype)
+
+        max_rate = max(self.up, self.down)
+        self.half_len = 10 * max_rate
+        h = firwin(2 * self.half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+
+        # Polyphase decomposition: phases[p, i] = h[p + i * up]
+        self.taps_per_phase = -(-len(h) // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[:len(h)] = h
+        phases = padded.reshape(self.taps_per_phase, self.up).T
+        # Reversed so that a forward window over the input lines up with the taps
+        self.phases = np.ascontiguousarray(phases[:, ::-1]).astype(self.dtype)
+
+        self._out = np.empty(0, dtype=self.dtype)
+        self._products = np.empty(0, dtype=self.dtype)
+        # Taps of each phase repeated once per output row. Multiplying two
+        # same-shaped contiguous arrays lets numpy skip its internal (allocating)
+        # buffered iteration that a broadcast operand would trigger.
+        self._tiled_phases = np.empty((self.up, 0, self.taps_per_phase), dtype=self.dtype)
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards all stream state so the next call starts a new, independent stream."""
+        history = self.taps_per_phase - 1
+        # _buf holds input samples from absolute index _buf_start onwards; the
+        # stream starts with zeros before sample 0.
+        self._buf = np.zeros(max(history + 4096, 2 * history), dtype=self.dtype)
+        self._buf_start = -history
+        self._buf_len = history
+        self._n_in = 0      # Total input samples received
+        self._n_out = 0     # Total output samples produced
+
+    @staticmethod
+    def _grow(arr: np.ndarray, size: int) -> np.ndarray:
+        """Returns `arr` or a larger replacement with at least `size` elements."""
+        if arr.size >= size:
+            return arr
+        return np.empty(max(size, 2 * arr.size), dtype=arr.dtype)
+
+    def _append(self, samples: np.ndarray) -> None:
+        """Appends input samples to the history buffer, growing it if needed."""
+        needed = self._buf_len + len(samples)
+        if needed > self._buf.size:
+            grown = np.empty(max(needed, 2 * self._buf.size), dtype=self.dtype)
+            grown[:self._buf_len] = self._buf[:self._buf_len]
+            self._buf = grown
+        self._buf[self._buf_len:needed] = samples
+        self._buf_len = needed
+
+    def _available_outputs(self, n_in: int) -> int:
+        """Number of output samples (in total) computable from `n_in` input samples."""
+        # Output j needs input index (j * down + half_len) // up <= n_in - 1
+        limit = n_in * self.up - self.half_len
+        if limit <= 0:
+            return 0
+        return -(-limit // self.down)
+
+    def _compute(self, n_end: int) -> np.ndarray:
+        """Computes outputs [_n_out, n_end) from the buffered input and drops stale history."""
+        count = n_end - self._n_out
+        if count <= 0:
+            return self._out[:0]
+
+        taps = self.taps_per_phase
+        rows = -(-count // self.up)
+        self._out = self._grow(self._out, count)
+        self._products = self._grow(self._products, rows * taps)
+        if self._tiled_phases.shape[1] < rows:
+            rows_capacity = max(rows, 2 * self._tiled_phases.shape[1])
+            self._tiled_phases = np.ascontiguousarray(
+                np.broadcast_to(self.phases[:, None, :], (self.up, rows_capacity, taps)))
+        out = self._out[:count]
+
+        up, down, base = self.up, self.down, self._buf_start
+        buf = self._buf
+        itemsize = buf.itemsize
+        for offset in range(min(up, count)):
+            j = self._n_out + offset
+            u = j * down + self.half_len
+            phase, newest = u % up, u // up
+            n = (count - offset + up - 1) // up   # outputs j, j + up, j + 2*up, ...
+            # Row k is the input window of output j + k*up (oldest sample first)
+            first = newest - (taps - 1) - base
+            windows = as_strided(buf[first:], shape=(n, taps), strides=(down * itemsize, itemsize), writeable=False)
+            products = self._products[:n * taps].reshape(n, taps)
+            np.copyto(products, windows)
+            np.multiply(products, self._tiled_phases[phase, :n], out=products)
+            np.add.reduce(products, axis=1, out=out[offset::up])
+
+        self._n_out = n_end
+
+        # Keep only the history the next output still needs
+        next_newest = (self._n_out * down + self.half_len) // up
+        keep_from = next_newest - (self.taps_per_phase - 1)
+        drop = min(keep_from - base, self._buf_len)
+        if drop > 0:
+            remaining = self._buf_len - drop
+            self._buf[:remaining] = self._buf[drop:self._buf_len]
+            self._buf_len = remaining
+            self._buf_start += drop
+        return out
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resamples the next chunk of the stream.
+
+        Args:
+            samples: 1-D array of input samples (any numeric dtype).
+
+        Returns:
+            The newly available output samples. The array is a view into an
+            internal buffer and is only valid until the next call; copy it (or
+            convert it, e.g. with `astype`) if it must be kept.
+        """
+        if len(samples):
+            self._append(samples)
+            self._n_in += len(samples)
+        return self._compute(self._available_outputs(self._n_in))
+
+    def flush(self) -> np.ndarray:
+        """
+        Emits the tail of the stream and resets the state.
+
+        Pads the input with zeros (as `resample_poly` does) until all
+        `ceil(n_in * up / down)` output samples have been produced.
+
+        Returns:
+            The remaining output samples (a copy, safe to keep).
+        """
+        total = -(-self._n_in * self.up // self.down)
+        if total > self._n_out:
+            last_newest = ((total - 1) * self.down + self.half_len) // self.up
+            pad = last_newest - (self._buf_start + self._buf_len) + 1
+            if pad > 0:
+                self._append(np.zeros(pad, dtype=self.dtype))
+            tail = self._compute(total).copy()
+        else:
+            tail = np.zeros(0, dtype=self.dtype)
+        self.reset()
+        return tail
+
+
+class PCM16Resampler:
+    """
+    Streaming resampler for int16 PCM that reuses all of its buffers.
+
+    Wraps a `StreamingResampler` and converts its float output back to int16
+    (clipping in place) into a small ring of preallocated frames. Each call
+    returns a view of the next ring slot, so consumers that hold on to a
+    returned frame for a short while (e.g. a recorder queue) are not affected
+    by the following few calls. Apart from growing the buffers when a larger
+    frame than before arrives, processing a frame does not allocate.
+    """
+    def __init__(self, up: int, down: int, ring_slots: int = 4, frame_capacity: int = 2048) -> None:
+        """
+        Initializes the resampler and its output ring.
+
+        Args:
+            up: Upsampling factor.
+            down: Downsampling factor.
+            ring_slots: Number of output frames kept alive before a slot is reused.
+            frame_capacity: Initial capacity (in output samples) of each slot.
+        """
+        self.resampler = StreamingResampler(up, down)
+        self._ring = np.empty((max(1, ring_slots), frame_capacity), dtype=np.int16)
+        self._slot = 0
+
+    def _to_int16(self, audio: np.ndarray) -> np.ndarray:
+        """Clips `audio` in place and copies it into the next ring slot as int16."""
+        slots, capacity = self._ring.shape
+        if audio.size > capacity:
+            self._ring = np.empty((slots, max(audio.size, 2 * capacity)), dtype=np.int16)
+        self._slot = (self._slot + 1) % slots
+        frame = self._ring[self._slot, :audio.size]
+        np.clip(audio, -32768, 32767, out=audio)
+        np.copyto(frame, audio, casting="unsafe")
+        return frame
+
+    def process(self, pcm) -> np.ndarray:
+        """
+        Resamples the next chunk of int16 PCM.
+
+        Args:
+            pcm: Raw int16 PCM as bytes / any buffer, or an int16 numpy array.
+
+        Returns:
+            The new int16 output samples, a view into the ring that stays valid
+            for the next `ring_slots - 1` calls.
+        """
+        samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        return self._to_int16(self.resampler.process(samples))
+
+    def flush(self) -> np.ndarray:
+        """Emits the tail of the stream as int16 (a view into the ring) and resets the state."""
+        return self._to_int16(self.resampler.flush())
+
+    def reset(self) -> None:
+        """Discards all stream state."""
+        self.resampler.reset()
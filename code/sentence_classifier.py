@@ -0,0 +1,408 @@
+import logging
+logger = logging.getLogger(__name__)
+
+import inspect
+import os
+import threading
+import time
+import queue
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import transformers
+import torch
+import torch.nn.functional as F
+
+from completion_cache import CompletionProbabilityCache
+from timing_stats import TimingStats
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    onnxruntime = None
+    ONNXRUNTIME_AVAILABLE = False
+
+# Model locations: Hugging Face id (local runs) and the pre-downloaded copy on the server
+model_dir_local = "KoljaB/SentenceFinishedClassification"
+model_dir_cloud = "/root/models/sentenceclassification/"
+
+# Inference backends: full precision PyTorch, dynamic int8 quantized PyTorch (CPU), ONNX Runtime (CPU)
+BACKEND_TORCH = "torch"
+BACKEND_TORCH_INT8 = "torch-int8"
+BACKEND_ONNX = "onnx"
+BACKENDS = (BACKEND_TORCH, BACKEND_TORCH_INT8, BACKEND_ONNX)
+default_onnx_path = os.path.join(os.path.expanduser("~"), ".cache", "ez247", "sentence_classifier.onnx")
+
+# Sentences used to check an optimized backend against the full precision model
+VALIDATION_SENTENCES = [
+    "I would like to order a large pepperoni pizza.",
+    "I would like to order a",
+    "Can I get two chicken teriyaki bowls and",
+    "What flavors do you have?",
+    "How much is the beef supreme",
+    "That's everything, thank you!",
+    "Actually, make that...",
+    "yes",
+]
+
+
+class SentenceClassifier:
+    """
+    Shared, micro-batching inference service for the sentence completion model (DistilBERT).
+
+    One instance is created per process and handed to every `TurnDetection`,
+    so concurrent client sessions share a single copy of the weights. Instead
+    of running one forward pass per partial transcript, `predict` enqueues the
+    sentence and a single worker thread collects everything that arrives within
+    a short batching window (from all sessions), runs one forward pass over the
+    batch padded only to its longest sentence, and hands each probability back
+    to the caller that asked for it. Identical sentences within a batch are
+    computed once.
+
+    The batching window is only waited for while more than one caller thread
+    has been active recently; a single session gets its prediction without the
+    extra delay.
+
+    `completion_cache` memoizes `predict` across turns and sessions; turn
+    detection goes through it so the model only runs for new sentences.
+    """
+
+    def __init__(
+            self,
+            local: bool = False,
+            max_length: int = 128,
+            batch_window: float = 0.005,
+            max_batch_size: int = 32,
+            active_caller_timeout: float = 2.0,
+            backend: str = BACKEND_TORCH,
+            onnx_path: Optional[str] = None,
+            validation_tolerance: float = 0.03,
+            cache_size: int = 4096,
+            model_dir: Optional[str] = None,
+        ) -> None:
+        """
+        Loads and warms up the sentence classification model and starts the batching worker.
+
+        An optimized `backend` is only used if its probabilities on
+        `VALIDATION_SENTENCES` stay within `validation_tolerance` of the full
+        precision model; otherwise (or if it cannot be set up) the classifier
+        falls back to full precision PyTorch. The backend actually in use is
+        available as `self.backend`.
+
+        Args:
+            local: If True, loads the model from `model_dir_local`, otherwise from `model_dir_cloud`.
+            max_length: Maximum token length; longer sentences are truncated.
+            batch_window: Seconds the worker waits after the first queued sentence for
+                          more sentences from other sessions before running the batch.
+            max_batch_size: Maximum number of distinct sentences per forward pass.
+            active_caller_timeout: Seconds a calling thread counts as active for deciding
+                                   whether waiting for a batch is worthwhile.
+            backend: One of `BACKENDS`: "torch" (full precision), "torch-int8" (dynamic int8
+                     quantization of the linear layers, CPU only) or "onnx" (exported graph
+                     run by ONNX Runtime on CPU, needs the onnxruntime package).
+            onnx_path: Where the exported ONNX graph is cached. Defaults to `default_onnx_path`.
+            validation_tolerance: Maximum absolute probability difference to the full
+                                  precision model accepted for an optimized backend.
+            cache_size: Number of sentences kept in `completion_cache`.
+            model_dir: Model directory or Hugging Face id; overrides `local` if given.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown sentence classifier backend '{backend}', expected one of {BACKENDS}")
+        if model_dir is None:
+            model_dir = model_dir_local if local else model_dir_cloud
+
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"🎤🔌 Using device: {self.device}")
+        self.tokenizer = transformers.DistilBertTokenizerFast.from_pretrained(model_dir)
+        self.classification_model = transformers.DistilBertForSequenceClassification.from_pretrained(model_dir)
+        self.classification_model.to(self.device)
+        self.classification_model.eval() # Set model to evaluation mode
+        self.max_length: int = max_length
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.active_caller_timeout = active_caller_timeout
+
+        self.backend = BACKEND_TORCH
+        self._infer: Callable[[List[str]], List[float]] = self._infer_torch
+        self._quantized_model: Optional[torch.nn.Module] = None
+        self._onnx_session: Any = None
+        if backend != BACKEND_TORCH:
+            self._setup_backend(backend, onnx_path or default_onnx_path, validation_tolerance)
+
+        self._requests: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._callers: Dict[int, float] = {} # thread id -> last request time
+        self._callers_lock = threading.Lock()
+
+        # Statistics: per forward pass, per request (queueing + inference) and batch sizes
+        self.inference_stats = TimingStats()
+        self.request_stats = TimingStats()
+        self.batches = 0
+        self.batched_sentences = 0
+        self._started_at = time.monotonic()
+        self.completion_cache = CompletionProbabilityCache(self.predict, max_size=cache_size)
+
+        # Warmup the classification model for faster initial predictions
+        logger.info("🎤🔥 Warming up the classification model...")
+        self.predict_batch(["This is a warmup sentence.", "And a second, slightly longer warmup sentence"])
+        logger.info("🎤✅ Classification model warmed up.")
+
+        self._shutdown = False
+        self._worker = threading.Thread(target=self._batch_worker, name="SentenceClassifierWorker", daemon=True)
+        self._worker.start()
+
+    def _setup_backend(self, backend: str, onnx_path: str, tolerance: float) -> None:
+        """
+        Prepares an optimized backend and switches to it if it matches the full precision model.
+
+        Args:
+            backend: `BACKEND_TORCH_INT8` or `BACKEND_ONNX`.
+            onnx_path: Cache path of the exported ONNX graph.
+            tolerance: Maximum accepted absolute probability difference.
+        """
+        try:
+            if self.device.type != "cpu":
+                raise RuntimeError(f"backend '{backend}' is CPU only, running on {self.device}")
+            if backend == BACKEND_TORCH_INT8:
+                self._quantized_model = torch.quantization.quantize_dynamic(
+                    self.classification_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                infer = self._infer_torch_int8
+            else:
+                if not ONNXRUNTIME_AVAILABLE:
+                    raise RuntimeError("onnxruntime is not installed")
+                self._onnx_session = self._load_onnx_session(onnx_path)
+                infer = self._infer_onnx
+        except Exception as e:
+            logger.warning(f"🎤⚠️ Could not set up '{backend}' classifier backend ({e}), using full precision PyTorch.")
+            return
+
+        reference = self._infer_torch(VALIDATION_SENTENCES)
+        candidate = infer(VALIDATION_SENTENCES)
+        max_diff = max(abs(a - b) for a, b in zip(reference, candidate))
+        if max_diff > tolerance:
+            logger.warning(f"🎤⚠️ '{backend}' classifier backend deviates by {max_diff:.4f} (> {tolerance}) from full precision, using full precision PyTorch.")
+            self._quantized_model = None
+            self._onnx_session = None
+            return
+
+        self.backend = backend
+        self._infer = infer
+        logger.info(f"🎤⚡ Using '{backend}' classifier backend (max deviation {max_diff:.4f}).")
+
+    def _load_onnx_session(self, onnx_path: str) -> Any:
+        """
+        Exports the model to ONNX (once, with dynamic batch and sequence axes) and opens it in ONNX Runtime.
+
+        Args:
+            onnx_path: File the graph is cached in; exported if it does not exist yet.
+
+        Returns:
+            An `onnxruntime.InferenceSession` on the CPU execution provider.
+        """
+        if not os.path.exists(onnx_path):
+            logger.info(f"🎤📦 Exporting sentence classifier to ONNX: {onnx_path}")
+            os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+            sample = self.tokenizer(["This is an export sentence."], return_tensors="pt")
+            tmp_path = onnx_path + ".tmp"
+            # torch >= 2.9 defaults to the torch.export based exporter, which needs onnxscript
+            export_options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+            torch.onnx.export(
+                self.classification_model,
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=14,
+                **export_options,
+            )
+            os.replace(tmp_path, onnx_path) # Never leave a half-written graph behind
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def _tokenize(self, sentences: List[str], return_tensors: str) -> Dict[str, Any]:
+        """Tokenizes with dynamic padding to the longest sentence of the batch."""
+        return self.tokenizer(
+            sentences,
+            return_tensors=return_tensors,
+            truncation=True,
+            padding=True,
+            max_length=self.max_length
+        )
+
+    def _run_torch(self, model: torch.nn.Module, sentences: List[str], device: torch.device) -> List[float]:
+        """Runs a PyTorch model and returns the 'complete' probabilities."""
+        inputs = self._tokenize(sentences, "pt")
+        # Move input tensors to the correct device (CPU or GPU)
+        inputs = {key: value.to(device) for key, value in inputs.items()}
+        with torch.no_grad(): # Disable gradient calculation for inference
+            outputs = model(**inputs)
+        # Apply softmax to get probabilities [prob_incomplete, prob_complete]
+        probabilities = F.softmax(outputs.logits, dim=1)
+        return probabilities[:, 1].tolist() # Index 1 corresponds to 'complete' label
+
+    def _infer_torch(self, sentences: List[str]) -> List[float]:
+        """Full precision PyTorch inference."""
+        return self._run_torch(self.classification_model, sentences, self.device)
+
+    def _infer_torch_int8(self, sentences: List[str]) -> List[float]:
+        """Dynamic int8 quantized PyTorch inference (CPU)."""
+        return self._run_torch(self._quantized_model, sentences, torch.device("cpu"))
+
+    def _infer_onnx(self, sentences: List[str]) -> List[float]:
+        """ONNX Runtime inference (CPU)."""
+        inputs = self._tokenize(sentences, "np")
+        (logits,) = self._onnx_session.run(["logits"], {
+            "input_ids": inputs["input_ids"].astype(np.int64),
+            "attention_mask": inputs["attention_mask"].astype(np.int64),
+        })
+        # Numerically stable softmax over [incomplete, complete]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp[:, 1] / exp.sum(axis=1)).tolist()
+
+    def predict_batch(self, sentences: List[str]) -> List[float]:
+        """
+        Runs the model once over several sentences.
+
+        Pads only to the longest sentence of the batch (dynamic padding) rather
+        than to `max_length`; the attention mask keeps the padding from
+        affecting the result. Uses the selected backend.
+
+        Args:
+            sentences: The input sentences.
+
+        Returns:
+            For each sentence, the probability (between 0.0 and 1.0) that it is
+            considered complete by the model.
+        """
+        if not sentences:
+            return []
+        start = time.perf_counter()
+        probabilities = self._infer(sentences)
+        self.inference_stats.record(time.perf_counter() - start)
+        return probabilities
+
+    def predict(self, sentence: str, timeout: Optional[float] = None) -> float:
+        """
+        Returns the completion probability of one sentence, batched with concurrent callers.
+
+        Blocks the calling thread until the worker has processed the batch
+        containing this sentence.
+
+        Args:
+            sentence: The input sentence string to analyze.
+            timeout: Maximum seconds to wait for the result. None waits indefinitely.
+
+        Returns:
+            A float representing the probability (between 0.0 and 1.0) that the
+            sentence is considered complete by the model.
+        """
+        if self._shutdown:
+            return self.predict_batch([sentence])[0]
+
+        now = time.monotonic()
+        with self._callers_lock:
+            self._callers[threading.get_ident()] = now
+
+        future: Future = Future()
+        self._requests.put((sentence, future))
+        result = future.result(timeout=timeout)
+        self.request_stats.record(time.monotonic() - now)
+        return result
+
+    def _active_callers(self) -> int:
+        """Counts the threads that requested a prediction within `active_caller_timeout`."""
+        cutoff = time.monotonic() - self.active_caller_timeout
+        with self._callers_lock:
+            for ident in [ident for ident, seen in self._callers.items() if seen < cutoff]:
+                del self._callers[ident]
+            return len(self._callers)
+
+    def _collect_batch(self, first: Tuple[str, Future]) -> Dict[str, List[Future]]:
+        """Gathers requests for one forward pass, starting with `first`."""
+        pending: Dict[str, List[Future]] = {first[0]: [first[1]]}
+        deadline = time.monotonic() + (self.batch_window if self._active_callers() > 1 else 0.0)
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None: # Shutdown sentinel, finish this batch first
+                self._requests.put(None)
+                break
+            sentence, future = item
+            pending.setdefault(sentence, []).append(future)
+        return pending
+
+    def _batch_worker(self) -> None:
+        """Worker loop: collects requests into batches and resolves their futures."""
+        while True:
+            first = self._requests.get()
+            if first is None:
+                break
+            pending = self._collect_batch(first)
+            sentences = list(pending)
+            try:
+                probabilities = self.predict_batch(sentences)
+            except Exception as e:
+                logger.error(f"🎤💥 Sentence classification batch of {len(sentences)} failed: {e}", exc_info=True)
+                for futures in pending.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_sentences += len(sentences)
+            for sentence, probability in zip(sentences, probabilities):
+                for future in pending[sentence]:
+                    future.set_result(probability)
+
+        # Requests that raced with shutdown are answered directly
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                sentence, future = item
+                try:
+                    future.set_result(self.predict_batch([sentence])[0])
+                except Exception as e:
+                    future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns latency and throughput statistics of the classifier.
+
+        Returns:
+            A dict with `inference` (per forward pass) and `request` (per `predict`
+            call, including queueing) timing snapshots, the number of batches, the
+            mean batch size, the overall sentence throughput per second and the
+            `completion_cache` counters.
+        """
+        elapsed = time.monotonic() - self._started_at
+        return {
+            "inference": self.inference_stats.snapshot(),
+            "request": self.request_stats.snapshot(),
+            "batches": self.batches,
+            "mean_batch_size": (self.batched_sentences / self.batches) if self.batches else 0.0,
+            "sentences_per_second": self.batched_sentences / elapsed if elapsed > 0 else 0.0,
+            "cache": self.completion_cache.stats(),
+        }
+
+    def shutdown(self) -> None:
+        """Stops the batching worker after the queued requests have been processed."""
+        if self._shutdown:
+            return
+        self._shutdown = True
+        self._requests.put(None)
+        self._worker.join(timeout=2.0)
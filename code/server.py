@@ -13,11 +13,13 @@ from colors import Colors
 import uvicorn
 import asyncio
 import struct
+import base64
 import json
 import time
 import threading # Keep threading for SpeechPipelineManager internals and AbortWorker
 import sys
 import os # Added for environment variable access
+import uuid
 from asyncio import run_coroutine_threadsafe
 
 from typing import Any, Dict, Optional, Callable # Added for type hints in docstrings
@@ -58,6 +60,67 @@ except ValueError:
         logger.warning("🖥️⚠️ Invalid MAX_AUDIO_QUEUE_SIZE env var. Using default: 50")
     MAX_AUDIO_QUEUE_SIZE = 50
 
+# Define how many client sessions may run concurrently (one model pool slot each)
+try:
+    MAX_CONCURRENT_SESSIONS = int(os.getenv("MAX_CONCURRENT_SESSIONS", 2))
+    if __name__ == "__main__":
+        logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} Concurrent session limit set to: {Colors.apply(str(MAX_CONCURRENT_SESSIONS)).blue}")
+except ValueError:
+    if __name__ == "__main__":
+        logger.warning("🖥️⚠️ Invalid MAX_CONCURRENT_SESSIONS env var. Using default: 2")
+    MAX_CONCURRENT_SESSIONS = 2
+
+# Seconds a new connection waits for a free model slot before being turned away
+SESSION_ACQUIRE_TIMEOUT = 10.0
+
+# Inference backend of the turn detection classifier: torch, torch-int8 or onnx (CPU)
+TURN_DETECTION_BACKEND = os.getenv("TURN_DETECTION_BACKEND", "torch")
+if __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} Turn detection backend: {Colors.apply(TURN_DETECTION_BACKEND).blue}")
+
+# MCP function server; MCP_IN_PROCESS=1 calls app.FUNCTIONS directly instead of over HTTP
+MCP_URL = os.getenv("MCP_URL", "http://localhost:9000/mcp")
+MCP_IN_PROCESS = os.getenv("MCP_IN_PROCESS", "0").lower() in ("1", "true", "yes")
+if __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} MCP: {Colors.apply('in-process' if MCP_IN_PROCESS else MCP_URL).blue}")
+
+# Cache of synthesized reply phrases shared by all TTS engines (memory budget in MB, optional disk tier)
+try:
+    PHRASE_CACHE_MB = int(os.getenv("PHRASE_CACHE_MB", 64))
+except ValueError:
+    if __name__ == "__main__":
+        logger.warning("🖥️⚠️ Invalid PHRASE_CACHE_MB env var. Using default: 64")
+    PHRASE_CACHE_MB = 64
+PHRASE_CACHE_DIR = os.getenv("PHRASE_CACHE_DIR") or None
+if __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} Phrase cache: {Colors.apply(f'{PHRASE_CACHE_MB} MB' + (f', disk {PHRASE_CACHE_DIR}' if PHRASE_CACHE_DIR else '')).blue}")
+
+# Background pre-synthesis of fixed replies and menu names into the phrase cache
+PRESYNTHESIS = os.getenv("PRESYNTHESIS", "1").lower() in ("1", "true", "yes")
+GREETING_TEXT = os.getenv("GREETING_TEXT") or None
+# Splice template replies (prices, availability, ...) from cached fragments instead of live TTS
+TEMPLATE_TTS = os.getenv("TEMPLATE_TTS", "1").lower() in ("1", "true", "yes")
+
+# Deterministic intent fast path: common price/availability/order utterances skip the LLM translation
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "1").lower() in ("1", "true", "yes")
+try:
+    INTENT_THRESHOLD = float(os.getenv("INTENT_THRESHOLD", 0.75))
+except ValueError:
+    if __name__ == "__main__":
+        logger.warning("🖥️⚠️ Invalid INTENT_THRESHOLD env var. Using default: 0.75")
+    INTENT_THRESHOLD = 0.75
+if __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} Intent fast path: {Colors.apply(f'threshold {INTENT_THRESHOLD}' if INTENT_FAST_PATH else 'off').blue}")
+
+# Token budget of the conversation prompt (pinned system prompt + sliding history window)
+try:
+    HISTORY_TOKENS = int(os.getenv("HISTORY_TOKENS", 2048))
+except ValueError:
+    if __name__ == "__main__":
+        logger.warning("🖥️⚠️ Invalid HISTORY_TOKENS env var. Using default: 2048")
+    HISTORY_TOKENS = 2048
+if __name__ == "__main__":
+    logger.info(f"🖥️⚙️ {Colors.apply('[PARAM]').blue} History budget: {Colors.apply(f'{HISTORY_TOKENS} tokens').blue}")
 
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -66,6 +129,11 @@ if sys.platform == "win32":
 #from audio_out import AudioOutProcessor
 from audio_in import AudioInputProcessor
 from speech_pipeline_manager import SpeechPipelineManager
+from model_pool import ModelPool, ModelLease
+from presynthesis import PreSynthesizer, build_catalogue
+from menu_snapshot import get_menu_store
+from event_bridge import LoopWakeup
+from tts_frame import pack_tts_frame, TTS_FORMAT_JSON, TTS_FORMAT_PCM16
 from colors import Colors
 
 LANGUAGE = "en"
@@ -113,34 +181,47 @@ async def lifespan(app: FastAPI):
     """
     Manages the application's lifespan, initializing and shutting down resources.
 
-    Initializes global components like SpeechPipelineManager, Upsampler, and
-    AudioInputProcessor and stores them in `app.state`. Handles cleanup on shutdown.
+    Loads the heavy models (Whisper, turn detection classifier, TTS engine) once
+    into a `ModelPool` stored in `app.state`. Connection-specific state is
+    created per WebSocket in `ClientSession`. Handles cleanup on shutdown.
 
     Args:
         app: The FastAPI application instance.
     """
     logger.info("🖥️▶️ Server starting up")
-    # Initialize global components, not connection-specific state
-    app.state.SpeechPipelineManager = SpeechPipelineManager(
+    # Initialize shared models only, sessions borrow them per connection
+    app.state.ModelPool = ModelPool(
+        size=MAX_CONCURRENT_SESSIONS,
+        language=LANGUAGE,
         tts_engine=TTS_START_ENGINE,
+        orpheus_model=TTS_ORPHEUS_MODEL,
         llm_provider=LLM_START_PROVIDER,
         llm_model=LLM_START_MODEL,
         no_think=NO_THINK,
-        orpheus_model=TTS_ORPHEUS_MODEL,
-    )
-
-    app.state.Upsampler = UpsampleOverlap()
-    app.state.AudioInputProcessor = AudioInputProcessor(
-        LANGUAGE,
-        is_orpheus=TTS_START_ENGINE=="orpheus",
-        pipeline_latency=app.state.SpeechPipelineManager.full_output_pipeline_latency / 1000, # seconds
+        turn_detection_backend=TURN_DETECTION_BACKEND,
+        mcp_url=MCP_URL,
+        mcp_in_process=MCP_IN_PROCESS,
+        phrase_cache_bytes=PHRASE_CACHE_MB * 1024 * 1024,
+        phrase_cache_dir=PHRASE_CACHE_DIR,
+        template_tts=TEMPLATE_TTS,
     )
-    app.state.Aborting = False # Keep this? Its usage isn't clear in the provided snippet. Minimizing changes.
+    if MCP_IN_PROCESS:
+        get_menu_store().start_watching() # Tool calls read the menu in this process
+    app.state.PreSynthesizer = None
+    if PRESYNTHESIS:
+        template_synthesizer = app.state.ModelPool.template_synthesizer
+        fragments = template_synthesizer.fragment_catalogue() if template_synthesizer is not None else []
+        app.state.PreSynthesizer = PreSynthesizer(app.state.ModelPool, build_catalogue(greeting=GREETING_TEXT, fragments=fragments))
+        app.state.PreSynthesizer.start() # Waits a moment, then only runs while no session is active
 
     yield
 
     logger.info("🖥️⏹️ Server shutting down")
-    app.state.AudioInputProcessor.shutdown()
+    if app.state.PreSynthesizer is not None:
+        app.state.PreSynthesizer.stop()
+    if MCP_IN_PROCESS:
+        get_menu_store().stop_watching()
+    app.state.ModelPool.shutdown()
 
 # --------------------------------------------------------------------
 # FastAPI app instance
@@ -183,6 +264,25 @@ async def get_index() -> HTMLResponse:
         html_content = f.read()
     return HTMLResponse(content=html_content)
 
+@app.get("/presynthesis")
+async def presynthesis_status():
+    """
+    Reports the progress of the background pre-synthesis and the phrase cache.
+
+    Returns:
+        A dict with the pre-synthesis `status` (None if disabled), the
+        `phrase_cache` counters (None if there is no phrase cache) and the
+        template splicing counters (`templates`, None if disabled).
+    """
+    presynthesizer = app.state.PreSynthesizer
+    phrase_cache = app.state.ModelPool.phrase_cache
+    template_synthesizer = app.state.ModelPool.template_synthesizer
+    return {
+        "status": presynthesizer.status() if presynthesizer is not None else None,
+        "phrase_cache": phrase_cache.stats() if phrase_cache is not None else None,
+        "templates": template_synthesizer.stats() if template_synthesizer is not None else None,
+    }
+
 # --------------------------------------------------------------------
 # Utility functions
 # --------------------------------------------------------------------
@@ -234,7 +334,7 @@ def format_timestamp_ns(timestamp_ns: int) -> str:
 # WebSocket data processing
 # --------------------------------------------------------------------
 
-async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: asyncio.Queue, callbacks: 'TranscriptionCallbacks') -> None:
+async def process_incoming_data(ws: WebSocket, session: 'ClientSession', incoming_chunks: asyncio.Queue) -> None:
     """
     Receives messages via WebSocket, processes audio and text messages.
 
@@ -246,10 +346,10 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
 
     Args:
         ws: The WebSocket connection instance.
-        app: The FastAPI application instance (for accessing global state if needed).
+        session: The ClientSession owning this connection's pipeline and state.
         incoming_chunks: An asyncio queue to put processed audio metadata dictionaries into.
-        callbacks: The TranscriptionCallbacks instance for this connection to manage state.
     """
+    callbacks = session.callbacks
     try:
         while True:
             msg = await ws.receive()
@@ -310,11 +410,11 @@ async def process_incoming_data(ws: WebSocket, app: FastAPI, incoming_chunks: as
                 # Add to the handleJSONMessage function in server.py
                 elif msg_type == "clear_history":
                     logger.info("🖥️ℹ️ Received clear_history from client.")
-                    app.state.SpeechPipelineManager.reset()
+                    session.pipeline.reset()
                 elif msg_type == "set_speed":
                     speed_value = data.get("speed", 0)
                     speed_factor = speed_value / 100.0  # Convert 0-100 to 0.0-1.0
-                    turn_detection = app.state.AudioInputProcessor.transcriber.turn_detection
+                    turn_detection = session.audio_input.transcriber.turn_detection
                     if turn_detection:
                         turn_detection.update_settings(speed_factor)
                         logger.info(f"🖥️⚙️ Updated turn detection settings to factor: {speed_factor:.2f}")
@@ -334,16 +434,20 @@ async def send_text_messages(ws: WebSocket, message_queue: asyncio.Queue) -> Non
     Continuously sends text messages from a queue to the client via WebSocket.
 
     Waits for messages on the `message_queue`, formats them as JSON, and sends
-    them to the connected WebSocket client. Logs non-TTS messages.
+    them to the connected WebSocket client. Logs non-TTS messages. Items that
+    are already `bytes` (binary TTS frames) are sent as binary WebSocket frames.
 
     Args:
         ws: The WebSocket connection instance.
-        message_queue: An asyncio queue yielding dictionaries to be sent as JSON.
+        message_queue: An asyncio queue yielding dictionaries to be sent as JSON,
+                       or bytes to be sent as binary frames.
     """
     try:
         while True:
-            await asyncio.sleep(0.001) # Yield control
             data = await message_queue.get()
+            if isinstance(data, bytes):
+                await ws.send_bytes(data)
+                continue
             msg_type = data.get("type")
             if msg_type != "tts_chunk":
                 logger.info(Colors.apply(f"🖥️📤 →→Client: {data}").orange)
@@ -357,7 +461,7 @@ async def send_text_messages(ws: WebSocket, message_queue: asyncio.Queue) -> Non
     except Exception as e:
         logger.exception(f"🖥️💥 {Colors.apply('EXCEPTION').red} in send_text_messages: {repr(e)}")
 
-async def _reset_interrupt_flag_async(app: FastAPI, callbacks: 'TranscriptionCallbacks'):
+async def _reset_interrupt_flag_async(session: 'ClientSession'):
     """
     Resets the microphone interruption flag after a delay (async version).
 
@@ -366,19 +470,19 @@ async def _reset_interrupt_flag_async(app: FastAPI, callbacks: 'TranscriptionCal
     connection-specific callbacks instance.
 
     Args:
-        app: The FastAPI application instance (to access AudioInputProcessor).
-        callbacks: The TranscriptionCallbacks instance for the connection.
+        session: The ClientSession whose AudioInputProcessor and callbacks are reset.
     """
+    callbacks = session.callbacks
     await asyncio.sleep(1)
     # Check the AudioInputProcessor's own interrupted state
-    if app.state.AudioInputProcessor.interrupted:
+    if session.audio_input.interrupted:
         logger.info(f"{Colors.apply('🖥️🎙️ ▶️ Microphone continued (async reset)').cyan}")
-        app.state.AudioInputProcessor.interrupted = False
+        session.audio_input.interrupted = False
         # Reset connection-specific interruption time via callbacks
         callbacks.interruption_time = 0
         logger.info(Colors.apply("🖥️🎙️ interruption flag reset after TTS chunk (async)").cyan)
 
-async def send_tts_chunks(app: FastAPI, message_queue: asyncio.Queue, callbacks: 'TranscriptionCallbacks') -> None:
+async def send_tts_chunks(session: 'ClientSession', message_queue: asyncio.Queue) -> None:
     """
     Continuously sends TTS audio chunks from the SpeechPipelineManager to the client.
 
@@ -387,122 +491,138 @@ async def send_tts_chunks(app: FastAPI, message_queue: asyncio.Queue, callbacks:
     queue, upsamples/encodes them, and puts them onto the outgoing `message_queue`
     for the client. Handles the end-of-generation logic and state resets.
 
+    The task does not poll: it sleeps on the session's `tts_wakeup`, which the
+    TTS worker threads notify whenever a chunk is queued or the generation state
+    changes (started, first chunk, quick/final finished, aborted). The only
+    timed wake-up is the deadline for resetting the microphone interruption flag.
+
+    Clients that negotiated `tts_format=pcm16` receive each chunk as a binary
+    frame (see `tts_frame.py`) tagged with the generation id and a per-generation
+    sequence number; all other clients get Base64 `tts_chunk` JSON messages.
+
     Args:
-        app: The FastAPI application instance (to access global components).
+        session: The ClientSession owning this connection's pipeline, upsampler and state.
         message_queue: An asyncio queue to put outgoing TTS chunk messages onto.
-        callbacks: The TranscriptionCallbacks instance managing this connection's state.
     """
+    callbacks = session.callbacks
+    wakeup = session.tts_wakeup
+    binary_frames = session.tts_format == TTS_FORMAT_PCM16
+    stream_generation_id = None
+    frame_sequence = 0
+
+    def queue_pcm(pcm: bytes) -> None:
+        """Puts upsampled PCM of the current generation onto the outgoing queue in the negotiated format."""
+        nonlocal frame_sequence
+        if binary_frames:
+            message_queue.put_nowait(pack_tts_frame(stream_generation_id, frame_sequence, pcm))
+            frame_sequence += 1
+        else:
+            message_queue.put_nowait({
+                "type": "tts_chunk",
+                "content": base64.b64encode(pcm).decode("utf-8")
+            })
+
     try:
         logger.info("🖥️🔊 Starting TTS chunk sender")
-        last_quick_answer_chunk = 0
-        last_chunk_sent = 0
         prev_status = None
 
-        while True:
-            await asyncio.sleep(0.001) # Yield control
+        def log_status():
+            nonlocal prev_status
+            is_tts_finished = session.pipeline.is_valid_gen() and session.pipeline.running_generation.audio_quick_finished
+            curr_status = (
+                # Access connection-specific state via callbacks
+                int(callbacks.tts_to_client),
+                int(callbacks.tts_client_playing),
+                int(callbacks.tts_chunk_sent),
+                int(callbacks.is_hot), # from callbacks
+                int(callbacks.synthesis_started), # from callbacks
+                int(session.pipeline.running_generation is not None), # Session manager state
+                int(session.pipeline.is_valid_gen()), # Session manager state
+                int(is_tts_finished),
+                int(session.audio_input.interrupted) # Input processor state
+            )
+
+            if curr_status != prev_status:
+                status = Colors.apply("🖥️🚦 State ").red
+                logger.info(
+                    f"{status} ToClient {curr_status[0]}, "
+                    f"ttsClientON {curr_status[1]}, " # Renamed slightly for clarity
+                    f"ChunkSent {curr_status[2]}, "
+                    f"hot {curr_status[3]}, synth {curr_status[4]}"
+                    f" gen {curr_status[5]}"
+                    f" valid {curr_status[6]}"
+                    f" tts_q_fin {curr_status[7]}"
+                    f" mic_inter {curr_status[8]}"
+                )
+                prev_status = curr_status
+
+        def wait_timeout() -> Optional[float]:
+            """Seconds until the interruption flag must be reset, or None to sleep until notified."""
+            if session.audio_input.interrupted and callbacks.interruption_time:
+                return callbacks.interruption_time + 2.0 - time.time()
+            return None
 
+        while True:
             # Use connection-specific interruption_time via callbacks
-            if app.state.AudioInputProcessor.interrupted and callbacks.interruption_time and time.time() - callbacks.interruption_time > 2.0:
-                app.state.AudioInputProcessor.interrupted = False
+            if session.audio_input.interrupted and callbacks.interruption_time and time.time() - callbacks.interruption_time > 2.0:
+                session.audio_input.interrupted = False
                 callbacks.interruption_time = 0 # Reset via callbacks
                 logger.info(Colors.apply("🖥️🎙️ interruption flag reset after 2 seconds").cyan)
 
-            is_tts_finished = app.state.SpeechPipelineManager.is_valid_gen() and app.state.SpeechPipelineManager.running_generation.audio_quick_finished
-
-            def log_status():
-                nonlocal prev_status
-                last_quick_answer_chunk_decayed = (
-                    last_quick_answer_chunk
-                    and time.time() - last_quick_answer_chunk > TTS_FINAL_TIMEOUT
-                    and time.time() - last_chunk_sent > TTS_FINAL_TIMEOUT
-                )
-
-                curr_status = (
-                    # Access connection-specific state via callbacks
-                    int(callbacks.tts_to_client),
-                    int(callbacks.tts_client_playing),
-                    int(callbacks.tts_chunk_sent),
-                    1, # Placeholder?
-                    int(callbacks.is_hot), # from callbacks
-                    int(callbacks.synthesis_started), # from callbacks
-                    int(app.state.SpeechPipelineManager.running_generation is not None), # Global manager state
-                    int(app.state.SpeechPipelineManager.is_valid_gen()), # Global manager state
-                    int(is_tts_finished), # Calculated local variable
-                    int(app.state.AudioInputProcessor.interrupted) # Input processor state
-                )
-
-                if curr_status != prev_status:
-                    status = Colors.apply("🖥️🚦 State ").red
-                    logger.info(
-                        f"{status} ToClient {curr_status[0]}, "
-                        f"ttsClientON {curr_status[1]}, " # Renamed slightly for clarity
-                        f"ChunkSent {curr_status[2]}, "
-                        f"hot {curr_status[4]}, synth {curr_status[5]}"
-                        f" gen {curr_status[6]}"
-                        f" valid {curr_status[7]}"
-                        f" tts_q_fin {curr_status[8]}"
-                        f" mic_inter {curr_status[9]}"
-                    )
-                    prev_status = curr_status
+            log_status()
+            running_generation = session.pipeline.running_generation
 
             # Use connection-specific state via callbacks
-            if not callbacks.tts_to_client:
-                await asyncio.sleep(0.001)
-                log_status()
+            if not callbacks.tts_to_client or not running_generation or running_generation.abortion_started:
+                await wakeup.wait(wait_timeout())
                 continue
 
-            if not app.state.SpeechPipelineManager.running_generation:
-                await asyncio.sleep(0.001)
-                log_status()
-                continue
+            if not running_generation.audio_quick_finished:
+                running_generation.tts_quick_allowed_event.set()
 
-            if app.state.SpeechPipelineManager.running_generation.abortion_started:
-                await asyncio.sleep(0.001)
-                log_status()
+            if not running_generation.quick_answer_first_chunk_ready:
+                await wakeup.wait(wait_timeout())
                 continue
 
-            if not app.state.SpeechPipelineManager.running_generation.audio_quick_finished:
-                app.state.SpeechPipelineManager.running_generation.tts_quick_allowed_event.set()
-
-            if not app.state.SpeechPipelineManager.running_generation.quick_answer_first_chunk_ready:
-                await asyncio.sleep(0.001)
-                log_status()
-                continue
-
-            chunk = None
             try:
-                chunk = app.state.SpeechPipelineManager.running_generation.audio_chunks.get_nowait()
-                if chunk:
-                    last_quick_answer_chunk = time.time()
+                chunk = running_generation.audio_chunks.get_nowait()
             except Empty:
-                final_expected = app.state.SpeechPipelineManager.running_generation.quick_answer_provided
-                audio_final_finished = app.state.SpeechPipelineManager.running_generation.audio_final_finished
+                final_expected = running_generation.quick_answer_provided
+                audio_final_finished = running_generation.audio_final_finished
 
                 if not final_expected or audio_final_finished:
                     logger.info("🖥️🏁 Sending of TTS chunks and 'user request/assistant answer' cycle finished.")
+                    if stream_generation_id == running_generation.id:
+                        tail = session.upsampler.flush_pcm_chunk() # Samples held back by the resampler
+                        if tail:
+                            queue_pcm(tail)
                     callbacks.send_final_assistant_answer() # Callbacks method
 
-                    assistant_answer = app.state.SpeechPipelineManager.running_generation.quick_answer + app.state.SpeechPipelineManager.running_generation.final_answer                    
-                    app.state.SpeechPipelineManager.running_generation = None
+                    session.pipeline.running_generation = None
 
                     callbacks.tts_chunk_sent = False # Reset via callbacks
                     callbacks.reset_state() # Reset connection state via callbacks
+                    continue
 
-                await asyncio.sleep(0.001)
-                log_status()
+                await wakeup.wait(wait_timeout())
                 continue
 
-            base64_chunk = app.state.Upsampler.get_base64_chunk(chunk)
-            message_queue.put_nowait({
-                "type": "tts_chunk",
-                "content": base64_chunk
-            })
-            last_chunk_sent = time.time()
+            if not chunk:
+                continue
+
+            if running_generation.id != stream_generation_id:
+                # New generation: start a fresh resampler stream (drops the tail of an aborted one)
+                stream_generation_id = running_generation.id
+                frame_sequence = 0
+                session.upsampler.reset()
+            pcm = session.upsampler.get_pcm_chunk(chunk)
+            if pcm:
+                queue_pcm(pcm)
 
             # Use connection-specific state via callbacks
             if not callbacks.tts_chunk_sent:
                 # Use the async helper function instead of a thread
-                asyncio.create_task(_reset_interrupt_flag_async(app, callbacks))
+                asyncio.create_task(_reset_interrupt_flag_async(session))
 
             callbacks.tts_chunk_sent = True # Set via callbacks
 
@@ -529,15 +649,15 @@ class TranscriptionCallbacks:
     `message_queue` and manages interaction logic like interruptions and final answer delivery.
     It also includes a threaded worker to handle abort checks based on partial transcription.
     """
-    def __init__(self, app: FastAPI, message_queue: asyncio.Queue):
+    def __init__(self, session: 'ClientSession', message_queue: asyncio.Queue):
         """
         Initializes the TranscriptionCallbacks instance for a WebSocket connection.
 
         Args:
-            app: The FastAPI application instance (to access global components).
+            session: The ClientSession owning the pipeline and audio input of this connection.
             message_queue: An asyncio queue for sending messages back to the client.
         """
-        self.app = app
+        self.session = session
         self.message_queue = message_queue
         self.final_transcription = ""
         self.abort_text = ""
@@ -566,6 +686,7 @@ class TranscriptionCallbacks:
         self.reset_state() # Call reset to ensure consistency
 
         self.abort_request_event = threading.Event()
+        self.abort_worker_stop_event = threading.Event()
         self.abort_worker_thread = threading.Thread(target=self._abort_worker, name="AbortWorker", daemon=True)
         self.abort_worker_thread.start()
 
@@ -593,20 +714,28 @@ class TranscriptionCallbacks:
         self.partial_transcription = ""
 
         # Keep the abort call related to the audio processor/pipeline manager
-        self.app.state.AudioInputProcessor.abort_generation()
+        self.session.audio_input.abort_generation()
 
 
+    def shutdown(self):
+        """Stops the abort worker thread of this connection."""
+        self.abort_worker_stop_event.set()
+        self.abort_request_event.set() # Wake the worker so it sees the stop request
+        self.abort_worker_thread.join(timeout=1.0)
+
     def _abort_worker(self):
         """Background thread worker to check for abort conditions based on partial text."""
-        while True:
+        while not self.abort_worker_stop_event.is_set():
             was_set = self.abort_request_event.wait(timeout=0.1) # Check every 100ms
             if was_set:
                 self.abort_request_event.clear()
+                if self.abort_worker_stop_event.is_set():
+                    break
                 # Only trigger abort check if the text actually changed
                 if self.last_abort_text != self.abort_text:
                     self.last_abort_text = self.abort_text
                     logger.debug(f"🖥️🧠 Abort check triggered by partial: '{self.abort_text}'")
-                    self.app.state.SpeechPipelineManager.check_abort(self.abort_text, False, "on_partial")
+                    self.session.pipeline.check_abort(self.abort_text, False, "on_partial")
 
     def on_partial(self, txt: str):
         """
@@ -632,10 +761,10 @@ class TranscriptionCallbacks:
 
     def on_tts_allowed_to_synthesize(self):
         """Callback invoked when the system determines TTS synthesis can proceed."""
-        # Access global manager state
-        if self.app.state.SpeechPipelineManager.running_generation and not self.app.state.SpeechPipelineManager.running_generation.abortion_started:
+        # Access session manager state
+        if self.session.pipeline.running_generation and not self.session.pipeline.running_generation.abortion_started:
             logger.info(f"{Colors.apply('🖥️🔊 TTS ALLOWED').blue}")
-            self.app.state.SpeechPipelineManager.running_generation.tts_quick_allowed_event.set()
+            self.session.pipeline.running_generation.tts_quick_allowed_event.set()
 
     def on_potential_sentence(self, txt: str):
         """
@@ -647,8 +776,8 @@ class TranscriptionCallbacks:
             txt: The potential sentence text.
         """
         logger.debug(f"🖥️🧠 Potential sentence: '{txt}'")
-        # Access global manager state
-        self.app.state.SpeechPipelineManager.prepare_generation(txt)
+        # Access session manager state
+        self.session.pipeline.prepare_generation(txt)
         
         
 
@@ -683,19 +812,20 @@ class TranscriptionCallbacks:
         logger.info(Colors.apply('🖥️🏁 =================== USER TURN END ===================').light_gray)
         self.user_finished_turn = True
         self.user_interrupted = False # Reset connection-specific flag (user finished, not interrupted)
-        # Access global manager state
-        if self.app.state.SpeechPipelineManager.is_valid_gen():
+        # Access session manager state
+        if self.session.pipeline.is_valid_gen():
             logger.info(f"{Colors.apply('🖥️🔊 TTS ALLOWED (before final)').blue}")
-            self.app.state.SpeechPipelineManager.running_generation.tts_quick_allowed_event.set()
+            self.session.pipeline.running_generation.tts_quick_allowed_event.set()
 
         # first block further incoming audio (Audio processor's state)
-        if not self.app.state.AudioInputProcessor.interrupted:
+        if not self.session.audio_input.interrupted:
             logger.info(f"{Colors.apply('🖥️🎙️ ⏸️ Microphone interrupted (end of turn)').cyan}")
-            self.app.state.AudioInputProcessor.interrupted = True
+            self.session.audio_input.interrupted = True
             self.interruption_time = time.time() # Set connection-specific flag
 
         logger.info(f"{Colors.apply('🖥️🔊 TTS STREAM RELEASED').blue}")
         self.tts_to_client = True # Set connection-specific flag
+        self.session.tts_wakeup.notify() # Wake the TTS sender
 
         # Send final user request (using the reliable final_transcription OR current partial if final isn't set yet)
         user_request_content = self.final_transcription if self.final_transcription else self.partial_transcription
@@ -704,20 +834,20 @@ class TranscriptionCallbacks:
             "content": user_request_content
         })
 
-        # Access global manager state
-        if self.app.state.SpeechPipelineManager.is_valid_gen():
+        # Access session manager state
+        if self.session.pipeline.is_valid_gen():
             # Send partial assistant answer (if available) to the client
             # Use connection-specific user_interrupted flag
-            if self.app.state.SpeechPipelineManager.running_generation.quick_answer and not self.user_interrupted:
-                self.assistant_answer = self.app.state.SpeechPipelineManager.running_generation.quick_answer
+            if self.session.pipeline.running_generation.quick_answer and not self.user_interrupted:
+                self.assistant_answer = self.session.pipeline.running_generation.quick_answer
                 self.message_queue.put_nowait({
                     "type": "partial_assistant_answer",
                     "content": self.assistant_answer
                 })
 
         logger.info(f"🖥️🧠 Adding user request to history: '{user_request_content}'")
-        # Access global manager state
-        self.app.state.SpeechPipelineManager.history.append({"role": "user", "content": user_request_content})
+        # Access session manager state
+        self.session.pipeline.history.append({"role": "user", "content": user_request_content})
 
     def on_final(self, txt: str):
         """
@@ -742,8 +872,8 @@ class TranscriptionCallbacks:
             reason: A string describing why the abortion is triggered.
         """
         logger.info(f"{Colors.apply('🖥️🛑 Aborting generation:').blue} {reason}")
-        # Access global manager state
-        self.app.state.SpeechPipelineManager.abort_generation(reason=f"server.py abort_generations: {reason}")
+        # Access session manager state
+        self.session.pipeline.abort_generation(reason=f"server.py abort_generations: {reason}")
 
     def on_silence_active(self, silence_active: bool):
         """
@@ -833,9 +963,9 @@ class TranscriptionCallbacks:
                     final answer is available. Defaults to False.
         """
         final_answer = ""
-        # Access global manager state
-        if self.app.state.SpeechPipelineManager.is_valid_gen():
-            final_answer = self.app.state.SpeechPipelineManager.running_generation.quick_answer + self.app.state.SpeechPipelineManager.running_generation.final_answer
+        # Access session manager state
+        if self.session.pipeline.is_valid_gen():
+            final_answer = self.session.pipeline.running_generation.quick_answer + self.session.pipeline.running_generation.final_answer
 
         if not final_answer: # Check if constructed answer is empty
             # If forced, try using the last known partial answer from this connection
@@ -862,7 +992,8 @@ class TranscriptionCallbacks:
                     "type": "final_assistant_answer",
                     "content": cleaned_answer
                 })
-                app.state.SpeechPipelineManager.history.append({"role": "assistant", "content": cleaned_answer})
+                self.session.pipeline.history.append({"role": "assistant", "content": cleaned_answer})
+                self.session.pipeline.on_turn_delivered() # Speculative answers are stale now
                 self.final_assistant_answer_sent = True
                 self.final_assistant_answer = cleaned_answer # Store the sent answer
             else:
@@ -874,6 +1005,90 @@ class TranscriptionCallbacks:
              self.final_assistant_answer = "" # Clear the stored answer
 
 
+# --------------------------------------------------------------------
+# Per-connection session
+# --------------------------------------------------------------------
+class ClientSession:
+    """
+    Owns everything that belongs to a single WebSocket conversation.
+
+    A session borrows one slot of heavy models from the `ModelPool` (TTS engine,
+    Whisper recorder with turn detection) and builds the lightweight per-conversation
+    parts around it: its own `SpeechPipelineManager` (generation state and history),
+    its own `UpsampleOverlap` and its own `TranscriptionCallbacks`. Nothing here is
+    shared with other connections, so concurrent clients cannot see each other's
+    transcripts, generations or audio.
+    """
+    def __init__(self, pool: ModelPool, lease: ModelLease, message_queue: asyncio.Queue, tts_wakeup: LoopWakeup, tts_format: str = TTS_FORMAT_JSON):
+        """
+        Builds the session around a leased model slot and wires all callbacks.
+
+        Args:
+            pool: The model pool the lease was taken from (returned to on close).
+            lease: The model slot borrowed for this session.
+            message_queue: An asyncio queue for messages sent to the client.
+            tts_wakeup: Wake-up signal of the TTS sender task, notified by the pipeline's worker threads.
+            tts_format: How TTS audio is sent to the client, `TTS_FORMAT_PCM16` for binary
+                        frames or `TTS_FORMAT_JSON` for Base64 inside `tts_chunk` messages.
+        """
+        self.id = uuid.uuid4().hex[:8]
+        self.pool = pool
+        self.lease = lease
+        self.message_queue = message_queue
+        self.tts_wakeup = tts_wakeup
+        self.tts_format = tts_format
+        self.audio_input: AudioInputProcessor = lease.audio_input_processor
+        self.upsampler = UpsampleOverlap()
+        self.pipeline = SpeechPipelineManager(
+            tts_engine=TTS_START_ENGINE,
+            llm_provider=LLM_START_PROVIDER,
+            llm_model=LLM_START_MODEL,
+            no_think=NO_THINK,
+            orpheus_model=TTS_ORPHEUS_MODEL,
+            audio_processor=lease.audio_processor,
+            llm_inference_time=pool.llm_inference_time,
+            mcp_client=pool.mcp_client,
+            template_synthesizer=pool.template_synthesizer,
+            session_id=self.id,
+            intent_threshold=INTENT_THRESHOLD if INTENT_FAST_PATH else None,
+            history_tokens=HISTORY_TOKENS,
+        )
+        self.callbacks = TranscriptionCallbacks(self, message_queue)
+        self._wire_callbacks()
+        logger.info(f"🖥️🧩 Session {self.id} created on model slot {lease.slot}.")
+
+    def _wire_callbacks(self) -> None:
+        """Points the leased components' callbacks at this session's TranscriptionCallbacks."""
+        callbacks = self.callbacks
+        self.audio_input.realtime_callback = callbacks.on_partial
+        self.audio_input.transcriber.potential_sentence_end = callbacks.on_potential_sentence
+        self.audio_input.transcriber.on_tts_allowed_to_synthesize = callbacks.on_tts_allowed_to_synthesize
+        self.audio_input.transcriber.potential_full_transcription_callback = callbacks.on_potential_final
+        self.audio_input.transcriber.potential_full_transcription_abort_callback = callbacks.on_potential_abort
+        self.audio_input.transcriber.full_transcription_callback = callbacks.on_final
+        self.audio_input.transcriber.before_final_sentence = callbacks.on_before_final
+        self.audio_input.recording_start_callback = callbacks.on_recording_start
+        self.audio_input.silence_active_callback = callbacks.on_silence_active
+        self.pipeline.on_partial_assistant_text = callbacks.on_partial_assistant_text
+        self.pipeline.on_state_change = self.tts_wakeup.notify
+
+    def close(self) -> None:
+        """
+        Tears the session down and returns its model slot to the pool.
+
+        Blocking (joins worker threads), so call it via `asyncio.to_thread`.
+        Callbacks are detached first so no late event reaches this session,
+        then the pipeline is shut down, which also stops any ongoing synthesis
+        on the leased TTS engine.
+        """
+        logger.info(f"🖥️🧹 Closing session {self.id}...")
+        self.audio_input.detach()
+        self.callbacks.shutdown()
+        self.pipeline.shutdown()
+        self.lease.audio_processor.on_first_audio_chunk_synthesize = None
+        self.pool.release(self.lease)
+        logger.info(f"🖥️👋 Session {self.id} closed.")
+
 # --------------------------------------------------------------------
 # Main WebSocket endpoint
 # --------------------------------------------------------------------
@@ -882,45 +1097,48 @@ async def websocket_endpoint(ws: WebSocket):
     """
     Handles the main WebSocket connection for real-time voice chat.
 
-    Accepts a connection, sets up connection-specific state via `TranscriptionCallbacks`,
-    initializes audio/message queues, and creates asyncio tasks for handling
-    incoming data, audio processing, outgoing text messages, and outgoing TTS chunks.
-    Manages the lifecycle of these tasks and cleans up on disconnect.
+    Accepts a connection, negotiates the TTS audio format from the `tts_format`
+    query parameter (`pcm16` for binary frames, anything else keeps the JSON/Base64
+    protocol), borrows a model slot from the pool and builds a
+    `ClientSession` holding all connection-specific state, initializes audio/message
+    queues, and creates asyncio tasks for handling incoming data, audio processing,
+    outgoing text messages, and outgoing TTS chunks. Manages the lifecycle of these
+    tasks and returns the model slot to the pool on disconnect.
 
     Args:
         ws: The WebSocket connection instance provided by FastAPI.
     """
     await ws.accept()
-    logger.info("🖥️✅ Client connected via WebSocket.")
+    tts_format = TTS_FORMAT_PCM16 if ws.query_params.get("tts_format") == TTS_FORMAT_PCM16 else TTS_FORMAT_JSON
+    logger.info(f"🖥️✅ Client connected via WebSocket (TTS format: {tts_format}).")
+
+    pool: ModelPool = app.state.ModelPool
+    lease = await asyncio.to_thread(pool.acquire, SESSION_ACQUIRE_TIMEOUT)
+    if lease is None:
+        logger.warning(f"🖥️🚫 All {pool.size} session slot(s) busy, rejecting client.")
+        await ws.send_json({"type": "server_busy", "content": ""})
+        await ws.close(code=1013) # Try again later
+        return
 
     message_queue = asyncio.Queue()
     audio_chunks = asyncio.Queue()
 
-    # Set up callback manager - THIS NOW HOLDS THE CONNECTION-SPECIFIC STATE
-    callbacks = TranscriptionCallbacks(app, message_queue)
-
-    # Assign callbacks to the AudioInputProcessor (global component)
-    # These methods within callbacks will now operate on its *instance* state
-    app.state.AudioInputProcessor.realtime_callback = callbacks.on_partial
-    app.state.AudioInputProcessor.transcriber.potential_sentence_end = callbacks.on_potential_sentence
-    app.state.AudioInputProcessor.transcriber.on_tts_allowed_to_synthesize = callbacks.on_tts_allowed_to_synthesize
-    app.state.AudioInputProcessor.transcriber.potential_full_transcription_callback = callbacks.on_potential_final
-    app.state.AudioInputProcessor.transcriber.potential_full_transcription_abort_callback = callbacks.on_potential_abort
-    app.state.AudioInputProcessor.transcriber.full_transcription_callback = callbacks.on_final
-    app.state.AudioInputProcessor.transcriber.before_final_sentence = callbacks.on_before_final
-    app.state.AudioInputProcessor.recording_start_callback = callbacks.on_recording_start
-    app.state.AudioInputProcessor.silence_active_callback = callbacks.on_silence_active
-
-    # Assign callback to the SpeechPipelineManager (global component)
-    app.state.SpeechPipelineManager.on_partial_assistant_text = callbacks.on_partial_assistant_text
+    try:
+        tts_wakeup = LoopWakeup(asyncio.get_running_loop())
+        session = await asyncio.to_thread(ClientSession, pool, lease, message_queue, tts_wakeup, tts_format)
+    except Exception as e:
+        logger.exception(f"🖥️💥 {Colors.apply('ERROR').red} creating session: {repr(e)}")
+        lease.audio_input_processor.detach()
+        pool.release(lease)
+        await ws.close(code=1011)
+        return
 
     # Create tasks for handling different responsibilities
-    # Pass the 'callbacks' instance to tasks that need connection-specific state
     tasks = [
-        asyncio.create_task(process_incoming_data(ws, app, audio_chunks, callbacks)), # Pass callbacks
-        asyncio.create_task(app.state.AudioInputProcessor.process_chunk_queue(audio_chunks)),
+        asyncio.create_task(process_incoming_data(ws, session, audio_chunks)),
+        asyncio.create_task(session.audio_input.process_chunk_queue(audio_chunks)),
         asyncio.create_task(send_text_messages(ws, message_queue)),
-        asyncio.create_task(send_tts_chunks(app, message_queue, callbacks)), # Pass callbacks
+        asyncio.create_task(send_tts_chunks(session, message_queue)),
     ]
 
     try:
@@ -941,6 +1159,7 @@ async def websocket_endpoint(ws: WebSocket):
         # Ensure all tasks are awaited after cancellation
         # Use return_exceptions=True to prevent gather from stopping on first error during cleanup
         await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(session.close)
         logger.info("🖥️❌ WebSocket session ended.")
 
 # --------------------------------------------------------------------
@@ -0,0 +1,179 @@
+# speculative_cache.py
+import collections
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from text_similarity import TextSimilarity
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculativeAnswer:
+    """
+    The result of a speculative generation that was discarded before it was delivered.
+
+    Holds the MCP response text and, if TTS ran to completion before the
+    generation was aborted, the synthesized audio chunks so the answer can be
+    replayed without calling the MCP server or the TTS engine again.
+    """
+    def __init__(
+            self,
+            response: str,
+            quick_answer: str = "",
+            final_answer: str = "",
+            audio_chunks: Optional[List[bytes]] = None,
+            response_ms: float = 0.0,
+            first_audio_ms: Optional[float] = None,
+        ) -> None:
+        """
+        Initializes the entry.
+
+        Args:
+            response: The MCP response text the generation was built from.
+            quick_answer: The quick answer part as split by the LLM worker.
+            final_answer: The remaining answer text synthesized by the final TTS worker.
+            audio_chunks: The complete synthesized audio, or None if TTS did not finish.
+            response_ms: Time the MCP call took.
+            first_audio_ms: Time from the start of the generation to its first audio chunk.
+        """
+        self.response = response
+        self.quick_answer = quick_answer
+        self.final_answer = final_answer
+        self.audio_chunks = audio_chunks
+        self.response_ms = response_ms
+        self.first_audio_ms = first_audio_ms
+        self.created_at = time.monotonic()
+
+    @property
+    def has_audio(self) -> bool:
+        """True if the complete answer audio can be replayed."""
+        return bool(self.audio_chunks) and self.first_audio_ms is not None
+
+    @property
+    def saved_ms(self) -> float:
+        """Latency a hit on this entry saves: time to first audio if audio is replayed, else the MCP call."""
+        return self.first_audio_ms if self.has_audio else self.response_ms
+
+
+class SpeculativeAnswerCache:
+    """
+    Bounded, TTL-evicting store of speculative answers for one conversation.
+
+    `on_potential_sentence` starts a generation before the user has finished
+    talking. When the transcript keeps changing, `check_abort` throws that
+    generation away, and the final transcript often asks for exactly the same
+    thing again. Entries are keyed by the transcript normalized the same way
+    `TextSimilarity` does (lowercase, punctuation removed, whitespace
+    collapsed), so "One pizza, please." and "one pizza please" share a result.
+
+    MCP functions change the order state, so an answer is only valid within the
+    user turn it was computed for: the cache must be `invalidate`d whenever an
+    answer is delivered. Reusing a speculative `place_order` result within the
+    turn also keeps the order from being placed twice.
+    """
+    def __init__(
+            self,
+            max_entries: int = 8,
+            ttl: float = 20.0,
+            normalize: Optional[Callable[[str], str]] = None,
+        ) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries: Maximum number of answers kept (least recently stored are evicted).
+            ttl: Seconds after which an entry is considered stale.
+            normalize: Key function. Defaults to `TextSimilarity` normalization.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._normalize = normalize or TextSimilarity()._normalize_text
+        self._entries: "collections.OrderedDict[str, SpeculativeAnswer]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def _evict_expired(self, now: float) -> None:
+        """Removes entries older than the TTL (oldest are first in the dict). Caller holds the lock."""
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.created_at < self.ttl:
+                break
+            del self._entries[key]
+
+    def lookup(self, text: str) -> Optional[SpeculativeAnswer]:
+        """
+        Returns the speculative answer computed for `text`, if any.
+
+        A hit counts the latency it saves; the entry stays cached in case the
+        same text is aborted and requested once more.
+
+        Args:
+            text: The transcript a generation is about to be prepared for.
+
+        Returns:
+            The cached SpeculativeAnswer or None.
+        """
+        key = self._normalize(text)
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_ms += entry.saved_ms
+            return entry
+
+    def store(self, text: str, answer: SpeculativeAnswer) -> None:
+        """
+        Remembers the answer of a discarded generation.
+
+        An entry with audio is never replaced by a later one without audio for
+        the same key.
+
+        Args:
+            text: The transcript the generation was prepared for.
+            answer: The answer to keep.
+        """
+        key = self._normalize(text)
+        if not key:
+            return
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None and existing.has_audio and not answer.has_audio:
+                return
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            self._evict_expired(time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drops all entries, e.g. after an answer was delivered and the order state moved on."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            A dict with `hits`, `misses`, `hit_rate`, `saved_ms` (total latency
+            saved by hits) and `size`.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_ms": self.saved_ms,
+                "size": len(self._entries),
+            }
@@ -1,5 +1,5 @@
 # speech_pipeline_manager.py
-from typing import Optional, Callable
+from typing import Optional, Callable, Union
 import threading
 import logging
 import time
@@ -9,9 +9,16 @@ import sys
 # (Make sure real/mock imports are correct)
 from audio_module import AudioProcessor
 from text_similarity import TextSimilarity
-from text_context import TextContext
+from text_context import TextContext, preprocess_tts_text
 from llm_module import LLM
 from colors import Colors
+from event_bridge import NotifyingQueue
+from mcp_client import MCPClient, MCPCall, MCPCallCancelled, get_default_client
+from speculative_cache import SpeculativeAnswer, SpeculativeAnswerCache
+from template_tts import TemplateSynthesizer
+from intent_router import get_intent_router
+from tool_call import StreamingToolCallParser, ToolCall, ToolCallError, format_call
+from history_manager import ConversationHistory, DEFAULT_MAX_TOKENS
 import requests
 import ollama
 import os
@@ -19,11 +26,13 @@ import json
 import asyncio
 
 import re
+import uuid
 import ast
 
 
 # Append the absolute path to `mcp_server` (2 levels up then into mcp_server)
 from menu_manager import MenuManager
+from menu_snapshot import get_menu
 
 # (Logging setup)
 logger = logging.getLogger(__name__)
@@ -57,11 +66,7 @@ Do NOT create or use any other emotion tags. Do NOT remove the spaces. Use these
 """.strip()
 
 orpheus_prompt_addon = orpheus_prompt_addon_uncensored if USE_ORPHEUS_UNCENSORED else orpheus_prompt_addon_normal
-def call_llm(prompt):
-    import json
-    import requests
-
-    system_prompt = """
+tool_call_system_prompt = """
 You are a backend agent that can only respond with function calls.
 
 Available functions:
@@ -75,6 +80,14 @@ Available functions:
 - If you're unsure, guess.
 """
 
+LLM_KEEP_ALIVE = "10m" # Ollama keeps the model, and the KV cache of the conversation prefix, loaded between turns
+
+def call_llm(prompt):
+    import json
+    import requests
+
+    system_prompt = tool_call_system_prompt
+
     try:
         res = requests.post(
             "http://localhost:11434/api/chat",
@@ -132,14 +145,7 @@ Available functions:
 
 # --- STEP 2: Send LLM result to MCP backend ---
 def call_mcp(prompt):
-    try:
-        res = requests.post("http://localhost:9000/mcp", json={"query": prompt})
-        data = res.json()
-        return data.get("response", "⚠️ No 'response' key in MCP output.")
-    except json.JSONDecodeError:
-        return f"⚠️ MCP Error: Invalid JSON response: {res.text}"
-    except Exception as e:
-        return f"⚠️ MCP Error: {str(e)}"
+    return get_default_client().call(prompt)
 
 # llm_output = call_llm(user_input)
 # print("🧠 LLM returned:", llm_output)
@@ -175,17 +181,27 @@ class RunningGeneration:
     the status of LLM and TTS stages (quick and final), threading events for synchronization,
     queues for audio chunks, and text buffers for partial/complete answers.
     """
-    def __init__(self, id: int):
+    def __init__(self, id: int, on_state_change: Optional[Callable[[], None]] = None):
         """
         Initializes a RunningGeneration state object.
 
         Args:
             id: A unique identifier for this generation attempt.
+            on_state_change: Optional hook fired whenever an audio chunk is queued,
+                             so consumers can wait for chunks instead of polling.
         """
         self.id: int = id # Store the generation ID
         self.text: Optional[str] = None
         self.timestamp = time.time()
 
+        self.mcp_call: Optional[MCPCall] = None
+        self.mcp_response: Optional[str] = None
+        self.mcp_ms: float = 0.0
+        self.tool_call_request_id: Optional[str] = None # LLM request translating the transcript into a call
+        self.tool_call_ms: float = 0.0 # Time until the call was complete and dispatched
+        self.from_speculation: bool = False # Answer replayed from the speculative cache
+        self.delivered: bool = False # Answer was sent to the user (not speculative any more)
+        self.first_audio_time: Optional[float] = None
         self.llm_generator = None
         self.llm_finished: bool = False
         self.llm_finished_event = threading.Event()
@@ -198,7 +214,7 @@ class RunningGeneration:
         self.tts_quick_started: bool = False
 
         self.tts_quick_allowed_event = threading.Event()
-        self.audio_chunks = Queue()
+        self.audio_chunks = NotifyingQueue(on_put=on_state_change, record=True) # Recorded for speculative replay
         self.audio_quick_finished: bool = False
         self.audio_quick_aborted: bool = False
         self.tts_quick_finished_event = threading.Event()
@@ -247,6 +263,13 @@ class SpeechPipelineManager:
             llm_model: str = "mistral",
             no_think: bool = False,
             orpheus_model: str = "orpheus-3b-0.1-ft-Q8_0-GGUF/orpheus-3b-0.1-ft-q8_0.gguf",
+            audio_processor: Optional[AudioProcessor] = None,
+            llm_inference_time: Optional[float] = None,
+            mcp_client: Optional[MCPClient] = None,
+            template_synthesizer: Optional[TemplateSynthesizer] = None,
+            session_id: Optional[str] = None,
+            intent_threshold: Optional[float] = None,
+            history_tokens: int = DEFAULT_MAX_TOKENS,
         ):
         """
         Initializes the SpeechPipelineManager.
@@ -255,12 +278,31 @@ class SpeechPipelineManager:
         loads system prompts, initializes state variables (queues, events, flags),
         measures initial inference latencies, and starts the background worker threads.
 
+        One manager is created per client session. The heavy TTS engine can be
+        borrowed from the model pool via `audio_processor`; likewise a previously
+        measured `llm_inference_time` skips the LLM prewarm and measurement.
+
         Args:
             tts_engine: The TTS engine to use (e.g., "kokoro", "orpheus").
             llm_provider: The LLM backend provider (e.g., "ollama").
             llm_model: The specific LLM model identifier.
             no_think: If True, removes specific thinking tags from LLM output.
             orpheus_model: Path or identifier for the Orpheus TTS model, if used.
+            audio_processor: Optional already initialized AudioProcessor to use
+                             instead of creating (and warming up) a new one.
+            llm_inference_time: Optional LLM inference time in ms measured earlier.
+            mcp_client: Pooled MCP client shared across sessions. Defaults to the
+                        process-wide client from `mcp_client.get_default_client`.
+            template_synthesizer: Optional splicer that speaks template replies from
+                                  cached fragments instead of running the TTS engine.
+            session_id: Id of the client session, sent with every MCP call so the
+                        order in progress is kept separate from other sessions'.
+            intent_threshold: Confidence above which a transcript matched by the
+                              deterministic intent router (`intent_router`) goes to
+                              MCP as a call directly, skipping the LLM translation.
+                              None sends every transcript through the LLM.
+            history_tokens: Token budget of the conversation prompt (system prompt
+                            plus history window) the LLM writes calls from, see `history_manager`.
         """
         self.tts_engine = tts_engine
         self.llm_provider = llm_provider
@@ -273,12 +315,20 @@ class SpeechPipelineManager:
             self.system_prompt += f"\n{orpheus_prompt_addon}"
 
         # --- Instance Dependencies ---
-        self.audio = AudioProcessor(
-            engine=self.tts_engine,
-            orpheus_model=self.orpheus_model
-        )
+        if audio_processor is not None:
+            self.audio = audio_processor
+        else:
+            self.audio = AudioProcessor(
+                engine=self.tts_engine,
+                orpheus_model=self.orpheus_model
+            )
         self.audio.on_first_audio_chunk_synthesize = self.on_first_audio_chunk_synthesize
+        self.mcp_client = mcp_client if mcp_client is not None else get_default_client()
+        self.template_synthesizer = template_synthesizer
+        self.session_id = session_id
+        self.intent_threshold = intent_threshold
         self.text_similarity = TextSimilarity(focus='end', n_words=5)
+        self.speculative_cache = SpeculativeAnswerCache(normalize=self.text_similarity._normalize_text)
         self.text_context = TextContext()
         self.generation_counter: int = 0
         self.abort_lock = threading.Lock()
@@ -288,12 +338,15 @@ class SpeechPipelineManager:
             system_prompt=self.system_prompt,
             no_think=no_think,
         )
-        self.llm.prewarm()
-        self.llm_inference_time = self.llm.measure_inference_time()
+        if llm_inference_time is not None:
+            self.llm_inference_time = llm_inference_time
+        else:
+            self.llm.prewarm()
+            self.llm_inference_time = self.llm.measure_inference_time()
         logger.debug(f"🗣️🧠🕒 LLM inference time: {self.llm_inference_time:.2f}ms")
 
         # --- State ---
-        self.history = []
+        self.history = ConversationHistory(system_prompt=tool_call_system_prompt, max_tokens=history_tokens) # The prompt of `_llm_tool_call`
         self.requests_queue = Queue()
         self.running_generation: Optional[RunningGeneration] = None
 
@@ -312,6 +365,7 @@ class SpeechPipelineManager:
         self.abort_block_event = threading.Event()
         self.abort_block_event.set()
         self.check_abort_lock = threading.Lock()
+        self.state_changed_event = threading.Event() # Wakes the final TTS worker
 
         # --- State Flags ---
         self.llm_generation_active = False
@@ -319,10 +373,6 @@ class SpeechPipelineManager:
         self.tts_final_generation_active = False
         self.previous_request = None
 
-        self.menu = MenuManager(path="data/enhanced_menu.json")
-
-         
-
         # --- Worker Threads ---
         self.request_processing_thread = threading.Thread(target=self._request_processing_worker, name="RequestProcessingThread", daemon=True)
         self.llm_inference_thread = threading.Thread(target=self._llm_inference_worker, name="LLMProcessingThread", daemon=True)
@@ -335,6 +385,8 @@ class SpeechPipelineManager:
         self.tts_final_inference_thread.start()
 
         self.on_partial_assistant_text: Optional[Callable[[str], None]] = None
+        # Fired (from worker threads) whenever generation state or queued audio changes
+        self.on_state_change: Optional[Callable[[], None]] = None
 
         # Handle case where LLM inference time is None (failed initialization)
         llm_time = self.llm_inference_time if self.llm_inference_time is not None else 0.0
@@ -353,6 +405,22 @@ class SpeechPipelineManager:
         """
         return self.running_generation is not None and not self.running_generation.abortion_started
 
+    def _notify_state_change(self) -> None:
+        """
+        Signals that the running generation changed state.
+
+        Wakes the final TTS worker and forwards the notification to the
+        `on_state_change` hook (the session's TTS sender), replacing polling of
+        the generation flags. Called after generation start, first audio chunk,
+        quick/final TTS completion and abortion.
+        """
+        self.state_changed_event.set()
+        if self.on_state_change:
+            try:
+                self.on_state_change()
+            except Exception as e:
+                logger.warning(f"🗣️💥 Error in on_state_change hook: {e}")
+
     def _request_processing_worker(self):
         """
         Worker thread target that processes requests from the `requests_queue`.
@@ -410,7 +478,10 @@ class SpeechPipelineManager:
         """
         logger.info("🗣️🎶 First audio chunk synthesized. Setting TTS quick allowed event.")
         if self.running_generation:
+            if self.running_generation.first_audio_time is None:
+                self.running_generation.first_audio_time = time.time()
             self.running_generation.quick_answer_first_chunk_ready = True
+            self._notify_state_change()
 
     def preprocess_chunk(self, chunk: str) -> str:
         """
@@ -425,7 +496,7 @@ class SpeechPipelineManager:
         Returns:
             The preprocessed text chunk.
         """
-        return chunk.replace("—", "-").replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'").replace("…", "...")
+        return preprocess_tts_text(chunk)
 
     def clean_quick_answer(self, text: str) -> str:
         """
@@ -766,6 +837,7 @@ class SpeechPipelineManager:
                     current_gen.tts_quick_finished_event.set() # Signal natural completion
 
                 current_gen.audio_quick_finished = True # Mark quick audio phase as done (even if aborted)
+                self._notify_state_change()
 
     def _tts_final_inference_worker(self):
         """
@@ -786,8 +858,10 @@ class SpeechPipelineManager:
         """
         logger.info("🗣️👄🚀 Final TTS Worker: Starting...")
         while not self.shutdown_event.is_set():
+            # Sleep until the generation state changes instead of spinning when idle
+            self.state_changed_event.wait(timeout=0.1)
+            self.state_changed_event.clear()
             current_gen = self.running_generation
-            time.sleep(0.01) # Prevent tight spinning when idle
 
             # --- Wait for prerequisites ---
             if not current_gen: continue # No active generation
@@ -893,6 +967,7 @@ class SpeechPipelineManager:
                     current_gen.tts_final_finished_event.set() # Signal natural completion
 
                 current_gen.audio_final_finished = True # Mark final audio phase as done (even if aborted)
+                self._notify_state_change()
 
 
     # --- Processing Methods ---
@@ -919,26 +994,223 @@ class SpeechPipelineManager:
         self.abort_completed_event.clear()
         self.abort_block_event.set()
 
-        self.running_generation = RunningGeneration(id=new_gen_id)
-        self.running_generation.text = txt
+        generation = RunningGeneration(id=new_gen_id, on_state_change=self._notify_state_change)
+        generation.text = txt
+        self.running_generation = generation
+        self._notify_state_change()
 
         try:
-            logger.info(f"🧪 [Gen {new_gen_id}] Calling MCP...")
-            
-            # 🔗 MCP Call
-            response = call_mcp(txt)
-            logger.info(f"🧪 [Gen {new_gen_id}] MCP response: {response}")
+            speculative = self.speculative_cache.lookup(txt)
+            if speculative is not None and speculative.has_audio:
+                self._replay_speculative_answer(generation, speculative)
+                return
+
+            if speculative is not None:
+                logger.info(f"🧪 [Gen {new_gen_id}] Reusing speculative MCP response (saved {speculative.response_ms:.0f}ms).")
+                response = speculative.response
+            else:
+                logger.info(f"🧪 [Gen {new_gen_id}] Calling MCP...")
+
+                # 🔗 MCP Call (cancellable by process_abort_generation)
+                query = self._tool_call_for(txt, generation)
+                if generation.abortion_started or self.running_generation is not generation:
+                    logger.info(f"🧪 [Gen {new_gen_id}] Generation aborted while translating the call, dropped.")
+                    return
+                if isinstance(query, ToolCall): # Already parsed, sent as is
+                    generation.mcp_call = self.mcp_client.submit_call(query, session_id=self.session_id)
+                else:
+                    generation.mcp_call = self.mcp_client.submit(query, session_id=self.session_id)
+                try:
+                    response = generation.mcp_call.result()
+                except MCPCallCancelled:
+                    logger.info(f"🧪 [Gen {new_gen_id}] MCP call cancelled by abort, generation dropped.")
+                    return
+                generation.mcp_ms = (time.time() - generation.timestamp) * 1000
+                logger.info(f"🧪 [Gen {new_gen_id}] MCP response: {response}")
+            generation.mcp_response = response
+
+            if generation.abortion_started or self.running_generation is not generation:
+                logger.info(f"🧪 [Gen {new_gen_id}] Generation aborted while waiting for MCP, response dropped.")
+                return
+
+            if self.template_synthesizer is not None:
+                spliced = self.template_synthesizer.render(response)
+                if spliced is not None:
+                    generation.first_audio_time = time.time()
+                    self._play_prerendered_answer(generation, self.preprocess_chunk(response), "", spliced)
+                    return
 
             def one_shot_generator():
                 yield response
 
-            self.running_generation.llm_generator = one_shot_generator()
+            generation.llm_generator = one_shot_generator()
 
             self.generator_ready_event.set()
 
         except Exception as e:
             logger.exception(f"🧪 [Gen {new_gen_id}] Failed in process_prepare_generation: {e}")
             self.running_generation = None
+            self._notify_state_change()
+
+    def _tool_call_for(self, txt: str, generation: RunningGeneration) -> Union[ToolCall, str]:
+        """
+        Translates a transcript into the call sent to MCP.
+
+        Common price, availability and order phrasings are mapped by the intent
+        router in microseconds; anything it is not confident about goes to the
+        LLM (`_llm_tool_call`). Text that already is a call passes through.
+
+        Args:
+            txt: The final user transcript.
+            generation: The generation the call is for.
+
+        Returns:
+            The parsed call, or text for MCP to parse when there is none
+            (a transcript that already is a call, or an LLM reply that never
+            completed one).
+        """
+        gen_id = generation.id
+        if txt.lstrip().startswith("CALL"):
+            return txt
+        if self.intent_threshold is not None:
+            start = time.perf_counter()
+            match = get_intent_router().route(txt)
+            route_us = (time.perf_counter() - start) * 1e6
+            if match is not None and match.confidence >= self.intent_threshold:
+                logger.info(f"🧭 [Gen {gen_id}] Intent fast path ({match.intent}, confidence {match.confidence:.2f}, {route_us:.0f}µs): {format_call(match.call)}")
+                return match.call
+            confidence = f"confidence {match.confidence:.2f}" if match is not None else "no match"
+            logger.info(f"🧭 [Gen {gen_id}] Intent fast path missed ({confidence}), asking the LLM.")
+        return self._llm_tool_call(txt, generation)
+
+    def _llm_tool_call(self, txt: str, generation: RunningGeneration) -> Union[ToolCall, str]:
+        """
+        Has the LLM write the call for a transcript, returning as soon as the call is complete.
+
+        Tokens go through a `StreamingToolCallParser`; once the call's closing
+        parenthesis arrives the rest of the generation is cancelled with
+        `LLM.cancel_generation` instead of being waited for. The time to the
+        complete call is kept in `generation.tool_call_ms`.
+
+        The prompt is the session's `history` (pinned tool-call prompt, then the
+        conversation window), so follow-ups keep their context and Ollama reuses
+        the cached prefix of the previous turn.
+
+        Args:
+            txt: The final user transcript.
+            generation: The generation the call is for (its abort cancels the request).
+
+        Returns:
+            The parsed call. If the call is malformed, its text; if the LLM never
+            completed a call, everything it wrote (MCP then answers with a parse
+            error, as before).
+        """
+        request_id = f"toolcall-{generation.id}-{uuid.uuid4().hex[:8]}"
+        parser = StreamingToolCallParser()
+        start = time.perf_counter()
+        generation.tool_call_request_id = request_id
+        history = self.history.messages() # Pinned tool-call prompt, then the conversation so far
+        if history[-1]["role"] == "user":
+            history = history[:-1] # The transcript itself, sent below as the user text
+        stream = self.llm.generate(
+            txt,
+            history=history,
+            use_system_prompt=False,
+            request_id=request_id,
+            keep_alive=LLM_KEEP_ALIVE,
+        )
+        try:
+            for token in stream:
+                try:
+                    call = parser.feed(token)
+                except ToolCallError:
+                    call = None
+                if parser.complete:
+                    generation.tool_call_ms = (time.perf_counter() - start) * 1000
+                    self.llm.cancel_generation(request_id)
+                    outcome = call.name if call is not None else "malformed call"
+                    logger.info(f"🧠🛠️ [Gen {generation.id}] Tool call complete after {parser.tokens} tokens, {generation.tool_call_ms:.0f}ms ({outcome}), rest of the generation cancelled.")
+                    return call if call is not None else parser.call_text
+        except Exception as e:
+            logger.error(f"🧠💥 [Gen {generation.id}] LLM tool call failed: {e}")
+            return f"⚠️ LLM Error: {e}"
+        finally:
+            stream.close()
+            generation.tool_call_request_id = None
+        generation.tool_call_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"🧠🛠️ [Gen {generation.id}] LLM finished without a complete call after {generation.tool_call_ms:.0f}ms.")
+        return parser.text.strip()
+
+    def _replay_speculative_answer(self, generation: RunningGeneration, speculative: SpeculativeAnswer) -> None:
+        """
+        Completes a new generation from a cached speculative answer.
+
+        Args:
+            generation: The freshly created running generation.
+            speculative: The cached answer with complete audio.
+        """
+        logger.info(f"🧪 [Gen {generation.id}] Replaying speculative answer ({len(speculative.audio_chunks)} chunks, saved {speculative.first_audio_ms:.0f}ms).")
+        generation.from_speculation = True
+        generation.mcp_response = speculative.response
+        self._play_prerendered_answer(generation, speculative.quick_answer, speculative.final_answer, speculative.audio_chunks)
+
+    def _play_prerendered_answer(self, generation: RunningGeneration, quick_answer: str, final_answer: str, audio_chunks: list) -> None:
+        """
+        Completes a generation with audio that is already available, without running any worker.
+
+        Queues the audio chunks and marks every stage as finished, so the TTS
+        sender streams the answer as soon as the user's turn ends.
+
+        Args:
+            generation: The freshly created running generation.
+            quick_answer: Answer text (first part) reported to the client.
+            final_answer: Remaining answer text, if the answer was split.
+            audio_chunks: The complete answer audio (24 kHz int16 PCM chunks).
+        """
+        generation.quick_answer = quick_answer
+        generation.final_answer = final_answer
+        generation.quick_answer_provided = True
+        generation.llm_finished = True
+        generation.llm_finished_event.set()
+        generation.tts_quick_started = True
+        generation.tts_final_started = True # Keeps the final TTS worker from picking it up
+        for chunk in audio_chunks:
+            generation.audio_chunks.put_nowait(chunk)
+        generation.tts_quick_finished_event.set()
+        generation.tts_final_finished_event.set()
+        generation.audio_quick_finished = True
+        generation.audio_final_finished = True
+        generation.quick_answer_first_chunk_ready = True
+        if self.on_partial_assistant_text:
+            self.on_partial_assistant_text(generation.quick_answer + generation.final_answer)
+        self._notify_state_change()
+
+    def _remember_speculation(self, generation: RunningGeneration) -> None:
+        """
+        Stores the result of a generation that is being aborted in the speculative cache.
+
+        Only generations whose MCP call returned are kept. Their audio is kept
+        too if both TTS stages finished before the abort.
+
+        Args:
+            generation: The generation being aborted (its workers have already stopped).
+        """
+        if generation.delivered or generation.from_speculation or generation.mcp_response is None or not generation.text:
+            return
+        audio_complete = (
+            generation.tts_quick_finished_event.is_set()
+            and generation.tts_final_finished_event.is_set()
+            and generation.first_audio_time is not None
+        )
+        self.speculative_cache.store(generation.text, SpeculativeAnswer(
+            response=generation.mcp_response,
+            quick_answer=generation.quick_answer,
+            final_answer=generation.final_answer,
+            audio_chunks=list(generation.audio_chunks.recorded) if audio_complete else None,
+            response_ms=generation.mcp_ms,
+            first_audio_ms=(generation.first_audio_time - generation.timestamp) * 1000 if audio_complete else None,
+        ))
+        logger.info(f"🗣️🛑💾 Gen {generation.id} Kept speculative answer{' with audio' if audio_complete else ''} for reuse.")
 
 # --- Processing Methods ---
     # def process_prepare_generation(self, txt: str):
@@ -1013,11 +1285,21 @@ class SpeechPipelineManager:
             # --- Start Abort Process ---
             logger.info(f"🗣️🛑🚀 {current_gen_id_str} Abortion process starting...")
             current_gen_obj.abortion_started = True # Mark immediately
+            self._notify_state_change()
             self.abort_block_event.clear() # Block new requests *before* waiting
             self.abort_completed_event.clear() # Clear completion flag at start
             self.stop_everything_event.set() # General signal (might be unused by workers)
             aborted_something = False
 
+            # --- Cancel the LLM still writing the tool call ---
+            if current_gen_obj.tool_call_request_id is not None:
+                logger.info(f"🗣️🛑🛠️ {current_gen_id_str} Cancelling the LLM tool call translation.")
+                self.llm.cancel_generation(current_gen_obj.tool_call_request_id)
+
+            # --- Cancel in-flight MCP call ---
+            if current_gen_obj.mcp_call is not None and not current_gen_obj.mcp_call.cancelled:
+                logger.info(f"🗣️🛑🔗 {current_gen_id_str} Cancelling in-flight MCP call.")
+                self.mcp_client.cancel(current_gen_obj.mcp_call)
 
             # --- Abort LLM ---
             # Check if LLM is potentially active (running OR waiting to start)
@@ -1094,6 +1376,9 @@ class SpeechPipelineManager:
                     logger.warning(f"🗣️🛑🔊💥 {current_gen_id_str} Error stopping audio playback: {audio_e}")
 
 
+            # --- Keep the result for a matching final transcript ---
+            self._remember_speculation(current_gen_obj)
+
             # --- Clear the running generation object and close generator ---
             # Re-check self.running_generation in case it changed *during* the waits above
             # Use the initially captured current_gen_obj for closing the generator if needed
@@ -1122,6 +1407,7 @@ class SpeechPipelineManager:
 
             # --- Signal Completion ---
             logger.info(f"🗣️🛑✅ {current_gen_id_str} Abort processing complete. Setting completion event and releasing block.")
+            self._notify_state_change()
             self.abort_completed_event.set() # Signal that the abort process is fully done
             self.abort_block_event.set() # Release the block for the request processor
 
@@ -1223,6 +1509,35 @@ class SpeechPipelineManager:
             self.abort_block_event.set()
 
 
+    def on_turn_delivered(self):
+        """
+        Marks the current answer as delivered to the user.
+
+        MCP functions advance the order state, so speculative answers computed
+        before this point are stale and are dropped.
+        """
+        generation = self.running_generation
+        if generation is not None:
+            generation.delivered = True
+        self.speculative_cache.invalidate()
+        stats = self.speculative_cache.stats()
+        if stats["hits"]:
+            logger.info(f"🗣️💾 Speculative cache: {stats['hits']} hit(s), {stats['hit_rate']:.0%} hit rate, {stats['saved_ms']:.0f}ms saved so far.")
+
+    @property
+    def menu(self) -> MenuManager:
+        """The current process-wide menu snapshot (follows hot reloads)."""
+        return get_menu()
+
+    def get_speculation_stats(self) -> dict:
+        """
+        Returns the speculative answer cache counters of this pipeline.
+
+        Returns:
+            A dict with `hits`, `misses`, `hit_rate`, `saved_ms` and `size`.
+        """
+        return self.speculative_cache.stats()
+
     def reset(self):
         """
         Resets the pipeline state completely.
@@ -1232,7 +1547,8 @@ class SpeechPipelineManager:
         """
         logger.info("🗣️🔄 Resetting pipeline state...")
         self.abort_generation(wait_for_completion=True, timeout=7.0, reason="reset") # Ensure clean slate
-        self.history = []
+        self.speculative_cache.invalidate()
+        self.history.clear()
         logger.info("🗣️🧹 History cleared. Reset complete.")
 
     def shutdown(self):
@@ -1261,6 +1577,7 @@ class SpeechPipelineManager:
         self.stop_tts_final_finished_event.set()
         self.abort_completed_event.set()
         self.abort_block_event.set() # Ensure request processor isn't blocked
+        self.state_changed_event.set()
 
         # Join threads
         threads_to_join = [
@@ -79,6 +79,24 @@ function initAudioContext() {
   }
 }
 
+// Binary TTS frame header (see tts_frame.py): big-endian
+// uint16 type, uint16 header length, uint32 generation id,
+// uint32 sequence, uint32 sample rate; int16 LE PCM follows.
+const TTS_FRAME_PCM16 = 1;
+const TTS_FRAME_MIN_HEADER = 16;
+
+function handleBinaryMessage(buffer) {
+  if (ignoreIncomingTTS) return;
+  if (buffer.byteLength < TTS_FRAME_MIN_HEADER) return;
+  const header = new DataView(buffer);
+  if (header.getUint16(0) !== TTS_FRAME_PCM16) return;
+  const headerLen = header.getUint16(2);
+  const int16Data = new Int16Array(buffer, headerLen, (buffer.byteLength - headerLen) >> 1);
+  if (ttsWorkletNode && int16Data.length) {
+    ttsWorkletNode.port.postMessage(int16Data, [buffer]);
+  }
+}
+
 function base64ToInt16Array(b64) {
   const raw = atob(b64);
   const buf = new ArrayBuffer(raw.length);
@@ -260,6 +278,10 @@ function handleJSONMessage({ type, content }) {
     socket.send(JSON.stringify({ type: 'tts_stop' }));
     return;
   }
+  if (type === "server_busy") {
+    statusDiv.textContent = "Server busy, all session slots in use. Try again shortly.";
+    return;
+  }
 }
 
 function escapeHtml(str) {
@@ -300,7 +322,8 @@ document.getElementById("startBtn").onclick = async () => {
   statusDiv.textContent = "Initializing connection...";
 
   const wsProto = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-  socket = new WebSocket(`${wsProto}//${location.host}/ws`);
+  socket = new WebSocket(`${wsProto}//${location.host}/ws?tts_format=pcm16`);
+  socket.binaryType = "arraybuffer";
 
   socket.onopen = async () => {
     statusDiv.textContent = "Connected. Activating mic and TTS…";
@@ -310,7 +333,9 @@ document.getElementById("startBtn").onclick = async () => {
   };
 
   socket.onmessage = (evt) => {
-    if (typeof evt.data === "string") {
+    if (evt.data instanceof ArrayBuffer) {
+      handleBinaryMessage(evt.data);
+    } else if (typeof evt.data === "string") {
       try {
         const msg = JSON.parse(evt.data);
         handleJSONMessage(msg);
@@ -0,0 +1,351 @@
+# template_tts.py
+import ast
+import json
+import logging
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from phrase_cache import PhraseAudioCache
+from text_context import preprocess_tts_text
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+CROSSFADE_MS = 5.0
+SENTENCE_PAUSE_MS = 250.0 # Inserted where a fragment starts with ". " / "? " / "! "
+CLAUSE_PAUSE_MS = 120.0   # Inserted for ", " / ": " / "; " and between list items
+OUTPUT_CHUNK_BYTES = 4800 # 100 ms of 24 kHz int16
+
+_EDGE_NOISE = re.compile(r"^[^\w]+|\s+$") # Emoji, punctuation and spaces at the start, spaces at the end
+
+
+class TemplatePart(NamedTuple):
+    """One piece of a reply template: literal text, or a slot filled in at runtime."""
+    text: str          # Literal text, or the slot's source expression
+    is_slot: bool
+    format_spec: str = ""
+
+
+class ReplyTemplate:
+    """
+    A reply format of an MCP function, e.g. `f"💵 {leaf_item} costs {price:.2f} dirhams."`.
+
+    Compiled to a regular expression that recognizes rendered replies and
+    extracts the slot values.
+    """
+    def __init__(self, function: str, parts: Sequence[TemplatePart]) -> None:
+        """
+        Initializes the template.
+
+        Args:
+            function: Name of the MCP function that returns this format.
+            parts: Literal and slot parts in order.
+        """
+        self.function = function
+        self.parts = list(parts)
+        pattern = "".join("(.+?)" if p.is_slot else re.escape(p.text) for p in self.parts)
+        self.regex = re.compile(pattern, re.DOTALL)
+        self.literal_length = sum(len(p.text) for p in self.parts if not p.is_slot)
+
+    def match(self, text: str) -> Optional[List[str]]:
+        """Returns the slot values if `text` is a rendering of this template, else None."""
+        m = self.regex.fullmatch(text)
+        return list(m.groups()) if m else None
+
+    def __repr__(self) -> str:
+        body = "".join("{" + p.text + (":" + p.format_spec if p.format_spec else "") + "}" if p.is_slot else p.text for p in self.parts)
+        return f"ReplyTemplate({self.function}: {body!r})"
+
+
+def _format_spec(node: ast.FormattedValue) -> str:
+    """Returns the literal format spec of an f-string field ('' if none or not constant)."""
+    if node.format_spec is None:
+        return ""
+    values = getattr(node.format_spec, "values", [])
+    return "".join(v.value for v in values if isinstance(v, ast.Constant))
+
+
+def load_templates(app_path: str = "app.py") -> List[ReplyTemplate]:
+    """
+    Detects the reply templates of the MCP functions.
+
+    Parses the app module (without importing it), reads the names registered
+    in its `FUNCTIONS` dict and collects every f-string those functions
+    (including their nested helpers) return, also as the reply of a
+    `(record, reply)` tuple.
+
+    Args:
+        app_path: Path of the MCP app module.
+
+    Returns:
+        The templates, most specific (longest literal text) first.
+    """
+    with open(app_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=app_path)
+
+    registered = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "FUNCTIONS" for t in node.targets):
+            if isinstance(node.value, ast.Dict):
+                registered = {v.id for v in node.value.values if isinstance(v, ast.Name)}
+
+    templates: List[ReplyTemplate] = []
+    seen = set()
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef) or node.name not in registered:
+            continue
+        for ret in ast.walk(node):
+            if not isinstance(ret, ast.Return):
+                continue
+            reply = ret.value
+            if isinstance(reply, ast.Tuple) and reply.elts:
+                reply = reply.elts[-1] # (record, reply) of an order update
+            if not isinstance(reply, ast.JoinedStr):
+                continue
+            parts = []
+            for value in reply.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(TemplatePart(value.value, False))
+                elif isinstance(value, ast.FormattedValue):
+                    parts.append(TemplatePart(ast.unparse(value.value), True, _format_spec(value)))
+            signature = tuple((p.is_slot, "" if p.is_slot else p.text) for p in parts)
+            if signature in seen:
+                continue
+            seen.add(signature)
+            templates.append(ReplyTemplate(node.name, parts))
+    templates.sort(key=lambda t: t.literal_length, reverse=True)
+    return templates
+
+
+def fragment_text(literal: str) -> Tuple[str, float]:
+    """
+    Turns a literal template piece into the text synthesized for it.
+
+    Leading emoji, punctuation and spaces are dropped (they belong to the
+    previous piece or are not spoken); a leading sentence or clause mark is
+    turned into a pause instead.
+
+    Args:
+        literal: The literal text between two slots.
+
+    Returns:
+        A tuple of the text to synthesize ('' if nothing is spoken) and the
+        pause in ms to insert before it.
+    """
+    literal = preprocess_tts_text(literal)
+    stripped = _EDGE_NOISE.sub("", literal)
+    lead = literal[:len(literal) - len(literal.lstrip(" \t\n.,;:!?"))]
+    pause = 0.0
+    if any(c in lead for c in ".!?"):
+        pause = SENTENCE_PAUSE_MS
+    elif any(c in lead for c in ",;:"):
+        pause = CLAUSE_PAUSE_MS
+    if not any(c.isalnum() for c in stripped):
+        stripped = ""
+    return stripped, pause
+
+
+def slot_items(value: str) -> List[str]:
+    """Splits a slot value into separately cached items (comma separated lists, e.g. flavors)."""
+    return [item.strip() for item in preprocess_tts_text(value).split(", ") if item.strip()]
+
+
+def crossfade_concat(segments: Sequence[np.ndarray], fade_samples: int) -> np.ndarray:
+    """
+    Joins int16 PCM segments, overlapping each junction with a linear crossfade.
+
+    Args:
+        segments: The int16 segments in order (silence segments included).
+        fade_samples: Crossfade length; shortened for segments that are too short.
+
+    Returns:
+        The joined int16 PCM.
+    """
+    segments = [s for s in segments if s.size]
+    if not segments:
+        return np.zeros(0, dtype=np.int16)
+    total = sum(s.size for s in segments)
+    out = np.zeros(total, dtype=np.float32)
+    position = 0
+    for index, segment in enumerate(segments):
+        seg = segment.astype(np.float32)
+        fade = 0
+        if index > 0:
+            fade = min(fade_samples, seg.size // 2, position)
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade, endpoint=False, dtype=np.float32)
+            start = position - fade
+            out[start:position] *= 1.0 - ramp
+            out[start:position] += seg[:fade] * ramp
+            out[position:position + seg.size - fade] = seg[fade:]
+            position += seg.size - fade
+        else:
+            out[position:position + seg.size] = seg
+            position += seg.size
+    np.clip(out[:position], -32768, 32767, out=out[:position])
+    return out[:position].astype(np.int16)
+
+
+class TemplateSynthesizer:
+    """
+    Speaks template replies by splicing cached audio fragments.
+
+    Replies such as "✅ Yes, we have Margherita available." differ only in
+    their slots. Every literal piece of a template and every slot value (menu
+    names, formatted prices) is synthesized once into the phrase cache; at
+    reply time the matching pieces are looked up and joined with short
+    crossfades, which takes well under a millisecond instead of a full TTS
+    run. If any piece is not cached, `render` returns None and the caller
+    falls back to the live engine.
+    """
+    def __init__(
+            self,
+            templates: Sequence[ReplyTemplate],
+            phrase_cache: PhraseAudioCache,
+            phrase_key: Callable[[str], str],
+            crossfade_ms: float = CROSSFADE_MS,
+        ) -> None:
+        """
+        Initializes the synthesizer.
+
+        Args:
+            templates: Reply templates, as returned by `load_templates`.
+            phrase_cache: The shared phrase cache holding the fragment audio.
+            phrase_key: Maps a text to its phrase cache key (engine, voice and speed
+                        of the live engine, e.g. `AudioProcessor.phrase_key`).
+            crossfade_ms: Crossfade length at each junction.
+        """
+        self.templates = list(templates)
+        self.phrase_cache = phrase_cache
+        self.phrase_key = phrase_key
+        self.fade_samples = int(SAMPLE_RATE * crossfade_ms / 1000)
+        self.rendered = 0
+        self.fallbacks = 0
+
+    def _fragment_pcm(self, text: str) -> Optional[np.ndarray]:
+        """Returns the cached audio of a fragment, or None if it is not cached."""
+        chunks = self.phrase_cache.get(self.phrase_key(text))
+        if chunks is None:
+            return None
+        return np.frombuffer(b"".join(chunks), dtype=np.int16)
+
+    @staticmethod
+    def _silence(ms: float) -> np.ndarray:
+        return np.zeros(int(SAMPLE_RATE * ms / 1000), dtype=np.int16)
+
+    def _segments(self, template: ReplyTemplate, values: List[str]) -> Optional[List[np.ndarray]]:
+        """Collects the audio segments of a matched reply, or None if any piece is missing."""
+        segments: List[np.ndarray] = []
+        slot_values = iter(values)
+        for part in template.parts:
+            if part.is_slot:
+                for index, item in enumerate(slot_items(next(slot_values))):
+                    if index:
+                        segments.append(self._silence(CLAUSE_PAUSE_MS))
+                    pcm = self._fragment_pcm(item)
+                    if pcm is None:
+                        return None
+                    segments.append(pcm)
+                continue
+            text, pause = fragment_text(part.text)
+            if pause and segments:
+                segments.append(self._silence(pause))
+            if text:
+                pcm = self._fragment_pcm(text)
+                if pcm is None:
+                    return None
+                segments.append(pcm)
+        return segments
+
+    def match(self, text: str) -> Optional[Tuple[ReplyTemplate, List[str]]]:
+        """Returns the first template (and its slot values) that `text` renders, or None."""
+        for template in self.templates:
+            values = template.match(text)
+            if values is not None:
+                return template, values
+        return None
+
+    def render(self, text: str) -> Optional[List[bytes]]:
+        """
+        Splices the audio of a template reply from cached fragments.
+
+        Args:
+            text: The complete reply text.
+
+        Returns:
+            24 kHz int16 PCM chunks of `OUTPUT_CHUNK_BYTES`, or None if the text is
+            not a template reply or a fragment is not cached yet.
+        """
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        matched = self.match(text)
+        if matched is None:
+            return None
+        template, values = matched
+        segments = self._segments(template, values)
+        if not segments:
+            self.fallbacks += 1
+            logger.info(f"👄🧩 Template reply of {template.function} not fully cached, using live synthesis: {text[:50]}...")
+            return None
+        pcm = crossfade_concat(segments, self.fade_samples).tobytes()
+        chunks = [pcm[i:i + OUTPUT_CHUNK_BYTES] for i in range(0, len(pcm), OUTPUT_CHUNK_BYTES)]
+        self.rendered += 1
+        logger.info(f"👄🧩 Spliced template reply of {template.function} in {(time.perf_counter() - start)*1000:.2f}ms "
+                    f"(CPU {(time.thread_time() - cpu_start)*1000:.2f}ms, {len(pcm) / 2 / SAMPLE_RATE:.2f}s audio): {text[:50]}...")
+        return chunks
+
+    def fragment_catalogue(self, menu_path: str = "data/enhanced_menu.json") -> List[str]:
+        """
+        Lists the texts that must be cached for the templates to be spliced.
+
+        Covers every spoken literal piece of every template and, for slots with
+        a numeric format spec (e.g. prices with ".2f"), every number of the menu
+        in that format. Menu names (the other slot values) are part of the
+        regular pre-synthesis catalogue.
+
+        Args:
+            menu_path: Path of the menu JSON (source of the numbers).
+
+        Returns:
+            The texts, without duplicates.
+        """
+        texts: Dict[str, None] = {}
+        numeric_specs = set()
+        for template in self.templates:
+            for part in template.parts:
+                if part.is_slot:
+                    if part.format_spec.endswith(("f", "d", "g")):
+                        numeric_specs.add(part.format_spec)
+                    continue
+                text, _ = fragment_text(part.text)
+                if text:
+                    texts[text] = None
+        if numeric_specs:
+            with open(menu_path, "r", encoding="utf-8") as f:
+                numbers = sorted(set(_menu_numbers(json.load(f))))
+            for spec in sorted(numeric_specs):
+                for number in numbers:
+                    try:
+                        texts[format(number, spec)] = None
+                    except ValueError: # e.g. a float price with an integer spec
+                        continue
+        return list(texts)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of spliced replies and of template replies that fell back to live synthesis."""
+        return {"rendered": self.rendered, "fallbacks": self.fallbacks, "templates": len(self.templates)}
+
+
+def _menu_numbers(node) -> List[float]:
+    """Collects every number (price) in the menu JSON."""
+    if isinstance(node, bool):
+        return []
+    if isinstance(node, (int, float)):
+        return [node]
+    if isinstance(node, dict):
+        return [n for value in node.values() for n in _menu_numbers(value)]
+    if isinstance(node, list):
+        return [n for value in node for n in _menu_numbers(value)]
+    return []
@@ -0,0 +1,129 @@
+import random
+import unittest
+
+import app
+from compiled_menu import CompiledMenu
+from menu_snapshot import get_menu
+
+menu = get_menu()
+
+# --- Reference implementations: the menu walks the compiled lookups replaced ---
+
+def legacy_get_price(item):
+    if not item or item == "unknown":
+        return "❌ Sorry, I couldn't understand the item you're asking about."
+    item = item.strip().lower()
+    for category, content in menu.menu.items():
+        if isinstance(content, dict):
+            for subkey, subcontent in content.items():
+                if isinstance(subcontent, dict):
+                    for leaf_item, price in subcontent.items():
+                        if item in leaf_item.lower():
+                            return f"💵 {leaf_item} costs {price:.2f} dirhams."
+                elif isinstance(subcontent, (int, float)):
+                    if item in subkey.lower():
+                        return f"💵 {subkey} costs {subcontent:.2f} dirhams."
+        elif isinstance(content, (int, float)):
+            if item in category.lower():
+                return f"💵 {category} costs {content:.2f} dirhams."
+        elif isinstance(content, list):
+            for list_item in content:
+                if item in list_item.lower():
+                    return f"🧂 {list_item} is available. Please ask for more details."
+    for category, content in menu.menu.items():
+        if item in category.lower():
+            priced_items = []
+            if isinstance(content, dict):
+                for k, v in content.items():
+                    if isinstance(v, (int, float)):
+                        priced_items.append((k, v))
+                    elif isinstance(v, dict):
+                        for subk, subv in v.items():
+                            if isinstance(subv, (int, float)):
+                                priced_items.append((subk, subv))
+            if priced_items:
+                msg = f"🧾 Here are some {category} options with prices:\n"
+                for name, price in priced_items:
+                    msg += f"• {name}: {price:.2f} AED\n"
+                return msg.strip()
+            return f"📦 {category} is available. Some items may not have prices listed."
+    return f"❌ Sorry, {item} is not found in our menu."
+
+
+def legacy_clarify_category(category):
+    if not category:
+        return "❌ I didn't catch the category."
+    category = category.lower().rstrip('s')
+    matched_category = None
+    for cat in menu.menu.keys():
+        if category in cat.lower() or cat.lower() in category:
+            matched_category = cat
+            break
+    if not matched_category:
+        return f"❌ Sorry, we don't have anything listed under {category}."
+    options = menu.list_flavors(matched_category)
+    if not options:
+        return f"❌ No flavors available under {matched_category}."
+    return f"✅ Yes, we have {matched_category}. What would you like? Options include: {', '.join(options)}"
+
+
+def legacy_menu_get_price(item_name):
+    key = item_name.lower()
+    if key not in menu.item_index:
+        return "❌ Not found"
+    category, item = menu.item_index[key]
+    cat_data = menu.menu[category]
+    if isinstance(cat_data, dict):
+        price = cat_data.get(item)
+        if isinstance(price, (int, float)):
+            return price
+        elif isinstance(price, str):
+            sizes = {k: v for k, v in cat_data.items() if isinstance(v, (int, float))}
+            if sizes:
+                return sizes
+    return "❌ Price not found"
+
+
+def _queries():
+    names = list(menu.search_index.nodes)
+    rng = random.Random(16)
+    queries = ["", " ", "unknown", "a", "zz", "pizza", "pizzas", "acai bowl", "sauces", "all the pizzas please",
+               "i want acai bowls", "small", "large", "alien burger", "chicken", "bowl", "sub", "wrap"]
+    for name in names:
+        queries += [name, name.lower(), name.upper(), f" {name} "]
+        for _ in range(3):
+            start = rng.randrange(len(name))
+            queries.append(name[start:start + rng.randint(1, 10)])
+        queries.append(f"the {name.lower()} one")
+    return queries
+
+
+class TestCompiledMenuParity(unittest.TestCase):
+
+    def test_get_price_parity(self):
+        for query in _queries():
+            self.assertEqual(app.get_price(query), legacy_get_price(query), repr(query))
+
+    def test_clarify_category_parity(self):
+        for query in _queries():
+            self.assertEqual(app.clarify_category(query), legacy_clarify_category(query), repr(query))
+
+    def test_menu_manager_get_price_parity(self):
+        for query in _queries() + list(menu.item_index):
+            self.assertEqual(menu.get_price(query), legacy_menu_get_price(query), repr(query))
+
+    def test_size_table_is_a_copy(self):
+        compiled = CompiledMenu({"Acai": {"OG": "Banana", "Small": 39.0, "Large": 49.0}}, {"og": ("Acai", "OG")}, {})
+        sizes = compiled.item_price("OG")
+        self.assertEqual(sizes, {"Small": 39.0, "Large": 49.0})
+        sizes["Small"] = 0
+        self.assertEqual(compiled.item_price("og")["Small"], 39.0)
+
+    def test_compiled_records_use_slots(self):
+        entry = menu.compiled.entries[0]
+        with self.assertRaises(AttributeError):
+            entry.extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from completion_cache import CompletionProbabilityCache, normalize_completion_text
+
+
+class TestCompletionProbabilityCache(unittest.TestCase):
+
+    def test_normalizes_whitespace_only(self):
+        self.assertEqual(normalize_completion_text("  I would   like\tit "), "I would like it")
+        self.assertNotEqual(normalize_completion_text("Pizza"), normalize_completion_text("pizza"))
+
+    def test_model_runs_once_per_normalized_sentence(self):
+        calls = []
+        cache = CompletionProbabilityCache(lambda s: calls.append(s) or 0.5)
+        for text in ("I would", "I would ", " I  would", "I would like", "I would"):
+            self.assertEqual(cache.get(text), 0.5)
+        self.assertEqual(calls, ["I would", "I would like"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 2))
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        calls = []
+        started = threading.Event()
+
+        def slow(sentence):
+            calls.append(sentence)
+            started.set()
+            time.sleep(0.1)
+            return 0.9
+
+        cache = CompletionProbabilityCache(slow)
+        results = []
+        first = threading.Thread(target=lambda: results.append(cache.get("burst")))
+        first.start()
+        started.wait(1.0)
+        others = [threading.Thread(target=lambda: results.append(cache.get("burst "))) for _ in range(4)]
+        for thread in others:
+            thread.start()
+        for thread in [first] + others:
+            thread.join()
+        self.assertEqual(calls, ["burst"])
+        self.assertEqual(results, [0.9] * 5)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_lru_eviction(self):
+        cache = CompletionProbabilityCache(lambda s: float(len(s)), max_size=2)
+        cache.get("a")
+        cache.get("bb")
+        cache.get("a")   # refresh "a"
+        cache.get("ccc") # evicts "bb"
+        cache.get("a")
+        self.assertEqual(cache.stats()["misses"], 3)
+        cache.get("bb")
+        self.assertEqual(cache.stats()["misses"], 4)
+
+    def test_failure_is_not_cached(self):
+        attempts = []
+
+        def flaky(sentence):
+            attempts.append(sentence)
+            if len(attempts) == 1:
+                raise RuntimeError("model failed")
+            return 0.1
+
+        cache = CompletionProbabilityCache(flaky)
+        with self.assertRaises(RuntimeError):
+            cache.get("again")
+        self.assertEqual(cache.get("again"), 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
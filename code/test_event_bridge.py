@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import unittest
+
+from event_bridge import LoopWakeup, NotifyingQueue
+
+
+class TestLoopWakeup(unittest.TestCase):
+
+    def test_notify_from_thread_wakes_waiter(self):
+        async def scenario():
+            wakeup = LoopWakeup()
+            threading.Timer(0.05, wakeup.notify).start()
+            return await wakeup.wait(timeout=2.0)
+        self.assertTrue(asyncio.run(scenario()))
+
+    def test_wait_times_out_without_notify(self):
+        async def scenario():
+            return await LoopWakeup().wait(timeout=0.02)
+        self.assertFalse(asyncio.run(scenario()))
+
+    def test_notify_before_wait_is_not_lost(self):
+        async def scenario():
+            wakeup = LoopWakeup()
+            wakeup.notify()
+            await asyncio.sleep(0) # let the scheduled set run
+            return await wakeup.wait(timeout=0.5)
+        self.assertTrue(asyncio.run(scenario()))
+
+    def test_burst_of_notifies_coalesces(self):
+        async def scenario():
+            wakeup = LoopWakeup()
+            for _ in range(100):
+                wakeup.notify()
+            first = await wakeup.wait(timeout=0.5)
+            second = await wakeup.wait(timeout=0.02)
+            return first, second
+        self.assertEqual(asyncio.run(scenario()), (True, False))
+
+
+class TestNotifyingQueue(unittest.TestCase):
+
+    def test_put_nowait_fires_hook(self):
+        calls = []
+        q = NotifyingQueue(on_put=lambda: calls.append(1))
+        q.put_nowait(b"a")
+        q.put(b"b")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(q.get_nowait(), b"a")
+
+    def test_record_keeps_drained_items(self):
+        q = NotifyingQueue(record=True)
+        q.put_nowait(b"a")
+        q.put_nowait(b"b")
+        q.get_nowait()
+        self.assertEqual(q.recorded, [b"a", b"b"])
+        self.assertIsNone(NotifyingQueue().recorded)
+
+
+if __name__ == "__main__":
+    unittest.main()
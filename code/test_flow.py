@@ -1,30 +1,44 @@
-from app import place_order, order_session
-
-# STEP 1: Add item + quantity
-print("\n🧑 You: I want to order 2 pizzas")
-response = place_order("pizza", 2)
-print("🤖", response)
-
-# STEP 2: Add NYU ID
-print("\n🧑 You: 12345678")
-order_session["nyu_id"] = "12345678"
-response = place_order("pizza", 2)
-print("🤖", response)
-
-# STEP 3: Add Building
-print("\n🧑 You: I live in A1C")
-order_session["building"] = "A1C"
-response = place_order("pizza", 2)
-print("🤖", response)
-
-# STEP 4: Add Phone
-print("\n🧑 You: My phone number is 0561234567")
-order_session["phone"] = "0534567"
-response = place_order("pizza", 2)
-print("🤖", response)
-
-# STEP 5: Add Dietary Notes
-print("\n🧑 You: I'm allergic to nuts")
-order_session["dietary"] = "I'm allergic to nuts"
-response = place_order("pizza", 2)
-print("🤖", response)
+"""
+Manual walk-through of one order, from the first item to the confirmation.
+
+Not a unit test: it confirms a real order into the order journal
+(ORDER_JOURNAL_DIR), so it only runs when started directly.
+
+Usage:
+    python test_flow.py
+"""
+from app import place_order, orders
+
+SESSION = "test-flow"
+
+
+def main():
+    # STEP 1: Add item + quantity
+    print("\n🧑 You: I want to order 2 margherita pizzas")
+    response = place_order("I want to order 2 margherita pizzas", "margherita", 2, session_id=SESSION)
+    print("🤖", response)
+
+    # STEP 2: Add NYU ID
+    print("\n🧑 You: N 12345678")
+    response = place_order("N 12345678", "margherita", 2, session_id=SESSION)
+    print("🤖", response)
+    print("🧾", orders.get(SESSION))
+
+    # STEP 3: Add Building
+    print("\n🧑 You: I live in A1C")
+    response = place_order("A1C", "margherita", 2, session_id=SESSION)
+    print("🤖", response)
+
+    # STEP 4: Add Phone
+    print("\n🧑 You: My phone number is 0561234567")
+    response = place_order("My phone number is 0561234567", "margherita", 2, session_id=SESSION)
+    print("🤖", response)
+
+    # STEP 5: Add Dietary Notes
+    print("\n🧑 You: I'm allergic to nuts")
+    response = place_order("I'm allergic to nuts", "margherita", 2, session_id=SESSION)
+    print("🤖", response)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import unittest
+
+from history_manager import ConversationHistory, MESSAGE_OVERHEAD
+from llm_module import LLM
+
+words = lambda text: len(text.split()) # Deterministic token counter for the tests
+
+
+def turn(history, index, size=10):
+    history.append({"role": "user", "content": " ".join([f"u{index}"] * size)})
+    history.append({"role": "assistant", "content": " ".join([f"a{index}"] * size)})
+
+
+class TestConversationHistory(unittest.TestCase):
+
+    def test_stays_within_budget_and_keeps_system_prompt(self):
+        history = ConversationHistory(system_prompt="be brief", max_tokens=200, count_tokens=words)
+        for index in range(50):
+            turn(history, index)
+            self.assertLessEqual(history.tokens, 200)
+            messages = history.messages()
+            self.assertEqual(messages[0], {"role": "system", "content": "be brief"})
+            self.assertEqual(messages[1]["role"], "user")
+            self.assertEqual(messages[-1]["content"], " ".join([f"a{index}"] * 10))
+        self.assertGreater(history.trims, 0)
+
+    def test_prefix_is_stable_between_trims(self):
+        history = ConversationHistory(system_prompt="be brief", max_tokens=200, count_tokens=words)
+        previous, prefix_changes = [], 0
+        for index in range(50):
+            turn(history, index)
+            messages = history.messages()
+            if messages[:len(previous)] != previous:
+                prefix_changes += 1
+            previous = messages
+        self.assertEqual(prefix_changes, history.trims)
+        self.assertLess(history.trims, 50 // 4) # A trim frees room for several turns, not one
+
+    def test_token_counts(self):
+        history = ConversationHistory(system_prompt="one two", max_tokens=1000, count_tokens=words)
+        history.append({"role": "user", "content": "three four five"})
+        self.assertEqual(history.tokens, 2 + 3 + 2 * MESSAGE_OVERHEAD)
+        history.clear()
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.tokens, 2 + MESSAGE_OVERHEAD)
+        self.assertEqual(history.messages(), [{"role": "system", "content": "one two"}])
+
+    def test_oversized_message_is_kept(self):
+        history = ConversationHistory(max_tokens=50, count_tokens=words)
+        turn(history, 0)
+        history.append({"role": "user", "content": "x " * 100})
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[-1]["role"], "user")
+
+    def test_llm_sends_one_system_prompt(self):
+        llm = LLM(backend="ollama", model="stub", system_prompt="llm prompt", base_url="http://127.0.0.1:9")
+        history = ConversationHistory(system_prompt="be brief", count_tokens=words)
+        turn(history, 0)
+        for _ in range(2):
+            messages = llm._build_messages("next", history.messages(), True)
+            self.assertEqual([m for m in messages if m["role"] == "system"], [{"role": "system", "content": "be brief"}])
+            self.assertEqual(messages[:-1], history.messages()) # Prefix as kept by the history
+            self.assertEqual(messages[-1], {"role": "user", "content": "next"})
+        self.assertEqual(llm._build_messages("hi", None, True)[0], {"role": "system", "content": "llm prompt"})
+
+
+if __name__ == "__main__":
+    unittest.main()
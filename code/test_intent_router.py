@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from intent_router import DEFAULT_THRESHOLD, IntentRouter, get_intent_router
+from menu_snapshot import MenuStore, get_menu
+from tool_call import format_call, parse_call
+
+
+class TestIntentRouter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.router = IntentRouter(get_menu())
+
+    def route(self, transcript):
+        match = self.router.route(transcript)
+        self.assertIsNotNone(match, transcript)
+        self.assertGreaterEqual(match.confidence, DEFAULT_THRESHOLD, transcript)
+        return match.call
+
+    def test_price(self):
+        for transcript in ("How much is the margherita?", "what's the price of a margherita pizza",
+                           "Um, how much does the margherita cost?"):
+            self.assertEqual(self.route(transcript), ("get_price", {"item": "Margherita"}))
+
+    def test_availability(self):
+        self.assertEqual(self.route("Do you have french fries?"), ("check_availability", {"item": "French Fries"}))
+
+    def test_order_with_quantity(self):
+        cases = [("I want two margherita pizzas", 2), ("Can I get 3 margheritas please", 3),
+                 ("I'd like a couple of margheritas", 2), ("I'll have a margherita", 1)]
+        for transcript, quantity in cases:
+            call = self.route(transcript)
+            self.assertEqual(call.name, "place_order")
+            self.assertEqual((call.args["item"], call.args["quantity"]), ("Margherita", quantity), transcript)
+            self.assertEqual(call.args["query"], transcript)
+
+    def test_category_order_asks_which_dish(self):
+        self.assertEqual(self.route("I want a pizza").name, "clarify_category")
+
+    def test_size_is_a_modifier(self):
+        for transcript, item in (("I'd like a small acai bowl", "Acai Bowls"), ("I want a large pizza", "Pizza"),
+                                 ("I want a large margherita", "Margherita")):
+            call = self.route(transcript)
+            self.assertEqual((call.name, call.args["item"]), ("place_order", item), transcript)
+
+    def test_size_alone_is_not_confident(self):
+        match = self.router.route("I'd like a small")
+        self.assertTrue(match is None or match.confidence < DEFAULT_THRESHOLD)
+
+    def test_no_match(self):
+        for transcript in ("tell me a joke", "what are your opening hours", "hello", ""):
+            self.assertIsNone(self.router.route(transcript), transcript)
+
+    def test_unexplained_words_lower_confidence(self):
+        match = self.router.route("I want a margherita delivered to my friend in the library")
+        self.assertTrue(match is None or match.confidence < DEFAULT_THRESHOLD)
+
+    def test_calls_round_trip_through_parser(self):
+        call = self.route("I'd like two margherita pizzas")
+        self.assertEqual(parse_call(format_call(call)), call)
+
+    def test_router_built_per_menu(self):
+        self.assertIs(get_intent_router(), get_intent_router())
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "menu.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"Pizza": {"Vegetarian": {"Quattro Stagioni": 40.0}}}, f)
+            router = IntentRouter(MenuStore(path).current().menu)
+            self.assertEqual(router.route("how much is the quattro stagioni").call,
+                             ("get_price", {"item": "Quattro Stagioni"}))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+import unittest
+
+from llm_module import LLM
+
+TOKENS = 50
+
+
+async def stub_ollama(reader, writer):
+    """Serves /api/chat as chunked NDJSON, one token per 10 ms, keeping the connection alive."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = next((int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:")), 0)
+            await reader.readexactly(length)
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for index in range(TOKENS + 1):
+                await asyncio.sleep(0.01)
+                line = json.dumps({"message": {"content": "" if index == TOKENS else f"t{index} "}, "done": index == TOKENS}).encode() + b"\n"
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+class TestAsyncGeneration(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.connections = 0
+
+        async def handle(reader, writer):
+            self.connections += 1
+            await stub_ollama(reader, writer)
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.llm = LLM(backend="ollama", model="stub", base_url=f"http://127.0.0.1:{port}", max_connections=4)
+
+    async def asyncTearDown(self):
+        await self.llm.aclose()
+        self.server.close()
+
+    async def collect(self, request_id=None):
+        return [token async for token in self.llm.agenerate("hi", use_system_prompt=False, request_id=request_id)]
+
+    async def test_streams_and_reuses_connections(self):
+        results = await asyncio.gather(*(self.collect() for _ in range(8)))
+        for tokens in results:
+            self.assertEqual("".join(tokens), "".join(f"t{i} " for i in range(TOKENS)))
+        self.assertLessEqual(self.connections, 4) # Pool limit; streams beyond it waited for a connection
+        await self.collect()
+        self.assertLessEqual(self.connections, 4) # Keep-alive
+        self.assertEqual(self.llm._active_requests, {})
+
+    async def test_cancel_closes_the_stream(self):
+        received = []
+        cancelled_at = None
+        async for token in self.llm.agenerate("hi", use_system_prompt=False, request_id="req-1"):
+            received.append(token)
+            if len(received) == 3:
+                cancelled_at = time.perf_counter()
+                self.assertTrue(self.llm.cancel_generation("req-1"))
+        self.assertLess(len(received), TOKENS)
+        self.assertLess(time.perf_counter() - cancelled_at, 0.5)
+        self.assertEqual(self.llm._active_requests, {})
+        self.assertEqual(len(await self.collect()), TOKENS) # The client still works afterwards
+
+    async def test_cancel_while_waiting_for_a_connection(self):
+        self.llm.max_connections = 1
+        await self.llm.aclose() # Rebuilt with a single pooled connection
+        first = asyncio.create_task(self.collect())
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(self.collect(request_id="queued"))
+        await asyncio.sleep(0.05) # The first stream still holds the only connection
+        self.assertFalse(first.done())
+        self.assertTrue(self.llm.cancel_generation("queued"))
+        self.assertEqual(await queued, [])
+        self.assertEqual(len(await first), TOKENS)
+        self.assertEqual(self.llm._active_requests, {})
+
+
+class TestAsyncClientLoops(unittest.TestCase):
+
+    def test_client_of_previous_loop_is_closed(self):
+        llm = LLM(backend="ollama", model="stub", base_url="http://127.0.0.1:9")
+
+        async def client():
+            result = llm._get_async_client()
+            await asyncio.sleep(0.01) # Lets the close of a previous client run
+            return result
+
+        first = asyncio.run(client())
+        second = asyncio.run(client())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertFalse(second.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
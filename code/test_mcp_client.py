@@ -0,0 +1,122 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mcp_client import MCPClient, MCPCallCancelled
+from tool_call import ToolCall
+
+
+class _MCPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        data = json.loads(body)
+        query = data["query"] if "query" in data else f"{data['name']} {json.dumps(data['arguments'], sort_keys=True)}"
+        self.server.connections.add(self.client_address)
+        if query.startswith("SLEEP"):
+            time.sleep(float(query.split()[1]))
+        reply = f"echo: {query}" + (f" [{data['session_id']}]" if "session_id" in data else "")
+        payload = json.dumps({"response": reply}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestMCPClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _MCPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = MCPClient(url=f"http://127.0.0.1:{self.server.server_port}/mcp")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_keep_alive_connection(self):
+        for i in range(5):
+            self.assertEqual(self.client.call(f"CALL get_price(item='{i}')"), f"echo: CALL get_price(item='{i}')")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_session_id_is_sent(self):
+        self.assertEqual(self.client.call("CALL place_order(item='pizza')", session_id="ab12cd34"),
+                         "echo: CALL place_order(item='pizza') [ab12cd34]")
+
+    def test_cancel_returns_immediately(self):
+        call = self.client.submit("SLEEP 1.0")
+        threading.Timer(0.05, self.client.cancel, args=(call,)).start()
+        start = time.monotonic()
+        with self.assertRaises(MCPCallCancelled):
+            call.result()
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(self.client.cancellations, 1)
+
+    def test_connection_refused_is_retried_within_deadline(self):
+        client = MCPClient(url=f"http://127.0.0.1:{_free_port()}/mcp", max_retries=2, deadline=2.0)
+        try:
+            start = time.monotonic()
+            response = client.call("CALL get_price(item='pizza')")
+            self.assertLess(time.monotonic() - start, 2.0)
+        finally:
+            client.close()
+        self.assertTrue(response.startswith("⚠️ MCP Error"))
+        self.assertEqual(client.retries, 2)
+
+    def test_read_timeout_is_not_retried(self):
+        client = MCPClient(url=self.client.url, read_timeout=0.1)
+        try:
+            response = client.call("SLEEP 0.5")
+        finally:
+            client.close()
+        self.assertTrue(response.startswith("⚠️ MCP Error"))
+        self.assertEqual(client.retries, 0)
+
+    def test_in_process_dispatch_skips_http(self):
+        client = MCPClient(dispatcher=lambda query: f"local: {query}")
+        try:
+            self.assertEqual(client.call("CALL get_price(item='pizza')"), "local: CALL get_price(item='pizza')")
+        finally:
+            client.close()
+        self.assertEqual(self.server.connections, set())
+
+    def test_in_process_dispatch_passes_session_id(self):
+        client = MCPClient(dispatcher=lambda query, session_id=None: f"{session_id}: {query}")
+        try:
+            self.assertEqual(client.call("CALL place_order(item='pizza')", session_id="s1"), "s1: CALL place_order(item='pizza')")
+        finally:
+            client.close()
+
+    def test_parsed_call_is_sent_structured(self):
+        call = self.client.submit_call(ToolCall("get_price", {"item": "pizza", "quantity": 2}), session_id="s1")
+        self.assertEqual(call.result(), 'echo: get_price {"item": "pizza", "quantity": 2} [s1]')
+
+    def test_parsed_call_in_process_skips_parsing(self):
+        executed = []
+        client = MCPClient(executor=lambda call, session_id=None: executed.append((call, session_id)) or "ok")
+        try:
+            self.assertEqual(client.submit_call(ToolCall("get_price", {"item": "pizza"}), "s1").result(), "ok")
+        finally:
+            client.close()
+        self.assertEqual(executed, [(ToolCall("get_price", {"item": "pizza"}), "s1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from difflib import get_close_matches
+
+from menu_manager import MenuManager
+from menu_search import MenuSearchIndex, phonetic_key
+
+menu = MenuManager("data/enhanced_menu.json")
+
+
+class TestMenuSearch(unittest.TestCase):
+
+    def test_phonetic_key_unifies_spellings(self):
+        self.assertEqual(phonetic_key("margarita"), phonetic_key("Margherita"))
+        self.assertEqual(phonetic_key("peperoni"), phonetic_key("Pepperoni"))
+        self.assertNotEqual(phonetic_key("margarita"), phonetic_key("Pepperoni"))
+
+    def test_ranked_hits_with_scores(self):
+        hits = menu.search_items("margarita")
+        self.assertEqual(hits[0].name, "Margherita")
+        self.assertTrue(hits[0].phonetic)
+        self.assertEqual([h.score for h in hits], sorted((h.score for h in hits), reverse=True))
+
+    def test_closest_item_matches_difflib(self):
+        keys = list(menu.item_index)
+        for query in ["chiken tikka", "beef suprem", "pepperony", "chocco bowl", "alien pizza", "teriyak"]:
+            expected = get_close_matches(query, keys, n=1, cutoff=0.8)
+            hit = menu.search_index.best(query, cutoff=0.8)
+            if hit is None or not hit.phonetic or hit.score == 1.0:
+                self.assertEqual(hit.key if hit else None, expected[0] if expected else None, query)
+
+    def test_exact_match(self):
+        self.assertEqual(menu.find_closest_item("Beef Supreme"), "beef supreme")
+
+    def test_substring_in_menu_order(self):
+        self.assertEqual(menu.find_in_menu("alfred"), "Chicken Alfredo")
+        self.assertEqual(menu.find_in_menu("nutella"), "Banana & Nutella")
+        self.assertIsNone(menu.find_in_menu("zzz"))
+
+    def test_substring_short_query_scans(self):
+        index = MenuSearchIndex({"Pizza": {"Margherita": 31.0}}, {"margherita": ("Pizza", "Margherita")})
+        self.assertEqual(index.find_substring("gh"), "Margherita")
+        self.assertEqual(index.find_substring("i"), "Pizza")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from menu_snapshot import MenuStore
+
+
+def _write_menu(path, menu, mtime):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(menu, f)
+    os.replace(tmp, path)
+    os.utime(path, (mtime, mtime)) # Distinct mtime even within the filesystem's resolution
+
+
+class TestMenuSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "menu.json")
+        self.mtime = time.time() - 100
+        _write_menu(self.path, {"Pizza": {"Vegetarian": {"Margherita": 31.0}}}, self.mtime)
+        self.store = MenuStore(self.path)
+
+    def tearDown(self):
+        self.store.stop_watching()
+        shutil.rmtree(self.dir)
+
+    def _update(self, menu):
+        self.mtime += 1
+        _write_menu(self.path, menu, self.mtime)
+
+    def test_reload_publishes_new_version(self):
+        old = self.store.current()
+        self.assertFalse(self.store.check_for_changes())
+        self._update({"Pizza": {"Vegetarian": {"Margherita": 31.0, "Al Funghi": 33.0}}})
+        self.assertTrue(self.store.check_for_changes())
+        new = self.store.current()
+        self.assertEqual(new.version, 2)
+        self.assertTrue(new.menu.is_available("Al Funghi"))
+        self.assertFalse(old.menu.is_available("Al Funghi")) # Readers holding v1 are unaffected
+        self.assertEqual(self.store.stats()["reloads"], 1)
+
+    def test_broken_file_keeps_current_snapshot(self):
+        self.mtime += 1
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"Pizza": {')
+        os.utime(self.path, (self.mtime, self.mtime))
+        self.assertFalse(self.store.check_for_changes())
+        self.assertEqual(self.store.current().version, 1)
+        self.assertEqual(self.store.stats()["failures"], 1)
+        self.assertIsNotNone(self.store.stats()["last_error"])
+
+    def test_watcher_picks_up_changes(self):
+        self.store.start_watching(interval=0.02)
+        self._update({"Sides": {"Fries": 12.0}})
+        deadline = time.monotonic() + 2.0
+        while self.store.current().version < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.store.current().menu.is_available("Fries"))
+
+    def test_readers_never_see_partial_snapshots(self):
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                snapshot = self.store.current()
+                try:
+                    menu = snapshot.menu
+                    self.assertEqual(len(menu.item_index), len(menu.compiled.items))
+                    menu.find_closest_item("margherita")
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(20):
+            self._update({"Pizza": {"Vegetarian": {f"Special {j}": 30.0 + j for j in range(i + 1)}}})
+            self.store.check_for_changes()
+        stop.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.store.current().version, 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
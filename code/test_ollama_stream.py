@@ -0,0 +1,64 @@
+import json
+import random
+import unittest
+
+from ollama_stream import OllamaStreamDecoder
+
+TOKENS = ["Hello", " wörld", " 🍕", ' "quoted"', "\n", " <b>&", "\\", " ok", "日本語", " ", ""]
+
+
+def stream_lines():
+    lines = []
+    for index, token in enumerate(TOKENS):
+        lines.append(json.dumps({"model": "m", "created_at": "t", "message": {"role": "assistant", "content": token}, "done": False},
+                                ensure_ascii=index % 2 == 0, separators=(",", ":")))
+    lines[3:3] = ["", "  \r", "not json", '{"error":"model not found"}', '{ "message" : { "content" : "spaced" }, "done" : false }']
+    lines.append('{"model":"m","message":{"role":"assistant","content":""},"done_reason":"stop","done":true,"eval_count":9}')
+    return lines
+
+
+class TestOllamaStreamDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.data = ("\n".join(stream_lines()) + "\n").encode("utf-8")
+        self.expected = [json.loads(line) for line in stream_lines() if line.strip() and line != "not json"]
+
+    def decode(self, pieces):
+        decoder = OllamaStreamDecoder()
+        chunks = [chunk for piece in pieces for chunk in decoder.feed(piece)]
+        return decoder, chunks
+
+    def check(self, decoder, chunks):
+        self.assertEqual([c.content for c in chunks], [(e.get("message") or {}).get("content", "") for e in self.expected])
+        self.assertEqual([c.done for c in chunks], [bool(e.get("done")) for e in self.expected])
+        self.assertEqual([c.error for c in chunks if c.error], ["model not found"])
+        self.assertEqual(decoder.invalid_lines, 1)
+
+    def test_every_split_point(self):
+        for cut in range(len(self.data) + 1): # Includes cuts inside multi-byte characters
+            self.check(*self.decode([self.data[:cut], self.data[cut:]]))
+
+    def test_random_chunking(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            pieces, index = [], 0
+            while index < len(self.data):
+                size = rng.randint(1, 64)
+                pieces.append(self.data[index:index + size])
+                index += size
+            self.check(*self.decode(pieces))
+
+    def test_whole_stream_and_single_bytes(self):
+        self.check(*self.decode([self.data]))
+        self.check(*self.decode([self.data[i:i + 1] for i in range(len(self.data))]))
+
+    def test_unfinished_line_is_kept(self):
+        decoder = OllamaStreamDecoder()
+        self.assertEqual(decoder.feed(b'{"message":{"content":"a'), [])
+        self.assertEqual(decoder.feed(b'b"},"done":false}'), [])
+        self.assertEqual(decoder.feed(b"\n")[0].content, "ab")
+        self.assertEqual(len(decoder._buffer), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import app
+import order_journal
+from order_journal import JournalError, JournalReader, JournalReceipt, OrderJournal, segment_paths
+
+
+class TestOrderJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.journals = []
+
+    def tearDown(self):
+        for journal in self.journals:
+            journal.close()
+        shutil.rmtree(self.dir)
+
+    def _open(self, **kwargs):
+        journal = OrderJournal(self.dir, **kwargs)
+        self.journals.append(journal)
+        return journal
+
+    def test_append_and_replay(self):
+        journal = self._open()
+        receipts = [journal.append({"item": f"Pizza {i}"}) for i in range(10)]
+        self.assertTrue(receipts[-1].wait(5))
+        self.assertTrue(all(receipt.done for receipt in receipts))
+        records = list(JournalReader(self.dir).replay())
+        self.assertEqual([record.seq for record in records], list(range(1, 11)))
+        self.assertEqual(records[3].order, {"item": "Pizza 3"})
+        self.assertEqual([record.seq for record in JournalReader(self.dir).replay(since_seq=7)], [8, 9, 10])
+
+    def test_concurrent_appends_are_group_committed(self):
+        journal = self._open(fsync="always")
+
+        def worker(i):
+            for j in range(100):
+                journal.append({"worker": i, "n": j})
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(journal.flush(5))
+        self.assertEqual(len(list(JournalReader(self.dir).replay())), 800)
+        self.assertLess(journal.stats()["commits"], 800)
+
+    def test_rotation_and_restart(self):
+        journal = self._open(segment_bytes=200)
+        for i in range(20):
+            journal.append({"item": f"Fries {i}"}).wait(5)
+        journal.close()
+        rotated = len(segment_paths(self.dir))
+        self.assertGreater(rotated, 1)
+
+        journal = self._open()
+        self.assertEqual(journal.append({"item": "Acai Bowl"}).seq, 21) # Continues the sequence
+        journal.flush(5)
+        self.assertEqual(len(segment_paths(self.dir)), rotated + 1) # Never appends to an old segment
+        self.assertEqual([record.seq for record in JournalReader(self.dir).replay(since_seq=18)], [19, 20, 21])
+
+    def test_torn_tail_is_skipped(self):
+        journal = self._open()
+        for i in range(3):
+            journal.append({"item": i}).wait(5)
+        journal.close()
+        with open(segment_paths(self.dir)[-1], "ab") as f:
+            f.write(b'0badc0de [4,1.0,{"it') # A crash in the middle of a write
+        self.assertEqual([record.seq for record in JournalReader(self.dir).replay()], [1, 2, 3])
+        self.assertEqual(self._open().append({"item": 4}).seq, 4)
+
+    def test_acknowledged_orders_survive_a_crash(self):
+        code = (
+            "import os, sys\n"
+            "from order_journal import OrderJournal\n"
+            f"journal = OrderJournal({self.dir!r}, fsync='off')\n"
+            "receipts = [journal.append({'item': i}) for i in range(500)]\n"
+            "acked = sum(1 for r in receipts if r.wait(5))\n"
+            "print(acked, flush=True)\n"
+            "os._exit(1)\n" # No close, no flush of anything still pending
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        acked = int(result.stdout.split()[-1])
+        self.assertEqual(acked, 500)
+        self.assertEqual(len(list(JournalReader(self.dir).replay())), acked)
+
+    def test_follow_streams_new_orders(self):
+        journal = self._open(segment_bytes=300)
+        stop = threading.Event()
+        seen = []
+
+        def reader():
+            for record in JournalReader(self.dir).follow(poll_interval=0.01, stop=stop):
+                seen.append(record.seq)
+                if len(seen) == 30:
+                    stop.set()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for i in range(30):
+            journal.append({"item": i})
+        journal.flush(5)
+        thread.join(5)
+        stop.set()
+        self.assertEqual(seen, list(range(1, 31)))
+
+    def test_unknown_fsync_mode(self):
+        with self.assertRaises(ValueError):
+            OrderJournal(self.dir, fsync="sometimes")
+
+    def test_one_writer_per_directory(self):
+        journal = self._open()
+        with self.assertRaises(JournalError):
+            OrderJournal(self.dir)
+        journal.close()
+        self.assertEqual(self._open().append({"item": 1}).seq, 1)
+
+    def test_failed_interval_sync_keeps_the_writer_running(self):
+        def failing_sync(fd):
+            raise OSError(5, "Input/output error")
+
+        original, order_journal._fdatasync = order_journal._fdatasync, failing_sync
+        try:
+            journal = self._open(fsync="interval", fsync_interval=0.01)
+            journal.append({"item": 1}).wait(5)
+            deadline = time.monotonic() + 5
+            while journal.failures == 0 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self.assertGreater(journal.failures, 0)
+        finally:
+            order_journal._fdatasync = original
+        self.assertTrue(journal.append({"item": 2}).wait(5))
+        self.assertTrue(journal._writer.is_alive())
+
+
+class TestConfirmedOrdersAreJournaled(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.journal = OrderJournal(self.dir)
+        self.app_journal, app.journal = app.journal, self.journal
+
+    def tearDown(self):
+        app.journal = self.app_journal
+        self.journal.close()
+        shutil.rmtree(self.dir)
+
+    def test_place_order_journals_confirmation(self):
+        session = "test-journal"
+        for query in ["", "N 1 2 3 4 5 6 7 8", "A1A", "0501234567", "no nuts"]:
+            reply = app.place_order(query=query, item="margherita", session_id=session)
+        self.assertTrue(reply.startswith("✅ Order confirmed"))
+        records = list(JournalReader(self.dir).replay())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].order["session_id"], session)
+        self.assertEqual(records[0].order["items"], [["margherita", 1]])
+        self.assertEqual(records[0].order["phone"], "0501234567")
+
+    def test_unsaved_order_is_not_confirmed(self):
+        self.journal.close() # Appends now fail
+        session = "test-journal-closed"
+        for query in ["", "N 1 2 3 4 5 6 7 8", "A1A", "0501234567", "no nuts"]:
+            reply = app.place_order(query=query, item="margherita", session_id=session)
+        self.assertTrue(reply.startswith("⚠️"))
+        self.assertIsNotNone(app.orders.get(session)) # Kept, so the caller can confirm again
+        app.orders.delete(session)
+
+    def test_journal_wait_does_not_hold_the_session(self):
+        receipts = []
+
+        class HeldJournal:
+            def append(self, order):
+                receipts.append(JournalReceipt(len(receipts) + 1))
+                return receipts[-1]
+
+        app.journal = HeldJournal()
+        session = "test-journal-held"
+        for query in ["", "N 1 2 3 4 5 6 7 8", "A1A", "0501234567"]:
+            app.place_order(query=query, item="margherita", session_id=session)
+        replies = []
+        thread = threading.Thread(target=lambda: replies.append(app.place_order(query="no nuts", item="margherita", session_id=session)))
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not receipts and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+        start = time.monotonic()
+        duplicate = app.place_order(query="no nuts", item="margherita", session_id=session) # Same session, while waiting
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertTrue(duplicate.startswith("⏳"))
+        self.assertEqual(len(receipts), 1) # Journaled once
+
+        receipts[0]._complete()
+        thread.join(5)
+        self.assertTrue(replies[0].startswith("✅ Order confirmed"))
+        self.assertIsNone(app.orders.get(session))
+
+
+if __name__ == "__main__":
+    unittest.main()
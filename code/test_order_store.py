@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import app
+from order_store import MemoryOrderStore, OrderRecord, OrderStore, SQLiteOrderStore, create_order_store
+
+
+def _add_item(name):
+    def fn(order):
+        return order._replace(items=order.items + ((name, 1),)), f"{len(order.items) + 1} items"
+    return fn
+
+
+class _OrderStoreTests:
+    """Behavior shared by every backend. Subclasses set `self.store`."""
+
+    def test_sessions_are_isolated(self):
+        self.assertEqual(self.store.update("a", _add_item("Margherita")), "1 items")
+        self.assertEqual(self.store.update("a", _add_item("Fries")), "2 items")
+        self.assertEqual(self.store.update("b", _add_item("Acai Bowl")), "1 items")
+        self.assertEqual(self.store.get("a").items, (("Margherita", 1), ("Fries", 1)))
+        self.assertEqual(self.store.get("b").items, (("Acai Bowl", 1),))
+        self.assertEqual(len(self.store), 2)
+
+    def test_returning_none_ends_the_session(self):
+        self.store.update("a", _add_item("Margherita"))
+        self.assertEqual(self.store.update("a", lambda order: (None, "done")), "done")
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(self.store.update("a", lambda order: (order, str(order))), str(OrderRecord()))
+
+    def test_expired_sessions_are_evicted(self):
+        self.store.ttl = 0.05
+        self.store.update("a", _add_item("Margherita"))
+        time.sleep(0.1)
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(self.store.update("b", _add_item("Fries")), "1 items")
+        self.assertEqual(self.store.evict_expired(), 1)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.stats()["evictions"], 1)
+
+    def test_concurrent_updates_of_one_session_are_atomic(self):
+        def worker(i):
+            for j in range(25):
+                self.store.update("shared", _add_item(f"{i}-{j}"))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.store.get("shared").items), 200)
+
+    def test_failed_update_keeps_previous_record(self):
+        self.store.update("a", _add_item("Margherita"))
+
+        def fail(order):
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.store.update("a", fail)
+        self.assertEqual(self.store.get("a").items, (("Margherita", 1),))
+
+
+class TestMemoryOrderStore(_OrderStoreTests, unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryOrderStore()
+
+
+class TestSQLiteOrderStore(_OrderStoreTests, unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "orders.sqlite3")
+        self.store = SQLiteOrderStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def test_stores_share_the_database(self):
+        other = SQLiteOrderStore(self.path) # As a second worker process would
+        try:
+            self.store.update("a", _add_item("Margherita"))
+            self.assertEqual(other.update("a", _add_item("Fries")), "2 items")
+            self.assertEqual(self.store.get("a").items, (("Margherita", 1), ("Fries", 1)))
+        finally:
+            other.close()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_order_store("redis")
+
+    def test_incomplete_backend_fails_on_construction(self):
+        class GetOnly(OrderStore):
+            def get(self, session_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnly()
+
+
+class TestDispatchSessions(unittest.TestCase):
+
+    def test_place_order_per_session(self):
+        first, second = "test-session-1", "test-session-2"
+        app.dispatch('CALL place_order(item="margherita")', first)
+        app.dispatch('CALL place_order(item="margherita", query="N 1 2 3 4 5 6 7 8")', first)
+        # Another session starts from scratch instead of continuing the first order
+        self.assertTrue(app.dispatch('CALL place_order(item="margherita")', second).startswith("📎"))
+        self.assertEqual(app.orders.get(first).nyu_id, "N12345678")
+        self.assertIsNone(app.orders.get(second).nyu_id)
+        app.orders.delete(first)
+        app.orders.delete(second)
+
+    def test_session_id_is_not_taken_from_the_call(self):
+        reply = app.dispatch('CALL place_order(item="margherita", session_id="victim")', "test-session-3")
+        self.assertTrue(reply.startswith("📎"))
+        self.assertIsNone(app.orders.get("victim"))
+        self.assertIsNotNone(app.orders.get("test-session-3"))
+        app.orders.delete("test-session-3")
+
+
+if __name__ == "__main__":
+    unittest.main()
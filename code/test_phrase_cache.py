@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from phrase_cache import PhraseAudioCache, phrase_cache_key, DISK_CHUNK_BYTES
+
+
+class TestPhraseCacheKey(unittest.TestCase):
+
+    def test_key_covers_engine_voice_speed_and_text(self):
+        base = phrase_cache_key("kokoro", "af_heart", 1.26, "Please provide your phone number.")
+        self.assertEqual(base, phrase_cache_key("kokoro", "af_heart", 1.26, "  Please provide  your phone number. "))
+        self.assertNotEqual(base, phrase_cache_key("coqui", "af_heart", 1.26, "Please provide your phone number."))
+        self.assertNotEqual(base, phrase_cache_key("kokoro", "af_bella", 1.26, "Please provide your phone number."))
+        self.assertNotEqual(base, phrase_cache_key("kokoro", "af_heart", 1.0, "Please provide your phone number."))
+        self.assertNotEqual(base, phrase_cache_key("kokoro", "af_heart", 1.26, "Please provide your phone number?"))
+
+
+class TestPhraseAudioCache(unittest.TestCase):
+
+    def test_roundtrip_keeps_chunks(self):
+        cache = PhraseAudioCache()
+        cache.put("k", [b"\x01\x00" * 10, b"\x02\x00" * 5])
+        self.assertEqual(cache.get("k"), [b"\x01\x00" * 10, b"\x02\x00" * 5])
+        self.assertIsNone(cache.get("missing"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, 30))
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = PhraseAudioCache(max_bytes=100)
+        cache.put("a", [b"a" * 40])
+        cache.put("b", [b"b" * 40])
+        cache.get("a")
+        cache.put("c", [b"c" * 40])
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertLessEqual(cache.stats()["bytes"], 100)
+        self.assertFalse(cache.put("huge", [b"x" * 200]))
+
+    def test_disk_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pcm = bytes(range(256)) * 40
+            PhraseAudioCache(disk_dir=tmp).put("abcd", [pcm])
+            cache = PhraseAudioCache(disk_dir=tmp)
+            chunks = cache.get("abcd")
+            self.assertEqual(b"".join(chunks), pcm)
+            self.assertTrue(all(len(c) <= DISK_CHUNK_BYTES for c in chunks))
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            self.assertFalse([f for _, _, files in os.walk(tmp) for f in files if f.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from phrase_cache import PhraseAudioCache
+from presynthesis import PreSynthesizer, build_catalogue, fixed_prompts, menu_vocabulary, quick_answer_text
+
+try:
+    from model_pool import ModelLease, ModelPool
+    MODEL_POOL_AVAILABLE = True
+except ImportError: # Speech input/output dependencies not installed
+    MODEL_POOL_AVAILABLE = False
+
+APP_SOURCE = '''
+def ask_phone():
+    return "📱 Please provide your phone number."
+
+def ask_building(order):
+    return order, "🏢 Please mention your building number."
+
+def price(item, value):
+    if not item:
+        return "❌ Sorry, I couldn’t understand the item."
+    return f"💵 {item} costs {value:.2f} dirhams."
+'''
+
+MENU_SOURCE = '''{"Pizza": {"Vegetarian": {"Margherita": 31.0}}, "Acai Bowls": {"OG Bowl": "Banana, Granola"}, "Sauces": ["Ranch"]}'''
+
+
+class TestCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app_path = os.path.join(self.tmp.name, "app.py")
+        self.menu_path = os.path.join(self.tmp.name, "menu.json")
+        with open(self.app_path, "w", encoding="utf-8") as f:
+            f.write(APP_SOURCE)
+        with open(self.menu_path, "w", encoding="utf-8") as f:
+            f.write(MENU_SOURCE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fixed_prompts_skip_formatted_replies(self):
+        self.assertEqual(fixed_prompts(self.app_path), [
+            "📱 Please provide your phone number.",
+            "🏢 Please mention your building number.",
+            "❌ Sorry, I couldn’t understand the item.",
+        ])
+
+    def test_menu_vocabulary_skips_descriptions(self):
+        self.assertEqual(menu_vocabulary(self.menu_path),
+                         ["Pizza", "Vegetarian", "Margherita", "Acai Bowls", "OG Bowl", "Sauces", "Ranch"])
+
+    def test_catalogue_uses_the_text_the_pipeline_synthesizes(self):
+        catalogue = build_catalogue(self.app_path, self.menu_path, greeting="Hi there, welcome to the NYU food line. What would you like?")
+        self.assertEqual(catalogue[0], "Hi there, welcome to the NYU food line.")
+        self.assertIn("❌ Sorry, I couldn't understand the item.", catalogue) # Curly quote preprocessed
+        self.assertIn("Margherita", catalogue)
+        self.assertEqual(len(catalogue), len(set(catalogue)))
+
+    def test_quick_answer_without_boundary_is_whole_text(self):
+        self.assertEqual(quick_answer_text("Pizza"), "Pizza")
+
+
+class _Audio:
+    """Engine stand-in: 'synthesizes' by storing the text bytes in the phrase cache."""
+    def __init__(self, cache):
+        self.cache = cache
+        self.on_first_audio_chunk_synthesize = None
+        self.synthesized = []
+
+    def phrase_key(self, text):
+        return "key:" + text
+
+    def synthesize(self, text, audio_chunks, stop_event, generation_string=""):
+        if stop_event.is_set():
+            return False
+        self.synthesized.append(text)
+        self.cache.put(self.phrase_key(text), [text.encode()])
+        return True
+
+
+class _SlowAudio(_Audio):
+    """Takes `seconds` per phrase and stops early when the stop event is set, like a real engine."""
+    def __init__(self, cache, seconds):
+        super().__init__(cache)
+        self.seconds = seconds
+
+    def synthesize(self, text, audio_chunks, stop_event, generation_string=""):
+        if stop_event.wait(self.seconds):
+            return False
+        return super().synthesize(text, audio_chunks, stop_event, generation_string)
+
+
+class _Lease:
+    def __init__(self, audio):
+        self.audio_processor = audio
+
+
+class _Pool:
+    """Pool stand-in with the background slot interface of ModelPool."""
+    def __init__(self):
+        self.phrase_cache = PhraseAudioCache()
+        self.background_preempt = threading.Event()
+        self.busy = False
+        self.lease = _Lease(_Audio(self.phrase_cache))
+
+    def acquire_background(self):
+        if self.busy:
+            return None
+        self.background_preempt.clear()
+        return self.lease
+
+    def release_background(self, lease):
+        pass
+
+
+class TestPreSynthesizer(unittest.TestCase):
+
+    def wait_for(self, presynthesizer, state):
+        deadline = time.monotonic() + 2.0
+        while presynthesizer.state != state and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(presynthesizer.state, state)
+
+    def test_fills_cache_and_skips_cached_phrases(self):
+        pool = _Pool()
+        pool.phrase_cache.put("key:b", [b"b"])
+        presynthesizer = PreSynthesizer(pool, ["a", "b", "c"], start_delay=0.0)
+        presynthesizer.start()
+        self.wait_for(presynthesizer, "finished")
+        self.assertEqual(pool.lease.audio_processor.synthesized, ["a", "c"])
+        status = presynthesizer.status()
+        self.assertEqual((status["synthesized"], status["skipped"]), (2, 1))
+        self.assertEqual(status["coverage"], 1.0)
+
+    def test_waits_while_sessions_are_active(self):
+        pool = _Pool()
+        pool.busy = True
+        presynthesizer = PreSynthesizer(pool, ["a"], start_delay=0.0, idle_poll=0.01)
+        presynthesizer.start()
+        self.wait_for(presynthesizer, "paused")
+        self.assertEqual(pool.lease.audio_processor.synthesized, [])
+        pool.busy = False
+        self.wait_for(presynthesizer, "finished")
+        self.assertEqual(pool.lease.audio_processor.synthesized, ["a"])
+
+
+@unittest.skipUnless(MODEL_POOL_AVAILABLE, "model_pool dependencies are not installed")
+class TestModelPoolPreemption(unittest.TestCase):
+
+    def test_session_is_not_starved_by_presynthesis(self):
+        pool = ModelPool.__new__(ModelPool) # Slot bookkeeping only, no models loaded
+        pool._init_slots(1)
+        pool.phrase_cache = PhraseAudioCache()
+        audio = _SlowAudio(pool.phrase_cache, 0.2)
+        pool._add_slot(ModelLease(0, audio, None))
+        presynthesizer = PreSynthesizer(pool, [f"phrase {index}" for index in range(100)], start_delay=0.0, idle_poll=0.01)
+        presynthesizer.start()
+        self.addCleanup(presynthesizer.stop)
+        deadline = time.monotonic() + 2.0
+        while len(audio.synthesized) < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+        start = time.monotonic()
+        lease = pool.acquire(timeout=5)
+        self.assertIsNotNone(lease)
+        self.assertLess(time.monotonic() - start, 0.5) # Preempted the phrase in progress, not starved
+        self.assertIsNone(pool.acquire_background())
+        pool.release(lease)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from resampler import PCM16Resampler, StreamingResampler
+from upsample_overlap import UpsampleOverlap
+
+
+def _stream(resampler, signal, sizes):
+    parts, pos = [], 0
+    for size in sizes:
+        if pos >= len(signal):
+            break
+        parts.append(resampler.process(signal[pos:pos + size]).copy())
+        pos += size
+    parts.append(resampler.process(signal[pos:]).copy())
+    parts.append(resampler.flush())
+    return np.concatenate(parts)
+
+
+class TestStreamingResampler(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1234)
+        self.signal = (rng.standard_normal(4801) * 8000).astype(np.int16)
+        self.sizes = rng.integers(1, 600, size=200)
+
+    def test_chunking_is_bit_exact(self):
+        for up, down in ((2, 1), (1, 3)):
+            whole = _stream(StreamingResampler(up, down), self.signal, [])
+            chunked = _stream(StreamingResampler(up, down), self.signal, self.sizes)
+            self.assertTrue(np.array_equal(whole, chunked), f"{up}/{down}")
+
+    def test_matches_resample_poly(self):
+        for up, down in ((2, 1), (1, 3)):
+            ours = _stream(StreamingResampler(up, down), self.signal, self.sizes)
+            reference = resample_poly(self.signal.astype(np.float64), up, down)
+            self.assertEqual(len(ours), len(reference))
+            np.testing.assert_allclose(ours, reference, atol=0.05)
+
+    def test_output_length_tracks_input(self):
+        resampler = StreamingResampler(1, 3)
+        produced = sum(len(resampler.process(np.zeros(960, dtype=np.int16))) for _ in range(10))
+        produced += len(resampler.flush())
+        self.assertEqual(produced, 3200)
+
+    def test_reset_starts_new_stream(self):
+        resampler = StreamingResampler(2, 1)
+        first = resampler.process(self.signal).copy()
+        resampler.process(self.signal[::-1])
+        resampler.reset()
+        self.assertTrue(np.array_equal(resampler.process(self.signal), first))
+
+
+class TestPCM16Resampler(unittest.TestCase):
+
+    def test_matches_float_stream_clipped(self):
+        loud = (np.sin(np.linspace(0, 90, 6144)) * 32767).astype(np.int16)
+        pcm = PCM16Resampler(1, 3)
+        reference = StreamingResampler(1, 3)
+        for pos in range(0, len(loud), 2048):
+            frame = loud[pos:pos + 2048]
+            expected = np.clip(reference.process(frame), -32768, 32767).astype(np.int16)
+            self.assertTrue(np.array_equal(pcm.process(frame.tobytes()), expected))
+
+    def test_ring_keeps_recent_frames_intact(self):
+        pcm = PCM16Resampler(1, 3, ring_slots=3)
+        frames = [np.full(2048, value, dtype=np.int16) for value in (1000, -1000, 3000)]
+        outputs = [pcm.process(frame) for frame in frames]
+        copies = [out.copy() for out in outputs]
+        pcm.process(frames[0])
+        for out, copy in zip(outputs[1:], copies[1:]):
+            self.assertTrue(np.array_equal(out, copy))
+
+
+class TestUpsampleOverlapStream(unittest.TestCase):
+
+    def test_stream_is_twice_input_length(self):
+        upsampler = UpsampleOverlap()
+        chunk = (np.sin(np.linspace(0, 40, 960)) * 12000).astype(np.int16).tobytes()
+        total = sum(len(upsampler.get_pcm_chunk(chunk)) for _ in range(5))
+        total += len(upsampler.flush_pcm_chunk())
+        self.assertEqual(total, 5 * len(chunk) * 2)
+        self.assertIsNone(upsampler.flush_base64_chunk())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+try:
+    import torch
+    import transformers
+    from sentence_classifier import ONNXRUNTIME_AVAILABLE, SentenceClassifier, VALIDATION_SENTENCES
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = ONNXRUNTIME_AVAILABLE = False
+ONNX_AVAILABLE = TORCH_AVAILABLE and ONNXRUNTIME_AVAILABLE and importlib.util.find_spec("onnx") is not None
+
+MODEL_DIR = None
+
+
+def build_model(path):
+    """Saves a small DistilBERT classifier with random weights and a word-level vocabulary to `path`."""
+    text = " ".join(VALIDATION_SENTENCES + ["This is a warmup sentence.", "And a second, slightly longer warmup sentence"])
+    words = set(text.lower().replace("...", " . ").split())
+    words |= {word.strip(".,?!'") for word in words} | set(".,?!'")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(words - {""})
+    with open(os.path.join(path, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+    transformers.DistilBertTokenizerFast(vocab_file=os.path.join(path, "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    config = transformers.DistilBertConfig(vocab_size=len(vocab), dim=64, hidden_dim=128, n_layers=2, n_heads=2)
+    transformers.DistilBertForSequenceClassification(config).save_pretrained(path)
+
+
+def setUpModule():
+    global MODEL_DIR
+    if TORCH_AVAILABLE:
+        MODEL_DIR = tempfile.mkdtemp()
+        build_model(MODEL_DIR)
+
+
+def tearDownModule():
+    if MODEL_DIR:
+        shutil.rmtree(MODEL_DIR, ignore_errors=True)
+
+
+class StubInfer:
+    """Records the batches it is called with; blocks while `gate` is cleared."""
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, sentences):
+        self.entered.set()
+        self.gate.wait(5)
+        self.batches.append(list(sentences))
+        if self.error:
+            raise self.error
+        return [len(sentence) / 100 for sentence in sentences]
+
+
+@unittest.skipUnless(TORCH_AVAILABLE, "torch and transformers are not installed")
+class TestBatching(unittest.TestCase):
+
+    def make(self, **kwargs):
+        classifier = SentenceClassifier(model_dir=MODEL_DIR, **kwargs)
+        self.addCleanup(classifier.shutdown)
+        classifier._infer = self.infer = StubInfer()
+        return classifier
+
+    def predict_in_threads(self, classifier, sentences):
+        """Starts one predict per sentence; returns the result list and the threads."""
+        results = [None] * len(sentences)
+
+        def run(index, sentence):
+            try:
+                results[index] = classifier.predict(sentence, timeout=5)
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=run, args=item) for item in enumerate(sentences)]
+        for thread in threads:
+            thread.start()
+        return results, threads
+
+    def wait_queued(self, classifier, count):
+        deadline = time.monotonic() + 5
+        while classifier._requests.qsize() < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(classifier._requests.qsize(), count)
+
+    def hold_worker(self, classifier):
+        """Blocks the worker inside the forward pass of a first request ("first")."""
+        self.infer.gate.clear()
+        self.infer.entered.clear()
+        self.first = self.predict_in_threads(classifier, ["first"])
+        self.assertTrue(self.infer.entered.wait(5))
+
+    def wait(self, threads):
+        self.infer.gate.set()
+        for thread in threads + self.first[1]:
+            thread.join(5)
+
+    def test_coalesces_within_window(self):
+        classifier = self.make(batch_window=0.3)
+        self.hold_worker(classifier) # Two callers active at once (threads that ran one after the other may share an ident)
+        results, threads = self.predict_in_threads(classifier, ["warm"])
+        self.wait_queued(classifier, 1)
+        self.wait(threads)
+        results, threads = self.predict_in_threads(classifier, ["a"])
+        time.sleep(0.05)
+        late, late_threads = self.predict_in_threads(classifier, ["bb"])
+        for thread in threads + late_threads:
+            thread.join(5)
+        self.assertEqual(self.infer.batches[-1], ["a", "bb"])
+        self.assertEqual(results + late, [0.01, 0.02])
+
+    def test_identical_sentences_run_once(self):
+        classifier = self.make()
+        sentences = ["same", "same", "other", "same"]
+        self.hold_worker(classifier)
+        results, threads = self.predict_in_threads(classifier, sentences)
+        self.wait_queued(classifier, len(sentences))
+        self.wait(threads)
+        self.assertEqual(sorted(self.infer.batches[-1]), ["other", "same"])
+        self.assertEqual(results, [0.04, 0.04, 0.05, 0.04])
+
+    def test_batch_size_cap(self):
+        classifier = self.make(max_batch_size=4)
+        self.hold_worker(classifier)
+        sentences = [f"sentence {index}" for index in range(10)]
+        results, threads = self.predict_in_threads(classifier, sentences)
+        self.wait_queued(classifier, len(sentences))
+        self.wait(threads)
+        self.assertEqual([len(batch) for batch in self.infer.batches[1:]], [4, 4, 2])
+        self.assertEqual(results, [len(sentence) / 100 for sentence in sentences])
+
+    def test_single_caller_skips_window(self):
+        classifier = self.make(batch_window=1.0)
+        start = time.monotonic()
+        self.assertEqual(classifier.predict("alone", timeout=5), 0.05)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_error_reaches_every_caller(self):
+        classifier = self.make()
+        self.hold_worker(classifier)
+        self.infer.error = RuntimeError("inference failed")
+        results, threads = self.predict_in_threads(classifier, ["a", "b", "a"])
+        self.wait_queued(classifier, 3)
+        self.wait(threads)
+        for result in results + self.first[0]:
+            self.assertIsInstance(result, RuntimeError)
+        self.infer.error = None
+        self.assertEqual(classifier.predict("after", timeout=5), 0.05) # The worker survived
+
+    def test_requests_racing_shutdown_are_answered(self):
+        classifier = self.make()
+        self.hold_worker(classifier)
+        classifier._shutdown = True # As in shutdown(), with a predict() that passed its check just before
+        classifier._requests.put(None)
+        late = Future()
+        classifier._requests.put(("late", late))
+        self.infer.gate.set()
+        classifier._worker.join(5)
+        self.assertFalse(classifier._worker.is_alive())
+        self.assertEqual(late.result(timeout=0), 0.04)
+        self.first[1][0].join(5)
+        self.assertEqual(self.first[0], [0.05])
+
+
+@unittest.skipUnless(TORCH_AVAILABLE, "torch and transformers are not installed")
+class TestBackends(unittest.TestCase):
+
+    def build(self, backend, **kwargs):
+        """Builds a classifier and checks the backend in use against full precision."""
+        classifier = SentenceClassifier(model_dir=MODEL_DIR, backend=backend, **kwargs)
+        self.addCleanup(classifier.shutdown)
+        reference = classifier._infer_torch(VALIDATION_SENTENCES)
+        for expected, actual in zip(reference, classifier.predict_batch(VALIDATION_SENTENCES)):
+            self.assertAlmostEqual(actual, expected, delta=0.03)
+        return classifier
+
+    def test_int8(self):
+        self.assertEqual(self.build("torch-int8").backend, "torch-int8")
+
+    def test_falls_back_when_out_of_tolerance(self):
+        self.assertEqual(self.build("torch-int8", validation_tolerance=-1.0).backend, "torch")
+
+    @unittest.skipUnless(ONNX_AVAILABLE, "onnx and onnxruntime are not installed")
+    def test_onnx_export_is_cached(self):
+        path = os.path.join(MODEL_DIR, "cache", "sentence_classifier.onnx")
+        self.assertEqual(self.build("onnx", onnx_path=path).backend, "onnx")
+        exported = os.stat(path).st_mtime_ns
+        self.assertEqual(self.build("onnx", onnx_path=path).backend, "onnx")
+        self.assertEqual(os.stat(path).st_mtime_ns, exported) # Loaded, not exported again
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
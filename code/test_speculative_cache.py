@@ -0,0 +1,51 @@
+import time
+import unittest
+
+from speculative_cache import SpeculativeAnswer, SpeculativeAnswerCache
+
+
+class TestSpeculativeAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SpeculativeAnswerCache(max_entries=2, ttl=10.0)
+
+    def test_hit_uses_text_similarity_normalization(self):
+        self.cache.store("One pizza, please.", SpeculativeAnswer("✅ ok", response_ms=120.0))
+        entry = self.cache.lookup("one   PIZZA please")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.response, "✅ ok")
+        self.assertIsNone(self.cache.lookup("two pizzas please"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+        self.assertAlmostEqual(stats["saved_ms"], 120.0)
+
+    def test_saved_ms_counts_time_to_first_audio_when_audio_is_complete(self):
+        self.cache.store("hello", SpeculativeAnswer("hi", audio_chunks=[b"\x00\x01"], response_ms=100.0, first_audio_ms=450.0))
+        self.assertTrue(self.cache.lookup("hello").has_audio)
+        self.assertAlmostEqual(self.cache.stats()["saved_ms"], 450.0)
+
+    def test_text_only_entry_does_not_replace_audio_entry(self):
+        self.cache.store("hello", SpeculativeAnswer("hi", audio_chunks=[b"\x00\x01"], first_audio_ms=300.0))
+        self.cache.store("hello", SpeculativeAnswer("hi"))
+        self.assertTrue(self.cache.lookup("hello").has_audio)
+
+    def test_bounded_and_ttl(self):
+        for text in ("a", "b", "c"):
+            self.cache.store(text, SpeculativeAnswer(text))
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.lookup("a"))
+
+        cache = SpeculativeAnswerCache(ttl=0.01)
+        cache.store("a", SpeculativeAnswer("a"))
+        time.sleep(0.02)
+        self.assertIsNone(cache.lookup("a"))
+
+    def test_invalidate(self):
+        self.cache.store("a", SpeculativeAnswer("a"))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.lookup("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
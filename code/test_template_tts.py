@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from phrase_cache import PhraseAudioCache
+from presynthesis import build_catalogue
+from template_tts import (
+    CLAUSE_PAUSE_MS,
+    SAMPLE_RATE,
+    TemplateSynthesizer,
+    crossfade_concat,
+    fragment_text,
+    load_templates,
+)
+
+
+def _key(text):
+    return f"kokoro|af_heart|{text}"
+
+
+def _tone(seconds, value=1000):
+    return np.full(int(seconds * SAMPLE_RATE), value, dtype=np.int16)
+
+
+class TestTemplateTTS(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PhraseAudioCache()
+        self.synth = TemplateSynthesizer(load_templates(), self.cache, _key)
+
+    def _fill(self, texts):
+        for text in texts:
+            self.cache.put(_key(text), [_tone(0.2).tobytes()])
+
+    def test_detects_registered_reply_formats(self):
+        functions = {t.function for t in self.synth.templates}
+        self.assertIn("get_price", functions)
+        self.assertIn("check_availability", functions)
+        self.assertIn("place_order", functions) # Reply of its (record, reply) order update
+        template, values = self.synth.match("💵 Margherita costs 31.00 dirhams.")
+        self.assertEqual(template.function, "get_price")
+        self.assertEqual(values, ["Margherita", "31.00"])
+
+    def test_fragment_text_turns_punctuation_into_pause(self):
+        self.assertEqual(fragment_text(" costs "), ("costs", 0.0))
+        self.assertEqual(fragment_text(", Yes"), ("Yes", CLAUSE_PAUSE_MS))
+        self.assertEqual(fragment_text(" dirhams."), ("dirhams.", 0.0))
+
+    def test_crossfade_overlaps_junctions(self):
+        a, b = _tone(0.1, 1000), _tone(0.1, 3000)
+        joined = crossfade_concat([a, b], 120)
+        self.assertEqual(joined.size, a.size + b.size - 120)
+        self.assertTrue(np.all(np.diff(joined.astype(np.int32)) >= 0)) # Monotonic ramp, no click
+
+    def test_missing_fragment_falls_back(self):
+        self.assertIsNone(self.synth.render("💵 Margherita costs 31.00 dirhams."))
+        self.assertEqual(self.synth.stats()["fallbacks"], 1)
+        self.assertIsNone(self.synth.render("Something that is not a template."))
+        self.assertEqual(self.synth.stats()["fallbacks"], 1)
+
+    def test_renders_from_cached_fragments(self):
+        self._fill(["Margherita", "costs", "31.00", "dirhams."])
+        chunks = self.synth.render("💵 Margherita costs 31.00 dirhams.")
+        self.assertIsNotNone(chunks)
+        samples = sum(len(c) for c in chunks) // 2
+        self.assertEqual(samples, 4 * int(0.2 * SAMPLE_RATE) - 3 * self.synth.fade_samples)
+        self.assertEqual(self.synth.stats()["rendered"], 1)
+
+    def test_catalogue_covers_fragments_verbatim(self):
+        fragments = self.synth.fragment_catalogue()
+        self.assertIn("31.00", fragments)
+        catalogue = build_catalogue(fragments=fragments)
+        for text in fragments:
+            self.assertIn(text, catalogue)
+
+
+if __name__ == "__main__":
+    unittest.main()
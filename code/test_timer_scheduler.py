@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+
+from timer_scheduler import TimerScheduler
+
+
+class TestTimerScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = TimerScheduler(name="TestTimerScheduler")
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_fires_in_deadline_order(self):
+        fired = []
+        done = threading.Event()
+        self.scheduler.schedule(0.06, lambda: (fired.append("late"), done.set()))
+        self.scheduler.schedule(0.02, fired.append, "early")
+        self.scheduler.schedule(0.04, fired.append, "middle")
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(fired, ["early", "middle", "late"])
+
+    def test_cancelled_timer_does_not_fire(self):
+        fired = []
+        done = threading.Event()
+        handle = self.scheduler.schedule(0.02, fired.append, "cancelled")
+        self.scheduler.schedule(0.05, done.set)
+        self.scheduler.cancel(handle)
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(fired, [])
+        self.assertEqual(self.scheduler.pending, 0)
+
+    def test_sooner_timer_preempts_sleep(self):
+        fired_at = []
+        done = threading.Event()
+        self.scheduler.schedule(5.0, fired_at.append, "far")
+        start = time.monotonic()
+        self.scheduler.schedule(0.03, lambda: (fired_at.append(time.monotonic() - start), done.set()))
+        self.assertTrue(done.wait(2.0))
+        self.assertLess(fired_at[0], 0.5)
+        self.assertGreaterEqual(fired_at[0], 0.03)
+
+    def test_failing_callback_does_not_stop_scheduler(self):
+        done = threading.Event()
+        with self.assertLogs("timer_scheduler", level="ERROR"):
+            self.scheduler.schedule(0.0, lambda: 1 / 0)
+            self.scheduler.schedule(0.01, done.set)
+            self.assertTrue(done.wait(2.0))
+
+    def test_schedule_after_shutdown_raises(self):
+        self.scheduler.shutdown()
+        with self.assertRaises(RuntimeError):
+            self.scheduler.schedule(0.01, lambda: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import ast
+import re
+import unittest
+
+from fastapi.testclient import TestClient
+
+import app
+from tool_call import StreamingToolCallParser, ToolCallError, parse_call, parse_json_call
+
+# --- Reference implementation: the regex + ast parser the tokenizer replaced ---
+
+def legacy_parse_function_call(llm_output):
+    match = re.match(r'CALL\s+(\w+)\((.*)\)', llm_output.strip(), re.DOTALL)
+    if not match:
+        raise ValueError(f"Invalid function call format: {llm_output}")
+    call = ast.parse(f"f({match.group(2)})", mode='eval').body
+    return match.group(1), {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+
+
+CALLS = [
+    'CALL get_price(item="pizza")',
+    "CALL get_price(item='Al Funghi')",
+    'CALL place_order(query="N 1 2 3 4 5 6 7 8", item="margherita", quantity=2)',
+    "  CALL   check_availability( item = 'acai bowl' , )  ",
+    'CALL clarify_category(category="pizzas")\n',
+    'CALL f(a=-1.5e3, b=[1, 2, (3,)], c={"x": None, "y": True}, d=(1), e=(), f=False)',
+    'CALL f(a="it\\\'s", b=\'say "hi"\', c="tab\\tnew\\nline \\x41 \\101 \\u00e9")',
+    "CALL f(a=r'\\d+', b='x' 'y' \"z\", c=u'u')",
+    'CALL f(a="""tri "ple" """, b=0.5, c=.5, d=1_000, e={1, 2}, f=1., g=+3)',
+    'CALL get_price(item="café")',
+    "CALL f(a='\\\\', b=\"\\\\\\\"\", c='\\'')",
+    "CALL f()",
+    "CALL f(1, 'positional', item=\"x\")",
+    "CALL f(\n  item='multi\\\nline',\n  q=3\n)",
+]
+
+INVALID = [
+    'get_price(item="x")',
+    "CALLget_price(item='x')",
+    "CALL get_price(item=pizza)",
+    "CALL f(a=1, a=2)",
+    'CALL f(a="x)',
+    "CALL f(a=1",
+    "CALL f(a=[1,)",
+    "CALL f(a={[1]: 2})",
+    "",
+]
+
+
+class TestParseCall(unittest.TestCase):
+
+    def test_parity_with_ast_parser(self):
+        for text in CALLS:
+            self.assertEqual(tuple(parse_call(text)), legacy_parse_function_call(text), repr(text))
+
+    def test_invalid_calls(self):
+        for text in INVALID:
+            with self.assertRaises(ToolCallError, msg=repr(text)):
+                parse_call(text)
+
+    def test_json_calls(self):
+        self.assertEqual(parse_json_call({"name": "get_price", "arguments": {"item": "pizza"}}),
+                         ("get_price", {"item": "pizza"}))
+        self.assertEqual(parse_json_call({"name": "get_price", "arguments": '{"item": "pizza"}'}),
+                         ("get_price", {"item": "pizza"}))
+        self.assertEqual(parse_json_call({"query": "CALL get_price(item='pizza')"}), ("get_price", {"item": "pizza"}))
+        for body in ({"name": 3}, {"name": "f", "arguments": [1]}, {"name": "f", "arguments": "{"}, [1], {}):
+            with self.assertRaises(ToolCallError, msg=repr(body)):
+                parse_json_call(body)
+
+
+class TestStreamingToolCallParser(unittest.TestCase):
+
+    def feed_all(self, tokens):
+        parser = StreamingToolCallParser()
+        calls = [call for call in map(parser.feed, tokens) if call is not None]
+        return parser, calls
+
+    def test_every_split_point(self):
+        for text in CALLS:
+            for cut in range(len(text) + 1):
+                _, calls = self.feed_all([text[:cut], text[cut:]])
+                self.assertEqual(calls, [parse_call(text)], (text, cut))
+
+    def test_dispatches_on_closing_parenthesis(self):
+        tokens = ["Sure", "! CA", "LL get_price(item=", '"a (b)', ' \\"c\\""', ")", "\n\nThis", " checks (x)"]
+        parser = StreamingToolCallParser()
+        for index, token in enumerate(tokens):
+            call = parser.feed(token)
+            if call is not None:
+                break
+        self.assertEqual(index, 5)
+        self.assertEqual(call, ("get_price", {"item": 'a (b) "c"'}))
+        self.assertEqual(parser.call_text, 'CALL get_price(item="a (b) \\"c\\"")')
+        self.assertIsNone(parser.feed("CALL f(a=1)"))
+
+    def test_incomplete_and_malformed(self):
+        parser, calls = self.feed_all(["I'm not sure", " what to call", ' CALL f(a="x)"'])
+        self.assertEqual(calls, [])
+        self.assertFalse(parser.complete)
+        parser = StreamingToolCallParser()
+        with self.assertRaises(ToolCallError):
+            parser.feed("CALL get_price(item=pizza)")
+        self.assertTrue(parser.complete)
+
+
+class TestMCPEndpoints(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app.app)
+
+    def test_legacy_and_json_bodies_agree(self):
+        legacy = self.client.post("/mcp", json={"query": 'CALL get_price(item="margherita")'}).json()
+        structured = self.client.post("/mcp", json={"name": "get_price", "arguments": {"item": "margherita"}}).json()
+        self.assertEqual(legacy, structured)
+        self.assertTrue(legacy["response"].startswith("💵"))
+
+    def test_errors_are_replies(self):
+        self.assertTrue(self.client.post("/mcp", json={"query": "hello"}).json()["response"].startswith("⚠️ MCP Error"))
+        self.assertEqual(self.client.post("/mcp", json={"name": "nope"}).json()["response"], "⚠️ Unknown function: nope")
+
+    def test_batch_runs_calls_in_order(self):
+        session = "test-batch"
+        response = self.client.post("/mcp/batch", json={"session_id": session, "calls": [
+            {"name": "check_availability", "arguments": {"item": "margherita"}},
+            'CALL place_order(item="margherita")',
+            {"name": "place_order", "arguments": {"item": "margherita", "query": "N 1 2 3 4 5 6 7 8"}},
+            {"name": "bogus"},
+        ]}).json()["responses"]
+        self.assertEqual(len(response), 4)
+        self.assertTrue(response[0].startswith("✅"))
+        self.assertTrue(response[1].startswith("📎"))
+        self.assertTrue(response[2].startswith("🏢"))
+        self.assertEqual(response[3], "⚠️ Unknown function: bogus")
+        self.assertEqual(app.orders.get(session).nyu_id, "N12345678")
+        app.orders.delete(session)
+
+    def test_batch_requires_a_list(self):
+        self.assertEqual(self.client.post("/mcp/batch", json={"calls": "CALL f()"}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
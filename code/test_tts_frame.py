@@ -0,0 +1,45 @@
+import base64
+import unittest
+
+import numpy as np
+
+from tts_frame import TTS_FRAME_HEADER, pack_tts_frame, unpack_tts_frame
+from upsample_overlap import UpsampleOverlap
+
+
+class TestTTSFrame(unittest.TestCase):
+
+    def test_round_trip(self):
+        pcm = np.arange(-5, 5, dtype=np.int16).tobytes()
+        frame = unpack_tts_frame(pack_tts_frame(7, 3, pcm, sample_rate=48000))
+        self.assertEqual((frame.generation_id, frame.sequence, frame.sample_rate), (7, 3, 48000))
+        self.assertEqual(frame.pcm, pcm)
+
+    def test_header_keeps_payload_int16_aligned(self):
+        self.assertEqual(TTS_FRAME_HEADER.size, 16)
+        frame = pack_tts_frame(1, 0, b"\x01\x00\x02\x00")
+        self.assertEqual(len(frame), 20)
+
+    def test_rejects_bad_frames(self):
+        with self.assertRaises(ValueError):
+            unpack_tts_frame(b"\x00" * 4)
+        with self.assertRaises(ValueError):
+            unpack_tts_frame(b"\x00\x02" + b"\x00" * 14)
+
+
+class TestUpsamplePcmChunk(unittest.TestCase):
+
+    def test_pcm_matches_base64_path(self):
+        audio = (np.sin(np.linspace(0, 60, 2400)) * 10000).astype(np.int16)
+        chunks = [audio[i:i + 480].tobytes() for i in range(0, len(audio), 480)]
+        pcm_up, b64_up = UpsampleOverlap(), UpsampleOverlap()
+        for chunk in chunks:
+            self.assertEqual(pcm_up.get_pcm_chunk(chunk), base64.b64decode(b64_up.get_base64_chunk(chunk)))
+
+    def test_empty_chunk(self):
+        self.assertEqual(UpsampleOverlap().get_pcm_chunk(b""), b"")
+        self.assertEqual(UpsampleOverlap().get_base64_chunk(b""), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
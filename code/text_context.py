@@ -4,6 +4,22 @@ from typing import Optional, Set, Tuple, Dict, Union # Added for type hinting
 logger = logging.getLogger(__name__)
 from colors import Colors # Assuming this is needed externally
 
+def preprocess_tts_text(text: str) -> str:
+    """
+    Replaces typographic characters with plain equivalents before TTS.
+
+    Em-dashes, curly quotes and ellipses are mapped to "-", straight quotes and
+    "..." to improve pronunciation. Used for every chunk the speech pipeline
+    synthesizes, so anything that pre-synthesizes the same text must apply it too.
+
+    Args:
+        text: The text to clean.
+
+    Returns:
+        The preprocessed text.
+    """
+    return text.replace("—", "-").replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'").replace("…", "...")
+
 class TextContext:
     """
     Extracts meaningful text segments (contexts) from a given string.
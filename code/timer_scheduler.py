@@ -0,0 +1,157 @@
+# timer_scheduler.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled callback. Returned by `TimerScheduler.schedule` and accepted by `cancel`."""
+    __slots__ = ("deadline", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, seq: int, callback: Callable[..., Any], args: tuple) -> None:
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other: "TimerHandle") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def cancel(self) -> None:
+        """Prevents the callback from running if it has not started yet."""
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """
+    Runs many one-shot timers on a single background thread.
+
+    Deadlines are kept in a heap ordered by `time.monotonic()`; the thread
+    sleeps on a condition variable until the earliest deadline (or until a
+    sooner timer is scheduled), so an idle scheduler uses no CPU no matter how
+    many timers are pending. Cancelled timers are simply skipped when they
+    reach the top of the heap.
+
+    Callbacks run on the scheduler thread, one after another, so they must be
+    short and must not block; exceptions are logged and do not stop the thread.
+    """
+    def __init__(self, name: str = "TimerScheduler") -> None:
+        """
+        Initializes the scheduler. The worker thread starts with the first timer.
+
+        Args:
+            name: Name of the worker thread (for logging and debugging).
+        """
+        self.name = name
+        self._heap: List[TimerHandle] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown = False
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        """
+        Runs `callback(*args)` once after `delay` seconds.
+
+        Args:
+            delay: Seconds from now. Zero or negative runs the callback as soon as possible.
+            callback: The function to call on the scheduler thread.
+            *args: Positional arguments for `callback`.
+
+        Returns:
+            A TimerHandle that can be passed to `cancel`.
+        """
+        return self.schedule_at(time.monotonic() + max(0.0, delay), callback, *args)
+
+    def schedule_at(self, deadline: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        """
+        Runs `callback(*args)` once at the given `time.monotonic()` deadline.
+
+        Args:
+            deadline: Absolute monotonic time in seconds.
+            callback: The function to call on the scheduler thread.
+            *args: Positional arguments for `callback`.
+
+        Returns:
+            A TimerHandle that can be passed to `cancel`.
+        """
+        handle = TimerHandle(deadline, next(self._counter), callback, args)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name} is shut down")
+            heapq.heappush(self._heap, handle)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            elif self._heap[0] is handle:
+                self._condition.notify() # New earliest deadline, wake the thread to re-sleep
+        return handle
+
+    def cancel(self, handle: Optional[TimerHandle]) -> None:
+        """
+        Cancels a pending timer. Cancelling an already fired or cancelled timer does nothing.
+
+        Args:
+            handle: The handle returned by `schedule`, or None.
+        """
+        if handle is not None:
+            handle.cancel()
+
+    @property
+    def pending(self) -> int:
+        """Number of timers in the heap that have not been cancelled."""
+        with self._condition:
+            return sum(1 for handle in self._heap if not handle.cancelled)
+
+    def _run(self) -> None:
+        """Worker loop: sleeps until the earliest deadline and runs due callbacks."""
+        while True:
+            with self._condition:
+                while not self._shutdown:
+                    while self._heap and self._heap[0].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    remaining = self._heap[0].deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._shutdown:
+                    return
+                handle = heapq.heappop(self._heap)
+
+            if handle.cancelled:
+                continue
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.exception(f"⏰💥 Timer callback {getattr(handle.callback, '__name__', handle.callback)} failed: {e}")
+
+    def shutdown(self) -> None:
+        """Stops the worker thread. Pending timers are discarded."""
+        with self._condition:
+            self._shutdown = True
+            self._heap.clear()
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+
+_default_scheduler: Optional[TimerScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> TimerScheduler:
+    """Returns the process-wide scheduler shared by all components (created on first use)."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = TimerScheduler()
+        return _default_scheduler
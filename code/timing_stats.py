@@ -0,0 +1,85 @@
+# timing_stats.py
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class TimingStats:
+    """
+    Thread-safe, allocation-free latency statistics for a hot path.
+
+    Keeps a running count, mean and maximum, an exponentially weighted moving
+    average for the recent trend, and the last `window` samples in a
+    preallocated array for percentiles. When the measured work processes media
+    (e.g. audio frames), the covered media duration can be recorded as well to
+    report a real-time factor (processing time / media time; below 1.0 means
+    faster than real time).
+    """
+    def __init__(self, window: int = 1024, ewma_alpha: float = 0.05) -> None:
+        """
+        Initializes empty statistics.
+
+        Args:
+            window: Number of most recent samples kept for percentiles.
+            ewma_alpha: Smoothing factor of the moving average (higher reacts faster).
+        """
+        self._lock = threading.Lock()
+        self._window = np.zeros(max(1, window), dtype=np.float64)
+        self._alpha = ewma_alpha
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears all recorded samples."""
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.ewma = 0.0
+            self.media_total = 0.0
+            self._pos = 0
+
+    def record(self, elapsed: float, media_duration: Optional[float] = None) -> None:
+        """
+        Adds one measurement.
+
+        Args:
+            elapsed: Processing time in seconds.
+            media_duration: Seconds of media covered by this measurement, if any.
+        """
+        with self._lock:
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.max:
+                self.max = elapsed
+            self.ewma = elapsed if self.count == 1 else self.ewma + self._alpha * (elapsed - self.ewma)
+            if media_duration:
+                self.media_total += media_duration
+            self._window[self._pos % self._window.size] = elapsed
+            self._pos += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns the current statistics.
+
+        Returns:
+            A dict with `count`, `mean_ms`, `max_ms`, `ewma_ms`, `p50_ms`, `p99_ms`
+            and, if media durations were recorded, `real_time_factor`.
+        """
+        with self._lock:
+            filled = min(self._pos, self._window.size)
+            if filled:
+                p50, p99 = np.percentile(self._window[:filled], (50, 99))
+            else:
+                p50 = p99 = 0.0
+            stats = {
+                "count": self.count,
+                "mean_ms": (self.total / self.count * 1000) if self.count else 0.0,
+                "max_ms": self.max * 1000,
+                "ewma_ms": self.ewma * 1000,
+                "p50_ms": float(p50) * 1000,
+                "p99_ms": float(p99) * 1000,
+            }
+            if self.media_total:
+                stats["real_time_factor"] = self.total / self.media_total
+            return stats
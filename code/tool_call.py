@@ -0,0 +1,404 @@
+# tool_call.py
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+_WS = re.compile(r"\s*")
+_NAME = re.compile(r"\w+") # Same identifiers as the `CALL\s+(\w+)` pattern the server used to match
+_NUMBER = re.compile(r"[-+]?(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][-+]?\d+)?")
+_ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|x[0-9a-fA-F]{2}|[0-7]{1,3}|.)", re.DOTALL)
+_SIMPLE_ESCAPES = {
+    "n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"',
+    "a": "\a", "b": "\b", "f": "\f", "v": "\v", "\n": "",
+}
+_CONSTANTS = {"True": True, "False": False, "None": None}
+_STRING_PREFIXES = {"r", "u", "R", "U"}
+
+
+class ToolCallError(ValueError):
+    """Raised for a tool call that cannot be parsed."""
+
+
+class ToolCall(NamedTuple):
+    """A parsed MCP tool call: function name and keyword arguments."""
+    name: str
+    args: Dict[str, Any]
+
+
+def _unescape(match: "re.Match[str]") -> str:
+    escape = match.group(1)
+    if escape in _SIMPLE_ESCAPES:
+        return _SIMPLE_ESCAPES[escape]
+    if len(escape) > 1 and escape[0] in "uUx":
+        return chr(int(escape[1:], 16))
+    if escape[0] in "01234567":
+        return chr(int(escape, 8))
+    return "\\" + escape # Unknown escapes are kept, as Python does
+
+
+class _Parser:
+    """
+    Recursive-descent parser for `CALL name(key=value, ...)`.
+
+    Values are the Python literals the LLM writes in a call: strings (single,
+    double or triple quoted, with escapes, `r`/`u` prefixes and implicit
+    concatenation), ints, floats, True/False/None, and lists, tuples, dicts
+    and sets of those. That is what `ast.literal_eval` accepted before, at a
+    fraction of the cost of building a Python AST per request.
+    """
+    __slots__ = ("text", "pos")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str) -> ToolCallError:
+        return ToolCallError(f"{message} at position {self.pos}")
+
+    def skip_ws(self) -> None:
+        self.pos = _WS.match(self.text, self.pos).end()
+
+    def peek(self) -> str:
+        return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        self.skip_ws()
+        if self.peek() != char:
+            raise self.error(f"Expected '{char}'")
+        self.pos += 1
+
+    def name(self) -> str:
+        match = _NAME.match(self.text, self.pos)
+        if not match:
+            raise self.error("Expected a name")
+        self.pos = match.end()
+        return match.group()
+
+    def call(self) -> ToolCall:
+        self.skip_ws()
+        if not self.text.startswith("CALL", self.pos):
+            raise ToolCallError("Invalid function call format")
+        self.pos += 4
+        start = self.pos
+        self.skip_ws()
+        if self.pos == start:
+            raise ToolCallError("Invalid function call format")
+        name = self.name()
+        self.expect("(")
+        args = self.arguments()
+        return ToolCall(name, args) # Anything after the closing parenthesis is ignored
+
+    def arguments(self) -> Dict[str, Any]:
+        args: Dict[str, Any] = {}
+        while True:
+            self.skip_ws()
+            if self.peek() == ")":
+                self.pos += 1
+                return args
+            match = _NAME.match(self.text, self.pos)
+            key = None
+            if match and not match.group()[0].isdigit():
+                after = _WS.match(self.text, match.end()).end()
+                if self.text[after:after + 1] == "=" and self.text[after + 1:after + 2] != "=":
+                    key = match.group()
+                    self.pos = after + 1
+            value = self.value()
+            if key is not None: # Positional arguments are parsed but ignored, as before
+                if key in args:
+                    raise self.error(f"Keyword argument repeated: {key}")
+                args[key] = value
+            self.skip_ws()
+            char = self.peek()
+            if char == ",":
+                self.pos += 1
+            elif char != ")":
+                raise self.error("Expected ',' or ')'")
+
+    def value(self) -> Any:
+        self.skip_ws()
+        char = self.peek()
+        if char in ("'", '"'):
+            return self.strings(raw=False)
+        if char == "[":
+            self.pos += 1
+            return self.sequence("]")
+        if char == "(":
+            self.pos += 1
+            items, trailing_comma = self.items(")")
+            return items[0] if len(items) == 1 and not trailing_comma else tuple(items)
+        if char == "{":
+            self.pos += 1
+            return self.mapping()
+        match = _NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            token = match.group()
+            try:
+                return float(token) if any(c in token for c in ".eE") else int(token)
+            except ValueError:
+                raise self.error(f"Malformed number {token!r}")
+        if not char:
+            raise self.error("Unexpected end of call")
+        name = self.name()
+        if name in _CONSTANTS:
+            return _CONSTANTS[name]
+        if name in _STRING_PREFIXES and self.peek() in ("'", '"'):
+            return self.strings(raw=name in ("r", "R"))
+        raise self.error(f"Unsupported value {name!r}")
+
+    def strings(self, raw: bool) -> str:
+        """Parses one or more adjacent string literals."""
+        parts = [self.string(raw)]
+        while True:
+            self.skip_ws()
+            char = self.peek()
+            if char in ("'", '"'):
+                parts.append(self.string(raw=False))
+            elif char in _STRING_PREFIXES and self.text[self.pos + 1:self.pos + 2] in ("'", '"'):
+                self.pos += 1
+                parts.append(self.string(raw=char in ("r", "R")))
+            else:
+                return "".join(parts)
+
+    def string(self, raw: bool) -> str:
+        text = self.text
+        quote = text[self.pos]
+        if text.startswith(quote * 3, self.pos):
+            quote *= 3
+        start = self.pos + len(quote)
+        end = text.find(quote, start)
+        if end < 0:
+            raise self.error("Unterminated string")
+        if "\\" not in text[start:end]: # Fast path: nothing to unescape
+            self.pos = end + len(quote)
+            return text[start:end]
+        index = start
+        while True: # Find the first quote not preceded by an odd number of backslashes
+            end = text.find(quote, index)
+            if end < 0:
+                raise self.error("Unterminated string")
+            backslashes = 0
+            while text[end - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+            index = end + 1
+        self.pos = end + len(quote)
+        body = text[start:end]
+        return body if raw else _ESCAPE.sub(_unescape, body)
+
+    def items(self, close: str) -> Tuple[List[Any], bool]:
+        """Parses comma separated values up to `close`. Returns them and whether a trailing comma was seen."""
+        items: List[Any] = []
+        trailing_comma = False
+        while True:
+            self.skip_ws()
+            if self.peek() == close:
+                self.pos += 1
+                return items, trailing_comma
+            items.append(self.value())
+            self.skip_ws()
+            trailing_comma = self.peek() == ","
+            if trailing_comma:
+                self.pos += 1
+            elif self.peek() != close:
+                raise self.error(f"Expected ',' or '{close}'")
+
+    def sequence(self, close: str) -> List[Any]:
+        return self.items(close)[0]
+
+    def mapping(self) -> Any:
+        result: Dict[Any, Any] = {}
+        members = []
+        while True:
+            self.skip_ws()
+            if self.peek() == "}":
+                self.pos += 1
+                break
+            key = self.value()
+            self.skip_ws()
+            if self.peek() == ":":
+                self.pos += 1
+                result[key] = self.value()
+            else:
+                members.append(key)
+            self.skip_ws()
+            if self.peek() == ",":
+                self.pos += 1
+            elif self.peek() != "}":
+                raise self.error("Expected ',' or '}'")
+        if members and result:
+            raise self.error("Mixed set and dict literal")
+        if members:
+            return set(members)
+        return result
+
+
+def parse_call(text: str) -> ToolCall:
+    """
+    Parses a tool call written by the LLM, e.g. `CALL get_price(item="pizza")`.
+
+    Args:
+        text: The call text.
+
+    Returns:
+        The parsed call (keyword arguments only).
+
+    Raises:
+        ToolCallError: If the text is not a well-formed call.
+    """
+    try:
+        return _Parser(text).call()
+    except (ValueError, TypeError, OverflowError, RecursionError) as e: # Also bad escapes, unhashable keys, absurd nesting
+        raise ToolCallError(f"❌ Failed to parse call: {text} → {e}") from None
+
+
+class StreamingToolCallParser:
+    """
+    Finds a `CALL name(...)` in LLM output while it is still streaming.
+
+    `feed` takes each token as it arrives and returns the parsed call as
+    soon as its closing parenthesis does, so the tool can be dispatched (and
+    the rest of the generation cancelled) without waiting for the LLM to
+    finish. Brackets, quotes and escapes are tracked incrementally, each
+    character being scanned once; the completed call text is then parsed
+    with `parse_call`. Text before `CALL` and after the call is ignored.
+    """
+    def __init__(self) -> None:
+        self.text = ""                      # Everything fed so far
+        self.call: Optional[ToolCall] = None
+        self.tokens = 0                     # Tokens fed until the call was complete
+        self._pos = 0                       # Next character to scan
+        self._start = -1                    # Offset of "CALL", once seen
+        self._end = -1                      # Offset after the closing parenthesis, once seen
+        self._depth = 0
+        self._quote = ""                    # Delimiter of the string being scanned
+
+    @property
+    def complete(self) -> bool:
+        """True once the call is syntactically closed (even if it failed to parse)."""
+        return self._end >= 0
+
+    @property
+    def call_text(self) -> Optional[str]:
+        """The call as written by the LLM, once complete."""
+        return self.text[self._start:self._end] if self._end >= 0 else None
+
+    def feed(self, token: str) -> Optional[ToolCall]:
+        """
+        Adds a token of LLM output.
+
+        Args:
+            token: The next piece of text.
+
+        Returns:
+            The call, when this token completed it; None otherwise (also for
+            every token after the call).
+
+        Raises:
+            ToolCallError: If the completed call is not well-formed.
+        """
+        if self._end >= 0:
+            return None
+        self.text += token
+        self.tokens += 1
+        self._end = self._scan()
+        if self._end < 0:
+            return None
+        self.call = parse_call(self.call_text)
+        return self.call
+
+    def _scan(self) -> int:
+        """Advances over the new text. Returns the offset after the closing parenthesis, or -1."""
+        text = self.text
+        size = len(text)
+        pos = self._pos
+        if self._start < 0:
+            start = text.find("CALL", max(0, pos - 3))
+            if start < 0:
+                self._pos = size
+                return -1
+            self._start = start
+            pos = start + 4
+        depth, quote = self._depth, self._quote
+        end = -1
+        while pos < size:
+            char = text[pos]
+            if quote:
+                if char == "\\":
+                    if pos + 1 >= size:
+                        break # The escaped character has not arrived yet
+                    pos += 2
+                    continue
+                if char == quote[0]:
+                    if len(quote) == 3 and size - pos < 3:
+                        break # Could be the closing triple quote
+                    if text.startswith(quote, pos):
+                        pos += len(quote)
+                        quote = ""
+                        continue
+                pos += 1
+                continue
+            if char in "'\"" and depth:
+                if size - pos < 3:
+                    break # Cannot tell a triple quote yet
+                quote = char * 3 if text.startswith(char * 3, pos) else char
+                pos += len(quote)
+                continue
+            if char in "([{":
+                depth += 1
+            elif char in ")]}" and depth:
+                depth -= 1
+                if depth == 0:
+                    end = pos + 1
+                    pos = end
+                    break
+            pos += 1
+        self._pos, self._depth, self._quote = pos, depth, quote
+        return end
+
+
+def format_call(call: ToolCall) -> str:
+    """
+    Writes a call in the text form `parse_call` reads, e.g. `CALL get_price(item='pizza')`.
+
+    Args:
+        call: The call (argument values must be literals).
+
+    Returns:
+        The call text.
+    """
+    return f"CALL {call.name}(" + ", ".join(f"{key}={value!r}" for key, value in call.args.items()) + ")"
+
+
+def parse_json_call(body: Dict[str, Any]) -> ToolCall:
+    """
+    Reads a tool call from a JSON request body.
+
+    Accepts a structured call, `{"name": "get_price", "arguments": {"item": "pizza"}}`
+    (`arguments` may also be a JSON encoded object, as in OpenAI style tool
+    calls), or the legacy text form, `{"query": "CALL get_price(item=\"pizza\")"}`.
+
+    Args:
+        body: The decoded JSON object.
+
+    Returns:
+        The call.
+
+    Raises:
+        ToolCallError: If the body holds no valid call.
+    """
+    if not isinstance(body, dict):
+        raise ToolCallError("❌ Tool call must be a JSON object")
+    if "name" not in body:
+        return parse_call(body.get("query") or "")
+    name = body["name"]
+    args = body.get("arguments") or {}
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError as e:
+            raise ToolCallError(f"❌ Failed to parse arguments of {name}: {e}") from None
+    if not isinstance(name, str) or not isinstance(args, dict):
+        raise ToolCallError(f"❌ Invalid tool call: {body}")
+    return ToolCall(name, args)
@@ -14,7 +14,8 @@ import json
 import copy
 import time
 import re
-from typing import Optional, Callable, Any, Dict, List
+from typing import Optional, Callable, Any, Dict, List, Tuple, Union
+from timer_scheduler import TimerScheduler, TimerHandle, get_default_scheduler
 
 # --- Configuration Flags ---
 USE_TURN_DETECTION = True
@@ -75,7 +76,7 @@ class TranscriptionProcessor:
     coordinating the RealtimeSTT recorder, processing callbacks, and managing
     internal state related to silence, potential sentences, and turn timing.
     """
-    # --- Constants for Silence Monitor Logic ---
+    # --- Constants for Silence Deadline Logic ---
     # Reserve time to ensure pipeline doesn't start too early or late
     _PIPELINE_RESERVE_TIME_MS: float = 0.02 # 20 ms
     # Offset from end of silence_waiting_time to start considering "hot" state
@@ -108,6 +109,8 @@ class TranscriptionProcessor:
             tts_allowed_event: Optional[threading.Event] = None, # Note: This seems unused in the original code provided
             pipeline_latency: float = 0.5,
             recorder_config: Optional[Dict[str, Any]] = None, # Allow passing custom config
+            turn_detection_classifier: Optional[Any] = None,
+            timer_scheduler: Optional[TimerScheduler] = None,
     ) -> None:
         """
         Initializes the TranscriptionProcessor.
@@ -127,6 +130,10 @@ class TranscriptionProcessor:
             tts_allowed_event: An event that might be set when TTS synthesis is allowed (currently unused in provided logic).
             pipeline_latency: Estimated latency of the downstream processing pipeline in seconds. Used for timing calculations.
             recorder_config: Optional dictionary to override default RealtimeSTT recorder configuration.
+            turn_detection_classifier: Optional shared `SentenceClassifier` passed on to TurnDetection so
+                                       several processors can reuse one copy of the model weights.
+            timer_scheduler: Scheduler running the silence deadlines. Defaults to the process-wide
+                             scheduler, so all processors share one timer thread.
         """
         self.source_language = source_language
         self.realtime_transcription_callback = realtime_transcription_callback
@@ -154,6 +161,14 @@ class TranscriptionProcessor:
         self.silence_active: bool = False
         self.last_audio_copy: Optional[np.ndarray] = None
 
+        # Silence deadlines (potential sentence end, TTS allowance, hot) armed when silence starts
+        self._timer_scheduler = timer_scheduler or get_default_scheduler()
+        self._silence_lock = threading.Lock()
+        self._silence_timers: List[TimerHandle] = []
+        self._silence_epoch: int = 0
+        self._potential_end_due: bool = False
+        self._hot: bool = False
+
         self.on_tts_allowed_to_synthesize: Optional[Callable] = None # Note: Seems unused
 
         self.text_similarity = TextSimilarity(focus='end', n_words=5)
@@ -167,11 +182,11 @@ class TranscriptionProcessor:
             self.turn_detection = TurnDetection(
                 on_new_waiting_time=self.on_new_waiting_time,
                 local=local,
-                pipeline_latency=pipeline_latency
+                pipeline_latency=pipeline_latency,
+                classifier=turn_detection_classifier,
             )
 
         self._create_recorder()
-        self._start_silence_monitor()
 
     # --- Recorder Parameter Abstraction ---
 
@@ -231,91 +246,142 @@ class TranscriptionProcessor:
             # Ensure the attribute exists before accessing
             return getattr(self.recorder, "is_recording", False)
 
-    # --- Silence Monitor ---
-    def _start_silence_monitor(self) -> None:
-        """
-        Starts a background thread to monitor silence duration and trigger
-        events like potential sentence end detection, TTS synthesis allowance,
-        and potential full transcription ("hot") state changes.
-        """
-        def monitor():
-            hot = False
-            # Initialize silence_time using the abstracted getter
-            self.silence_time = self._get_recorder_param("speech_end_silence_start", 0.0)
-
-            while not self.shutdown_performed:
-                speech_end_silence_start = self.silence_time # Use cached value updated by callback
-
-                if self.recorder and speech_end_silence_start is not None and speech_end_silence_start != 0:
-                    silence_waiting_time = self._get_recorder_param("post_speech_silence_duration", 0.0)
-                    time_since_silence = time.time() - speech_end_silence_start
-
-                    # Calculate latest time pipeline can start without exceeding silence duration
-                    latest_pipe_start_time = silence_waiting_time - self.pipeline_latency - self._PIPELINE_RESERVE_TIME_MS
-
-                    # Calculate the target time to trigger potential sentence end detection
-                    potential_sentence_end_time = latest_pipe_start_time
-                    # Ensure it doesn't trigger too early
-                    if potential_sentence_end_time < self._MIN_POTENTIAL_END_DETECTION_TIME_MS:
-                        potential_sentence_end_time = self._MIN_POTENTIAL_END_DETECTION_TIME_MS
-
-                    # Determine the threshold time to enter the "hot" state
-                    start_hot_condition_time = silence_waiting_time - self._HOT_THRESHOLD_OFFSET_S
-                    # Ensure the hot condition has a minimum meaningful duration
-                    if start_hot_condition_time < self._MIN_HOT_CONDITION_DURATION_S:
-                        start_hot_condition_time = self._MIN_HOT_CONDITION_DURATION_S
-
-                    # Adjust potential_sentence_end_time based on Orpheus mode
-                    if self.is_orpheus:
-                         # For Orpheus, ensure potential end detection doesn't happen too early relative to hot state
-                        orpheus_potential_end_time = silence_waiting_time - self._HOT_THRESHOLD_OFFSET_S
-                        if potential_sentence_end_time < orpheus_potential_end_time:
-                             potential_sentence_end_time = orpheus_potential_end_time
-
-
-                    # --- Trigger Actions Based on Timing ---
-
-                    # 1. Force potential sentence end detection if time has passed
-                    if time_since_silence > potential_sentence_end_time:
-                        # Check if realtime_text exists before logging/detecting
-                        current_text = self.realtime_text if self.realtime_text else ""
-                        logger.info(f"👂🔚 {Colors.YELLOW}Potential sentence end detected (timed out){Colors.RESET}: {current_text}")
-                        # Use force_yield=True because this is triggered by timeout, not punctuation detection
-                        self.detect_potential_sentence_end(current_text, force_yield=True, force_ellipses=True) # Force ellipses if timeout occurs
-
-                    # 2. Allow TTS synthesis shortly before the final silence duration elapses
-                    tts_allowance_time = silence_waiting_time - self._TTS_ALLOWANCE_OFFSET_S
-                    if time_since_silence > tts_allowance_time:
-                        if self.on_tts_allowed_to_synthesize: # Check if callback exists
-                            self.on_tts_allowed_to_synthesize()
-
-                    # 3. Handle "Hot" state (potential full transcription)
-                    hot_condition_met = time_since_silence > start_hot_condition_time
-                    if hot_condition_met and not hot:
-                        hot = True
-                        print(f"{Colors.MAGENTA}HOT{Colors.RESET}")
-                        if self.potential_full_transcription_callback:
-                            self.potential_full_transcription_callback(self.realtime_text)
-                    elif not hot_condition_met and hot:
-                        # Transitioning from Hot to Cold while still in silence period (e.g., silence_waiting_time changed)
-                        if self._is_recorder_recording(): # Check if still recording before aborting
-                            print(f"{Colors.CYAN}COLD (during silence){Colors.RESET}")
-                            if self.potential_full_transcription_abort_callback:
-                                self.potential_full_transcription_abort_callback()
-                        hot = False
-
-                elif hot: # Exited silence period (speech_end_silence_start is 0 or None)
-                    # If we were hot, but silence ended (e.g., new speech started), transition to cold
-                    if self._is_recorder_recording(): # Check if recording actually restarted
-                         print(f"{Colors.CYAN}COLD (silence ended){Colors.RESET}")
-                         if self.potential_full_transcription_abort_callback:
-                             self.potential_full_transcription_abort_callback()
-                    hot = False
-
-                time.sleep(0.001) # Short sleep to prevent busy-waiting dominating CPU
-
-        monitor_thread = threading.Thread(target=monitor, daemon=True)
-        monitor_thread.start()
+    # --- Silence Deadlines ---
+    def _silence_thresholds(self, silence_waiting_time: float) -> Tuple[float, float, float]:
+        """
+        Computes when, relative to the start of silence, each silence event is due.
+
+        Args:
+            silence_waiting_time: The recorder's current `post_speech_silence_duration` in seconds.
+
+        Returns:
+            A tuple (potential_sentence_end_time, tts_allowance_time, start_hot_condition_time)
+            in seconds after the start of silence.
+        """
+        # Calculate latest time pipeline can start without exceeding silence duration
+        latest_pipe_start_time = silence_waiting_time - self.pipeline_latency - self._PIPELINE_RESERVE_TIME_MS
+
+        # Calculate the target time to trigger potential sentence end detection
+        potential_sentence_end_time = latest_pipe_start_time
+        # Ensure it doesn't trigger too early
+        if potential_sentence_end_time < self._MIN_POTENTIAL_END_DETECTION_TIME_MS:
+            potential_sentence_end_time = self._MIN_POTENTIAL_END_DETECTION_TIME_MS
+
+        # Determine the threshold time to enter the "hot" state
+        start_hot_condition_time = silence_waiting_time - self._HOT_THRESHOLD_OFFSET_S
+        # Ensure the hot condition has a minimum meaningful duration
+        if start_hot_condition_time < self._MIN_HOT_CONDITION_DURATION_S:
+            start_hot_condition_time = self._MIN_HOT_CONDITION_DURATION_S
+
+        # Adjust potential_sentence_end_time based on Orpheus mode
+        if self.is_orpheus:
+            # For Orpheus, ensure potential end detection doesn't happen too early relative to hot state
+            orpheus_potential_end_time = silence_waiting_time - self._HOT_THRESHOLD_OFFSET_S
+            if potential_sentence_end_time < orpheus_potential_end_time:
+                potential_sentence_end_time = orpheus_potential_end_time
+
+        # Allow TTS synthesis shortly before the final silence duration elapses
+        tts_allowance_time = silence_waiting_time - self._TTS_ALLOWANCE_OFFSET_S
+
+        return potential_sentence_end_time, tts_allowance_time, start_hot_condition_time
+
+    def _cancel_silence_timers(self) -> None:
+        """Cancels all pending silence deadlines. Must be called with `_silence_lock` held."""
+        for handle in self._silence_timers:
+            self._timer_scheduler.cancel(handle)
+        self._silence_timers.clear()
+        self._silence_epoch += 1 # Invalidates callbacks that are already running
+
+    def _arm_silence_timers(self) -> None:
+        """
+        (Re)schedules the potential sentence end, TTS allowance and "hot" deadlines.
+
+        Called when silence starts and whenever `post_speech_silence_duration`
+        changes during silence. The deadlines are measured from `silence_time`,
+        so re-arming keeps already elapsed silence. If the new waiting time
+        moves the hot threshold into the future while we are hot, the hot state
+        is left again (with the abort callback if still recording).
+        """
+        go_cold = False
+        with self._silence_lock:
+            self._cancel_silence_timers()
+            self._potential_end_due = False
+            silence_start = self.silence_time
+            if not self.recorder or not silence_start:
+                return
+
+            silence_waiting_time = self._get_recorder_param("post_speech_silence_duration", 0.0)
+            potential_end_time, tts_allowance_time, hot_time = self._silence_thresholds(silence_waiting_time)
+            time_since_silence = time.time() - silence_start
+
+            if self._hot and time_since_silence <= hot_time:
+                # Transitioning from Hot to Cold while still in silence period (silence_waiting_time changed)
+                self._hot = False
+                go_cold = True
+
+            epoch = self._silence_epoch
+            schedule = self._timer_scheduler.schedule
+            self._silence_timers = [
+                schedule(potential_end_time - time_since_silence, self._on_potential_end_deadline, epoch),
+                schedule(tts_allowance_time - time_since_silence, self._on_tts_allowance_deadline, epoch),
+            ]
+            if not self._hot:
+                self._silence_timers.append(schedule(hot_time - time_since_silence, self._on_hot_deadline, epoch))
+
+        if go_cold and self._is_recorder_recording(): # Check if still recording before aborting
+            print(f"{Colors.CYAN}COLD (during silence){Colors.RESET}")
+            if self.potential_full_transcription_abort_callback:
+                self.potential_full_transcription_abort_callback()
+
+    def _end_silence(self) -> None:
+        """
+        Cancels the silence deadlines because speech resumed or a new recording started.
+
+        Leaves the "hot" state if it was entered (with the abort callback if
+        the recorder is recording again).
+        """
+        with self._silence_lock:
+            self._cancel_silence_timers()
+            self._potential_end_due = False
+            was_hot = self._hot
+            self._hot = False
+
+        # If we were hot, but silence ended (e.g., new speech started), transition to cold
+        if was_hot and self._is_recorder_recording(): # Check if recording actually restarted
+            print(f"{Colors.CYAN}COLD (silence ended){Colors.RESET}")
+            if self.potential_full_transcription_abort_callback:
+                self.potential_full_transcription_abort_callback()
+
+    def _on_potential_end_deadline(self, epoch: int) -> None:
+        """Timer callback: silence lasted long enough to force a potential sentence end."""
+        with self._silence_lock:
+            if epoch != self._silence_epoch:
+                return
+            self._potential_end_due = True
+        # Check if realtime_text exists before logging/detecting
+        current_text = self.realtime_text if self.realtime_text else ""
+        logger.info(f"👂🔚 {Colors.YELLOW}Potential sentence end detected (timed out){Colors.RESET}: {current_text}")
+        # Use force_yield=True because this is triggered by timeout, not punctuation detection.
+        # Partials arriving later in this silence period are force-yielded by on_partial.
+        self.detect_potential_sentence_end(current_text, force_yield=True, force_ellipses=True) # Force ellipses if timeout occurs
+
+    def _on_tts_allowance_deadline(self, epoch: int) -> None:
+        """Timer callback: TTS synthesis may start shortly before the silence duration elapses."""
+        with self._silence_lock:
+            if epoch != self._silence_epoch:
+                return
+        if self.on_tts_allowed_to_synthesize: # Check if callback exists
+            self.on_tts_allowed_to_synthesize()
+
+    def _on_hot_deadline(self, epoch: int) -> None:
+        """Timer callback: enter the "hot" state (final transcription likely imminent)."""
+        with self._silence_lock:
+            if epoch != self._silence_epoch or self._hot:
+                return
+            self._hot = True
+        print(f"{Colors.MAGENTA}HOT{Colors.RESET}")
+        if self.potential_full_transcription_callback:
+            self.potential_full_transcription_callback(self.realtime_text)
 
     def on_new_waiting_time(
             self,
@@ -324,7 +390,8 @@ class TranscriptionProcessor:
         ) -> None:
         """
         Callback handler for when TurnDetection calculates a new waiting time.
-        Updates the recorder's post_speech_silence_duration parameter.
+        Updates the recorder's post_speech_silence_duration parameter and, during
+        silence, reschedules the silence deadlines for the new duration.
 
         Args:
             waiting_time: The new calculated silence duration in seconds.
@@ -336,6 +403,8 @@ class TranscriptionProcessor:
                 log_text = text if text else "(No text provided)"
                 logger.info(f"👂⏳ {Colors.GRAY}New waiting time: {Colors.RESET}{Colors.YELLOW}{waiting_time:.2f}{Colors.RESET}{Colors.GRAY} for text: {log_text}{Colors.RESET}")
                 self._set_recorder_param("post_speech_silence_duration", waiting_time)
+                if self.silence_time:
+                    self._arm_silence_timers() # Deadlines depend on the waiting time
         else:
             logger.warning("👂⚠️ Recorder not initialized, cannot set new waiting time.")
 
@@ -391,6 +460,39 @@ class TranscriptionProcessor:
         self.potential_sentences_yielded.clear()
         logger.info("👂⏹️ Potential sentence yield cache cleared (generation aborted).")
 
+    def reset(self) -> None:
+        """
+        Clears all per-conversation transcription state.
+
+        Called when the processor is returned to the model pool so the next
+        client session starts from a clean slate: cached sentence ends, the last
+        real-time text, silence tracking, turn detection history and any audio
+        still queued inside the recorder are discarded.
+        """
+        self.realtime_text = None
+        self.sentence_end_cache.clear()
+        self.potential_sentences_yielded.clear()
+        self.stripped_partial_user_text = ""
+        self.final_transcription = None
+        self.silence_time = 0.0
+        self.silence_active = False
+        self.last_audio_copy = None
+        with self._silence_lock:
+            self._cancel_silence_timers()
+            self._potential_end_due = False
+            self._hot = False
+
+        if USE_TURN_DETECTION and hasattr(self, 'turn_detection'):
+            self.turn_detection.reset()
+            self.turn_detection.update_settings(speed_factor=0.0)
+
+        if self.recorder and hasattr(self.recorder, 'clear_audio_queue'):
+            try:
+                self.recorder.clear_audio_queue()
+            except Exception as e:
+                logger.warning(f"👂⚠️ Failed to clear recorder audio queue during reset: {e}")
+        logger.info("👂🔄 TranscriptionProcessor state reset.")
+
     def perform_final(self, audio_bytes: Optional[bytes] = None) -> None:
         """
         Manually triggers the final transcription process using the last known
@@ -664,12 +766,14 @@ class TranscriptionProcessor:
             recorder_silence_start = self._get_recorder_param("speech_end_silence_start", None)
             self.silence_time = recorder_silence_start if recorder_silence_start else time.time()
             logger.debug(f"👂🤫 Silence detected (start_silence_detection called). Silence time set to: {self.silence_time}")
+            self._arm_silence_timers()
 
 
         def stop_silence_detection():
             """Callback triggered when recorder detects end of silence (start of speech)."""
             self.set_silence(False)
             self.silence_time = 0.0 # Reset silence time
+            self._end_silence()
             logger.debug("👂🗣️ Speech detected (stop_silence_detection called). Silence time reset.")
 
 
@@ -678,6 +782,7 @@ class TranscriptionProcessor:
             logger.info("👂▶️ Recording started.")
             self.set_silence(False) # Ensure silence is marked inactive
             self.silence_time = 0.0   # Ensure silence timer is reset
+            self._end_silence()
             if self.on_recording_start_callback:
                 self.on_recording_start_callback()
 
@@ -709,8 +814,13 @@ class TranscriptionProcessor:
                 return
             self.realtime_text = text # Update the latest realtime text
 
-            # Detect potential sentence ends based on punctuation stability
-            self.detect_potential_sentence_end(text)
+            # Detect potential sentence ends based on punctuation stability. Once the
+            # potential-end deadline of the current silence has passed, every new
+            # partial is yielded right away until speech resumes.
+            if self._potential_end_due:
+                self.detect_potential_sentence_end(text, force_yield=True, force_ellipses=True)
+            else:
+                self.detect_potential_sentence_end(text)
 
             # Process for partial transcription callback and turn detection
             stripped_partial_user_text_new = strip_ending_punctuation(text)
@@ -778,12 +888,15 @@ class TranscriptionProcessor:
             logger.exception(f"👂🔥 Failed to create recorder: {e}")
             self.recorder = None # Ensure recorder is None if creation failed
 
-    def feed_audio(self, chunk: bytes, audio_meta_data: Optional[Dict[str, Any]] = None) -> None:
+    def feed_audio(self, chunk: Union[bytes, memoryview], audio_meta_data: Optional[Dict[str, Any]] = None) -> None:
         """
         Feeds an audio chunk to the underlying recorder instance for processing.
 
+        The recorder copies the data into its own buffer before returning, so a
+        memoryview of a reused buffer can be passed without copying it first.
+
         Args:
-            chunk: A bytes object containing the raw audio data chunk.
+            chunk: A bytes-like object (bytes or byte memoryview) containing the raw 16kHz int16 audio data chunk.
             audio_meta_data: Optional dictionary containing metadata about the audio
                              (e.g., sample rate, channels), if required by the recorder.
         """
@@ -814,6 +927,8 @@ class TranscriptionProcessor:
         if not self.shutdown_performed:
             logger.info("👂🔌 Shutting down TranscriptionProcessor...")
             self.shutdown_performed = True # Set flag early to stop loops/threads
+            with self._silence_lock:
+                self._cancel_silence_timers()
 
             if self.recorder:
                 logger.info("👂🔌 Calling recorder shutdown()...")
@@ -0,0 +1,77 @@
+# tts_frame.py
+import struct
+from typing import NamedTuple
+
+# Binary TTS frame sent to clients that negotiated `tts_format=pcm16`:
+#
+#   offset  size  field
+#   0       2     frame type (uint16, TTS_FRAME_PCM16)
+#   2       2     header length in bytes (uint16, 16), PCM starts here
+#   4       4     generation id (uint32)
+#   8       4     sequence number within the generation (uint32, starts at 0)
+#   12      4     sample rate in Hz (uint32)
+#   16      ...   mono PCM, signed 16-bit little-endian samples
+#
+# The header is big-endian like the 8-byte header of the microphone packets the
+# client sends. The PCM payload stays little-endian, which is what both numpy and
+# the browser's Int16Array use natively, so neither side has to byte-swap. The
+# header length is even, so the client can view the payload as an Int16Array in
+# place without copying.
+TTS_FRAME_HEADER = struct.Struct("!HHIII")
+TTS_FRAME_PCM16 = 1
+TTS_FORMAT_JSON = "json"
+TTS_FORMAT_PCM16 = "pcm16"
+
+
+class TTSFrame(NamedTuple):
+    """A decoded binary TTS frame."""
+    generation_id: int
+    sequence: int
+    sample_rate: int
+    pcm: bytes
+
+
+def pack_tts_frame(generation_id: int, sequence: int, pcm: bytes, sample_rate: int = 48000) -> bytes:
+    """
+    Builds a binary TTS frame from raw PCM.
+
+    Args:
+        generation_id: Id of the speech generation the audio belongs to.
+        sequence: Position of this frame within its generation.
+        pcm: Raw mono int16 little-endian PCM bytes.
+        sample_rate: Sample rate of `pcm` in Hz.
+
+    Returns:
+        The frame as bytes, ready for `WebSocket.send_bytes`.
+    """
+    header = TTS_FRAME_HEADER.pack(
+        TTS_FRAME_PCM16,
+        TTS_FRAME_HEADER.size,
+        generation_id & 0xFFFFFFFF,
+        sequence & 0xFFFFFFFF,
+        sample_rate,
+    )
+    return header + pcm
+
+
+def unpack_tts_frame(frame: bytes) -> TTSFrame:
+    """
+    Parses a binary TTS frame.
+
+    Args:
+        frame: Bytes produced by `pack_tts_frame`.
+
+    Returns:
+        The decoded TTSFrame.
+
+    Raises:
+        ValueError: If the frame is truncated or not a PCM16 TTS frame.
+    """
+    if len(frame) < TTS_FRAME_HEADER.size:
+        raise ValueError(f"TTS frame too short for header: {len(frame)} bytes")
+    frame_type, header_len, generation_id, sequence, sample_rate = TTS_FRAME_HEADER.unpack_from(frame)
+    if frame_type != TTS_FRAME_PCM16:
+        raise ValueError(f"Unknown TTS frame type: {frame_type}")
+    if header_len < TTS_FRAME_HEADER.size or header_len > len(frame):
+        raise ValueError(f"Invalid TTS frame header length: {header_len}")
+    return TTSFrame(generation_id, sequence, sample_rate, bytes(frame[header_len:]))
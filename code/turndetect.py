@@ -1,17 +1,16 @@
 import logging
 logger = logging.getLogger(__name__)
 
-import transformers
 import collections
 import threading
 import queue
-import torch
 import time
 import re
+from typing import Optional
+
+from sentence_classifier import SentenceClassifier, BACKEND_TORCH
 
 # Configuration constants
-model_dir_local = "KoljaB/SentenceFinishedClassification"
-model_dir_cloud = "/root/models/sentenceclassification/"
 sentence_end_marks = ['.', '!', '?', '。'] # Characters considered sentence endings
 
 # Anchor points for probability-to-pause interpolation
@@ -174,7 +173,7 @@ class TurnDetection:
     completion probability, considers punctuation, and calculates a suggested waiting
     time (pause duration) before the next speaker might start. It uses a background
     thread for processing and provides a callback for new waiting time suggestions.
-    It also maintains a history of recent texts and uses caching for model predictions.
+    It also maintains a history of recent texts and uses the classifier's shared cache for model predictions.
     """
 
     def __init__(
@@ -183,22 +182,28 @@ class TurnDetection:
         local: bool = False,
         pipeline_latency: float = 0.5,
         pipeline_latency_overhead: float = 0.1,
+        classifier: Optional[SentenceClassifier] = None,
+        backend: str = BACKEND_TORCH,
     ) -> None:
         """
         Initializes the TurnDetection instance.
 
-        Loads the sentence classification model and tokenizer, sets up internal state
-        (deques, cache), starts the background processing thread, and performs model warmup.
+        Sets up internal state (history deques) and starts the background processing
+        thread. The sentence classification model is taken from `classifier` when
+        given (shared between sessions), otherwise a private one is loaded and warmed up.
 
         Args:
             on_new_waiting_time: Callback function invoked when a new waiting time is calculated.
                                  It receives `(time: float, text: str)`.
             local: If True, loads the model from `model_dir_local`, otherwise from `model_dir_cloud`.
+                   Ignored when `classifier` is provided.
             pipeline_latency: Estimated base latency of the STT/processing pipeline in seconds.
             pipeline_latency_overhead: Additional buffer added to the pipeline latency.
+            classifier: Optional shared `SentenceClassifier` instance.
+            backend: Inference backend ("torch", "torch-int8" or "onnx") of the private
+                     classifier. Ignored when `classifier` is provided (the shared
+                     instance already chose its backend).
         """
-        model_dir = model_dir_local if local else model_dir_cloud
-
         self.on_new_waiting_time = on_new_waiting_time
 
         self.current_waiting_time: float = -1 # Tracks the last suggested time
@@ -213,35 +218,10 @@ class TurnDetection:
         )
         self.text_worker.start()
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        logger.info(f"🎤🔌 Using device: {self.device}")
-        self.tokenizer = transformers.DistilBertTokenizerFast.from_pretrained(model_dir)
-        self.classification_model = transformers.DistilBertForSequenceClassification.from_pretrained(model_dir)
-        self.classification_model.to(self.device)
-        self.classification_model.eval() # Set model to evaluation mode
-        self.max_length: int = 128 # Max sequence length for the model
+        self.classifier = classifier if classifier is not None else SentenceClassifier(local=local, backend=backend)
         self.pipeline_latency: float = pipeline_latency
         self.pipeline_latency_overhead: float = pipeline_latency_overhead
 
-        # Initialize completion probability cache with OrderedDict for LRU behavior
-        self._completion_probability_cache: collections.OrderedDict[str, float] = collections.OrderedDict()
-        self._completion_probability_cache_max_size: int = 256 # Max size for the LRU cache
-
-        # Warmup the classification model for faster initial predictions
-        logger.info("🎤🔥 Warming up the classification model...")
-        with torch.no_grad():
-            warmup_text = "This is a warmup sentence."
-            inputs = self.tokenizer(
-                warmup_text,
-                return_tensors="pt",
-                truncation=True,
-                padding="max_length",
-                max_length=self.max_length
-            )
-            inputs = {key: value.to(self.device) for key, value in inputs.items()}
-            _ = self.classification_model(**inputs) # Run one prediction
-        logger.info("🎤✅ Classification model warmed up.")
-
         # Default dynamic pause settings (initialized for speed_factor=0.0)
         self.detection_speed: float = 0.5
         self.ellipsis_pause: float = 2.3
@@ -326,8 +306,10 @@ class TurnDetection:
         """
         Calculates the probability that the given sentence is complete using the ML model.
 
-        Uses an internal LRU cache (`_completion_probability_cache`) to store and
-        retrieve results for previously seen sentences, improving performance.
+        Goes through the classifier's shared `completion_cache`, keyed on the
+        whitespace-normalized sentence. It survives `reset()` and is shared by
+        all sessions, so the model only runs when the normalized sentence is
+        new, and identical sentences requested concurrently are computed once.
 
         Args:
             sentence: The input sentence string to analyze.
@@ -336,42 +318,7 @@ class TurnDetection:
             A float representing the probability (between 0.0 and 1.0) that the
             sentence is considered complete by the model.
         """
-        # Check cache first
-        if sentence in self._completion_probability_cache:
-            self._completion_probability_cache.move_to_end(sentence) # Mark as recently used
-            return self._completion_probability_cache[sentence]
-
-        # If not in cache, run model prediction
-        import torch
-        import torch.nn.functional as F
-
-        inputs = self.tokenizer(
-            sentence,
-            return_tensors="pt",
-            truncation=True,
-            padding="max_length",
-            max_length=self.max_length
-        )
-        # Move input tensors to the correct device (CPU or GPU)
-        inputs = {key: value.to(self.device) for key, value in inputs.items()}
-
-        with torch.no_grad(): # Disable gradient calculation for inference
-            outputs = self.classification_model(**inputs)
-
-        logits = outputs.logits
-        # Apply softmax to get probabilities [prob_incomplete, prob_complete]
-        probabilities = F.softmax(logits, dim=1).squeeze().tolist()
-        prob_complete = probabilities[1] # Index 1 corresponds to 'complete' label
-
-        # Store the result in the cache
-        self._completion_probability_cache[sentence] = prob_complete
-        self._completion_probability_cache.move_to_end(sentence) # Mark as recently used
-
-        # Maintain cache size (LRU eviction)
-        if len(self._completion_probability_cache) > self._completion_probability_cache_max_size:
-            self._completion_probability_cache.popitem(last=False) # Remove the least recently used item
-
-        return prob_complete
+        return self.classifier.completion_cache.get(sentence)
 
     def get_suggested_whisper_pause(self, text: str) -> float:
         """
@@ -520,9 +467,10 @@ class TurnDetection:
         """
         Resets the internal state of the TurnDetection instance.
 
-        Clears the text history deques, the model prediction cache, and resets the
-        current waiting time tracker. Useful for starting a new conversation or
-        interaction context.
+        Clears the text history deques and resets the current waiting time
+        tracker. Useful for starting a new conversation or interaction context.
+        The shared completion probability cache is kept: model outputs depend
+        only on the sentence, not on the conversation.
         """
         logger.info("🎤🔄 Resetting TurnDetection state.")
         # Clear the history deques
@@ -530,9 +478,6 @@ class TurnDetection:
         self.texts_without_punctuation.clear()
         # Reset the last suggested time
         self.current_waiting_time = -1
-        # Clear the prediction cache
-        if hasattr(self, "_completion_probability_cache"):
-            self._completion_probability_cache.clear()
         # Clear the processing queue (optional, might discard unprocessed items)
         # while not self.text_queue.empty():
         #     try: